@@ -12,7 +12,7 @@ import re
 import itertools
 
 # Import flask utilities
-from flask import Flask, current_app, render_template
+from flask import Flask, current_app, render_template, request, jsonify
 from flask_debugtoolbar import DebugToolbarExtension
 
 # Import contents
@@ -42,6 +42,9 @@ from eboa.engine.alerts import alert_severity_codes
 # Import method to obtain the resources PATH
 from eboa.engine.functions import get_resources_path
 
+# Import the exception of the invalid cursors of the pages
+from vboa.functions import InvalidPaginationCursor
+
 # Import filters
 from vboa.filters import filters_for_events_in_json, filters_for_annotations_in_json, filters_for_values_in_json, filters_for_dates_in_json, filters_for_lists
 
@@ -147,6 +150,13 @@ def create_app():
     def page_forbidden(e):
         return render_template("panel/forbidden.html", error_code=405), 405
 
+    @app.errorhandler(InvalidPaginationCursor)
+    def invalid_pagination_cursor(e):
+        if request.is_json:
+            return jsonify({"status": "KO", "message": str(e)}), 400
+        # end if
+        return render_template("panel/error.html", error_code=400), 400
+
     ########
     # Tests
     ########
@@ -8,20 +8,61 @@ module vboa
 # Import python utilities
 from tempfile import mkstemp
 from distutils import util
+from urllib.parse import quote
+import base64
+import bisect
 import datetime
+import io
 import json
+import math
+import mimetypes
+import operator
+import os
+import re
+import tarfile
+import threading
+import time
+import uuid
 import pytz
 from dateutil import parser
 
+# Import XML utilities
+from lxml import etree
+
+# Import SQLAlchemy utilities
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy import inspect, func, or_, and_
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import DateTime, Date
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import Query as OrmQuery
+
 # Import orbit
 import eboa.ingestion.orbit as eboa_orbit
 
 # Import flask utilities
-from flask import request, url_for
+from flask import request, url_for, Response
+from werkzeug.datastructures import ContentRange
+from werkzeug.wsgi import wrap_file
 
 # Import EBOA errors
 from eboa.engine.errors import ErrorParsingParameters
 
+# Import eboa utilities
+from eboa.engine.query import Query
+from eboa.engine.functions import get_resources_path
+
+# Import datamodel
+from eboa.datamodel.events import Event, EventGeometry
+from eboa.datamodel.annotations import Annotation, AnnotationCnf, AnnotationGeometry
+from eboa.datamodel.gauges import Gauge
+from eboa.datamodel.sources import Source
+from eboa.datamodel.explicit_refs import ExplicitRef, ExplicitRefGrp
+from eboa.datamodel.dim_signatures import DimSignature
+from eboa.datamodel.alerts import Alert, AlertGroup, SourceAlert, EventAlert, AnnotationAlert, ExplicitRefAlert
+from rboa.datamodel.reports import Report
+from rboa.datamodel.alerts import ReportAlert
+
 ########
 # Date functions
 ########
@@ -208,6 +249,2160 @@ def set_specific_alert_filters(filters):
 
     return kwargs
 
+########
+# Query cost functions
+########
+# Thresholds for the estimation of the cost of the queries (in rows
+# and in units of the PostgreSQL planner)
+query_cost_confirmation_rows = float(os.environ.get("VBOA_QUERY_COST_CONFIRMATION_ROWS", 200000))
+query_cost_confirmation_cost = float(os.environ.get("VBOA_QUERY_COST_CONFIRMATION_COST", 1000000))
+query_cost_rejection_rows = float(os.environ.get("VBOA_QUERY_COST_REJECTION_ROWS", 20000000))
+query_cost_rejection_cost = float(os.environ.get("VBOA_QUERY_COST_REJECTION_COST", 100000000))
+
+# Maximum number of rows estimated by the planner for counting exactly
+# the elements of a query (the estimation is returned otherwise)
+query_count_exact_rows = float(os.environ.get("VBOA_QUERY_COUNT_EXACT_ROWS", 10000))
+
+# Entities of the methods of the Query whose cost can be estimated and
+# whose elements can be counted
+query_method_entities = {
+    "get_events": Event,
+    "get_annotations": Annotation,
+    "get_sources": Source,
+    "get_explicit_refs": ExplicitRef,
+    "get_gauges": Gauge,
+    "get_reports": Report,
+    "get_event_alerts": EventAlert,
+    "get_annotation_alerts": AnnotationAlert,
+    "get_source_alerts": SourceAlert,
+    "get_explicit_ref_alerts": ExplicitRefAlert,
+    "get_report_alerts": ReportAlert
+}
+
+# State of the threads estimating the cost of a query
+_query_cost_estimation = threading.local()
+
+class QueryCostEstimated(Exception):
+    """
+    Exception used to abort the execution of a query once its plan has been obtained
+    """
+    def __init__(self, plan):
+        self.plan = plan
+        super().__init__("Query cost estimated")
+
+class QueryCounted(Exception):
+    """
+    Exception used to abort the execution of a query once its elements have been counted
+    """
+    def __init__(self, count):
+        self.count = count
+        super().__init__("Query counted")
+
+@sqlalchemy_event.listens_for(Engine, "before_cursor_execute", retval=True)
+def _explain_instead_of_execute(connection, cursor, statement, parameters, context, executemany):
+    """
+    Obtain the plan of the statement instead of executing it when it
+    corresponds to the query of the entity estimated by the current
+    thread (see _intercept_entity_query).
+    """
+    if getattr(_query_cost_estimation, "explain_next_statement", False) and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        _query_cost_estimation.explain_next_statement = False
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        if type(plan) == str:
+            plan = json.loads(plan)
+        # end if
+        raise QueryCostEstimated(plan[0]["Plan"])
+    # end if
+
+    return statement, parameters
+
+@sqlalchemy_event.listens_for(OrmQuery, "before_compile", retval=True)
+def _intercept_entity_query(query):
+    """
+    Estimate the cost of (or count the elements of) the query of the
+    entity estimated (or counted) by the current thread instead of
+    executing it. The rest of queries (e.g. the ones resolving the
+    filters) are executed normally.
+    """
+    entity = query.column_descriptions[0]["expr"] if len(query.column_descriptions) > 0 else None
+
+    estimated_entity = getattr(_query_cost_estimation, "estimated_entity", None)
+    if estimated_entity is not None and entity is estimated_entity:
+        # The statement compiled from the query is the next one
+        # executed, which is explained instead
+        _query_cost_estimation.estimated_entity = None
+        _query_cost_estimation.explain_next_statement = True
+        return query
+    # end if
+
+    counted_entity = getattr(_query_cost_estimation, "counted_entity", None)
+    if counted_entity is None or entity is not counted_entity:
+        return query
+    # end if
+
+    # The count query is compiled without counting again
+    _query_cost_estimation.counted_entity = None
+    counted_query = query.enable_assertions(False).order_by(None).limit(None).offset(None)
+    count = query.session.query(func.count()).select_from(counted_query.subquery()).scalar()
+
+    raise QueryCounted(count)
+
+def estimate_query_cost(query_method_name, **kwargs):
+    """
+    Function to estimate the cost of a query of the EBOA without executing it
+
+    The method of the Query is called with the received filters but the
+    statement of the query of its entity is replaced by an EXPLAIN, so
+    the estimation corresponds to the SQL the query would execute. The
+    queries issued by the method before it (e.g. resolving the filters)
+    are executed normally.
+
+    :param query_method_name: name of the method of the Query (one of query_method_entities)
+    :type query_method_name: str
+    :param kwargs: filters of the method
+    :type kwargs: dict
+
+    :return: estimation with the rows matching the filters, the rows to return, the cost and the action to perform (run, confirm or reject)
+    :rtype: dict
+    """
+
+    query_boa = Query()
+    plan = None
+    _query_cost_estimation.estimated_entity = query_method_entities[query_method_name]
+    try:
+        getattr(query_boa, query_method_name)(**kwargs)
+    except QueryCostEstimated as estimation:
+        plan = estimation.plan
+    finally:
+        _query_cost_estimation.estimated_entity = None
+        _query_cost_estimation.explain_next_statement = False
+        query_boa.session.rollback()
+        query_boa.close_session()
+    # end try
+
+    if plan is None:
+        # The query did not reach the database
+        return {"rows": 0, "returned_rows": 0, "cost": 0, "action": "run"}
+    # end if
+
+    # The rows matching the filters are the ones entering the limit
+    matching_rows_plan = plan
+    while matching_rows_plan["Node Type"] == "Limit" and len(matching_rows_plan.get("Plans", [])) > 0:
+        matching_rows_plan = matching_rows_plan["Plans"][0]
+    # end while
+
+    estimation = {
+        "rows": matching_rows_plan["Plan Rows"],
+        "returned_rows": plan["Plan Rows"],
+        "cost": plan["Total Cost"]
+    }
+
+    if estimation["rows"] > query_cost_rejection_rows or estimation["cost"] > query_cost_rejection_cost:
+        estimation["action"] = "reject"
+    elif estimation["rows"] > query_cost_confirmation_rows or estimation["cost"] > query_cost_confirmation_cost:
+        estimation["action"] = "confirm"
+    else:
+        estimation["action"] = "run"
+    # end if
+
+    return estimation
+
+def count_query_elements(query_method_name, **kwargs):
+    """
+    Function to count the elements matching the filters of a query of the EBOA
+
+    The elements are counted exactly when the planner estimates that
+    they are not more than query_count_exact_rows. Otherwise, the
+    estimation of the planner is returned, avoiding a count as
+    expensive as the query itself. The restrictions of the page
+    (limit, offset and order) are ignored. The count replaces the
+    query of the entity of the method, so the queries issued by the
+    method before it (e.g. resolving the filters) are not counted.
+
+    :param query_method_name: name of the method of the Query (one of query_method_entities)
+    :type query_method_name: str
+    :param kwargs: filters of the method
+    :type kwargs: dict
+
+    :return: number of elements and flag indicating if it is an estimation
+    :rtype: dict
+    """
+    kwargs = {name: value for name, value in kwargs.items() if name not in ["limit", "offset", "order_by"]}
+
+    estimation = estimate_query_cost(query_method_name, **kwargs)
+    if estimation["rows"] > query_count_exact_rows:
+        return {"count": int(estimation["rows"]), "estimated": True}
+    # end if
+
+    query_boa = Query()
+    count = 0
+    _query_cost_estimation.counted_entity = query_method_entities[query_method_name]
+    try:
+        getattr(query_boa, query_method_name)(**kwargs)
+    except QueryCounted as counted:
+        count = counted.count
+    finally:
+        _query_cost_estimation.counted_entity = None
+        query_boa.session.rollback()
+        query_boa.close_session()
+    # end try
+
+    return {"count": count, "estimated": False}
+
+########
+# Loading functions
+########
+# Maximum number of rows per statement loading relationships
+eager_loading_chunk_size = 10000
+
+def load_relationships(session, items, relationships):
+    """
+    Function to load in bulk the relationships of a list of rows of the EBOA
+
+    The rows obtained by the Query are already in the identity map of
+    the session, so selecting them again with select-in loading options
+    populates the requested relationships of the same instances with
+    one statement per relationship instead of one per row and
+    relationship.
+
+    :param session: session where the rows were obtained
+    :type session: sqlalchemy.orm.Session
+    :param items: list of rows of the same entity
+    :type items: list
+    :param relationships: list of relationships to load (nested relationships are separated by dots, e.g. alertDefinition.group)
+    :type relationships: list
+
+    :return: the received list of rows
+    :rtype: list
+    """
+
+    if len(items) == 0 or len(relationships) == 0:
+        return items
+    # end if
+
+    entity = type(items[0])
+    primary_key = inspect(entity).primary_key[0]
+
+    options = []
+    for relationship in relationships:
+        option = None
+        relationship_entity = entity
+        for attribute_name in relationship.split("."):
+            attribute = getattr(relationship_entity, attribute_name)
+            if option is None:
+                option = selectinload(attribute)
+            else:
+                option = option.selectinload(attribute)
+            # end if
+            relationship_entity = attribute.property.mapper.class_
+        # end for
+        options.append(option)
+    # end for
+
+    identifiers = [getattr(item, primary_key.key) for item in items]
+    for i in range(0, len(identifiers), eager_loading_chunk_size):
+        session.query(entity).options(*options).filter(primary_key.in_(identifiers[i:i + eager_loading_chunk_size])).all()
+    # end for
+
+    return items
+
+########
+# Geometry functions
+########
+# Maximum number of entities per statement obtaining geometries
+geometries_chunk_size = 10000
+
+def get_simplification_tolerance(zoom):
+    """
+    Function to obtain the tolerance (in degrees) for simplifying geometries shown in a map with the received zoom level
+
+    The tolerance corresponds to the size of a pixel of the map (tiles
+    of 256 pixels covering 360 degrees at zoom level 0), so the
+    simplification is not noticeable.
+
+    :param zoom: zoom level of the map
+    :type zoom: float
+
+    :return: tolerance in degrees
+    :rtype: float
+    """
+    return 360 / (256 * 2**float(zoom))
+
+def get_bbox_envelopes(bbox):
+    """
+    Function to obtain the envelopes (in longitude and latitude) covering the received bounding box of a map
+
+    The longitudes of the bounding box are normalized to [-180, 180)
+    and split in two envelopes when the bounding box crosses the
+    antimeridian, as maps showing several worlds return longitudes out
+    of range.
+
+    :param bbox: bounding box as [minimum longitude, minimum latitude, maximum longitude, maximum latitude]
+    :type bbox: list
+
+    :return: list of envelopes as [minimum longitude, minimum latitude, maximum longitude, maximum latitude] or None if the bounding box covers all the longitudes
+    :rtype: list
+    """
+    if len(bbox) != 4:
+        raise ValueError("The bounding box {} has to contain 4 values: [minimum longitude, minimum latitude, maximum longitude, maximum latitude]".format(bbox))
+    # end if
+
+    min_lon, min_lat, max_lon, max_lat = [float(value) for value in bbox]
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError("The bounding box {} has its minimum values greater than the maximum values".format(bbox))
+    # end if
+
+    min_lat = max(min_lat, -90)
+    max_lat = min(max_lat, 90)
+
+    if max_lon - min_lon >= 360:
+        return None
+    # end if
+
+    shift = math.floor((min_lon + 180) / 360) * 360
+    min_lon -= shift
+    max_lon -= shift
+
+    envelopes = [[min_lon, min_lat, min(max_lon, 180), max_lat]]
+    if max_lon > 180:
+        envelopes.append([-180, min_lat, max_lon - 360, max_lat])
+    # end if
+
+    return envelopes
+
+def get_geometries_feature_collection(session, entity, uuids, zoom = None, bbox = None):
+    """
+    Function to obtain the geometries of events or annotations as a GeoJSON FeatureCollection
+
+    The geometries are serialized by PostGIS (ST_AsGeoJSON) in one
+    statement per chunk of entities, together with the information
+    shown in the tooltips of the maps, instead of loading the geometry
+    rows as objects and converting them one by one.
+
+    :param session: session to the database
+    :type session: sqlalchemy.orm.Session
+    :param entity: entity of the geometries (events or annotations)
+    :type entity: str
+    :param uuids: list of UUIDs of the entities
+    :type uuids: list
+    :param zoom: zoom level of the map for simplifying the geometries (optional)
+    :type zoom: float
+    :param bbox: bounding box of the view of the map to obtain only the geometries intersecting it (optional, see get_bbox_envelopes)
+    :type bbox: list
+
+    :return: GeoJSON FeatureCollection with one feature per geometry
+    :rtype: dict
+    """
+
+    if entity == "events":
+        geometry_table = EventGeometry
+        uuid_column = EventGeometry.event_uuid
+    elif entity == "annotations":
+        geometry_table = AnnotationGeometry
+        uuid_column = AnnotationGeometry.annotation_uuid
+    else:
+        raise ValueError("The entity {} has no geometries. Available entities are: ['events', 'annotations']".format(entity))
+    # end if
+
+    geometry = geometry_table.value
+    if zoom is not None:
+        geometry = func.ST_SimplifyPreserveTopology(geometry, get_simplification_tolerance(zoom))
+    # end if
+
+    envelopes = None
+    if bbox is not None:
+        envelopes = get_bbox_envelopes(bbox)
+    # end if
+
+    features = []
+    for i in range(0, len(uuids), geometries_chunk_size):
+        chunk = uuids[i:i + geometries_chunk_size]
+        if entity == "events":
+            sql_query = session.query(uuid_column, geometry_table.name, func.ST_AsGeoJSON(geometry),
+                                      Event.start, Event.stop, Event.ingestion_time,
+                                      Gauge.name, Gauge.system,
+                                      Source.source_uuid, Source.name,
+                                      ExplicitRef.explicit_ref_uuid, ExplicitRef.explicit_ref) \
+                               .join(Event, Event.event_uuid == uuid_column) \
+                               .join(Gauge, Event.gauge_uuid == Gauge.gauge_uuid) \
+                               .join(Source, Event.source_uuid == Source.source_uuid) \
+                               .outerjoin(ExplicitRef, Event.explicit_ref_uuid == ExplicitRef.explicit_ref_uuid)
+        else:
+            sql_query = session.query(uuid_column, geometry_table.name, func.ST_AsGeoJSON(geometry),
+                                      Annotation.ingestion_time,
+                                      AnnotationCnf.name, AnnotationCnf.system,
+                                      Source.source_uuid, Source.name,
+                                      ExplicitRef.explicit_ref_uuid, ExplicitRef.explicit_ref) \
+                               .join(Annotation, Annotation.annotation_uuid == uuid_column) \
+                               .join(AnnotationCnf, Annotation.annotation_cnf_uuid == AnnotationCnf.annotation_cnf_uuid) \
+                               .join(Source, Annotation.source_uuid == Source.source_uuid) \
+                               .outerjoin(ExplicitRef, Annotation.explicit_ref_uuid == ExplicitRef.explicit_ref_uuid)
+        # end if
+
+        sql_query = sql_query.filter(uuid_column.in_(chunk))
+
+        if envelopes is not None:
+            # The envelopes take the SRID of the stored geometries
+            sql_query = sql_query.filter(or_(*[func.ST_Intersects(geometry_table.value, func.ST_MakeEnvelope(*envelope, func.ST_SRID(geometry_table.value))) for envelope in envelopes]))
+        # end if
+
+        sql_query = sql_query.order_by(uuid_column)
+
+        features += _build_features(entity, sql_query.all())
+    # end for
+
+    return {
+        "type": "FeatureCollection",
+        "features": features
+    }
+
+def _build_features(entity, rows):
+    """
+    Build the GeoJSON features from the rows obtained for the geometries of events or annotations.
+    """
+    features = []
+    geometries_per_uuid = {}
+    for row in rows:
+        entity_uuid = str(row[0])
+        if entity_uuid not in geometries_per_uuid:
+            geometries_per_uuid[entity_uuid] = 0
+        # end if
+        properties = {
+            "id": entity_uuid,
+            "name": row[1],
+        }
+        if entity == "events":
+            properties["start"] = row[3].isoformat()
+            properties["stop"] = row[4].isoformat()
+            properties["ingestion_time"] = row[5].isoformat()
+            properties["gauge"] = {"name": row[6], "system": str(row[7])}
+            remaining_columns = row[8:]
+        else:
+            properties["ingestion_time"] = row[3].isoformat()
+            properties["annotation_cnf"] = {"name": row[4], "system": str(row[5])}
+            remaining_columns = row[6:]
+        # end if
+        properties["source_uuid"] = str(remaining_columns[0])
+        properties["source"] = remaining_columns[1]
+        # The explicit reference is optional
+        properties["explicit_ref_uuid"] = str(remaining_columns[2] or "")
+        properties["explicit_reference"] = remaining_columns[3] or ""
+
+        features.append({
+            "type": "Feature",
+            "id": entity_uuid + "_" + str(geometries_per_uuid[entity_uuid]),
+            "geometry": json.loads(row[2]),
+            "properties": properties
+        })
+        geometries_per_uuid[entity_uuid] += 1
+    # end for
+
+    return features
+
+########
+# Selection functions
+########
+# Path to the selections of entities kept for the maps and number of
+# seconds since their last use after which they expire
+selections_path = os.environ.get("VBOA_SELECTIONS_PATH", "/tmp/vboa_selections")
+selections_ttl = float(os.environ.get("VBOA_SELECTIONS_TTL", 3600))
+
+def create_selection(uuids):
+    """
+    Function to keep a selection of entities in the server, so that the
+    clients requesting information about them several times (e.g. the
+    maps every time the user pans or zooms) send their UUIDs only once
+
+    The selections are kept on disk to be shared by all the workers.
+
+    :param uuids: list of UUIDs of the entities
+    :type uuids: list
+
+    :return: identifier of the selection
+    :rtype: str
+    """
+    if not isinstance(uuids, list) or len([entity_uuid for entity_uuid in uuids if not isinstance(entity_uuid, str)]) > 0:
+        raise ValueError("The UUIDs of the selection have to be a list of strings")
+    # end if
+
+    remove_expired_selections()
+
+    os.makedirs(selections_path, exist_ok = True)
+    selection_id = uuid.uuid4().hex
+    selection_path = os.path.join(selections_path, selection_id + ".json")
+    with open(selection_path + ".tmp", "w") as selection_file:
+        json.dump(uuids, selection_file)
+    # end with
+    os.replace(selection_path + ".tmp", selection_path)
+
+    return selection_id
+
+def get_selection(selection_id):
+    """
+    Function to obtain the UUIDs of the entities of a selection (the
+    use of the selection extends its expiration)
+
+    :param selection_id: identifier of the selection as returned by create_selection
+    :type selection_id: str
+
+    :return: list of UUIDs of the entities (None if the selection does not exist or it has expired)
+    :rtype: list
+    """
+    # Avoid accessing paths outside the folder of the selections
+    if not isinstance(selection_id, str) or os.path.basename(selection_id) != selection_id or selection_id in ["", ".", ".."]:
+        return None
+    # end if
+
+    selection_path = os.path.join(selections_path, selection_id + ".json")
+    try:
+        if time.time() - os.path.getmtime(selection_path) > selections_ttl:
+            return None
+        # end if
+        os.utime(selection_path)
+        with open(selection_path) as selection_file:
+            uuids = json.load(selection_file)
+        # end with
+    except (FileNotFoundError, json.JSONDecodeError):
+        uuids = None
+    # end try
+
+    return uuids
+
+def remove_expired_selections():
+    """
+    Function to remove the selections not used within the TTL
+    """
+    if not os.path.isdir(selections_path):
+        return
+    # end if
+
+    now = time.time()
+    for selection_name in os.listdir(selections_path):
+        selection_path = os.path.join(selections_path, selection_name)
+        try:
+            if now - os.path.getmtime(selection_path) > selections_ttl:
+                os.remove(selection_path)
+            # end if
+        except FileNotFoundError:
+            pass
+        # end try
+    # end for
+
+    return
+
+########
+# Graph data functions
+########
+# Maximum number of entities per statement obtaining the data for the graphs
+graph_data_chunk_size = 10000
+
+def get_graph_data(session, entity, uuids):
+    """
+    Function to obtain the data shown in the graphs (timelines, networks and X-time graphs) of events, sources or explicit references
+
+    The data is obtained in one statement per chunk of entities,
+    selecting only the needed columns, instead of loading the entities
+    and their relationships as objects.
+
+    :param session: session to the database
+    :type session: sqlalchemy.orm.Session
+    :param entity: entity of the data (events, sources or explicit_refs)
+    :type entity: str
+    :param uuids: list of UUIDs of the entities
+    :type uuids: list
+
+    :return: list with the data of each entity
+    :rtype: list
+    """
+
+    if entity == "events":
+        build_item = _build_event_graph_item
+    elif entity == "sources":
+        build_item = _build_source_graph_item
+    elif entity == "explicit_refs":
+        build_item = _build_explicit_ref_graph_item
+    else:
+        raise ValueError("The entity {} has no graphs. Available entities are: ['events', 'sources', 'explicit_refs']".format(entity))
+    # end if
+
+    items = []
+    for i in range(0, len(uuids), graph_data_chunk_size):
+        chunk = uuids[i:i + graph_data_chunk_size]
+        if entity == "events":
+            sql_query = session.query(Event.event_uuid, Event.start, Event.stop, Event.ingestion_time,
+                                      Gauge.name, Gauge.system,
+                                      Source.source_uuid, Source.name,
+                                      ExplicitRef.explicit_ref_uuid, ExplicitRef.explicit_ref) \
+                               .join(Gauge, Event.gauge_uuid == Gauge.gauge_uuid) \
+                               .join(Source, Event.source_uuid == Source.source_uuid) \
+                               .outerjoin(ExplicitRef, Event.explicit_ref_uuid == ExplicitRef.explicit_ref_uuid) \
+                               .filter(Event.event_uuid.in_(chunk)) \
+                               .order_by(Event.start, Event.event_uuid)
+        elif entity == "sources":
+            # The events are counted (grouping by the primary key of the sources) instead of loaded
+            sql_query = session.query(Source.source_uuid, Source.name, DimSignature.dim_signature,
+                                      Source.processor, Source.processor_version,
+                                      Source.validity_start, Source.validity_stop,
+                                      Source.reported_validity_start, Source.reported_validity_stop,
+                                      Source.reception_time, Source.ingestion_time,
+                                      Source.processing_duration, Source.ingestion_duration,
+                                      Source.generation_time, Source.reported_generation_time,
+                                      Source.priority, Source.ingestion_completeness,
+                                      Source.ingestion_completeness_message, Source.ingestion_error,
+                                      func.count(Event.event_uuid)) \
+                               .join(DimSignature, Source.dim_signature_uuid == DimSignature.dim_signature_uuid) \
+                               .outerjoin(Event, Event.source_uuid == Source.source_uuid) \
+                               .filter(Source.source_uuid.in_(chunk)) \
+                               .group_by(Source.source_uuid, DimSignature.dim_signature) \
+                               .order_by(Source.source_uuid)
+        else:
+            sql_query = session.query(ExplicitRef.explicit_ref_uuid, ExplicitRef.explicit_ref, ExplicitRef.ingestion_time,
+                                      ExplicitRefGrp.name) \
+                               .outerjoin(ExplicitRefGrp, ExplicitRef.expl_ref_cnf_uuid == ExplicitRefGrp.expl_ref_cnf_uuid) \
+                               .filter(ExplicitRef.explicit_ref_uuid.in_(chunk)) \
+                               .order_by(ExplicitRef.explicit_ref_uuid)
+        # end if
+
+        items += [build_item(row) for row in sql_query.all()]
+    # end for
+
+    return items
+
+def _build_event_graph_item(row):
+    """
+    Build the data for the graphs from the row obtained for an event.
+    """
+    (event_uuid, start, stop, ingestion_time, gauge_name, gauge_system, source_uuid, source_name, explicit_ref_uuid, explicit_ref) = row
+
+    return {
+        "id": str(event_uuid),
+        "gauge": {
+            "name": gauge_name,
+            "system": str(gauge_system)
+        },
+        "explicit_reference": explicit_ref or "",
+        "explicit_ref_uuid": str(explicit_ref_uuid or ""),
+        "ingestion_time": ingestion_time.isoformat(),
+        "source": source_name,
+        "source_uuid": str(source_uuid),
+        "start": start.isoformat(),
+        "stop": stop.isoformat()
+    }
+
+def _build_source_graph_item(row):
+    """
+    Build the data for the graphs from the row obtained for a source.
+    The dates not available are replaced by the generation time.
+    """
+    (source_uuid, name, dim_signature, processor, processor_version,
+     validity_start, validity_stop, reported_validity_start, reported_validity_stop,
+     reception_time, ingestion_time, processing_duration, ingestion_duration,
+     generation_time, reported_generation_time, priority, ingestion_completeness,
+     ingestion_completeness_message, ingestion_error, number_of_events) = row
+
+    return {
+        "id": str(source_uuid),
+        "name": name,
+        "dim_signature": dim_signature,
+        "processor": str(processor),
+        "version": str(processor_version),
+        "validity_start": (validity_start or generation_time).isoformat(),
+        "validity_stop": (validity_stop or generation_time).isoformat(),
+        "reported_validity_start": (reported_validity_start or reported_generation_time).isoformat(),
+        "reported_validity_stop": (reported_validity_stop or reported_generation_time).isoformat(),
+        "reception_time": (reception_time or generation_time).isoformat(),
+        "ingestion_time": (ingestion_time or generation_time).isoformat(),
+        "processing_duration": str(processing_duration or datetime.timedelta()),
+        "ingestion_duration": str(ingestion_duration or datetime.timedelta()),
+        "generation_time": generation_time.isoformat(),
+        "reported_generation_time": reported_generation_time.isoformat(),
+        "number_of_events": str(number_of_events),
+        "priority": str(priority),
+        "ingestion_completeness": str(ingestion_completeness),
+        "ingestion_completeness_message": str(ingestion_completeness_message),
+        "ingestion_error": str(ingestion_error)
+    }
+
+def _build_explicit_ref_graph_item(row):
+    """
+    Build the data for the graphs from the row obtained for an explicit reference.
+    """
+    (explicit_ref_uuid, explicit_ref, ingestion_time, group) = row
+
+    return {
+        "id": str(explicit_ref_uuid),
+        "explicit_reference": explicit_ref,
+        "group": group or "N/A",
+        "ingestion_time": str(ingestion_time)
+    }
+
+########
+# Keyset pagination functions
+########
+# Keysets of the alerts (entity, fields which can be used as key, attribute
+# of the UUID used as tie-breaker and default ordering field)
+event_alerts_keyset = (EventAlert, ["notification_time"], "event_alert_uuid", "notification_time")
+annotation_alerts_keyset = (AnnotationAlert, ["notification_time"], "annotation_alert_uuid", "notification_time")
+source_alerts_keyset = (SourceAlert, ["notification_time"], "source_alert_uuid", "notification_time")
+er_alerts_keyset = (ExplicitRefAlert, ["notification_time"], "explicit_ref_alert_uuid", "notification_time")
+
+# State of the threads ordering the query of an entity by keyset
+_query_ordering = threading.local()
+
+class InvalidPaginationCursor(ValueError):
+    """
+    Exception raised when the cursor of a page received from the client is not valid
+    """
+
+@sqlalchemy_event.listens_for(OrmQuery, "before_compile", retval=True)
+def _order_query_by_keyset(query):
+    """
+    Order the query of the entity paginated by the current thread by the
+    ordering field and the UUID (as tie-breaker) and restrict it to the
+    elements following the cursor. The Query of the EBOA only orders by
+    one field, so the ordering is completed before compiling the query.
+    """
+    ordering = getattr(_query_ordering, "ordering", None)
+    if ordering is None or query.column_descriptions[0]["expr"] is not ordering["entity"]:
+        return query
+    # end if
+
+    # The Query already applied the limit and the offset
+    query = query.enable_assertions(False)
+    if ordering["condition"] is not None:
+        query = query.filter(ordering["condition"])
+    # end if
+
+    return query.order_by(None).order_by(*ordering["order_by"])
+
+def encode_pagination_cursor(cursor):
+    """
+    Function to encode the position of a page into an opaque string
+
+    :param cursor: position of the page (ordering field and direction, value and UUID of the last element shown)
+    :type cursor: dict
+
+    :return: opaque cursor
+    :rtype: str
+    """
+    return base64.urlsafe_b64encode(json.dumps(cursor, separators=(",", ":")).encode()).decode()
+
+def decode_pagination_cursor(opaque_cursor):
+    """
+    Function to decode the opaque cursor received from the client
+
+    :param opaque_cursor: opaque cursor as returned by encode_pagination_cursor
+    :type opaque_cursor: str
+
+    :return: position of the page
+    :rtype: dict
+    """
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(opaque_cursor.encode()).decode())
+        if cursor["value"] is not None and not isinstance(cursor["value"], str):
+            raise ValueError
+        # end if
+        if not isinstance(cursor["field"], str) or not isinstance(cursor["descending"], bool) or not isinstance(cursor["uuid"], str):
+            raise ValueError
+        # end if
+    except Exception:
+        raise InvalidPaginationCursor(f"the cursor {opaque_cursor} is not valid")
+    # end try
+
+    return cursor
+
+def get_keyset_order(filters, keyset):
+    """
+    Function to obtain the ordering of the query when it can be paginated by keyset
+
+    :param filters: filters received from the query form
+    :type filters: dict
+    :param keyset: keyset of the entity
+    :type keyset: tuple
+
+    :return: ordering field and descending flag (None if the query cannot be paginated by keyset)
+    :rtype: tuple
+    """
+    entity, keyset_fields, uuid_attribute, default_field = keyset
+
+    if not "limit" in filters or filters["limit"][0] == "":
+        return None
+    # end if
+
+    field = default_field
+    descending = False
+    if "order_by" in filters and filters["order_by"][0] != "":
+        field = filters["order_by"][0]
+        descending = "order_descending" in filters
+    # end if
+
+    if not field in keyset_fields:
+        return None
+    # end if
+
+    return (field, descending)
+
+def get_pagination_cursor(filters, keyset):
+    """
+    Function to obtain the position where the requested page starts
+
+    The pages are requested with the cursors of the previous pages
+    (filters["cursors"]), being the last one the position where the
+    requested page starts.
+
+    :param filters: filters received from the query form
+    :type filters: dict
+    :param keyset: keyset of the entity
+    :type keyset: tuple
+
+    :return: position of the page (None if it is the first page or the query cannot be paginated by keyset)
+    :rtype: dict
+    """
+    order = get_keyset_order(filters, keyset)
+    cursors = filters.get("cursors") or []
+    if order is None or len(cursors) == 0:
+        return None
+    # end if
+
+    cursor = decode_pagination_cursor(cursors[-1])
+    if cursor["field"] != order[0]:
+        raise InvalidPaginationCursor(f"the cursor {cursors[-1]} does not correspond to the ordering field {order[0]}")
+    # end if
+
+    return cursor
+
+def set_keyset_pagination(filters, kwargs, keyset):
+    """
+    Function to paginate the query by keyset instead of by offset
+
+    The query is ordered by the ordering field (the UUID is added as
+    tie-breaker by query_by_keyset, which also seeks the position of the
+    cursor). The offset typed in the query form is honoured in the first
+    page and replaced by the cursor in the following ones. The offset is
+    kept when the ordering field cannot be used as key.
+
+    :param filters: filters received from the query form
+    :type filters: dict
+    :param kwargs: kwargs of the query (updated with the ordering)
+    :type kwargs: dict
+    :param keyset: keyset of the entity (entity, fields which can be used as key, attribute of the UUID and default ordering field)
+    :type keyset: tuple
+
+    :return: True if the query is paginated by keyset, False otherwise
+    :rtype: bool
+    """
+    order = get_keyset_order(filters, keyset)
+    if order is None:
+        return False
+    # end if
+    (field, descending) = order
+
+    kwargs["order_by"] = {"field": field, "descending": descending}
+    if get_pagination_cursor(filters, keyset) is not None:
+        kwargs.pop("offset", None)
+    # end if
+
+    return True
+
+def query_by_keyset(query_elements, kwargs, keyset, field = None, descending = False, cursor = None, condition = None):
+    """
+    Function to query the elements ordered by the field and the UUID
+    (as tie-breaker) following the position of the cursor
+
+    The elements without value in the ordering field are placed at the
+    end in both directions. The cursor keeps the ordering of the page it
+    was obtained from, which is used to seek its position. The field can
+    be any attribute of the entity, although only the fields of the
+    keyset are used to build cursors.
+
+    :param query_elements: function receiving the kwargs of the query and returning the elements
+    :type query_elements: function
+    :param kwargs: kwargs of the query
+    :type kwargs: dict
+    :param keyset: keyset of the entity
+    :type keyset: tuple
+    :param field: ordering field (the default ordering field of the keyset if None)
+    :type field: str
+    :param descending: flag to order descending
+    :type descending: bool
+    :param cursor: position after which the elements are obtained
+    :type cursor: dict
+    :param condition: additional condition over the entity which the elements have to fulfill
+    :type condition: sqlalchemy expression
+
+    :return: list of elements
+    :rtype: list
+    """
+    entity, keyset_fields, uuid_attribute, default_field = keyset
+    if field is None:
+        field = default_field
+    # end if
+
+    column = getattr(entity, field)
+    uuid_column = getattr(entity, uuid_attribute)
+    order_by = [column.asc().nullslast(), uuid_column.asc()]
+    if descending:
+        order_by = [column.desc().nullslast(), uuid_column.desc()]
+    # end if
+
+    if cursor is not None:
+        if not cursor["field"] in keyset_fields:
+            raise InvalidPaginationCursor(f"the field {cursor['field']} of the cursor cannot be used as key")
+        # end if
+        cursor_column = getattr(entity, cursor["field"])
+        cursor_follows = operator.gt
+        if cursor["descending"]:
+            cursor_follows = operator.lt
+        # end if
+        if cursor["value"] is None:
+            cursor_condition = and_(cursor_column.is_(None), cursor_follows(uuid_column, cursor["uuid"]))
+        else:
+            value = cursor["value"]
+            if isinstance(cursor_column.type, (DateTime, Date)):
+                try:
+                    value = parser.parse(value)
+                except (ValueError, OverflowError):
+                    raise InvalidPaginationCursor(f"the value {value} of the cursor is not a valid date")
+                # end try
+            # end if
+            cursor_condition = or_(cursor_follows(cursor_column, value), cursor_column.is_(None), and_(cursor_column == value, cursor_follows(uuid_column, cursor["uuid"])))
+        # end if
+        if condition is None:
+            condition = cursor_condition
+        else:
+            condition = and_(condition, cursor_condition)
+        # end if
+    # end if
+
+    _query_ordering.ordering = {"entity": entity, "order_by": order_by, "condition": condition}
+    try:
+        elements = query_elements(kwargs)
+    finally:
+        _query_ordering.ordering = None
+    # end try
+
+    return elements
+
+def query_page_by_keyset(query_elements, kwargs, filters, keyset, condition = None):
+    """
+    Function to query the page requested in the query form
+
+    The elements are always ordered by the ordering field of the query
+    (the default ordering field of the keyset if there is none) and the
+    UUID, so that the pages are stable. The page starts after the cursor
+    when the query is paginated by keyset.
+
+    :param query_elements: function receiving the kwargs of the query and returning the elements
+    :type query_elements: function
+    :param kwargs: kwargs of the query obtained from the filters of the query form
+    :type kwargs: dict
+    :param filters: filters received from the query form
+    :type filters: dict
+    :param keyset: keyset of the entity
+    :type keyset: tuple
+    :param condition: additional condition over the entity which the elements have to fulfill
+    :type condition: sqlalchemy expression
+
+    :return: list of elements
+    :rtype: list
+    """
+    order_by = kwargs.get("order_by") or {"field": None, "descending": False}
+
+    return query_by_keyset(query_elements, kwargs, keyset, order_by["field"], order_by["descending"], get_pagination_cursor(filters, keyset), condition)
+
+def probe_query_window(query_elements, kwargs, filters, keyset):
+    """
+    Function to probe the page requested in the query form without
+    querying all its elements, so that the page can be rendered without
+    rows and DataTables requests them
+
+    At most two elements are queried: the last element of the page, to
+    obtain the cursor of the following page when the page is full, and
+    the first one, to know if the page has elements when it is not full.
+
+    :param query_elements: function receiving the kwargs of the query and returning the elements
+    :type query_elements: function
+    :param kwargs: kwargs of the query obtained from the filters of the query form
+    :type kwargs: dict
+    :param filters: filters received from the query form (updated with the next cursor)
+    :type filters: dict
+    :param keyset: keyset of the entity
+    :type keyset: tuple
+
+    :return: number of elements of the page known by the probes (the limit when the page is full, 1 if it has elements and 0 otherwise)
+    :rtype: int
+    """
+    kwargs = dict(kwargs)
+    window_offset = int(kwargs.get("offset") or 0)
+    window_limit = None
+    if kwargs.get("limit") not in [None, ""]:
+        window_limit = int(kwargs["limit"])
+    # end if
+
+    filters.pop("next_cursor", None)
+    if window_limit is not None and window_limit <= 0:
+        return 0
+    # end if
+
+    if window_limit is not None:
+        kwargs["offset"] = window_offset + window_limit - 1
+        kwargs["limit"] = 1
+        last_elements = query_page_by_keyset(query_elements, kwargs, filters, keyset)
+        if len(last_elements) > 0:
+            set_next_pagination_cursor(filters, last_elements, keyset)
+            return window_limit
+        # end if
+    # end if
+
+    kwargs["offset"] = window_offset
+    kwargs["limit"] = 1
+    first_elements = query_page_by_keyset(query_elements, kwargs, filters, keyset)
+
+    return len(first_elements)
+
+def set_next_pagination_cursor(filters, elements, keyset):
+    """
+    Function to set the cursor of the page following the queried elements (filters["next_cursor"])
+
+    :param filters: filters received from the query form (updated with the next cursor)
+    :type filters: dict
+    :param elements: elements of the page obtained by the query (only the last one is used)
+    :type elements: list
+    :param keyset: keyset of the entity
+    :type keyset: tuple
+    """
+    entity, keyset_fields, uuid_attribute, default_field = keyset
+
+    filters.pop("next_cursor", None)
+
+    order = get_keyset_order(filters, keyset)
+    if order is None or len(elements) == 0:
+        return
+    # end if
+    (field, descending) = order
+
+    value = getattr(elements[-1], field)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        value = value.isoformat()
+    elif value is not None:
+        value = str(value)
+    # end if
+
+    filters["next_cursor"] = [encode_pagination_cursor({"field": field, "descending": descending, "value": value, "uuid": str(getattr(elements[-1], uuid_attribute))})]
+
+########
+# DataTables functions
+########
+# Default number of rows of the tables processed in the server by DataTables
+datatables_page_length = int(os.environ.get("VBOA_DATATABLES_PAGE_LENGTH", 100))
+
+# Columns of the tables of alerts (field to order by and kwarg to search by)
+alerts_table_columns = [
+    (None, None),
+    (None, None),
+    (None, "groups"),
+    (None, "names"),
+    (None, None),
+    ("notification_time", None),
+    (None, None),
+    ("solved_time", None),
+    (None, None),
+    (None, None),
+    ("generator", "generators"),
+    (None, None),
+    ("ingestion_time", None),
+    (None, None),
+    (None, None)
+]
+
+# Conditions of the global search over the searchable columns of the
+# tables of alerts (kwarg -> function receiving the entity of the alerts
+# and the searched pattern)
+alerts_search_conditions = {
+    "groups": lambda entity, pattern: entity.alertDefinition.has(Alert.group.has(AlertGroup.name.like(pattern))),
+    "names": lambda entity, pattern: entity.alertDefinition.has(Alert.name.like(pattern)),
+    "generators": lambda entity, pattern: entity.generator.like(pattern)
+}
+
+def get_datatables_settings(url, filters, records_total, columns):
+    """
+    Function to obtain the settings of a table processed in the server by DataTables
+
+    :param url: URL of the endpoint providing the pages of the table
+    :type url: str
+    :param filters: filters received from the query form
+    :type filters: dict
+    :param records_total: number of rows of the table
+    :type records_total: int
+    :param columns: list with the field to order by and the kwarg to search by of every column of the table (None if the column does not allow it)
+    :type columns: list
+
+    :return: settings of the table for the templates
+    :rtype: dict
+    """
+
+    return {
+        "url": url,
+        "filters": filters,
+        "records_total": records_total,
+        "page_length": datatables_page_length,
+        "orderable_columns": [index for index, (field, kwarg) in enumerate(columns) if field is not None],
+        "searchable_columns": [index for index, (field, kwarg) in enumerate(columns) if kwarg is not None]
+    }
+
+def query_datatables_page(parameters, kwargs, columns, query_elements, keyset, search_conditions = {}):
+    """
+    Function to query the page of a table processed in the server by DataTables
+
+    The ordering and the searches of the columns requested by DataTables
+    are pushed into the kwargs of the query and the page is obtained
+    inside the window (offset and limit) requested in the query form. The
+    rows are always ordered by keyset (the ordering field and the UUID) so
+    that the pages are stable. The global search matches the rows
+    containing the text in any of the searchable columns. The number of
+    filtered rows (and the number of rows when the table was rendered
+    without counting them) is only known up to the requested page, so it
+    is reported as one more row than the page when there are more rows
+    after it.
+
+    :param parameters: parameters sent by DataTables (draw, start, length, order, columns, search) and number of rows of the table (records_total, None if unknown)
+    :type parameters: dict
+    :param kwargs: kwargs of the query obtained from the filters of the query form
+    :type kwargs: dict
+    :param columns: list with the field to order by and the kwarg to search by of every column of the table (None if the column does not allow it)
+    :type columns: list
+    :param query_elements: function receiving the kwargs of the query and returning the elements
+    :type query_elements: function
+    :param keyset: keyset of the entity
+    :type keyset: tuple
+    :param search_conditions: functions receiving the entity and the searched pattern and returning the condition of the global search over every searchable column (by kwarg)
+    :type search_conditions: dict
+
+    :return: tuple with the elements of the page and the response for DataTables without the rows (draw, recordsTotal and recordsFiltered)
+    :rtype: tuple
+    """
+    kwargs = dict(kwargs)
+
+    draw = int(parameters.get("draw", 0))
+    start = max(int(parameters.get("start", 0)), 0)
+    length = int(parameters.get("length", datatables_page_length))
+    records_total = parameters.get("records_total")
+    if records_total is not None:
+        records_total = int(records_total)
+    # end if
+
+    # Ordering (the Query only orders by one field)
+    for order in parameters.get("order") or []:
+        column = int(order.get("column", -1))
+        if column >= 0 and column < len(columns) and columns[column][0] is not None:
+            kwargs["order_by"] = {"field": columns[column][0], "descending": order.get("dir") == "desc"}
+            break
+        # end if
+    # end for
+
+    # Searches
+    searches = []
+    for index, column_parameters in enumerate(parameters.get("columns") or []):
+        value = ((column_parameters or {}).get("search") or {}).get("value", "")
+        if value != "" and index < len(columns) and columns[index][1] is not None:
+            searches.append((columns[index][1], value))
+        # end if
+    # end for
+    conditions = []
+    for kwarg, value in searches:
+        pattern = "%" + escape_like_pattern(value) + "%"
+        search_filter = _combine_search_filter(kwargs.get(kwarg), value, pattern)
+        if search_filter is not None:
+            kwargs[kwarg] = search_filter
+        elif kwarg in search_conditions:
+            # The filter of the query form is kept and the search is added as a condition
+            conditions.append(search_conditions[kwarg](keyset[0], pattern))
+        # end if
+    # end for
+    search_value = (parameters.get("search") or {}).get("value", "")
+    if search_value != "":
+        pattern = "%" + escape_like_pattern(search_value) + "%"
+        column_conditions = [search_conditions[kwarg](keyset[0], pattern) for (field, kwarg) in columns if kwarg is not None and kwarg in search_conditions]
+        if len(column_conditions) > 0:
+            conditions.append(or_(*column_conditions))
+        # end if
+    # end if
+    search_condition = None
+    if len(conditions) > 0:
+        search_condition = and_(*conditions)
+    # end if
+
+    # Paging inside the window requested in the query form
+    window_offset = int(kwargs.get("offset") or 0)
+    window_limit = None
+    if kwargs.get("limit") not in [None, ""]:
+        window_limit = int(kwargs["limit"])
+    # end if
+    remaining_rows = None
+    if window_limit is not None:
+        remaining_rows = max(window_limit - start, 0)
+    # end if
+    limit = remaining_rows
+    if length >= 0 and (limit is None or length < limit):
+        limit = length
+    # end if
+
+    more_rows = False
+    if limit == 0:
+        elements = []
+    else:
+        kwargs["offset"] = window_offset + start
+        kwargs.pop("limit", None)
+        probe_next_row = limit is not None and (remaining_rows is None or limit < remaining_rows)
+        if limit is not None:
+            # Obtain one more row to know if there are rows after the page
+            kwargs["limit"] = limit + 1 if probe_next_row else limit
+        # end if
+        # The page of the query form starts after its cursor
+        order_by = kwargs.get("order_by") or {"field": None, "descending": False}
+        elements = query_by_keyset(query_elements, kwargs, keyset, order_by["field"], order_by["descending"], get_pagination_cursor(parameters.get("filters") or {}, keyset), search_condition)
+        if probe_next_row and len(elements) > limit:
+            more_rows = True
+            elements = elements[:limit]
+        # end if
+    # end if
+
+    records_filtered = records_total
+    if len(searches) > 0 or search_condition is not None or records_total is None:
+        records_filtered = start + len(elements) + (1 if more_rows else 0)
+    # end if
+    if records_total is None:
+        records_total = records_filtered
+    # end if
+
+    return elements, {"draw": draw, "recordsTotal": records_total, "recordsFiltered": records_filtered}
+
+def escape_like_pattern(value):
+    """
+    Escape the wildcards of LIKE (and the escape character) in a text so that it is matched literally.
+
+    :param value: text to escape
+    :type value: str
+
+    :return: escaped text
+    :rtype: str
+    """
+
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _combine_search_filter(query_filter, value, pattern):
+    """
+    Combine the search of a column of DataTables with the filter of the query form over the same kwarg.
+
+    Filters with lists of values are narrowed to the values containing the
+    searched text. Any other filter (e.g. like, notlike or exclusions)
+    cannot hold the search too, so None is returned and the search has to
+    be added as a condition on top of the filter.
+
+    :param query_filter: filter of the query form over the kwarg (None if there is no filter)
+    :type query_filter: dict
+    :param value: searched text
+    :type value: str
+    :param pattern: LIKE pattern matching the searched text
+    :type pattern: str
+
+    :return: filter combining both or None if they cannot be combined
+    :rtype: dict
+    """
+    if query_filter is None:
+        return {"filter": pattern, "op": "like"}
+    # end if
+
+    if query_filter["op"] in ["in", "=="]:
+        values = query_filter["filter"]
+        if type(values) != list:
+            values = [values]
+        # end if
+        return {"filter": [filter_value for filter_value in values if value in filter_value], "op": "in"}
+    # end if
+
+    return None
+
+########
+# Catalog index functions
+########
+# Minimum number of seconds between the checks of new values of the catalogs
+catalog_index_refresh_interval = float(os.environ.get("VBOA_CATALOG_INDEX_REFRESH_INTERVAL", 60))
+
+class CatalogIndex():
+    """
+    Index of the values of a catalog (e.g. the names of the gauges)
+    answering the lookups of the selectors without accessing the database
+
+    The values are kept in a sorted list, so the values starting with the
+    searched text are found by bisection. The values are obtained by a
+    function receiving a session and the watermark of the previous load
+    and returning the values and the new watermark. Catalogs with an
+    ingestion time return a watermark to obtain later only the values
+    ingested after it, which are merged into the index. The rest of
+    catalogs are replaced on every refresh.
+
+    Every process of the server keeps its own indexes. The invalidations
+    (e.g. after deleting sources) only reach the indexes of the process
+    handling the request, so the rest of processes show the changes
+    after their next refresh, at most catalog_index_refresh_interval
+    seconds (VBOA_CATALOG_INDEX_REFRESH_INTERVAL) after the change.
+    """
+    def __init__(self, load_values):
+        self.load_values = load_values
+        self.values = []
+        self.watermark = None
+        self.loaded = False
+        self.refresh_time = None
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+    def lookup(self, search, limit = None, offset = None, exact = False):
+        """
+        Obtain the values of the catalog matching the searched text.
+
+        The values starting with the searched text are returned before
+        the values containing it.
+
+        :param search: searched text
+        :type search: str
+        :param limit: maximum number of values to return
+        :type limit: int
+        :param offset: number of matching values to skip
+        :type offset: int
+        :param exact: flag to return only the value equal to the searched text
+        :type exact: bool
+
+        :return: list of matching values
+        :rtype: list
+        """
+        values = self.get_values()
+        search = search or ""
+
+        start = bisect.bisect_left(values, search)
+        if exact:
+            matches = values[start:start + 1]
+            if len(matches) > 0 and matches[0] != search:
+                matches = []
+            # end if
+        else:
+            stop = bisect.bisect_left(values, search + chr(0x10ffff))
+            matches = values[start:stop]
+            if search != "":
+                matches = matches + [value for value in values if search in value and not value.startswith(search)]
+            # end if
+        # end if
+
+        offset = int(offset or 0)
+        if limit not in [None, ""]:
+            return matches[offset:offset + int(limit)]
+        # end if
+
+        return matches[offset:]
+
+    def get_values(self):
+        """
+        Obtain the sorted values of the catalog.
+
+        The first call loads the values and the next ones trigger a refresh
+        in background when the refresh interval has elapsed, so lookups
+        only wait for the database the first time.
+
+        :return: sorted list of values
+        :rtype: list
+        """
+        if not self.loaded:
+            with self.lock:
+                if not self.loaded:
+                    self._refresh()
+                # end if
+            # end with
+        elif self.refresh_time is None or time.monotonic() - self.refresh_time > catalog_index_refresh_interval:
+            self.refresh_in_background()
+        # end if
+
+        return self.values
+
+    def refresh_in_background(self):
+        """
+        Refresh the values of the catalog in a background thread (if not already being refreshed).
+        """
+        with self.lock:
+            if self.refreshing:
+                return
+            # end if
+            self.refreshing = True
+        # end with
+
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def invalidate(self, reset = False):
+        """
+        Mark the values of the catalog to be refreshed on the next lookup.
+
+        :param reset: flag to discard the watermark so that the next refresh replaces all the values (e.g. after deletions)
+        :type reset: bool
+        """
+        if reset:
+            self.watermark = None
+        # end if
+        self.refresh_time = None
+
+    def _refresh_in_background(self):
+        try:
+            with self.lock:
+                self._refresh()
+            # end with
+        finally:
+            self.refreshing = False
+        # end try
+
+    def _refresh(self):
+        query_boa = Query()
+        try:
+            values, watermark = self.load_values(query_boa.session, self.watermark)
+        finally:
+            query_boa.close_session()
+        # end try
+
+        values = set(value for value in values if value is not None)
+        if self.watermark is None or watermark is None:
+            self.values = sorted(values)
+        elif not values.issubset(self.values):
+            # The list is replaced (and not modified) as lookups can be reading it
+            self.values = sorted(values.union(self.values))
+        # end if
+        self.watermark = watermark
+        self.refresh_time = time.monotonic()
+        self.loaded = True
+
+def get_catalog_loader(column, ingestion_time_column = None):
+    """
+    Function to obtain the function loading the distinct values of a column for a CatalogIndex
+
+    :param column: column of the values of the catalog
+    :type column: sqlalchemy.orm.attributes.InstrumentedAttribute
+    :param ingestion_time_column: column with the ingestion time of the rows, to load only the values ingested after the watermark
+    :type ingestion_time_column: sqlalchemy.orm.attributes.InstrumentedAttribute
+
+    :return: function receiving a session and the watermark and returning the values and the new watermark
+    :rtype: function
+    """
+    def load_values(session, watermark):
+        values_query = session.query(column).distinct()
+        new_watermark = None
+        if ingestion_time_column is not None:
+            new_watermark = session.query(func.max(ingestion_time_column)).scalar()
+            if new_watermark is not None:
+                values_query = values_query.filter(ingestion_time_column <= new_watermark)
+            # end if
+            if watermark is not None:
+                values_query = values_query.filter(ingestion_time_column > watermark)
+            # end if
+        # end if
+
+        return [value for (value,) in values_query], new_watermark
+    # end def
+
+    return load_values
+
+########
+# Sliding window functions
+########
+# Number of seconds subtracted to the watermark of the sliding views,
+# covering the changes committed after being stamped
+sliding_window_watermark_margin = float(os.environ.get("VBOA_SLIDING_WINDOW_WATERMARK_MARGIN", 300))
+
+# Number of updates of the sliding views applying the changes before
+# reloading the whole view (obtaining the changes not stamped, like the
+# validation of the alerts)
+sliding_window_full_refresh_cycles = int(os.environ.get("VBOA_SLIDING_WINDOW_FULL_REFRESH_CYCLES", 12))
+
+def get_sliding_window_filters(window_delay, window_size):
+    """
+    Function to obtain the filters of the period covered by a sliding view at the current time
+
+    :param window_delay: days from the end of the period to the current time
+    :type window_delay: float
+    :param window_size: days covered by the period
+    :type window_size: float
+
+    :return: filter of the start (end of the period) and filter of the stop (beginning of the period)
+    :rtype: tuple
+    """
+    now = datetime.datetime.now()
+    start_filter = {
+        "date": (now - datetime.timedelta(days=float(window_delay))).isoformat(),
+        "operator": "<="
+    }
+    stop_filter = {
+        "date": (now - datetime.timedelta(days=(float(window_delay) + float(window_size)))).isoformat(),
+        "operator": ">="
+    }
+
+    return start_filter, stop_filter
+
+def get_sliding_window_watermark(watermark):
+    """
+    Function to obtain the time since which the changes of a sliding view are requested and the watermark of the next request
+
+    :param watermark: watermark of the last update of the view (in ISO format)
+    :type watermark: str
+
+    :return: time since which the changes are requested and new watermark (in ISO format)
+    :rtype: tuple
+    """
+    new_watermark = datetime.datetime.now().isoformat()
+    since = parser.parse(watermark) - datetime.timedelta(seconds=sliding_window_watermark_margin)
+
+    return since, new_watermark
+
+def get_sliding_window_delta(windows, uuids):
+    """
+    Function to obtain the elements of a sliding view added, changed or aged out since the last update of the view
+
+    Only the UUIDs of the elements are selected, so the elements to
+    show are loaded afterwards by the view.
+
+    :param windows: list of tuples with the query of the UUIDs of the elements inside the period of the view, the column of the UUIDs and the condition of the elements changed since the last update
+    :type windows: list
+    :param uuids: UUIDs of the elements shown by the view
+    :type uuids: list
+
+    :return: UUIDs of the elements added or changed and UUIDs of the shown elements aged out of the period
+    :rtype: tuple
+    """
+    changed_uuids = set()
+    kept_uuids = set()
+    for (window_query, uuid_column, changed_condition) in windows:
+        if len(uuids) > 0:
+            # The elements entering the period are added
+            changed_query = window_query.filter(or_(changed_condition, uuid_column.notin_(uuids)))
+            kept_uuids.update(str(uuid) for (uuid,) in window_query.filter(uuid_column.in_(uuids)))
+        else:
+            # Every element inside the period is new for the view
+            changed_query = window_query
+        # end if
+        changed_uuids.update(str(uuid) for (uuid,) in changed_query.distinct())
+    # end for
+
+    removed_uuids = [uuid for uuid in uuids if uuid not in kept_uuids]
+
+    return sorted(changed_uuids), removed_uuids
+
+########
+# Rollup functions
+########
+# Number of seconds covered by each bucket of the rollup of the sources
+sources_rollup_bucket_size = int(os.environ.get("VBOA_SOURCES_ROLLUP_BUCKET_SIZE", 300))
+# Maximum number of buckets kept in memory (60 days of 5 minutes by default)
+sources_rollup_maximum_buckets = int(os.environ.get("VBOA_SOURCES_ROLLUP_MAXIMUM_BUCKETS", 17280))
+
+# Counters of the rollup of the sources
+sources_rollup_counters = ["sources", "ingested", "errors", "incomplete", "in_progress", "alerts", "ingestion_duration", "ingestion_durations", "ingestion_delay", "ingestion_delays"]
+
+def _get_sources_rollup_bucket(date):
+    """
+    Obtain the bucket of the rollup of the sources containing the date.
+    """
+    return math.floor((date - datetime.datetime(1970, 1, 1)).total_seconds() / sources_rollup_bucket_size)
+
+def _get_sources_rollup_bucket_start(bucket):
+    """
+    Obtain the start of the bucket of the rollup of the sources.
+    """
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds = bucket * sources_rollup_bucket_size)
+
+def _aggregate_sources(session, periods, by_bucket = False):
+    """
+    Aggregate in the DDBB the sources received inside the periods by DIM signature and processor
+
+    :param session: session to the database
+    :type session: sqlalchemy.orm.Session
+    :param periods: list of tuples with the start, the stop and the flag to include the sources received at the stop of every period
+    :type periods: list
+    :param by_bucket: flag to aggregate also by bucket
+    :type by_bucket: bool
+
+    :return: counters by bucket (None if not by_bucket), DIM signature and processor
+    :rtype: dict
+    """
+    bucket_column = func.floor(func.extract("epoch", Source.reception_time) / sources_rollup_bucket_size)
+    group_columns = [DimSignature.dim_signature, Source.processor]
+    if by_bucket:
+        group_columns = [bucket_column] + group_columns
+    # end if
+
+    period_conditions = []
+    for (start, stop, include_stop) in periods:
+        if include_stop:
+            stop_condition = Source.reception_time <= stop
+        else:
+            stop_condition = Source.reception_time < stop
+        # end if
+        period_conditions.append(and_(Source.reception_time >= start, stop_condition))
+    # end for
+    conditions = [or_(*period_conditions), DimSignature.dim_signature != "BOA_HEALTH"]
+    not_ingestion_error = or_(Source.ingestion_error == False, Source.ingestion_error == None)
+    ingestion_delay = func.extract("epoch", Source.ingestion_time - Source.generation_time)
+
+    sources_query = session.query(*group_columns,
+                                  func.count(Source.source_uuid),
+                                  func.count(Source.source_uuid).filter(Source.ingested == True),
+                                  func.count(Source.source_uuid).filter(Source.ingestion_error == True),
+                                  func.count(Source.source_uuid).filter(not_ingestion_error, or_(Source.ingestion_completeness == False, Source.ingestion_completeness == None)),
+                                  func.count(Source.source_uuid).filter(not_ingestion_error, Source.ingested == False),
+                                  func.sum(func.extract("epoch", Source.ingestion_duration)),
+                                  func.count(Source.ingestion_duration),
+                                  func.sum(ingestion_delay),
+                                  func.count(ingestion_delay)) \
+                           .join(DimSignature, Source.dim_signature_uuid == DimSignature.dim_signature_uuid) \
+                           .filter(*conditions) \
+                           .group_by(*group_columns)
+
+    alerts_query = session.query(*group_columns, func.count(SourceAlert.source_alert_uuid)) \
+                          .join(Source, SourceAlert.source_uuid == Source.source_uuid) \
+                          .join(DimSignature, Source.dim_signature_uuid == DimSignature.dim_signature_uuid) \
+                          .filter(*conditions) \
+                          .group_by(*group_columns)
+
+    aggregation = {}
+    for row in sources_query:
+        counters = _get_sources_rollup_counters(aggregation, row, by_bucket)
+        for counter, value in zip(["sources", "ingested", "errors", "incomplete", "in_progress", "ingestion_duration", "ingestion_durations", "ingestion_delay", "ingestion_delays"], row[len(group_columns):]):
+            counters[counter] += float(value or 0)
+        # end for
+    # end for
+    for row in alerts_query:
+        _get_sources_rollup_counters(aggregation, row, by_bucket)["alerts"] += row[-1]
+    # end for
+
+    return aggregation
+
+def _get_sources_rollup_counters(aggregation, row, by_bucket):
+    """
+    Obtain the counters of the aggregation for the bucket, DIM signature and processor of the row.
+    """
+    if by_bucket:
+        bucket, key = int(row[0]), (row[1], row[2])
+    else:
+        bucket, key = None, (row[0], row[1])
+    # end if
+
+    return aggregation.setdefault(bucket, {}).setdefault(key, dict.fromkeys(sources_rollup_counters, 0))
+
+def _add_sources_rollup_counters(groups, counters_by_group):
+    """
+    Add the counters by DIM signature and processor to the accumulated ones.
+    """
+    for key in counters_by_group:
+        accumulated = groups.setdefault(key, dict.fromkeys(sources_rollup_counters, 0))
+        for counter in sources_rollup_counters:
+            accumulated[counter] += counters_by_group[key][counter]
+        # end for
+    # end for
+
+def _get_sources_rollup_bucket_runs(buckets):
+    """
+    Obtain the runs of consecutive buckets as tuples with the first and the last bucket of every run.
+    """
+    runs = []
+    for bucket in sorted(buckets):
+        if len(runs) > 0 and runs[-1][1] == bucket - 1:
+            runs[-1] = (runs[-1][0], bucket)
+        else:
+            runs.append((bucket, bucket))
+        # end if
+    # end for
+
+    return runs
+
+class SourcesRollup():
+    """
+    Rollup of the sources by buckets of reception time, DIM signature
+    and processor with the counters shown by the summary of the
+    ingestion control
+
+    The buckets fully covered by the requested periods are aggregated
+    in the DDBB once and kept in memory, so the cost of the summary
+    does not depend on the number of sources of the period. On every
+    request, the buckets with sources ingested (or with alerts
+    ingested or solved) after the previous request and the buckets
+    with ingestions in progress are aggregated again. The buckets of
+    the sources removed are invalidated by the views removing them
+    (see invalidate). The edges of the period not covering a whole
+    bucket are always aggregated.
+    """
+    def __init__(self):
+        self.buckets = {}
+        self.in_progress_buckets = set()
+        self.refresh_time = None
+        self.lock = threading.Lock()
+
+    def get_summary(self, session, start, stop):
+        """
+        Obtain the summary of the sources received inside the period.
+
+        :param session: session to the database
+        :type session: sqlalchemy.orm.Session
+        :param start: start of the period
+        :type start: str
+        :param stop: stop of the period
+        :type stop: str
+
+        :return: total counters and counters by DIM signature and processor
+        :rtype: dict
+        """
+        start = parser.parse(start)
+        stop = parser.parse(stop)
+        first_bucket = math.ceil((start - datetime.datetime(1970, 1, 1)).total_seconds() / sources_rollup_bucket_size)
+        last_bucket = _get_sources_rollup_bucket(stop)
+
+        groups = {}
+        if first_bucket < last_bucket:
+            with self.lock:
+                self._refresh(session, first_bucket, last_bucket)
+                for bucket in range(first_bucket, last_bucket):
+                    _add_sources_rollup_counters(groups, self.buckets[bucket])
+                # end for
+            # end with
+            edges = [(start, _get_sources_rollup_bucket_start(first_bucket), False),
+                     (_get_sources_rollup_bucket_start(last_bucket), stop, True)]
+        else:
+            edges = [(start, stop, True)]
+        # end if
+        _add_sources_rollup_counters(groups, _aggregate_sources(session, edges).get(None, {}))
+
+        summary = dict.fromkeys(["sources", "ingested", "errors", "incomplete", "alerts"], 0)
+        summary["groups"] = []
+        for (dim_signature, processor) in sorted(groups, key = lambda key: (str(key[0]), str(key[1]))):
+            counters = groups[(dim_signature, processor)]
+            for counter in ["sources", "ingested", "errors", "incomplete", "alerts"]:
+                summary[counter] += int(counters[counter])
+            # end for
+            group = {
+                "dim_signature": dim_signature,
+                "processor": processor,
+                "sources": int(counters["sources"]),
+                "errors": int(counters["errors"]),
+                "error_rate": round(100 * counters["errors"] / counters["sources"], 2),
+                "mean_ingestion_duration": None,
+                "mean_ingestion_delay": None
+            }
+            if counters["ingestion_durations"] > 0:
+                group["mean_ingestion_duration"] = str(datetime.timedelta(seconds = round(counters["ingestion_duration"] / counters["ingestion_durations"])))
+            # end if
+            if counters["ingestion_delays"] > 0:
+                group["mean_ingestion_delay"] = str(datetime.timedelta(seconds = round(counters["ingestion_delay"] / counters["ingestion_delays"])))
+            # end if
+            summary["groups"].append(group)
+        # end for
+
+        return summary
+
+    def invalidate(self, reception_times = None):
+        """
+        Mark the buckets containing the reception times to be aggregated
+        again on the next request (all the buckets if not provided).
+
+        :param reception_times: reception times of the removed or modified sources
+        :type reception_times: list
+        """
+        with self.lock:
+            if reception_times is None:
+                self.buckets = {}
+                self.in_progress_buckets = set()
+            else:
+                for reception_time in reception_times:
+                    bucket = _get_sources_rollup_bucket(reception_time)
+                    self.buckets.pop(bucket, None)
+                    self.in_progress_buckets.discard(bucket)
+                # end for
+            # end if
+        # end with
+
+    def _refresh(self, session, first_bucket, last_bucket):
+        now = datetime.datetime.now()
+
+        if self.refresh_time is not None:
+            since = self.refresh_time - datetime.timedelta(seconds = sliding_window_watermark_margin)
+            bucket_column = func.floor(func.extract("epoch", Source.reception_time) / sources_rollup_bucket_size)
+            changed_buckets = set(self.in_progress_buckets)
+            changed_buckets.update(int(bucket) for (bucket,) in session.query(bucket_column).filter(Source.ingestion_time > since).distinct())
+            changed_buckets.update(int(bucket) for (bucket,) in session.query(bucket_column)
+                                   .join(SourceAlert, SourceAlert.source_uuid == Source.source_uuid)
+                                   .filter(or_(SourceAlert.ingestion_time > since, SourceAlert.solved_time > since)).distinct())
+            for bucket in changed_buckets:
+                self.buckets.pop(bucket, None)
+                self.in_progress_buckets.discard(bucket)
+            # end for
+        # end if
+        self.refresh_time = now
+
+        # Aggregate only the missing buckets, grouped in runs of
+        # consecutive buckets inside one statement
+        missing_buckets = [bucket for bucket in range(first_bucket, last_bucket) if bucket not in self.buckets]
+        if len(missing_buckets) > 0:
+            periods = [(_get_sources_rollup_bucket_start(run_first), _get_sources_rollup_bucket_start(run_last + 1), False) for (run_first, run_last) in _get_sources_rollup_bucket_runs(missing_buckets)]
+            aggregation = _aggregate_sources(session, periods, by_bucket = True)
+            for bucket in missing_buckets:
+                self.buckets[bucket] = aggregation.get(bucket, {})
+                if len([key for key in self.buckets[bucket] if self.buckets[bucket][key]["in_progress"] > 0]) > 0:
+                    self.in_progress_buckets.add(bucket)
+                # end if
+            # end for
+        # end if
+
+        # Evict the oldest buckets out of the period when the rollup is full
+        if len(self.buckets) > sources_rollup_maximum_buckets:
+            buckets_to_evict = [bucket for bucket in sorted(self.buckets) if bucket < first_bucket or bucket >= last_bucket]
+            for bucket in buckets_to_evict[:len(self.buckets) - sources_rollup_maximum_buckets]:
+                del self.buckets[bucket]
+                self.in_progress_buckets.discard(bucket)
+            # end for
+        # end if
+
+# Rollup of the sources shown by the summary of the ingestion control
+sources_rollup = SourcesRollup()
+
+########
+# Triggering functions
+########
+# Path to the triggering configuration
+triggering_path = os.path.join(get_resources_path(), "triggering.xml")
+
+# Compiled triggering configuration and the state of the file it was
+# compiled from
+_triggering_index = {"file_state": None, "index": None}
+_triggering_index_lock = threading.Lock()
+
+def compile_triggering_index(triggering_xml):
+    """
+    Function to compile the triggering configuration into an index of rules
+
+    :param triggering_xml: content of the triggering configuration
+    :type triggering_xml: bytes
+
+    :return: index with the rules (compiled source mask, source type and skip flag, in the order of the configuration) and the dependent rules (compiled source masks) per source type
+    :rtype: dict
+    """
+    triggering_rules = etree.fromstring(triggering_xml)
+
+    index = {
+        "rules": [],
+        "dependents": {}
+    }
+    for rule in triggering_rules.findall("rule"):
+        source_mask = re.compile(rule.findtext("source_mask"))
+        index["rules"].append({
+            "source_mask": source_mask,
+            "source_type": rule.findtext("source_type"),
+            "skip": rule.get("skip") == "true"
+        })
+        for source_type in rule.findall("dependencies/source_type"):
+            index["dependents"].setdefault(source_type.text, []).append(source_mask)
+        # end for
+    # end for
+
+    return index
+
+def get_triggering_index():
+    """
+    Function to obtain the compiled triggering configuration
+
+    The configuration is compiled once and compiled again only when the
+    file changes (modification time or size).
+
+    :return: index of the triggering configuration (see compile_triggering_index)
+    :rtype: dict
+    """
+    file_stat = os.stat(triggering_path)
+    file_state = (file_stat.st_mtime_ns, file_stat.st_size)
+
+    with _triggering_index_lock:
+        if _triggering_index["file_state"] != file_state:
+            with open(triggering_path, "rb") as triggering_file:
+                _triggering_index["index"] = compile_triggering_index(triggering_file.read())
+            # end with
+            _triggering_index["file_state"] = file_state
+        # end if
+        index = _triggering_index["index"]
+    # end with
+
+    return index
+
+def get_triggering_rule(index, source_name):
+    """
+    Function to obtain the first rule of the triggering configuration matching the name of a source
+
+    :param index: index of the triggering configuration (see compile_triggering_index)
+    :type index: dict
+    :param source_name: name of the source
+    :type source_name: str
+
+    :return: rule matching the source or None
+    :rtype: dict
+    """
+    for rule in index["rules"]:
+        if rule["source_mask"].match(source_name):
+            return rule
+        # end if
+    # end for
+
+    return None
+
+########
+# File delivery functions
+########
+# Mode of delivery of the files: stream (by the web server using
+# sendfile when available), x-accel-redirect (nginx) or x-sendfile
+# (apache/lighttpd)
+file_delivery_mode = os.environ.get("VBOA_FILE_DELIVERY_MODE", "stream")
+
+# Internal locations of the front proxy for the x-accel-redirect mode
+# with the format <path prefix>=<uri prefix>[,<path prefix>=<uri prefix>...]
+file_delivery_internal_locations = [location.split("=", 1) for location in os.environ.get("VBOA_FILE_DELIVERY_INTERNAL_LOCATIONS", "").split(",") if "=" in location]
+
+# Size of the blocks read when the file is not sent by sendfile
+file_delivery_block_size = 1024*1024
+
+class FileSlice:
+    """
+    File-like object limited to a slice of a file, so that only the
+    bytes of the slice are sent. When backed by a file in the file
+    system, the WSGI server can send it with sendfile.
+    """
+
+    def __init__(self, file_object, size, real_file = True, resources = None):
+        self.file_object = file_object
+        self.remaining = size
+        self.real_file = real_file
+        # Resources to close together with the file
+        self.resources = resources or []
+
+    def read(self, size = -1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        # end if
+        data = self.file_object.read(size)
+        self.remaining -= len(data)
+
+        return data
+
+    def fileno(self):
+        if not self.real_file:
+            raise io.UnsupportedOperation("fileno")
+        # end if
+
+        return self.file_object.fileno()
+
+    def close(self):
+        self.file_object.close()
+        for resource in self.resources:
+            resource.close()
+        # end for
+
+def get_file_etag(file_path, *qualifiers):
+    """
+    Get the entity tag of the file using its modification time and size.
+
+    :param file_path: path to the file
+    :type file_path: str
+    :param qualifiers: values distinguishing different contents obtained from the same file
+    :type qualifiers: str
+
+    :return: entity tag
+    :rtype: str
+    """
+    file_stat = os.stat(file_path)
+
+    return "-".join(["{:x}".format(file_stat.st_mtime_ns), "{:x}".format(file_stat.st_size)] + [str(qualifier) for qualifier in qualifiers])
+
+def deliver_file(file_path, mimetype = None, as_attachment = False, download_name = None, etag = None):
+    """
+    Deliver the file supporting HTTP Range and If-None-Match requests.
+
+    Depending on VBOA_FILE_DELIVERY_MODE, the file is handed off to the
+    front proxy or streamed from the file system without buffering it.
+
+    :param file_path: path to the file
+    :type file_path: str
+    :param mimetype: mimetype of the content (guessed from the name if not provided)
+    :type mimetype: str
+    :param as_attachment: flag to indicate that the file has to be downloaded
+    :type as_attachment: bool
+    :param download_name: name of the file for the client (name of the file if not provided)
+    :type download_name: str
+    :param etag: entity tag of the content (obtained from the file if not provided)
+    :type etag: str
+
+    :return: response
+    :rtype: flask.Response
+    """
+    if download_name is None:
+        download_name = os.path.basename(file_path)
+    # end if
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+    # end if
+
+    # Hand off the file to the front proxy which deals with the conditional and range requests
+    proxy_header = None
+    if file_delivery_mode == "x-sendfile":
+        proxy_header = ("X-Sendfile", os.path.abspath(file_path))
+    elif file_delivery_mode == "x-accel-redirect":
+        absolute_file_path = os.path.abspath(file_path)
+        for path_prefix, uri_prefix in file_delivery_internal_locations:
+            path_prefix = path_prefix.rstrip("/") + "/"
+            if absolute_file_path.startswith(path_prefix):
+                proxy_header = ("X-Accel-Redirect", uri_prefix.rstrip("/") + "/" + quote(absolute_file_path[len(path_prefix):]))
+                break
+            # end if
+        # end for
+    # end if
+
+    if proxy_header is not None:
+        response = Response(mimetype = mimetype)
+        response.headers[proxy_header[0]] = proxy_header[1]
+        _set_content_disposition(response, as_attachment, download_name)
+
+        return response
+    # end if
+
+    size = os.path.getsize(file_path)
+    if etag is None:
+        etag = get_file_etag(file_path)
+    # end if
+
+    return _deliver_slice(lambda: FileSlice(open(file_path, "rb"), size), 0, etag, mimetype, as_attachment, download_name)
+
+def deliver_tar_member(file_path, mimetype = None, as_attachment = False, download_name = None, etag = None):
+    """
+    Deliver the first member of the tar file supporting HTTP Range and
+    If-None-Match requests.
+
+    The member of a non compressed tar is delivered as a slice of the
+    tar file (so it can be sent with sendfile). The member of a
+    compressed tar is decompressed while it is streamed.
+
+    :param file_path: path to the tar file
+    :type file_path: str
+    :param mimetype: mimetype of the content (guessed from the name of the member if not provided)
+    :type mimetype: str
+    :param as_attachment: flag to indicate that the file has to be downloaded
+    :type as_attachment: bool
+    :param download_name: name of the file for the client (name of the member if not provided)
+    :type download_name: str
+    :param etag: entity tag of the content (obtained from the tar file if not provided)
+    :type etag: str
+
+    :return: response
+    :rtype: flask.Response
+    """
+    try:
+        tar = tarfile.open(file_path, "r:")
+        compressed = False
+    except tarfile.ReadError:
+        tar = tarfile.open(file_path, "r:*")
+        compressed = True
+    # end try
+
+    # Obtain only the first member without listing all the members
+    with tar:
+        member = tar.next()
+    # end with
+    if member is None:
+        raise tarfile.ReadError("The tar file {} has no members".format(file_path))
+    # end if
+
+    if download_name is None:
+        download_name = os.path.basename(member.name)
+    # end if
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+    # end if
+    if etag is None:
+        etag = get_file_etag(file_path, member.name)
+    # end if
+
+    if not compressed and not member.issparse():
+        open_file = lambda: FileSlice(open(file_path, "rb"), member.size)
+        offset = member.offset_data
+    else:
+        def open_file():
+            tar = tarfile.open(file_path, "r:*")
+
+            return FileSlice(tar.extractfile(tar.next()), member.size, real_file = False, resources = [tar])
+        # end def
+        offset = 0
+    # end if
+
+    return _deliver_slice(open_file, offset, etag, mimetype, as_attachment, download_name)
+
+def _deliver_slice(open_file, offset, etag, mimetype, as_attachment, download_name):
+    """
+    Deliver the slice of the file attending to the headers If-None-Match, Range and If-Range.
+
+    :param open_file: function returning the slice of the opened file
+    :type open_file: function
+    :param offset: position of the slice in the file
+    :type offset: int
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status = 304, mimetype = mimetype)
+        response.set_etag(etag)
+
+        return response
+    # end if
+
+    file_slice = open_file()
+    size = file_slice.remaining
+
+    start = 0
+    stop = size
+    status = 200
+    # Attend only single range requests for the current version of the file
+    if request.range is not None and len(request.range.ranges) == 1 and (request.if_range.etag is None or request.if_range.etag == etag):
+        requested_range = request.range.range_for_length(size)
+        if requested_range is None:
+            file_slice.close()
+            response = Response(status = 416, mimetype = mimetype)
+            response.headers["Content-Range"] = "bytes */{}".format(size)
+
+            return response
+        # end if
+        start, stop = requested_range
+        status = 206
+    # end if
+
+    file_slice.file_object.seek(offset + start)
+    file_slice.remaining = stop - start
+
+    response = Response(wrap_file(request.environ, file_slice, file_delivery_block_size),
+                        status = status, mimetype = mimetype, direct_passthrough = True)
+    response.content_length = stop - start
+    response.accept_ranges = "bytes"
+    if status == 206:
+        response.content_range = ContentRange("bytes", start, stop, size)
+    # end if
+    response.set_etag(etag)
+    _set_content_disposition(response, as_attachment, download_name)
+
+    return response
+
+def _set_content_disposition(response, as_attachment, download_name):
+    """
+    Set the header Content-Disposition of the response.
+    """
+    disposition = "inline"
+    if as_attachment:
+        disposition = "attachment"
+    # end if
+    response.headers["Content-Disposition"] = "{}; filename*=UTF-8''{}".format(disposition, quote(download_name))
+
+    return
+
 ########
 # Czml functions
 ########
@@ -6,19 +6,141 @@ Written by DEIMOS Space S.L. (dibb)
 module vboa
 """
 # Import python utilities
+import os
 import shutil
 import traceback
+import gzip
+import fcntl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import json
+import base64
+import datetime
+import uuid
+from dateutil import parser
+
+# Import SQLAlchemy utilities
+from sqlalchemy import inspect, func, extract
 
 # Import flask utilities
-from flask import Blueprint, request, make_response
+from flask import Blueprint, request, make_response, Response, stream_with_context, send_file
 
 # Import eboa utilities
 from eboa.engine.query import Query
 from eboa.engine import export as eboa_export
 
+# Import datamodel
+from eboa.datamodel.events import Event, EventKey
+from eboa.datamodel.gauges import Gauge
+from eboa.datamodel.sources import Source
+from eboa.datamodel.explicit_refs import ExplicitRef, ExplicitRefGrp
+
+# Import operators
+from vboa.filters.operators import arithmetic_operators, text_operators
+
+# Import query cost estimation
+from vboa.functions import estimate_query_cost, query_by_keyset
+
 bp = Blueprint("query", __name__, url_prefix="/query")
 query = Query()
 
+# Entities available through the query API with the method of the
+# Query solving them and the attribute identifying their rows
+query_entities = {
+    "events": ("get_events", "event_uuid"),
+    "annotations": ("get_annotations", "annotation_uuid"),
+    "sources": ("get_sources", "source_uuid"),
+    "explicit_refs": ("get_explicit_refs", "explicit_ref_uuid"),
+    "reports": ("get_reports", "report_uuid"),
+    "event_alerts": ("get_event_alerts", "event_alert_uuid"),
+    "annotation_alerts": ("get_annotation_alerts", "annotation_alert_uuid"),
+    "source_alerts": ("get_source_alerts", "source_alert_uuid"),
+    "explicit_ref_alerts": ("get_explicit_ref_alerts", "explicit_ref_alert_uuid"),
+    "report_alerts": ("get_report_alerts", "report_alert_uuid")
+}
+
+# Entities exported by the EBOA (see export_items)
+eboa_exported_entities = ["events", "annotations"]
+
+# Parameters of the query API which are not entities
+query_options = ["stream", "projection", "confirm_query_cost"]
+
+# Relationships available for the projection of every entity with the
+# method of the Query solving them in bulk, the filter of the method,
+# the attribute of the entity referencing them and the attributes to
+# export
+projection_relations = {
+    "events": {
+        "gauge": ("get_gauges", "gauge_uuids", "gauge_uuid", ["gauge_uuid", "name", "system"]),
+        "source": ("get_sources", "source_uuids", "source_uuid", ["source_uuid", "name"]),
+        "explicit_reference": ("get_explicit_refs", "explicit_ref_uuids", "explicit_ref_uuid", ["explicit_ref_uuid", "explicit_ref"])
+    },
+    "annotations": {
+        "annotation_cnf": ("get_annotation_cnfs", "annotation_cnf_uuids", "annotation_cnf_uuid", ["annotation_cnf_uuid", "name", "system"]),
+        "source": ("get_sources", "source_uuids", "source_uuid", ["source_uuid", "name"]),
+        "explicit_reference": ("get_explicit_refs", "explicit_ref_uuids", "explicit_ref_uuid", ["explicit_ref_uuid", "explicit_ref"])
+    },
+    "event_alerts": {
+        "event": ("get_events", "event_uuids", "event_uuid", ["event_uuid", "start", "stop"])
+    },
+    "annotation_alerts": {
+        "annotation": ("get_annotations", "annotation_uuids", "annotation_uuid", ["annotation_uuid", "ingestion_time"])
+    },
+    "source_alerts": {
+        "source": ("get_sources", "source_uuids", "source_uuid", ["source_uuid", "name"])
+    },
+    "explicit_ref_alerts": {
+        "explicit_reference": ("get_explicit_refs", "explicit_ref_uuids", "explicit_ref_uuid", ["explicit_ref_uuid", "explicit_ref"])
+    },
+    "report_alerts": {
+        "report": ("get_reports", "report_uuids", "report_uuid", ["report_uuid", "name"])
+    }
+}
+
+# Entities whose values can be requested in the projection with the
+# method of the Query obtaining them
+projection_values = {
+    "events": "get_event_values",
+    "annotations": "get_annotation_values"
+}
+
+# Dimensions available for grouping the aggregation of events with the
+# column providing them and the table to join
+aggregation_dimensions = {
+    "gauge_name": (Gauge.name, Gauge),
+    "gauge_system": (Gauge.system, Gauge),
+    "explicit_ref_group": (ExplicitRefGrp.name, ExplicitRefGrp),
+    "source": (Source.name, Source)
+}
+
+# Default configuration for the streaming mode
+default_stream_batch_size = 1000
+maximum_stream_batch_size = 10000
+
+# Keyset of the streaming mode (events ordered by start and UUID)
+stream_keyset = (Event, ["start"], "event_uuid", "start")
+
+# Default configuration for the query jobs
+query_jobs_path = os.environ.get("VBOA_QUERY_JOBS_PATH", "/query_jobs")
+query_jobs_ttl = float(os.environ.get("VBOA_QUERY_JOBS_TTL", 24*3600))
+query_jobs_cleanup_interval = float(os.environ.get("VBOA_QUERY_JOBS_CLEANUP_INTERVAL", 600))
+maximum_concurrent_query_jobs = int(os.environ.get("VBOA_MAXIMUM_CONCURRENT_QUERY_JOBS", 4))
+query_jobs_page_size = 10000
+
+# Pool of workers executing the query jobs
+query_jobs_executor = ThreadPoolExecutor(max_workers = maximum_concurrent_query_jobs)
+
+# Identifier of the pool of this process. The process holds the lock of
+# the identifier while it lives, so that the jobs of the pools of
+# processes no longer existing (e.g. restarted workers) are detected
+query_jobs_executor_id = uuid.uuid4().hex
+query_jobs_executor_lock = None
+
+# Thread removing the expired query jobs periodically
+query_jobs_cleanup_thread = None
+query_jobs_cleanup_thread_lock = threading.Lock()
+
 @bp.route("/", methods=["GET"])
 def perform_query():
     """
@@ -36,14 +158,28 @@ def perform_query():
         }
         response = make_response(response_json, status)
         response.mimetype = "application/json"
+    elif not isinstance(request.get_json(), dict):
+        status = 400
+        response_json = {
+            "response": {
+                "status": status,
+                "message": "The method /query needs to receive a JSON object with the relevant query parameters"
+            },
+            "data": {}
+        }
+        response = make_response(response_json, status)
+        response.mimetype = "application/json"
+    elif "stream" in request.get_json():
+        response = perform_streamed_query(request.get_json())
     else:
-        data = {}
         query_parameters = request.get_json()
 
         try:
-            if "events" in query_parameters.keys():
-                events = query.get_events(**query_parameters["events"])
-                eboa_export.export_events(data, events, group = "events", include_ers = True, include_annotations = True)
+            estimations = estimate_query_parameters_cost(query_parameters)
+            blocked_entities = [entity for entity in estimations if estimations[entity]["action"] == "reject" or (estimations[entity]["action"] == "confirm" and query_parameters.get("confirm_query_cost") != True)]
+            data = None
+            if len(blocked_entities) == 0:
+                data = solve_query(query_parameters)
             # end if
         except Exception as e:
             status = 400
@@ -56,12 +192,627 @@ def perform_query():
             }
             response = make_response(response_json, status)
             response.mimetype = "application/json"
+        else:
+            if data is None:
+                status = 400
+                message = f"The estimated cost of the query for the entities {blocked_entities} is too high. "
+                if len([entity for entity in blocked_entities if estimations[entity]["action"] == "reject"]) > 0:
+                    message += "Please, restrict the filters or use the methods /query/jobs or stream"
+                else:
+                    message += "Please, restrict the filters, use the methods /query/jobs or stream or confirm the execution with \"confirm_query_cost\": true"
+                # end if
+                response_json = {
+                    "response": {
+                        "status": status,
+                        "message": message
+                    },
+                    "data": {"query_cost": estimations}
+                }
+            else:
+                status = 200
+                response_json = {
+                    "response": {
+                        "status": status,
+                        "message": "Query solved"
+                    },
+                    "data": data
+                }
+            # end if
+            response = make_response(response_json, status)
+            response.mimetype = "application/json"
+        # end try
+    # end if
+
+    return response
+
+@bp.route("/explain", methods=["GET", "POST"])
+def explain_query():
+    """
+    API for obtaining the estimated cost of a query to BOA without executing it.
+    """
+
+    if not "Content-Type" in request.headers or request.headers["Content-Type"] != "application/json":
+        status = 400
+        response_json = {
+            "response": {
+                "status": status,
+                "message": "The method /query/explain needs to receive the JSON data with the relevant query parameters"
+            },
+            "data": {}
+        }
+    else:
+        try:
+            estimations = estimate_query_parameters_cost(request.get_json())
+        except Exception as e:
+            status = 400
+            response_json = {
+                "response": {
+                    "status": status,
+                    "message": f"The method /query/explain needs to receive correct filters. The exception raised was: {str(e)}. The traceback generated was: {traceback.format_exc()}"
+                },
+                "data": {}
+            }
         else:
             status = 200
             response_json = {
                 "response": {
                     "status": status,
-                    "message": "Query solved"
+                    "message": "Query cost estimated"
+                },
+                "data": {"query_cost": estimations}
+            }
+        # end try
+    # end if
+    response = make_response(response_json, status)
+    response.mimetype = "application/json"
+
+    return response
+
+def estimate_query_parameters_cost(query_parameters):
+    """
+    Estimate the cost of the query of every entity requested in the query parameters.
+
+    :param query_parameters: dictionary with the parameters of the query
+    :type query_parameters: dict
+
+    :return: dictionary with the estimation per entity (see vboa.functions.estimate_query_cost)
+    :rtype: dict
+    """
+
+    unknown_entities = [entity for entity in query_parameters if entity not in query_entities and entity not in query_options]
+    if len(unknown_entities) > 0:
+        raise ValueError(f"the entities {unknown_entities} are not available. Available entities are: {list(query_entities)}")
+    # end if
+
+    estimations = {}
+    for entity in [entity for entity in query_entities if entity in query_parameters]:
+        filters = query_parameters[entity]
+        if filters is None:
+            filters = {}
+        # end if
+        estimations[entity] = estimate_query_cost(query_entities[entity][0], **filters)
+    # end for
+
+    return estimations
+
+def solve_query(query_parameters):
+    """
+    Solve all the entities requested in the query parameters.
+
+    All the entities are obtained using the same session and inside the
+    same transaction (with a repeatable read snapshot), so that every
+    section of the response is consistent with the others. The rows of
+    every section are indexed by their UUID, so related rows shared by
+    several entities (e.g. explicit references of events and
+    annotations) are only exported once.
+
+    Expected parameters:
+    {"<entity>": {<filters of the corresponding Query method>}, ...,
+     "projection": {"<entity>": [<fields and relations>], ...}}
+    where entity is one of the keys of query_entities. The projection is
+    optional (see export_projected_entities)
+
+    :param query_parameters: dictionary with the parameters of the query
+    :type query_parameters: dict
+
+    :return: dictionary with the exported entities
+    :rtype: dict
+    """
+
+    unknown_entities = [entity for entity in query_parameters if entity not in query_entities and entity not in query_options]
+    if len(unknown_entities) > 0:
+        raise ValueError(f"the entities {unknown_entities} are not available. Available entities are: {list(query_entities)}")
+    # end if
+
+    projection = get_projection(query_parameters)
+
+    data = {}
+
+    query_boa = Query()
+    try:
+        # Every section is solved inside the same transaction
+        query_boa.session.connection(execution_options = {"isolation_level": "REPEATABLE READ"})
+
+        requested_entities = [entity for entity in query_entities if entity in query_parameters]
+        for entity in requested_entities:
+            filters = query_parameters[entity]
+            if filters is None:
+                filters = {}
+            # end if
+            items = getattr(query_boa, query_entities[entity][0])(**filters)
+            export_items(data, query_boa, entity, items, projection, requested_entities)
+        # end for
+    finally:
+        query_boa.session.rollback()
+        query_boa.close_session()
+    # end try
+
+    return data
+
+def export_items(data, query_boa, entity, items, projection, requested_entities = []):
+    """
+    Insert the structure of a list of items of an entity into the dictionary.
+
+    Every section of the dictionary is serialized in the same way. The
+    events and the annotations are exported by the EBOA, which also
+    inserts the related explicit references and annotations. These
+    related items are exported by the serializer of their own entity
+    when it is requested (or projected) too, otherwise they keep the
+    structure given by the EBOA.
+
+    :param data: dictionary where to insert the items
+    :type data: dict
+    :param query_boa: query object used to load the relations
+    :type query_boa: eboa.engine.query.Query
+    :param entity: name of the entity
+    :type entity: str
+    :param items: list of items to export
+    :type items: list
+    :param projection: dictionary with the list of fields and relations per entity
+    :type projection: dict
+    :param requested_entities: list of entities requested in the same query
+    :type requested_entities: list
+    """
+
+    if entity in projection:
+        export_projected_entities(data, query_boa, entity, items, projection[entity])
+    elif entity in eboa_exported_entities:
+        exported_data = {}
+        if entity == "events":
+            eboa_export.export_events(exported_data, items, group = "events", include_ers = True, include_annotations = True)
+        else:
+            eboa_export.export_annotations(exported_data, items, group = "annotations", include_ers = True)
+        # end if
+
+        for section in exported_data:
+            new_uuids = [item_uuid for item_uuid in exported_data[section] if item_uuid not in data.get(section, {})]
+            exported_by_other_serializer = section in query_entities and (section in projection or (section in requested_entities and section not in eboa_exported_entities))
+            if section != entity and exported_by_other_serializer:
+                if len(new_uuids) > 0:
+                    related_items = getattr(query_boa, query_entities[section][0])(**{query_entities[section][1] + "s": {"filter": new_uuids, "op": "in"}})
+                    export_items(data, query_boa, section, related_items, projection, requested_entities)
+                # end if
+            else:
+                section_data = data.setdefault(section, {})
+                for item_uuid in new_uuids:
+                    section_data[item_uuid] = exported_data[section][item_uuid]
+                # end for
+            # end if
+        # end for
+    else:
+        export_entities(data, entity, items, query_entities[entity][1])
+    # end if
+
+    return
+
+def export_entities(data, entity, items, uuid_attribute):
+    """
+    Insert the structure of a list of items into the section of the
+    dictionary corresponding to the entity, avoiding duplicated rows.
+
+    :param data: dictionary where to insert the items
+    :type data: dict
+    :param entity: name of the section
+    :type entity: str
+    :param items: list of items to export
+    :type items: list
+    :param uuid_attribute: attribute identifying every item
+    :type uuid_attribute: str
+    """
+
+    if not entity in data:
+        data[entity] = {}
+    # end if
+
+    for item in items:
+        item_uuid = str(getattr(item, uuid_attribute))
+        if not item_uuid in data[entity]:
+            data[entity][item_uuid] = item.jsonify()
+        # end if
+    # end for
+
+    return
+
+def get_projection(query_parameters):
+    """
+    Obtain and check the projection received in the query parameters.
+
+    :param query_parameters: dictionary with the parameters of the query
+    :type query_parameters: dict
+
+    :return: dictionary with the list of fields and relations per entity
+    :rtype: dict
+    """
+
+    projection = query_parameters.get("projection")
+    if projection is None:
+        projection = {}
+    # end if
+
+    if not isinstance(projection, dict):
+        raise ValueError("the projection has to be a dictionary with the list of fields and relations per entity")
+    # end if
+
+    for entity in projection:
+        if entity not in query_entities:
+            raise ValueError(f"the entity {entity} of the projection is not available. Available entities are: {list(query_entities)}")
+        # end if
+        if not isinstance(projection[entity], list):
+            raise ValueError(f"the projection of the entity {entity} has to be a list of fields and relations")
+        # end if
+    # end for
+
+    return projection
+
+def export_projected_entities(data, query_boa, entity, items, fields):
+    """
+    Insert the projection of a list of items into the section of the
+    dictionary corresponding to the entity.
+
+    Only the requested fields are exported. Fields can be the columns
+    of the entity (e.g. start, stop, gauge_uuid), the relations defined
+    in projection_relations (e.g. gauge) and "values" for the entities
+    defined in projection_values. Relations and values are loaded in
+    bulk with one query per relation and only if requested, so the rest
+    of the graph of the items is never loaded.
+
+    :param data: dictionary where to insert the items
+    :type data: dict
+    :param query_boa: query object used to load the relations
+    :type query_boa: eboa.engine.query.Query
+    :param entity: name of the section
+    :type entity: str
+    :param items: list of items to export
+    :type items: list
+    :param fields: list of fields and relations to export
+    :type fields: list
+    """
+
+    if not entity in data:
+        data[entity] = {}
+    # end if
+
+    if len(items) == 0:
+        return
+    # end if
+
+    uuid_attribute = query_entities[entity][1]
+    columns = inspect(type(items[0])).column_attrs.keys()
+    relations = projection_relations.get(entity, {})
+
+    wrong_fields = [field for field in fields if field not in columns and field not in relations and not (field == "values" and entity in projection_values)]
+    if len(wrong_fields) > 0:
+        raise ValueError(f"the fields {wrong_fields} are not available for the projection of the entity {entity}. Available fields are: {columns + list(relations) + (['values'] if entity in projection_values else [])}")
+    # end if
+
+    # Load requested relations in bulk
+    related_items = {}
+    for relation in [field for field in fields if field in relations]:
+        method, filter_name, reference_attribute, _ = relations[relation]
+        related_uuids = list(set([getattr(item, reference_attribute) for item in items if getattr(item, reference_attribute) is not None]))
+        related_items[relation] = {}
+        if len(related_uuids) > 0:
+            related_items[relation] = {getattr(related_item, reference_attribute): related_item for related_item in getattr(query_boa, method)(**{filter_name: {"filter": related_uuids, "op": "in"}})}
+        # end if
+    # end for
+
+    # Load requested values in bulk
+    item_values = {}
+    if "values" in fields:
+        for value in getattr(query_boa, projection_values[entity])([getattr(item, uuid_attribute) for item in items]):
+            item_values.setdefault(getattr(value, uuid_attribute), []).append(value.jsonify())
+        # end for
+    # end if
+
+    for item in items:
+        item_uuid = str(getattr(item, uuid_attribute))
+        if item_uuid in data[entity]:
+            continue
+        # end if
+        structure = {uuid_attribute: item_uuid}
+        for field in fields:
+            if field in relations:
+                reference_attribute = relations[field][2]
+                related_item = related_items[field].get(getattr(item, reference_attribute))
+                structure[field] = None
+                if related_item is not None:
+                    structure[field] = {attribute: _serialize_value(getattr(related_item, attribute)) for attribute in relations[field][3]}
+                # end if
+            elif field == "values":
+                structure[field] = item_values.get(getattr(item, uuid_attribute), [])
+            else:
+                structure[field] = _serialize_value(getattr(item, field))
+            # end if
+        # end for
+        data[entity][item_uuid] = structure
+    # end for
+
+    return
+
+def _serialize_value(value):
+    """
+    Convert the value of a column into a JSON serializable value.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    elif isinstance(value, uuid.UUID):
+        return str(value)
+    # end if
+
+    return value
+
+def perform_streamed_query(query_parameters):
+    """
+    Solve the query in streaming mode, writing the events (with their
+    explicit references and annotations) as newline-delimited JSON in
+    batches ordered by start. Every batch carries an opaque cursor which
+    can be sent back in the "stream" parameters to resume the query
+    after the last delivered batch.
+
+    Expected parameters:
+    {"events": {<filters of Query.get_events>},
+     "stream": {"batch_size": <int>, "cursor": <str>},
+     "projection": {"events": [<fields and relations>]}}
+
+    :param query_parameters: dictionary with the parameters of the query
+    :type query_parameters: dict
+
+    :return: streamed response with one JSON document per line
+    :rtype: flask.Response
+    """
+
+    stream_parameters = query_parameters["stream"]
+    if stream_parameters is None:
+        stream_parameters = {}
+    # end if
+
+    try:
+        if not "events" in query_parameters.keys():
+            raise ValueError("the streaming mode is only available for the events")
+        # end if
+        if not isinstance(stream_parameters, dict):
+            raise ValueError("the stream parameter has to be a dictionary")
+        # end if
+        batch_size = int(stream_parameters.get("batch_size", default_stream_batch_size))
+        if batch_size < 1 or batch_size > maximum_stream_batch_size:
+            raise ValueError(f"the batch_size has to be between 1 and {maximum_stream_batch_size}")
+        # end if
+        cursor = decode_cursor(stream_parameters.get("cursor"))
+        projection = get_projection(query_parameters)
+
+        # Solve the first batch before starting the response so that
+        # wrong filters are reported with the corresponding status
+        first_batch = _get_events_batch(query, query_parameters["events"], batch_size, cursor)
+        if "events" in projection:
+            # Check the projection
+            export_events_batch(query, first_batch[0][:1], projection)
+        # end if
+    except Exception as e:
+        status = 400
+        response_json = {
+            "response": {
+                "status": status,
+                "message": f"The method /query needs to receive correct filters and stream parameters. The exception raised was: {str(e)}. The traceback generated was: {traceback.format_exc()}"
+            },
+            "data": {}
+        }
+        response = make_response(response_json, status)
+        response.mimetype = "application/json"
+
+        return response
+    # end try
+
+    def generate():
+        events, next_cursor = first_batch
+        batch = 0
+        while True:
+            yield json.dumps({
+                "batch": batch,
+                "cursor": encode_cursor(next_cursor),
+                "data": export_events_batch(query, events, projection)
+            }) + "\n"
+
+            if next_cursor is None:
+                break
+            # end if
+
+            # Release the objects of the delivered batch
+            del events
+            batch += 1
+            try:
+                events, next_cursor = _get_events_batch(query, query_parameters["events"], batch_size, next_cursor)
+            except Exception as e:
+                yield json.dumps({
+                    "response": {
+                        "status": 500,
+                        "message": f"The streaming of the query was interrupted. The exception raised was: {str(e)}"
+                    }
+                }) + "\n"
+                break
+            # end try
+        # end while
+
+    response = Response(stream_with_context(generate()), status = 200, mimetype = "application/x-ndjson")
+
+    return response
+
+def export_events_batch(query_boa, events, projection, requested_entities = []):
+    """
+    Export a batch of events of the streaming mode.
+
+    :param query_boa: query object used to load the relations
+    :type query_boa: eboa.engine.query.Query
+    :param events: list of events
+    :type events: list
+    :param projection: dictionary with the list of fields and relations per entity
+    :type projection: dict
+    :param requested_entities: list of entities requested in the same query
+    :type requested_entities: list
+
+    :return: dictionary with the exported events
+    :rtype: dict
+    """
+    data = {}
+    export_items(data, query_boa, "events", events, projection, requested_entities)
+
+    return data
+
+def _get_events_batch(query_boa, event_filters, batch_size, cursor):
+    """
+    Obtain the next batch of events ordered by start using keyset pagination.
+
+    The events are ordered by start and UUID (as tie-breaker) and the
+    cursor holds the start and the UUID of the last delivered event, so
+    that ties are not repeated nor lost between batches.
+
+    :param query_boa: query object used to obtain the events
+    :type query_boa: eboa.engine.query.Query
+    :param event_filters: filters for Query.get_events
+    :type event_filters: dict
+    :param batch_size: maximum number of events of the batch
+    :type batch_size: int
+    :param cursor: position after which the batch starts (None for the first batch)
+    :type cursor: dict
+
+    :return: tuple with the events of the batch and the cursor for the next one (None if there are no more events)
+    :rtype: tuple
+    """
+
+    kwargs = dict(event_filters)
+    # The streaming mode controls the ordering and the size of the pages
+    for restriction in ["order_by", "limit", "offset"]:
+        kwargs.pop(restriction, None)
+    # end for
+    kwargs["limit"] = batch_size
+
+    keyset_cursor = None
+    if cursor is not None:
+        keyset_cursor = {"field": "start", "descending": False, "value": cursor["start"], "uuid": cursor["event_uuid"]}
+    # end if
+
+    events = query_by_keyset(lambda kwargs: query_boa.get_events(**kwargs), kwargs, stream_keyset, "start", False, keyset_cursor)
+
+    next_cursor = None
+    if len(events) == batch_size:
+        next_cursor = {
+            "start": events[-1].start.isoformat(),
+            "event_uuid": str(events[-1].event_uuid)
+        }
+    # end if
+
+    return events, next_cursor
+
+def encode_cursor(cursor):
+    """
+    Encode the keyset cursor into an opaque string.
+
+    :param cursor: keyset cursor
+    :type cursor: dict
+
+    :return: opaque cursor (None if there is no cursor)
+    :rtype: str
+    """
+    if cursor is None:
+        return None
+    # end if
+
+    return base64.urlsafe_b64encode(json.dumps(cursor, separators=(",", ":")).encode()).decode()
+
+def decode_cursor(opaque_cursor):
+    """
+    Decode the opaque cursor received from the client.
+
+    :param opaque_cursor: opaque cursor as returned by encode_cursor
+    :type opaque_cursor: str
+
+    :return: keyset cursor (None if there is no cursor)
+    :rtype: dict
+    """
+    if opaque_cursor is None or opaque_cursor == "":
+        return None
+    # end if
+
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(opaque_cursor.encode()).decode())
+        datetime.datetime.fromisoformat(cursor["start"])
+        if not isinstance(cursor["event_uuid"], str):
+            raise ValueError
+        # end if
+    except Exception:
+        raise ValueError(f"the cursor {opaque_cursor} is not valid")
+    # end try
+
+    return cursor
+
+@bp.route("/aggregate", methods=["GET", "POST"])
+def perform_aggregation():
+    """
+    API for obtaining aggregated statistics of the events of BOA.
+
+    The grouping and the statistics are computed by the database so
+    that only the aggregated result is transferred.
+
+    Expected parameters:
+    {"events": {<filters of Query.get_events>},
+     "group_by": [<dimensions of aggregation_dimensions and/or "bucket">],
+     "bucket_size": <size in seconds of the buckets by start>}
+    """
+
+    if not "Content-Type" in request.headers or request.headers["Content-Type"] != "application/json":
+        status = 400
+        response_json = {
+            "response": {
+                "status": status,
+                "message": "The method /query/aggregate needs to receive the JSON data with the relevant aggregation parameters"
+            },
+            "data": []
+        }
+        response = make_response(response_json, status)
+        response.mimetype = "application/json"
+    else:
+        aggregation_parameters = request.get_json()
+
+        try:
+            data = aggregate_events(aggregation_parameters.get("events") or {},
+                                    aggregation_parameters.get("group_by") or [],
+                                    aggregation_parameters.get("bucket_size"))
+        except Exception as e:
+            status = 400
+            response_json = {
+                "response": {
+                    "status": status,
+                    "message": f"The method /query/aggregate needs to receive correct filters and aggregation parameters. The exception raised was: {str(e)}. The traceback generated was: {traceback.format_exc()}"
+                },
+                "data": []
+            }
+            response = make_response(response_json, status)
+            response.mimetype = "application/json"
+        else:
+            status = 200
+            response_json = {
+                "response": {
+                    "status": status,
+                    "message": "Aggregation solved"
                 },
                 "data": data
             }
@@ -69,5 +820,628 @@ def perform_query():
             response.mimetype = "application/json"
         # end try
     # end if
-    
+
+    return response
+
+def aggregate_events(event_filters, group_by, bucket_size = None):
+    """
+    Obtain the number of events, the total, minimum and maximum duration
+    and the covered period per group of events. Events without the
+    related row of a dimension (e.g. without explicit reference) are
+    not taken into account when grouping by that dimension.
+
+    :param event_filters: filters with the syntax of Query.get_events
+    :type event_filters: dict
+    :param group_by: list of dimensions for grouping the events
+    :type group_by: list
+    :param bucket_size: size in seconds of the buckets by start (needed when grouping by "bucket")
+    :type bucket_size: float
+
+    :return: list of groups with their statistics
+    :rtype: list
+    """
+
+    if not isinstance(group_by, list):
+        raise ValueError("the group_by parameter has to be a list of dimensions")
+    # end if
+    wrong_dimensions = [dimension for dimension in group_by if dimension not in aggregation_dimensions and dimension != "bucket"]
+    if len(wrong_dimensions) > 0:
+        raise ValueError(f"the dimensions {wrong_dimensions} are not available. Available dimensions are: {list(aggregation_dimensions) + ['bucket']}")
+    # end if
+
+    duration = extract("epoch", Event.stop - Event.start)
+
+    group_columns = []
+    for dimension in group_by:
+        if dimension == "bucket":
+            if bucket_size is None or float(bucket_size) <= 0:
+                raise ValueError("the bucket_size parameter has to be a positive number of seconds when grouping by bucket")
+            # end if
+            bucket_size = float(bucket_size)
+            group_columns.append(func.to_timestamp(func.floor(extract("epoch", Event.start) / bucket_size) * bucket_size).label(dimension))
+        else:
+            group_columns.append(aggregation_dimensions[dimension][0].label(dimension))
+        # end if
+    # end for
+
+    query_boa = Query()
+    try:
+        sql_query = query_boa.session.query(*group_columns,
+                                            func.count(Event.event_uuid).label("count"),
+                                            func.sum(duration).label("duration"),
+                                            func.min(duration).label("min_duration"),
+                                            func.max(duration).label("max_duration"),
+                                            func.min(Event.start).label("start"),
+                                            func.max(Event.stop).label("stop")).select_from(Event)
+
+        joined_tables = []
+        tables_to_join = [aggregation_dimensions[dimension][1] for dimension in group_by if dimension != "bucket"]
+        sql_query, joined_tables = _join_event_tables(sql_query, tables_to_join, joined_tables)
+        sql_query, joined_tables = _filter_events(sql_query, event_filters, joined_tables)
+
+        if len(group_columns) > 0:
+            sql_query = sql_query.group_by(*group_columns).order_by(*group_columns)
+        # end if
+
+        data = []
+        for row in sql_query.all():
+            structure = row._asdict()
+            data.append({key: _serialize_value(structure[key]) for key in structure})
+        # end for
+    finally:
+        query_boa.close_session()
+    # end try
+
+    return data
+
+def _join_event_tables(sql_query, tables, joined_tables):
+    """
+    Join the tables related to the events which were not already joined.
+    """
+    for table in tables:
+        if table in joined_tables:
+            continue
+        # end if
+        if table == Gauge:
+            sql_query = sql_query.join(Gauge, Event.gauge_uuid == Gauge.gauge_uuid)
+        elif table == Source:
+            sql_query = sql_query.join(Source, Event.source_uuid == Source.source_uuid)
+        elif table == ExplicitRef:
+            sql_query = sql_query.join(ExplicitRef, Event.explicit_ref_uuid == ExplicitRef.explicit_ref_uuid)
+        elif table == ExplicitRefGrp:
+            sql_query, joined_tables = _join_event_tables(sql_query, [ExplicitRef], joined_tables)
+            sql_query = sql_query.join(ExplicitRefGrp, ExplicitRef.expl_ref_cnf_uuid == ExplicitRefGrp.expl_ref_cnf_uuid)
+        elif table == EventKey:
+            sql_query = sql_query.join(EventKey, Event.event_uuid == EventKey.event_uuid)
+        # end if
+        joined_tables.append(table)
+    # end for
+
+    return sql_query, joined_tables
+
+def _text_filter(column, text_filter):
+    """
+    Build the condition corresponding to a filter with the structure {"filter": <value>, "op": <operator>}.
+    """
+    op = text_filter["op"]
+    if op in arithmetic_operators:
+        return arithmetic_operators[op](column, text_filter["filter"])
+    elif op in text_operators:
+        return getattr(column, text_operators[op])(text_filter["filter"])
+    # end if
+
+    raise ValueError(f"the operator {op} is not available for the aggregation. Available operators are: {list(arithmetic_operators) + list(text_operators)}")
+
+def _arithmetic_operator(op):
+    """
+    Obtain the function of an arithmetic operator of the filters of dates and durations.
+    """
+    if op not in arithmetic_operators:
+        raise ValueError(f"the operator {op} is not available for the aggregation. Available operators are: {list(arithmetic_operators)}")
+    # end if
+
+    return arithmetic_operators[op]
+
+def _filter_events(sql_query, event_filters, joined_tables):
+    """
+    Apply the filters of the events with the syntax of Query.get_events.
+
+    Supported filters: event_uuids, source_uuids, sources, explicit_ref_uuids,
+    explicit_refs, gauge_uuids, gauge_names, gauge_systems, keys,
+    start_filters, stop_filters, ingestion_time_filters and duration_filters.
+    Any other filter of Query.get_events (e.g. value_filters or
+    explicit_ref_groups) and the regex operator are rejected, so that the
+    aggregation never covers other events than Query.get_events.
+    """
+
+    if not isinstance(event_filters, dict):
+        raise ValueError("the filters of the events have to be a dictionary with the syntax of Query.get_events")
+    # end if
+
+    text_filters = {
+        "event_uuids": (Event.event_uuid, None),
+        "source_uuids": (Event.source_uuid, None),
+        "sources": (Source.name, Source),
+        "explicit_ref_uuids": (Event.explicit_ref_uuid, None),
+        "explicit_refs": (ExplicitRef.explicit_ref, ExplicitRef),
+        "gauge_uuids": (Event.gauge_uuid, None),
+        "gauge_names": (Gauge.name, Gauge),
+        "gauge_systems": (Gauge.system, Gauge),
+        "keys": (EventKey.event_key, EventKey)
+    }
+    date_filters = {
+        "start_filters": Event.start,
+        "stop_filters": Event.stop,
+        "ingestion_time_filters": Event.ingestion_time
+    }
+
+    wrong_filters = [event_filter for event_filter in event_filters if event_filter not in text_filters and event_filter not in date_filters and event_filter != "duration_filters"]
+    if len(wrong_filters) > 0:
+        raise ValueError(f"the filters {wrong_filters} are not available for the aggregation. Available filters are: {list(text_filters) + list(date_filters) + ['duration_filters']}")
+    # end if
+
+    conditions = []
+    for event_filter in event_filters:
+        if event_filter in text_filters:
+            column, table = text_filters[event_filter]
+            if table is not None:
+                sql_query, joined_tables = _join_event_tables(sql_query, [table], joined_tables)
+            # end if
+            conditions.append(_text_filter(column, event_filters[event_filter]))
+        elif event_filter in date_filters:
+            for date_filter in event_filters[event_filter]:
+                conditions.append(_arithmetic_operator(date_filter["op"])(date_filters[event_filter], parser.parse(date_filter["date"])))
+            # end for
+        else:
+            for duration_filter in event_filters[event_filter]:
+                conditions.append(_arithmetic_operator(duration_filter["op"])(extract("epoch", Event.stop - Event.start), float(duration_filter["float"])))
+            # end for
+        # end if
+    # end for
+
+    if len(conditions) > 0:
+        sql_query = sql_query.filter(*conditions)
+    # end if
+
+    return sql_query, joined_tables
+
+@bp.route("/jobs", methods=["POST"])
+def submit_query_job():
+    """
+    API for submitting a query to be solved in background.
+
+    The query parameters are the same as for /query (without the
+    streaming mode). The result is spooled into compressed pages which
+    can be downloaded once the job is finished.
+    """
+
+    if not "Content-Type" in request.headers or request.headers["Content-Type"] != "application/json":
+        status = 400
+        message = "The method /query/jobs needs to receive the JSON data with the relevant query parameters"
+        data = {}
+    else:
+        query_parameters = request.get_json()
+
+        _start_query_jobs_cleanup()
+        remove_expired_query_jobs()
+
+        try:
+            if "stream" in query_parameters:
+                raise ValueError("the streaming mode is not available for the query jobs")
+            # end if
+            unknown_entities = [entity for entity in query_parameters if entity not in query_entities and entity not in query_options]
+            if len(unknown_entities) > 0:
+                raise ValueError(f"the entities {unknown_entities} are not available. Available entities are: {list(query_entities)}")
+            # end if
+            get_projection(query_parameters)
+        except Exception as e:
+            status = 400
+            message = f"The method /query/jobs needs to receive correct query parameters. The exception raised was: {str(e)}"
+            data = {}
+        else:
+            # The check of the concurrent jobs and the registration of the
+            # new one are atomic among the workers
+            with _lock_query_jobs_submission():
+                active_jobs = [job_status for job_status in get_query_jobs_statuses() if job_status["status"] in ["queued", "running"]]
+                if len(active_jobs) >= maximum_concurrent_query_jobs:
+                    status = 429
+                    message = f"The maximum number of concurrent query jobs ({maximum_concurrent_query_jobs}) has been reached. Try again later"
+                    data = {}
+                else:
+                    job_id = uuid.uuid4().hex
+                    os.makedirs(os.path.join(query_jobs_path, job_id))
+                    job_status = {
+                        "job_id": job_id,
+                        "status": "queued",
+                        "submission_time": datetime.datetime.now().isoformat(),
+                        "pages": 0,
+                        "executor": _lock_query_jobs_executor()
+                    }
+                    _write_query_job_status(job_status)
+                    query_jobs_executor.submit(run_query_job, job_id, query_parameters)
+
+                    status = 202
+                    message = "Query job submitted"
+                    data = job_status
+                # end if
+            # end with
+        # end try
+    # end if
+
+    response_json = {
+        "response": {
+            "status": status,
+            "message": message
+        },
+        "data": data
+    }
+    response = make_response(response_json, status)
+    response.mimetype = "application/json"
+
+    return response
+
+@bp.route("/jobs/<string:job_id>", methods=["GET"])
+def get_query_job(job_id):
+    """
+    API for obtaining the status of a query job.
+    """
+
+    _start_query_jobs_cleanup()
+    remove_expired_query_jobs()
+
+    job_status = _read_query_job_status(job_id)
+    if job_status is None:
+        status = 404
+        message = f"The query job {job_id} does not exist or it has expired"
+        data = {}
+    else:
+        status = 200
+        message = f"Query job {job_status['status']}"
+        data = job_status
+    # end if
+
+    response_json = {
+        "response": {
+            "status": status,
+            "message": message
+        },
+        "data": data
+    }
+    response = make_response(response_json, status)
+    response.mimetype = "application/json"
+
+    return response
+
+@bp.route("/jobs/<string:job_id>/pages/<int:page>", methods=["GET"])
+def download_query_job_page(job_id, page):
+    """
+    API for downloading a page of the result of a finished query job.
+
+    The page is delivered compressed (Content-Encoding: gzip) as it was
+    spooled to disk.
+    """
+
+    job_status = _read_query_job_status(job_id)
+    if job_status is None or job_status["status"] != "finished" or page < 0 or page >= job_status["pages"]:
+        status = 404
+        response_json = {
+            "response": {
+                "status": status,
+                "message": f"The page {page} of the query job {job_id} is not available"
+            },
+            "data": {}
+        }
+        response = make_response(response_json, status)
+        response.mimetype = "application/json"
+    else:
+        response = send_file(_get_query_job_page_path(job_id, page), mimetype = "application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    # end if
+
     return response
+
+@bp.route("/jobs/<string:job_id>", methods=["DELETE"])
+def delete_query_job(job_id):
+    """
+    API for removing a query job and its result.
+    """
+
+    job_status = _read_query_job_status(job_id)
+    if job_status is None:
+        status = 404
+        message = f"The query job {job_id} does not exist or it has expired"
+    elif job_status["status"] in ["queued", "running"]:
+        status = 409
+        message = f"The query job {job_id} is {job_status['status']} and cannot be removed"
+    else:
+        shutil.rmtree(os.path.join(query_jobs_path, job_id), ignore_errors = True)
+        status = 200
+        message = f"The query job {job_id} has been removed"
+    # end if
+
+    response_json = {
+        "response": {
+            "status": status,
+            "message": message
+        },
+        "data": {}
+    }
+    response = make_response(response_json, status)
+    response.mimetype = "application/json"
+
+    return response
+
+def run_query_job(job_id, query_parameters):
+    """
+    Solve the query of a job spooling the result into compressed pages.
+
+    The events are paged with the keyset pagination of the streaming
+    mode. Every other entity is spooled into its own page.
+
+    :param job_id: identifier of the job
+    :type job_id: str
+    :param query_parameters: dictionary with the parameters of the query
+    :type query_parameters: dict
+    """
+
+    job_status = _read_query_job_status(job_id)
+    job_status["status"] = "running"
+    job_status["start_time"] = datetime.datetime.now().isoformat()
+    _write_query_job_status(job_status)
+
+    query_boa = Query()
+    try:
+        projection = get_projection(query_parameters)
+        page = 0
+        requested_entities = [entity for entity in query_entities if entity in query_parameters]
+        for entity in requested_entities:
+            filters = query_parameters[entity]
+            if filters is None:
+                filters = {}
+            # end if
+            if entity == "events":
+                cursor = None
+                while True:
+                    events, cursor = _get_events_batch(query_boa, filters, query_jobs_page_size, cursor)
+                    _write_query_job_page(job_id, page, entity, export_events_batch(query_boa, events, projection, requested_entities))
+                    page += 1
+                    # Release the objects of the spooled page
+                    query_boa.session.expunge_all()
+                    if cursor is None:
+                        break
+                    # end if
+                # end while
+            else:
+                data = {}
+                items = getattr(query_boa, query_entities[entity][0])(**filters)
+                export_items(data, query_boa, entity, items, projection, requested_entities)
+                _write_query_job_page(job_id, page, entity, data)
+                page += 1
+                query_boa.session.expunge_all()
+            # end if
+            job_status["pages"] = page
+            _write_query_job_status(job_status)
+        # end for
+    except Exception as e:
+        job_status["status"] = "failed"
+        job_status["message"] = f"The exception raised was: {str(e)}. The traceback generated was: {traceback.format_exc()}"
+    else:
+        job_status["status"] = "finished"
+    finally:
+        query_boa.close_session()
+    # end try
+
+    job_status["finish_time"] = datetime.datetime.now().isoformat()
+    _write_query_job_status(job_status)
+
+    return
+
+def get_query_jobs_statuses():
+    """
+    Obtain the statuses of all the query jobs available on disk.
+
+    :return: list of statuses
+    :rtype: list
+    """
+
+    statuses = []
+    if os.path.isdir(query_jobs_path):
+        for job_id in os.listdir(query_jobs_path):
+            job_status = _read_query_job_status(job_id)
+            if job_status is not None:
+                statuses.append(job_status)
+            # end if
+        # end for
+    # end if
+
+    return statuses
+
+def remove_expired_query_jobs():
+    """
+    Remove the query jobs finished (or failed) before the TTL. Jobs
+    which did not finish within the TTL since their submission are also
+    removed.
+
+    Jobs queued or running in a pool which no longer exists (e.g.
+    because the worker was restarted) are marked as failed, so that they
+    do not count towards the maximum number of concurrent query jobs.
+    """
+
+    now = datetime.datetime.now()
+    for job_status in get_query_jobs_statuses():
+        if job_status["status"] in ["queued", "running"] and not _is_query_jobs_executor_alive(job_status.get("executor")):
+            job_status["status"] = "failed"
+            job_status["message"] = "The process executing the query job no longer exists"
+            job_status["finish_time"] = now.isoformat()
+            _write_query_job_status(job_status)
+        # end if
+        reference_time = job_status.get("finish_time", job_status["submission_time"])
+        if (now - datetime.datetime.fromisoformat(reference_time)).total_seconds() > query_jobs_ttl:
+            shutil.rmtree(os.path.join(query_jobs_path, job_status["job_id"]), ignore_errors = True)
+        # end if
+    # end for
+
+    return
+
+def _start_query_jobs_cleanup():
+    """
+    Start (once per process) the thread removing the expired query jobs
+    every query_jobs_cleanup_interval seconds, so that they are removed
+    even if no request of the query jobs arrives.
+    """
+    global query_jobs_cleanup_thread
+
+    with query_jobs_cleanup_thread_lock:
+        if query_jobs_cleanup_thread is None:
+            query_jobs_cleanup_thread = threading.Thread(target = _clean_query_jobs_periodically, daemon = True)
+            query_jobs_cleanup_thread.start()
+        # end if
+    # end with
+
+    return
+
+def _clean_query_jobs_periodically():
+    """
+    Remove the expired query jobs every query_jobs_cleanup_interval seconds.
+    """
+    while True:
+        time.sleep(query_jobs_cleanup_interval)
+        try:
+            remove_expired_query_jobs()
+        except Exception:
+            # The folder of the jobs could be unavailable, the next
+            # cycle will cover the expired jobs
+            pass
+        # end try
+    # end while
+
+def _lock_query_jobs_submission():
+    """
+    Take the lock serializing the submission of query jobs among the
+    processes.
+
+    :return: file holding the lock (the lock is released when it is closed)
+    :rtype: file
+    """
+    os.makedirs(query_jobs_path, exist_ok = True)
+    lock_file = open(os.path.join(query_jobs_path, ".submission.lock"), "w")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+    return lock_file
+
+def _get_query_jobs_executor_lock_path(executor_id):
+    """
+    Obtain the path to the lock file of a pool of query jobs.
+    """
+    return os.path.join(query_jobs_path, ".executors", f"{executor_id}.lock")
+
+def _lock_query_jobs_executor():
+    """
+    Take the lock of the pool of query jobs of this process (kept until
+    the process ends).
+
+    :return: identifier of the pool
+    :rtype: str
+    """
+    global query_jobs_executor_lock
+
+    if query_jobs_executor_lock is None:
+        lock_path = _get_query_jobs_executor_lock_path(query_jobs_executor_id)
+        os.makedirs(os.path.dirname(lock_path), exist_ok = True)
+        lock_file = open(lock_path, "w")
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        query_jobs_executor_lock = lock_file
+    # end if
+
+    return query_jobs_executor_id
+
+def _is_query_jobs_executor_alive(executor_id):
+    """
+    Check whether the pool of query jobs is held by a living process.
+
+    :param executor_id: identifier of the pool
+    :type executor_id: str
+
+    :return: True if the pool exists, False otherwise
+    :rtype: bool
+    """
+    if executor_id == query_jobs_executor_id:
+        return True
+    # end if
+    if not isinstance(executor_id, str) or os.path.basename(executor_id) != executor_id or executor_id in ["", ".", ".."]:
+        return False
+    # end if
+
+    lock_path = _get_query_jobs_executor_lock_path(executor_id)
+    try:
+        with open(lock_path) as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            # end try
+        # end with
+    except FileNotFoundError:
+        return False
+    # end try
+
+    # Nobody holds the lock anymore
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+    # end try
+
+    return False
+
+def _get_query_job_page_path(job_id, page):
+    """
+    Obtain the path to the file of a page of a query job.
+    """
+    return os.path.join(query_jobs_path, job_id, f"page_{page}.json.gz")
+
+def _write_query_job_page(job_id, page, entity, data):
+    """
+    Spool a page of the result of a query job into a compressed file.
+    """
+    page_path = _get_query_job_page_path(job_id, page)
+    with gzip.open(page_path + ".tmp", "wt") as page_file:
+        json.dump({"page": page, "entity": entity, "data": data}, page_file)
+    # end with
+    os.replace(page_path + ".tmp", page_path)
+
+    return
+
+def _write_query_job_status(job_status):
+    """
+    Write the status of a query job (atomically, so readers from other workers never see partial files).
+    """
+    status_path = os.path.join(query_jobs_path, job_status["job_id"], "status.json")
+    with open(status_path + ".tmp", "w") as status_file:
+        json.dump(job_status, status_file)
+    # end with
+    os.replace(status_path + ".tmp", status_path)
+
+    return
+
+def _read_query_job_status(job_id):
+    """
+    Read the status of a query job.
+
+    :return: status of the job (None if the job does not exist)
+    :rtype: dict
+    """
+    # Avoid accessing paths outside the folder of the jobs
+    if os.path.basename(job_id) != job_id or job_id in ["", ".", ".."]:
+        return None
+    # end if
+
+    try:
+        with open(os.path.join(query_jobs_path, job_id, "status.json")) as status_file:
+            job_status = json.load(status_file)
+        # end with
+    except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+        job_status = None
+    # end try
+
+    return job_status
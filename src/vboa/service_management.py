@@ -12,17 +12,33 @@ import shlex
 import json
 from tempfile import mkstemp
 import datetime
+import queue
+import threading
+import time
+import fcntl
 
 # Import BOA scheduler
 import sboa.scheduler.boa_scheduler as boa_scheduler
 
 # Import flask utilities
-from flask import Blueprint, flash, g, redirect, render_template, request, url_for, jsonify
+from flask import Blueprint, flash, g, redirect, render_template, request, url_for, jsonify, Response
 
 # Import rboa engine
 import rboa.engine.engine as rboa_engine
 from rboa.engine.engine import Engine
 
+# Import eboa utilities
+from eboa.engine.query import Query
+
+# Import datamodel
+from eboa.datamodel.sources import Source
+from eboa.datamodel.dim_signatures import DimSignature
+from eboa.datamodel.alerts import SourceAlert, EventAlert, AnnotationAlert, ExplicitRefAlert
+from rboa.datamodel.alerts import ReportAlert
+
+# Import SQLAlchemy utilities
+from sqlalchemy import func
+
 # Import vboa security
 from vboa.security import auth_required, roles_accepted
 
@@ -30,6 +46,14 @@ bp = Blueprint("service_management", __name__)
 
 version="1.0"
 
+# Default configuration for the status stream
+status_stream_interval = float(os.environ.get("VBOA_STATUS_STREAM_INTERVAL", 3))
+status_stream_keepalive = float(os.environ.get("VBOA_STATUS_STREAM_KEEPALIVE", 15))
+status_stream_queue_size = 100
+# Path (without extension) of the lock electing the producer of the
+# host and of the state shared with the rest of workers
+status_stream_path = os.environ.get("VBOA_STATUS_STREAM_PATH", "/dev/shm/vboa_status_stream")
+
 def execute_command(command):
     '''
     Method to execute a command
@@ -67,6 +91,13 @@ def check_orc_status():
     Check ORC status.
     """
 
+    return jsonify(get_orc_status())
+
+def get_orc_status():
+    """
+    Obtain the status of the processes of the ORC.
+    """
+
     orc_status = {}
 
     orc_scheduler_check = os.system("pgrep orcScheduler")
@@ -83,7 +114,7 @@ def check_orc_status():
         orc_status["ingester"] = {"status": "off"}
     # end if
     
-    return jsonify(orc_status)
+    return orc_status
 
 @bp.route("/switch-on-orc")
 @auth_required()
@@ -124,6 +155,13 @@ def check_cron_status():
     Check CRON status.
     """
 
+    return jsonify(get_cron_status())
+
+def get_cron_status():
+    """
+    Obtain the status of the CRON.
+    """
+
     cron_status = {}
 
     cron_check = os.system("pgrep crond")
@@ -133,7 +171,7 @@ def check_cron_status():
         cron_status["crond"] = {"status": "off"}
     # end if
     
-    return jsonify(cron_status)
+    return cron_status
 
 @bp.route("/switch-on-cron")
 @auth_required()
@@ -206,3 +244,307 @@ def switch_off_scheduler():
     command_status = execute_command(command)
     
     return jsonify(command_status)
+
+###
+# Status stream
+###
+class StatusProducer():
+    """
+    Producer of the events of the status stream shared by all the
+    connected clients of the host
+
+    Every worker of the web server keeps a background thread while it
+    has clients connected. Only one of these threads in the host (the
+    leader, elected through an exclusive lock on <path>.lock) checks
+    periodically the status of the ORC, the CRON and the scheduler and
+    looks for the sources and alerts ingested since the previous
+    check. The leader writes the last statuses and the last events,
+    numbered with a sequence, to the shared state file <path>.json.
+    The threads of all the workers (including the leader) tail this
+    file and publish the events not sent yet to their clients. Every
+    client receives the events through its own queue, which starts with
+    the last statuses. The thread stops, releasing the lock to the
+    threads of other workers, when there are no clients left.
+    """
+    def __init__(self, path = None):
+        self.subscribers = set()
+        self.statuses = {}
+        self.sequence = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.path = path or status_stream_path
+        self.leader_file = None
+        self.state = None
+
+    def subscribe(self):
+        """
+        Subscribe a client to the events of the stream.
+
+        :return: queue receiving the events
+        :rtype: queue.Queue
+        """
+        subscriber = queue.Queue(maxsize = status_stream_queue_size)
+        with self.lock:
+            for name in self.statuses:
+                subscriber.put_nowait(_format_status_event(name, self.statuses[name]))
+            # end for
+            self.subscribers.add(subscriber)
+            if self.thread is None:
+                self.thread = threading.Thread(target = self._run, daemon = True)
+                self.thread.start()
+            # end if
+        # end with
+
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        Unsubscribe a client from the events of the stream.
+
+        :param subscriber: queue receiving the events
+        :type subscriber: queue.Queue
+        """
+        with self.lock:
+            self.subscribers.discard(subscriber)
+        # end with
+
+    def publish(self, name, data):
+        """
+        Publish an event to all the subscribed clients.
+
+        The oldest event of the clients not consuming their events is
+        discarded to make room for the new one.
+
+        :param name: name of the event (orc, cron, scheduler, ingestions or alerts)
+        :type name: str
+        :param data: data of the event
+        :type data: dict
+        """
+        event = _format_status_event(name, data)
+        with self.lock:
+            for subscriber in self.subscribers:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+                    # end try
+                    subscriber.put_nowait(event)
+                # end try
+            # end for
+        # end with
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if len(self.subscribers) == 0:
+                    # The statuses are outdated when the stream is resumed
+                    self.thread = None
+                    self.statuses = {}
+                    self.sequence = None
+                    self._release_leadership()
+                    return
+                # end if
+            # end with
+
+            try:
+                if self._acquire_leadership():
+                    self._produce()
+                # end if
+                self._tail_state()
+            except Exception:
+                # The DDBB, the scheduler or the shared state could be
+                # unavailable, the next check will cover the changes
+                pass
+            # end try
+
+            time.sleep(status_stream_interval)
+        # end while
+
+    def _acquire_leadership(self):
+        """
+        Try to become the producer of the host (without waiting for the lock).
+
+        :return: True if this thread is the producer of the host, False otherwise
+        :rtype: bool
+        """
+        if self.leader_file is not None:
+            return True
+        # end if
+
+        leader_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(leader_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            leader_file.close()
+            return False
+        # end try
+        self.leader_file = leader_file
+
+        # Resume the state left by the previous producer keeping the
+        # sequence, which only grows for the threads tailing the state
+        state = self._read_state()
+        if state is None:
+            self.state = {"sequence": 0, "statuses": {}, "watermark": None, "events": [], "update_time": None}
+        else:
+            self.state = state
+            if state["update_time"] is None or time.time() - state["update_time"] > 2 * status_stream_interval:
+                # Nobody produced the state lately, so the statuses and
+                # the watermark are outdated
+                self.state.update({"statuses": {}, "watermark": None, "events": []})
+            # end if
+        # end if
+
+        return True
+
+    def _release_leadership(self):
+        if self.leader_file is not None:
+            # Closing the file releases the lock
+            self.leader_file.close()
+            self.leader_file = None
+            self.state = None
+        # end if
+
+    def _produce(self):
+        statuses = {
+            "orc": get_orc_status(),
+            "cron": get_cron_status(),
+            "scheduler": boa_scheduler.status_scheduler()
+        }
+        for name in statuses:
+            if self.state["statuses"].get(name) != statuses[name]:
+                self.state["statuses"][name] = statuses[name]
+                self._add_event(name, statuses[name])
+            # end if
+        # end for
+
+        self._check_new_ingestions_and_alerts()
+
+        self.state["update_time"] = time.time()
+        self._write_state()
+
+    def _add_event(self, name, data):
+        self.state["sequence"] += 1
+        self.state["events"].append({"sequence": self.state["sequence"], "name": name, "data": data})
+        # The threads tailing the state read it several times per check
+        del self.state["events"][:-status_stream_queue_size]
+
+    def _check_new_ingestions_and_alerts(self):
+        now = datetime.datetime.now()
+        if self.state["watermark"] is None:
+            self.state["watermark"] = now.isoformat()
+            return
+        # end if
+        watermark = datetime.datetime.fromisoformat(self.state["watermark"])
+
+        query_status = Query()
+        try:
+            sources = [name for (name,) in query_status.session.query(Source.name)
+                       .join(DimSignature, Source.dim_signature_uuid == DimSignature.dim_signature_uuid)
+                       .filter(Source.ingestion_time > watermark,
+                               Source.ingestion_time <= now,
+                               DimSignature.dim_signature != "BOA_HEALTH")]
+            number_of_alerts = 0
+            for alert_model in [SourceAlert, EventAlert, AnnotationAlert, ExplicitRefAlert, ReportAlert]:
+                number_of_alerts += query_status.session.query(func.count()).select_from(alert_model) \
+                                                        .filter(alert_model.ingestion_time > watermark,
+                                                                alert_model.ingestion_time <= now).scalar()
+            # end for
+        finally:
+            query_status.close_session()
+        # end try
+        self.state["watermark"] = now.isoformat()
+
+        if len(sources) > 0:
+            self._add_event("ingestions", {"number": len(sources), "names": sources[:10]})
+        # end if
+        if number_of_alerts > 0:
+            self._add_event("alerts", {"number": number_of_alerts})
+        # end if
+
+    def _read_state(self):
+        try:
+            with open(self.path + ".json") as state_file:
+                return json.load(state_file)
+            # end with
+        except (OSError, ValueError):
+            return None
+        # end try
+
+    def _write_state(self):
+        # Replace the file at once so the readers never get a partial state
+        (state_fd, state_path) = mkstemp(dir = os.path.dirname(self.path), prefix = os.path.basename(self.path) + ".")
+        with os.fdopen(state_fd, "w") as state_file:
+            json.dump(self.state, state_file)
+        # end with
+        os.replace(state_path, self.path + ".json")
+
+    def _tail_state(self):
+        """
+        Publish to the clients the events of the shared state not sent yet.
+        """
+        state = self._read_state()
+        if state is None:
+            return
+        # end if
+
+        if self.sequence is None or state["sequence"] < self.sequence:
+            # The stream starts with the last statuses
+            events = [{"name": name, "data": state["statuses"][name]} for name in state["statuses"]]
+        else:
+            events = [event for event in state["events"] if event["sequence"] > self.sequence]
+        # end if
+        for event in events:
+            if event["name"] in ["orc", "cron", "scheduler"]:
+                with self.lock:
+                    self.statuses[event["name"]] = event["data"]
+                # end with
+            # end if
+            self.publish(event["name"], event["data"])
+        # end for
+        self.sequence = state["sequence"]
+
+def _format_status_event(name, data):
+    """
+    Format an event of the status stream following the Server-Sent Events protocol.
+    """
+    return "event: {}\ndata: {}\n\n".format(name, json.dumps(data))
+
+# Producer of the events of the status stream of this worker
+status_producer = StatusProducer()
+
+@bp.route("/status-stream")
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator")
+def stream_status():
+    """
+    Stream the changes of the status of the ORC, the CRON and the
+    scheduler, the new ingestions and the new alerts (Server-Sent Events).
+    """
+
+    subscriber = status_producer.subscribe()
+
+    def generate():
+        try:
+            yield "retry: {}\n\n".format(int(status_stream_interval * 1000))
+            while True:
+                try:
+                    yield subscriber.get(timeout = status_stream_keepalive)
+                except queue.Empty:
+                    # Comment keeping the connection alive and detecting
+                    # the clients already disconnected
+                    yield ": keepalive\n\n"
+                # end try
+            # end while
+        finally:
+            status_producer.unsubscribe(subscriber)
+        # end try
+
+    response = Response(generate(), mimetype = "text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Avoid the buffering of the events by the front proxy
+    response.headers["X-Accel-Buffering"] = "no"
+
+    return response
@@ -1,3 +1,6 @@
+import * as toastr from "toastr/toastr.js";
+import * as query from "./query.js";
+
 
 /* Function to activate the search on every column */
 export function activate_search_on_columns() {
@@ -11,7 +14,7 @@ export function activate_search_on_columns() {
  
     // DataTable
     var tables = jQuery(".table-search").each( function (){
-        var table = $(this).DataTable({
+        var table = $(this).DataTable(Object.assign({
             responsive: true,
             aLengthMenu: [
                 [10, 25, 50, 100, 200, -1],
@@ -47,7 +50,7 @@ export function activate_search_on_columns() {
                     }
                 },
             ]
-        });
+        }, get_server_side_options(this)));
         // Apply the search
         table.columns().every( function () {
             var that = this;
@@ -74,7 +77,7 @@ export function activate_search_and_checkboxes_on_tables() {
 
     // DataTable
     var tables = jQuery(".table-search-checkboxes").each( function (){
-        var table = $(this).DataTable({
+        var table = $(this).DataTable(Object.assign({
             // Add scroll on X and Y axis
             scrollX: true,
             scrollY: "500px",
@@ -116,7 +119,7 @@ export function activate_search_and_checkboxes_on_tables() {
                 className: 'select-checkbox',
                 targets:   0
             } ]
-        });
+        }, get_server_side_options(this)));
         // Apply the search
         table.columns().every( function () {
             var that = this;
@@ -147,3 +150,88 @@ export function activate_search_and_checkboxes_on_tables() {
     })
  
 };
+
+/* Function to obtain the options of DataTables to process in the server
+ * the tables defining the attribute data-server-side-url. When the rows
+ * of the first page are already rendered in the table (attribute
+ * data-records-total), the first request is deferred. The pages are
+ * rendered in the server and requested with the filters of the query
+ * form which originated the table */
+function get_server_side_options(table) {
+
+    var url = $(table).data("server-side-url");
+    if (url == undefined){
+        return {};
+    }
+    var filters = $(table).data("filters");
+    var records_total = $(table).data("records-total");
+    var page_length = $(table).data("page-length");
+    var orderable_columns = $(table).data("orderable-columns");
+    var searchable_columns = $(table).data("searchable-columns");
+
+    // Searches are only available on the columns allowing them
+    jQuery("tfoot th", table).each(function (index){
+        if (!searchable_columns.includes(index)){
+            $(this).html("");
+        }
+    });
+
+    var columns = [];
+    jQuery("thead th", table).each(function (index){
+        columns.push({
+            data: index,
+            orderable: orderable_columns.includes(index),
+            searchable: searchable_columns.includes(index)
+        });
+    });
+
+    return {
+        serverSide: true,
+        processing: true,
+        searchDelay: 500,
+        deferLoading: records_total === undefined ? null : records_total,
+        iDisplayLength: page_length,
+        columns: columns,
+        createdRow: function (row, data) {
+            // Restore the classes of the cells rendered in the server
+            $(row).children("td").each(function (index){
+                if (data.classes && data.classes[index]){
+                    $(this).addClass(data.classes[index]);
+                }
+            });
+        },
+        ajax: function (data, callback, settings) {
+            var parameters = {
+                "draw": data.draw,
+                "start": data.start,
+                "length": data.length,
+                "order": data.order,
+                "search": data.search,
+                "columns": data.columns.map(column => ({"search": column.search})),
+                "records_total": records_total,
+                "filters": filters
+            };
+            query.request_info_json(url, function (response){
+                if (typeof response != "string"){
+                    toastr.error("The page of the table could not be obtained");
+                    callback({"draw": data.draw, "recordsTotal": records_total || 0, "recordsFiltered": 0, "data": []});
+                    return;
+                }
+                var page = JSON.parse(response);
+                var rows = [];
+                jQuery("<table>" + page["rows"] + "</table>").find("tbody > tr").each(function (){
+                    var row = {"classes": []};
+                    if (this.id){
+                        row["DT_RowId"] = this.id;
+                    }
+                    $(this).children("td").each(function (index){
+                        row[index] = this.innerHTML;
+                        row["classes"].push(this.className);
+                    });
+                    rows.push(row);
+                });
+                callback({"draw": page["draw"], "recordsTotal": page["recordsTotal"], "recordsFiltered": page["recordsFiltered"], "data": rows});
+            }, parameters);
+        }
+    };
+};
@@ -143,6 +143,26 @@ export function create_event_map(events_geometries, dom_id){
     graph.display_map(dom_id, polygons);
 };
 
+/* Function to create a map for the EBOA navigation view requesting
+ * the geometries of the events inside the view of the map (as a
+ * GeoJSON FeatureCollection) to the server every time the user pans
+ * or zooms (the UUIDs are kept by the server as a selection) */
+export function create_event_map_from_geojson(url, event_uuids, dom_id){
+
+    const request_geometries = query.create_selection_requester(url, event_uuids);
+    graph.display_map_by_viewport(dom_id, function(bbox, zoom, callback){
+        request_geometries({"bbox": bbox, "zoom": zoom}, function(feature_collection){
+            var polygons = [];
+            for (const feature of feature_collection["features"]){
+                polygons.push({"geojson": feature,
+                               "id": feature["id"],
+                               "tooltip": create_event_tooltip_text(feature["properties"])})
+            }
+            callback(polygons);
+        });
+    });
+};
+
 /*
 * Functions to build the needed structures for the graph library (data is already formated by the calling module)
 
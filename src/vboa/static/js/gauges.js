@@ -26,11 +26,15 @@ export function create_gauge_network(gauges, dom_id){
     for (const gauge of gauges){
 
         for (const gauge_link of gauge["gauges_linking"]){
+            var label = gauge_link["link_name"];
+            if ("number_of_links" in gauge_link){
+                label = label + " (" + gauge_link["number_of_links"] + ")";
+            }
             edges.push({
                 "from": gauge_link["gauge_uuid"],
                 "to": gauge["id"],
                 "arrows": "to",
-                "label": gauge_link["link_name"]
+                "label": label
             })
         }
         for (const gauge_link of gauge["gauges_linked"]){
@@ -6,17 +6,19 @@ import * as chartjs from "chart.js/dist/Chart.js";
 import olMap from 'ol/Map.js';
 import olView from 'ol/View.js';
 import WKT from 'ol/format/WKT.js';
+import GeoJSON from 'ol/format/GeoJSON.js';
 import olLayerTile from 'ol/layer/Tile.js';
 import olLayerVector from 'ol/layer/Vector.js';
 import olSourceOSM from 'ol/source/OSM.js';
 import olSourceVector from 'ol/source/Vector.js';
-import {fromLonLat} from 'ol/proj';
+import {fromLonLat, transformExtent} from 'ol/proj';
 import MousePosition from 'ol/control/MousePosition.js';
 import {createStringXY} from 'ol/coordinate.js';
 import {defaults as defaultControls} from 'ol/control.js';
 import {Fill, Stroke, Style, Text} from 'ol/style.js';
 import OLCesium from 'olcs/OLCesium.js';
 import * as toastr from "toastr/toastr.js";
+import * as query from "./query.js";
 import * as dates from "./dates.js";
 
 /* Function to display a pie chart given the id of the DOM where to
@@ -146,6 +148,11 @@ function show_bar_item_information(params, items, dom_id){
     }
 }
 
+/* Timelines and X-Time graphs displayed by container, and buttons
+ * shown instead of the graphs exceeding the threshold of elements */
+const displayed_graphs = {};
+const threshold_buttons = {};
+
 /* Function to display a timeline given the id of the DOM where to
  * attach it and the items to show with corresponding groups */
 export function display_timeline(dom_id, items, groups, options, show_hide = true){
@@ -193,6 +200,7 @@ export function display_timeline(dom_id, items, groups, options, show_hide = tru
         button.classList.add("btn-primary");
         button.innerHTML = "Number of elements (" + items.length + ") exceeded the threshold (" + threshold + "). Click here to show the timeline graph";
         button_container.appendChild(button);
+        threshold_buttons[dom_id] = button_container;
         button.onclick = function (){
             button.style.display = "none";
             container.style.display = "inherit";
@@ -234,6 +242,7 @@ function show_timeline(dom_id, items, container, groups_dataset, options, show_h
     
     var items_dataset = new DataSet(items)
     const timeline = new vis_timeline_graph2d.Timeline(timeline_container, items_dataset, groups_dataset, options);
+    displayed_graphs[dom_id] = timeline;
 
     timeline.on("click", function (params) {
         show_timeline_item_information(params, items, dom_id)
@@ -347,6 +356,7 @@ export function display_x_time(dom_id, items, groups, options, threshold = 1000)
         button.classList.add("btn-primary");
         button.innerHTML = "Number of elements (" + items.length + ") exceeded the threshold (" + threshold + "). Click here to show the timeline graph";
         button_container.appendChild(button);
+        threshold_buttons[dom_id] = button_container;
         button.onclick = function (){
             button.style.display = "none";
             container.style.display = "inherit";
@@ -360,6 +370,7 @@ export function display_x_time(dom_id, items, groups, options, threshold = 1000)
 function show_x_time(dom_id, items, container, groups, options){
 
     const x_time = new vis_timeline_graph2d.Graph2d(container, items, groups, options);
+    displayed_graphs[dom_id] = x_time;
 
     x_time.on("click", function (params) {
         show_x_time_item_information(params, items, dom_id)
@@ -390,22 +401,26 @@ function show_x_time_item_information(params, items, dom_id){
     }
 }
 
-/* Function to display a map given the id of the DOM where to
- * attach it and the polygons to show */
-export function display_map(dom_id, polygons){
-
-    /* Raster layer used to display world map */
-    var raster = new olLayerTile({
-        source: new olSourceOSM()
-    });
+/* Function to create the features of a map given the polygons to
+ * show (in WKT or GeoJSON) */
+function create_map_features(polygons){
 
     /* Format set to WKT (Well Known Text standard) */
     var format = new WKT();
 
+    /* Format for the geometries already serialized as GeoJSON by the server */
+    var geojson_format = new GeoJSON();
+
     /* Build features containing polygons */
     var features = []
     for (const polygon of polygons){
-        var feature = format.readFeature(polygon["polygon"], {
+        var polygon_format = format;
+        var polygon_value = polygon["polygon"];
+        if ("geojson" in polygon){
+            polygon_format = geojson_format;
+            polygon_value = polygon["geojson"];
+        }
+        var feature = polygon_format.readFeature(polygon_value, {
             dataProjection: 'EPSG:4326',
             featureProjection: 'EPSG:3857'
         });
@@ -449,6 +464,21 @@ export function display_map(dom_id, polygons){
         }
         features.push(feature);
     }
+
+    return features;
+}
+
+/* Function to display a map given the id of the DOM where to
+ * attach it and the polygons to show */
+export function display_map(dom_id, polygons){
+
+    /* Raster layer used to display world map */
+    var raster = new olLayerTile({
+        source: new olSourceOSM()
+    });
+
+    /* Build features containing polygons */
+    var features = create_map_features(polygons);
     
     var vector = new olLayerVector({
         source: new olSourceVector({
@@ -574,6 +604,42 @@ export function display_map(dom_id, polygons){
     }
 }
 
+/* Function to display a map given the id of the DOM where to attach
+ * it and a function requesting the polygons inside the view of the
+ * map. The function receives the extent of the view (minimum
+ * longitude, minimum latitude, maximum longitude, maximum latitude),
+ * the zoom level and the callback to call with the polygons. The
+ * polygons are requested again every time the user pans or zooms */
+export function display_map_by_viewport(dom_id, request_polygons){
+
+    display_map(dom_id, []);
+
+    const map = document.getElementById(dom_id + "-map").data;
+    var request_id = 0;
+
+    map.on("moveend", function() {
+        const view = map.getView();
+        const extent = transformExtent(view.calculateExtent(map.getSize()), 'EPSG:3857', 'EPSG:4326');
+        const zoom = view.getZoom();
+
+        request_id = request_id + 1;
+        const current_request_id = request_id;
+        request_polygons(extent, zoom, function(polygons){
+            /* Discard the polygons of views which are not the current one */
+            if (current_request_id != request_id){
+                return;
+            }
+            map.getLayers().forEach(function (layer) {
+                if (layer.get('name') === 'features') {
+                    const source = layer.getSource();
+                    source.clear();
+                    source.addFeatures(create_map_features(polygons));
+                }
+            });
+        });
+    });
+}
+
 function show_2dmap_item_information(event, map, dom_id){
 
     var feature = map.forEachFeatureAtPixel(event.pixel, function(feature) {
@@ -1145,3 +1211,142 @@ function drag_element(element) {
         document.onmousemove = null;
     }
 }
+
+/* Data for the graphs requested to the server by URL and items */
+const requested_graph_data = {};
+
+/* Function to create a graph once its container is shown. The data
+ * of the graph is requested to the server (once for all the graphs
+ * using the same URL and items) and prepared, if needed, before
+ * calling the function creating the graph. The items are the list of
+ * UUIDs or the parameters identifying them in the server (e.g. the
+ * filters of the query form) */
+export function create_graph_when_shown(url, uuids, dom_id, create_graph, prepare_data = null, name = null){
+
+    if (name){
+        /* The data is obtained when the graph is shown using the
+         * elements shown at that moment */
+        register_updatable_graph(name, dom_id, create_graph, null, uuids, prepare_data);
+    }
+
+    when_shown(dom_id, function(){
+        if (name){
+            uuids = updatable_graphs[dom_id]["uuids"];
+        }
+        const parameters = Array.isArray(uuids) ? {"uuids": uuids} : uuids;
+        const key = url + ";" + JSON.stringify(parameters);
+        if (!(key in requested_graph_data)){
+            requested_graph_data[key] = new Promise(function(resolve){
+                query.request_info_json(url, function(response){
+                    resolve(JSON.parse(response));
+                }, parameters);
+            });
+        }
+        requested_graph_data[key].then(function(data){
+            if (name){
+                updatable_graphs[dom_id]["data"] = data;
+            }
+            if (prepare_data){
+                data = prepare_data(data);
+            }
+            create_graph(data, dom_id);
+        });
+    });
+
+};
+
+/* Function to call the callback the first time the container is shown */
+function when_shown(dom_id, callback){
+
+    const container = document.getElementById(dom_id);
+    if (!container){
+        return;
+    }
+
+    if (!("IntersectionObserver" in window)){
+        callback();
+        return;
+    }
+
+    const observer = new IntersectionObserver(function(entries){
+        if (entries.some(entry => entry.isIntersecting)){
+            observer.disconnect();
+            callback();
+        }
+    });
+    observer.observe(container);
+
+};
+
+/* Graphs updated by the sliding views by container. The items of
+ * the graphs (with identifiers starting by the UUID of the element)
+ * are replaced by the ones received for the changed elements */
+const updatable_graphs = {};
+
+/* Function to register a graph to be updated by the sliding views.
+ * The data is null while the graph has not been shown */
+export function register_updatable_graph(name, dom_id, create_graph, data, uuids = [], prepare_data = null){
+
+    updatable_graphs[dom_id] = {
+        "name": name,
+        "create_graph": create_graph,
+        "data": data,
+        "uuids": uuids,
+        "prepare_data": prepare_data
+    };
+
+};
+
+/* Function to obtain the names of the graphs registered to be updated */
+export function get_updatable_graph_names(){
+
+    return Array.from(new Set(Object.values(updatable_graphs).map(updatable_graph => updatable_graph["name"])));
+
+};
+
+/* Function to update the graphs registered with the name replacing
+ * the items of the received UUIDs */
+export function update_graphs(name, items, replaced_uuids, uuids){
+
+    for (const dom_id in updatable_graphs){
+        const updatable_graph = updatable_graphs[dom_id];
+        if (updatable_graph["name"] != name){
+            continue;
+        }
+        updatable_graph["uuids"] = uuids;
+        if (updatable_graph["data"] == null){
+            continue;
+        }
+        updatable_graph["data"] = updatable_graph["data"].filter(item => !replaced_uuids.has(String(item["id"]).substring(0, 36))).concat(items);
+        redraw_graph(dom_id);
+    }
+
+};
+
+/* Function to create again a registered graph with its current data */
+function redraw_graph(dom_id){
+
+    const updatable_graph = updatable_graphs[dom_id];
+    const container = document.getElementById(dom_id);
+    if (!container){
+        return;
+    }
+
+    if (dom_id in displayed_graphs){
+        displayed_graphs[dom_id].destroy();
+        delete displayed_graphs[dom_id];
+    }
+    if (dom_id in threshold_buttons){
+        threshold_buttons[dom_id].remove();
+        delete threshold_buttons[dom_id];
+    }
+    container.innerHTML = "";
+    container.style.display = "";
+
+    var data = updatable_graph["data"];
+    if (updatable_graph["prepare_data"]){
+        data = updatable_graph["prepare_data"](data);
+    }
+    updatable_graph["create_graph"](data, dom_id);
+
+};
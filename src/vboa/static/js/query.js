@@ -80,6 +80,13 @@ export function request_info_json(url, callback, json, show_loader = false){
 
                 return callback(permission_denied_response);
             }
+            else if (this.readyState == 4 && this.status == 410){
+                var gone_response = {
+                    "return_code": 410
+                };
+
+                return callback(gone_response);
+            }
             else if (this.readyState == 4 && this.status == 500){
                 var internal_server_error_response = {
                     "return_code": 500
@@ -95,6 +102,42 @@ export function request_info_json(url, callback, json, show_loader = false){
     xmlhttp.send(JSON.stringify(json));
 }
 
+/* Function to create a requester of information about a selection of
+ * items kept by the server. The UUIDs of the items (or the parameters
+ * identifying them in the server, e.g. the filters of the query form)
+ * are only sent in the first request (and again if the server reports
+ * the selection as expired), the next requests send the identifier of
+ * the selection returned by the server */
+export function create_selection_requester(url, uuids){
+
+    var selection = null;
+
+    const request_selection_info = function(json, callback){
+        var parameters = Object.assign({}, json);
+        const sent_selection = selection;
+        if (sent_selection == null && Array.isArray(uuids)){
+            parameters["uuids"] = uuids;
+        }else if (sent_selection == null){
+            Object.assign(parameters, uuids);
+        }else{
+            parameters["selection"] = sent_selection;
+        }
+        request_info_json(url, function(response){
+            if (response["return_code"] == 410 && sent_selection != null){
+                selection = null;
+                request_selection_info(json, callback);
+            }
+            else if (typeof response === "string"){
+                const data = JSON.parse(response);
+                selection = data["selection"];
+                callback(data);
+            }
+        }, parameters);
+    };
+
+    return request_selection_info;
+}
+
 /* Function to request information to the EBOA by URL, using json for the parameters after asking for confirmation */
 export function request_info_json_after_confirmation(url, json, confirmation_message, cancel_message, show_loader = false){
 
@@ -0,0 +1,148 @@
+import * as query from "./query.js";
+import * as graph from "./graph.js";
+
+/* Function to update a sliding view periodically applying the changes
+ * obtained from the server since the last update (rows of the new and
+ * changed elements, elements removed from the window, graph items
+ * and summaries). The whole view is reloaded when the changes cannot be
+ * applied, when the previous request did not finish or after the
+ * number of updates indicated by the server */
+export function update_view_by_delta(delta_url, parameters, repeat_cycle, watermark, uuids, view_url){
+
+    const state = {
+        "watermark": watermark,
+        "uuids": new Set(uuids),
+        "pending": false,
+        "cycles": 0
+    };
+
+    setInterval(function(){
+        if (state["pending"]){
+            reload_view(view_url, parameters, repeat_cycle);
+            return;
+        }
+        state["pending"] = true;
+        const json = Object.assign({}, parameters, {
+            "watermark": state["watermark"],
+            "uuids": Array.from(state["uuids"])
+        });
+        query.request_info_json(delta_url, function(response){
+            state["pending"] = false;
+            if (typeof response != "string"){
+                reload_view(view_url, parameters, repeat_cycle);
+                return;
+            }
+            const delta = JSON.parse(response);
+            state["cycles"] += 1;
+            if (state["cycles"] >= delta["full_refresh_cycles"] || !apply_delta(delta, state)){
+                reload_view(view_url, parameters, repeat_cycle);
+                return;
+            }
+            state["watermark"] = delta["watermark"];
+        }, json);
+    }, repeat_cycle * 60 * 1000);
+
+};
+
+/* Function to reload the whole sliding view */
+function reload_view(view_url, parameters, repeat_cycle){
+
+    var href = view_url + "?"
+    for (const parameter of Object.keys(parameters)){
+        href = href + parameter + "=" + parameters[parameter] + "&";
+    }
+    href = href + "repeat_cycle=" + repeat_cycle;
+    window.location.href = href;
+
+};
+
+/* Function to apply the changes to the tables, graphs, summary
+ * counters and reporting header of the view. It returns false when
+ * the changes need a new structure of the page (sections appearing
+ * or getting empty) */
+function apply_delta(delta, state){
+
+    const replaced_uuids = new Set(delta["removed"].concat(delta["changed"]));
+    const content = new DOMParser().parseFromString(delta["content"], "text/html");
+
+    /* Sections not shown yet need the whole view */
+    for (const content_table of content.querySelectorAll("table[id]")){
+        if (content_table.querySelector("tbody > tr") && !document.getElementById(content_table.id)){
+            return false;
+        }
+    }
+
+    /* Replace the rows of the changed elements in the tables */
+    for (const table of jQuery.fn.dataTable.tables()){
+        const datatable = jQuery(table).DataTable();
+        datatable.rows(function(index, data, node){
+            return replaced_uuids.has(node.id);
+        }).remove();
+        const content_table = content.getElementById(table.id);
+        if (content_table){
+            for (const row of content_table.querySelectorAll("tbody > tr")){
+                datatable.row.add(document.importNode(row, true));
+            }
+        }
+        if (datatable.rows().count() == 0){
+            return false;
+        }
+        datatable.draw(false);
+    }
+
+    /* Update the elements shown */
+    for (const uuid of replaced_uuids){
+        state["uuids"].delete(uuid);
+    }
+    for (const uuid of delta["uuids"]){
+        state["uuids"].add(uuid);
+    }
+    if (state["uuids"].size == 0){
+        return false;
+    }
+
+    /* Update the graphs */
+    for (const name of graph.get_updatable_graph_names()){
+        graph.update_graphs(name, delta["graphs"][name] || [], replaced_uuids, Array.from(state["uuids"]));
+    }
+
+    /* Update the summary counters with the rows of the tables */
+    for (const counter of document.querySelectorAll("[data-sliding-count]")){
+        var count = 0;
+        for (const table_id of counter.dataset.slidingCount.split(" ")){
+            const table = document.getElementById(table_id);
+            if (table && jQuery.fn.dataTable.isDataTable(table)){
+                count += jQuery(table).DataTable().rows(counter.dataset.slidingCountRows || null).count();
+            }
+        }
+        if (count == 0){
+            return false;
+        }
+        counter.innerHTML = count;
+    }
+
+    /* Update the summaries obtained by the server, the whole view is
+     * needed when they appear or disappear */
+    const summaries = content.querySelectorAll("[data-sliding-summary]");
+    if (summaries.length != document.querySelectorAll("[data-sliding-summary]").length){
+        return false;
+    }
+    for (const summary of summaries){
+        const element = document.getElementById(summary.id);
+        if (!element){
+            return false;
+        }
+        element.innerHTML = summary.innerHTML;
+    }
+
+    /* Update the reporting period */
+    const reporting_start = document.getElementById("header-reporting-start");
+    const reporting_stop = document.getElementById("header-reporting-stop");
+    if (reporting_start && reporting_stop){
+        reporting_start.innerHTML = delta["reporting_start"];
+        reporting_stop.innerHTML = delta["reporting_stop"];
+    }
+
+    return true;
+
+};
@@ -436,14 +436,41 @@ function notify_reingestion(response){
     var json_response = JSON.parse(response);
     
     if (json_response["status"] == "OK"){
-        toastr.success("Reingestion operation has been completed");
+        // Follow the progress of the reingestion job
+        follow_reingestion_job(json_response["job_id"]);
     }else{
         toastr.error("Reingestion operation has failed with the following error (no changes are performed to the DDBB): " + json_response["error"]);
+
+        // Stop loader
+        var loader = document.getElementById("updating-page");
+        loader.className = ""
     }
+    
+}
 
-    // Stop loader
-    var loader = document.getElementById("updating-page");
-    loader.className = ""
+/* Period in milliseconds to check the status of the reingestion jobs */
+const reingestion_job_check_period = 2000;
+
+/* Function to follow the progress of a reingestion job until it finishes */
+function follow_reingestion_job(job_id){
+
+    queryFunctions.request_info_no_args("/eboa_nav/reingestion-jobs/" + job_id, function(response){
+        var job_status = JSON.parse(response);
+
+        if (job_status["status"] == "running"){
+            setTimeout(follow_reingestion_job, reingestion_job_check_period, job_id);
+            return;
+        }
+        else if (job_status["status"] == "finished"){
+            toastr.success("Reingestion operation has been completed");
+        }else{
+            toastr.error("Reingestion operation has failed with the following error (no changes are performed to the DDBB): " + job_status["error"]);
+        }
+
+        // Stop loader
+        var loader = document.getElementById("updating-page");
+        loader.className = ""
+    });
     
 }
 
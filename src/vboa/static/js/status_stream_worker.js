@@ -0,0 +1,81 @@
+/* Shared worker keeping a single connection to the status stream for
+ * all the pages of the browser and relaying the received events to
+ * them (loaded directly by the browser, not included in the bundle) */
+
+const event_names = ["orc", "cron", "scheduler", "ingestions", "alerts"];
+
+/* Events of the statuses sent to the pages when they connect */
+const status_event_names = ["orc", "cron", "scheduler"];
+
+/* Ports of the connected pages */
+const ports = new Set();
+
+/* Last statuses received from the status stream */
+const received_statuses = {};
+
+var status_stream = null;
+
+onconnect = function(connection){
+
+    const port = connection.ports[0];
+    port.onmessage = function(message){
+        if (message.data == "close"){
+            remove_port(port);
+        }else if (message.data == "open"){
+            add_port(port);
+        }
+    };
+    add_port(port);
+
+};
+
+function add_port(port){
+
+    ports.add(port);
+    for (const name of status_event_names){
+        if (name in received_statuses){
+            port.postMessage({"name": name, "data": received_statuses[name]});
+        }
+    }
+    if (status_stream == null){
+        open_status_stream();
+    }
+
+};
+
+/* The connection is closed when there are no pages left */
+function remove_port(port){
+
+    ports.delete(port);
+    if (ports.size == 0 && status_stream != null){
+        status_stream.close();
+        status_stream = null;
+        for (const name of status_event_names){
+            delete received_statuses[name];
+        }
+    }
+
+};
+
+function open_status_stream(){
+
+    status_stream = new EventSource("/status-stream");
+    for (const name of event_names){
+        status_stream.addEventListener(name, function(event){
+            const data = JSON.parse(event.data);
+            if (status_event_names.includes(name)){
+                received_statuses[name] = data;
+            }
+            for (const port of ports){
+                port.postMessage({"name": name, "data": data});
+            }
+        });
+    }
+    /* The server refused the connection (user without permissions) */
+    status_stream.onerror = function(){
+        if (status_stream != null && status_stream.readyState == EventSource.CLOSED){
+            status_stream = null;
+        }
+    };
+
+};
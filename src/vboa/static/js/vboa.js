@@ -38,6 +38,7 @@ import * as dates from "./dates.js";
 import * as datatableFunctions from "./datatables.js";
 import * as selectorFunctions from "./selectors.js";
 import * as screenshotFunctions from "./screenshots.js";
+import * as slidingViewFunctions from "./sliding_views.js";
 import * as renderFunctions from "./render.js";
 import * as nouislider from "nouislider/dist/nouislider.min.js";
 
@@ -185,6 +186,26 @@ jQuery(document).ready(function() {
     jQuery(".query-source-statuses").one("focusin", sourceFunctions.fill_statuses);
 });
 
+/* Request the number of elements matching the queries once the page is rendered */
+jQuery(document).ready(function() {
+    jQuery(".query-count").each(function(){
+        const count_node = this;
+        queryFunctions.request_info_json(count_node.dataset.countUrl, function(response){
+            if (typeof response != "string"){
+                count_node.innerHTML = "not available";
+                return;
+            }
+            const count = JSON.parse(response);
+            if (count["estimated"]){
+                count_node.innerHTML = "~" + count["count"].toLocaleString() + " (estimated)";
+            }
+            else{
+                count_node.innerHTML = count["count"].toLocaleString();
+            }
+        }, JSON.parse(count_node.dataset.filters));
+    });
+});
+
 /* Update view */
 export function update_view(parameters, repeat_cycle, view){
     setTimeout(function(){
@@ -197,6 +218,16 @@ export function update_view(parameters, repeat_cycle, view){
     }, repeat_cycle * 60 * 1000);
 }
 
+/* Update view applying the changes since the last update, reloading
+ * the view only when the changes cannot be applied */
+export function update_view_by_delta(delta_url, parameters, repeat_cycle, watermark, uuids, view){
+
+    jQuery(document).ready(function(){
+        slidingViewFunctions.update_view_by_delta(delta_url, parameters, repeat_cycle, watermark, uuids, view);
+    });
+
+}
+
 /* Functions to add more time filters (start-stop, validity start-validity stop, ingestion time, generation time) */
 export function add_start_stop(dom_id){
     dates.add_start_stop(dom_id);
@@ -460,6 +491,26 @@ export function create_event_network(events, dom_id){
 
 };
 
+/* Function to show a timeline of events requesting their data to the server when the timeline is shown */
+export function create_event_timeline_from_url(url, event_uuids, dom_id){
+
+    jQuery(document).ready(function(){
+        graph.create_graph_when_shown(url, event_uuids, dom_id, eventFunctions.create_event_timeline);
+    });
+
+};
+
+/* Function to show a network of events requesting their data to the server when the network is shown */
+export function create_event_network_from_url(url, links, dom_id){
+
+    jQuery(document).ready(function(){
+        graph.create_graph_when_shown(url, Array.from(new Set(links.map(link => link["id"]))), dom_id, eventFunctions.create_event_network, function(events){
+            return graph_data_with_links(events, links);
+        });
+    });
+
+};
+
 /* Function to show a map for events */
 export function create_event_map(geometries, dom_id){
 
@@ -469,6 +520,15 @@ export function create_event_map(geometries, dom_id){
 
 };
 
+/* Function to show a map for events requesting their geometries to the server */
+export function create_event_map_from_geojson(url, event_uuids, dom_id){
+
+    jQuery(document).ready(function(){
+        eventFunctions.create_event_map_from_geojson(url, event_uuids, dom_id);
+    });
+
+};
+
 /***
 * ALERTS *
 ***/
@@ -478,6 +538,7 @@ export function create_alert_timeline(alerts, dom_id){
 
     jQuery(document).ready(function(){
         alertFunctions.create_alert_timeline(alerts, dom_id);
+        graph.register_updatable_graph("alerts", dom_id, alertFunctions.create_alert_timeline, alerts);
     });
 
 };
@@ -500,6 +561,15 @@ export function create_annotation_map(geometries, dom_id){
 
 };
 
+/* Function to show a map for annotations requesting their geometries to the server */
+export function create_annotation_map_from_geojson(url, annotation_uuids, dom_id){
+
+    jQuery(document).ready(function(){
+        annotationFunctions.create_annotation_map_from_geojson(url, annotation_uuids, dom_id);
+    });
+
+};
+
 /***
 * EXPLICIT REFERENCES *
 ***/
@@ -513,6 +583,29 @@ export function create_er_network(ers, dom_id){
 
 };
 
+/* Function to show a network of explicit references requesting their data to the server when the network is shown */
+export function create_er_network_from_url(url, links, dom_id){
+
+    jQuery(document).ready(function(){
+        graph.create_graph_when_shown(url, Array.from(new Set(links.map(link => link["id"]))), dom_id, erFunctions.create_er_network, function(ers){
+            return graph_data_with_links(ers, links);
+        });
+    });
+
+};
+
+/* Function to join the data of the items with their links to the prime item */
+function graph_data_with_links(items, links){
+
+    const items_by_id = {};
+    for (const item of items){
+        items_by_id[item["id"]] = item;
+    }
+
+    return links.filter(link => link["id"] in items_by_id).map(link => Object.assign({}, items_by_id[link["id"]], link));
+
+};
+
 /***
 * GAUGES *
 ***/
@@ -576,6 +669,30 @@ export function create_source_generation_time_to_ingestion_time_xy(sources, dom_
 
 };
 
+/* Function to show the graphs of the sources requesting their data to
+ * the server when each graph is shown. graphs is an object
+ * associating the name of the graph (validity_timeline,
+ * generation_to_ingestion_timeline, number_events_xy,
+ * ingestion_duration_xy or generation_time_to_ingestion_time_xy) to
+ * the id of its container */
+export function create_source_graphs_from_url(url, source_uuids, graphs){
+
+    const create_graph_functions = {
+        "validity_timeline": sourceFunctions.create_source_validity_timeline,
+        "generation_to_ingestion_timeline": sourceFunctions.create_source_generation_to_ingestion_timeline,
+        "number_events_xy": sourceFunctions.create_source_number_events_xy,
+        "ingestion_duration_xy": sourceFunctions.create_source_ingestion_duration_xy,
+        "generation_time_to_ingestion_time_xy": sourceFunctions.create_source_generation_time_to_ingestion_time_xy
+    };
+
+    jQuery(document).ready(function(){
+        for (const graph_name in graphs){
+            graph.create_graph_when_shown(url, source_uuids, graphs[graph_name], create_graph_functions[graph_name], null, "sources");
+        }
+    });
+
+};
+
 export function submit_request_for_ingestion_management(form_id){
     sourceFunctions.submit_request_for_ingestion_management(form_id);
 }
@@ -594,6 +711,7 @@ export function create_report_validity_timeline(reports, dom_id){
 
     jQuery(document).ready(function(){
         reportFunctions.create_report_validity_timeline(reports, dom_id);
+        graph.register_updatable_graph("reports", dom_id, reportFunctions.create_report_validity_timeline, reports);
     });
 
 };
@@ -603,6 +721,7 @@ export function create_report_generation_duration_xy(reports, dom_id){
 
     jQuery(document).ready(function(){
         reportFunctions.create_report_generation_duration_xy(reports, dom_id);
+        graph.register_updatable_graph("reports", dom_id, reportFunctions.create_report_generation_duration_xy, reports);
     });
 
 };
@@ -690,10 +809,95 @@ export function render_page(page){
 
 };
 
+/***
+ * STATUS STREAM
+ ***/
+/* Callbacks subscribed to the events of the status stream */
+const status_stream_callbacks = {
+    "orc": [],
+    "cron": [],
+    "scheduler": [],
+    "ingestions": [],
+    "alerts": []
+};
+
+/* Last statuses received from the status stream */
+const received_statuses = {};
+
+/* Events of the status stream associated to the indicators of the BOA processes */
+const status_indicators = {
+    "orc-indicator": "orc",
+    "cron-indicator": "cron",
+    "sboa-indicator": "scheduler"
+};
+
+/* Function to subscribe to the events of the status stream (orc,
+ * cron, scheduler, ingestions and alerts) */
+export function subscribe_to_status_stream(event_name, callback){
+
+    status_stream_callbacks[event_name].push(callback);
+    if (event_name in received_statuses){
+        callback(received_statuses[event_name]);
+    }
+
+};
+
+function dispatch_status_event(event_name, data){
+
+    if (Object.values(status_indicators).includes(event_name)){
+        received_statuses[event_name] = data;
+    }
+    for (const callback of status_stream_callbacks[event_name]){
+        callback(data);
+    }
+
+};
+
+/* Function to connect to the status stream. The pages of the browser
+ * share the connection through a worker, when supported, to not
+ * exhaust the connections allowed by the browser to the server */
+function connect_to_status_stream(){
+
+    if (!document.getElementById("boa-management-menu")){
+        return;
+    }
+    if (typeof SharedWorker != "undefined"){
+        const worker = new SharedWorker("/static/js/status_stream_worker.js");
+        worker.port.onmessage = function(message){
+            dispatch_status_event(message.data["name"], message.data["data"]);
+        };
+        worker.port.start();
+        /* Stop receiving the events while the page is not shown */
+        window.addEventListener("pagehide", function(){
+            worker.port.postMessage("close");
+        });
+        window.addEventListener("pageshow", function(event){
+            if (event.persisted){
+                worker.port.postMessage("open");
+            }
+        });
+    }else{
+        const status_stream = new EventSource("/status-stream");
+        for (const event_name of Object.keys(status_stream_callbacks)){
+            status_stream.addEventListener(event_name, function(event){
+                dispatch_status_event(event_name, JSON.parse(event.data));
+            });
+        }
+    }
+
+};
+
+jQuery(document).ready(connect_to_status_stream);
+
 /* Functions for providing management on the BOA processes */
 function handle_return_status(parameters, command_status){
 
     document.getElementById(parameters["dom_indicator_id"]).className = "circle"
+    /* Show again the last status received for the process */
+    const event_name = status_indicators[parameters["dom_indicator_id"]];
+    if (event_name in received_statuses){
+        dispatch_status_event(event_name, received_statuses[event_name]);
+    }
     if (command_status["return_code"] == 0){
         var message = parameters["success_message"]
         if (command_status["output"]){
@@ -742,19 +946,7 @@ function switch_on_off_orc(parameters, orc_status) {
 };
 
 /* Function to update the status of the orc */
-setInterval(request_and_update_orc_status, 3000);
-
-request_and_update_orc_status(true)
-
-function request_and_update_orc_status(first = false) {
-
-    var boa_management_menu_node = document.getElementById("boa-management-menu");
-    if (boa_management_menu_node){
-        if (document.getElementById("boa-management-menu").getAttribute("aria-expanded") == "true" || first == true){
-            queryFunctions.request_info("/check-orc-status", update_orc_status, null);
-        }
-    }
-};
+subscribe_to_status_stream("orc", function(status){ update_orc_status(null, status); });
 
 function update_orc_status(parameters, orc_status) {
 
@@ -799,20 +991,7 @@ function switch_on_off_cron(parameters, cron_status) {
 };
 
 /* Function to update the status of the cron */
-setInterval(request_and_update_cron_status, 3000);
-
-request_and_update_cron_status(true)
-
-function request_and_update_cron_status(first = false) {
-
-    var boa_management_menu_node = document.getElementById("boa-management-menu");
-    if (boa_management_menu_node){
-        if (document.getElementById("boa-management-menu").getAttribute("aria-expanded") == "true" || first == true){
-            queryFunctions.request_info("/check-cron-status", update_cron_status, null);
-        }
-    }
-    
-};
+subscribe_to_status_stream("cron", function(status){ update_cron_status(null, status); });
 
 function update_cron_status(parameters, cron_status) {
 
@@ -886,20 +1065,7 @@ function switch_on_off_scheduler(parameters, scheduler_status) {
 };
 
 /* Function to update the status of the scheduler */
-setInterval(request_and_update_scheduler_status, 3000);
-
-request_and_update_scheduler_status(true)
-
-function request_and_update_scheduler_status(first = false) {
-
-    var boa_management_menu_node = document.getElementById("boa-management-menu");
-    if (boa_management_menu_node){
-        if (document.getElementById("boa-management-menu").getAttribute("aria-expanded") == "true" || first == true){
-            queryFunctions.request_info("/check-scheduler-status", update_scheduler_status, null);
-        }
-    }
-    
-};
+subscribe_to_status_stream("scheduler", function(status){ update_scheduler_status(null, status); });
 
 function update_scheduler_status(parameters, scheduler_status) {
 
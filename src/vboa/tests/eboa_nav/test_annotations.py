@@ -239,24 +239,8 @@ class TestAnnotationsTab(unittest.TestCase):
 
         annotation = self.session.query(Annotation).all()[0]
 
-        assert self.driver.execute_script('return annotations_geometries;') == [{
-            "id": str(annotation.annotation_uuid),
-            "annotation_cnf":{
-                    "name": "NAME_1",
-                    "system": "SYSTEM"
-            },
-            "explicit_reference": str(annotation.explicitRef.explicit_ref),
-            "explicit_ref_uuid": str(annotation.explicit_ref_uuid),
-            "ingestion_time": annotation.ingestion_time.isoformat().replace("T"," "),
-            "source": "source_1.xml",
-            "source_uuid": str(annotation.source_uuid),
-            "geometries": [
-                {
-                    "value": "POLYGON ((27.5923694065675 28.6897912912051, 27.8617502445779 28.6464983273278, 27.7690524083984 28.2803979779816, 27.4991925556512 28.322475522552, 27.5923694065675 28.6897912912051))",
-                    "name": "GEOMETRY"
-                }
-            ]
-        }]
+        # The geometries are requested to the server using the UUIDs of the annotations
+        assert self.driver.execute_script('return annotations_for_map;') == [str(annotation.annotation_uuid)]
 
         assert condition is True
 
@@ -9,6 +9,8 @@ module vboa
 import unittest
 import os
 import shutil
+import datetime
+import uuid
 import pdb
 
 # Configure environment to avoid authentication and authorization
@@ -22,12 +24,18 @@ importlib.reload(eboa_nav)
 # Import app
 from vboa import create_app
 
+# Import the functions of vboa
+import vboa.functions as functions
+
 # Import engine of the DDBB
 import eboa.engine.engine as eboa_engine
 from eboa.engine.engine import Engine
 from eboa.engine.query import Query
 from eboa.datamodel.base import Session, engine, Base
 
+# Import SQLAlchemy utilities
+from sqlalchemy import event
+
 class TestEboaNav(unittest.TestCase):
 
     def setUp(self):
@@ -63,6 +71,633 @@ class TestEboaNav(unittest.TestCase):
         response = self.client.get('/eboa_nav/')
         assert response.status_code == 200
 
+    def insert_source_with_events(self, source_name, number_of_events):
+
+        # Every event has its own gauge and explicit reference
+        data = {"operations": [{
+            "mode": "insert",
+            "dim_signature": {"name": "dim_signature",
+                              "exec": "exec",
+                              "version": "1.0"},
+            "source": {"name": source_name,
+                       "reception_time": "2018-07-05T02:07:03",
+                       "generation_time": "2018-07-05T02:07:03",
+                       "validity_start": "2018-06-05T02:07:03",
+                       "validity_stop": "2018-06-05T08:07:36"},
+            "events": [{
+                "explicit_reference": source_name + "_EXPLICIT_REFERENCE_" + str(i),
+                "gauge": {"name": source_name + "_GAUGE_NAME_" + str(i),
+                          "system": "GAUGE_SYSTEM",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T04:07:03",
+                "stop": "2018-06-05T06:07:36"
+            } for i in range(number_of_events)]
+        }]}
+
+        exit_status = self.engine_eboa.treat_data(data)
+        assert len([item for item in exit_status if item["status"] != eboa_engine.exit_codes["OK"]["status"]]) == 0
+
+        return self.query_eboa.get_sources(names = {"filter": source_name, "op": "=="})[0].source_uuid
+
+    def count_statements_rendering(self, route):
+
+        statements = []
+        def register_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        # end def
+
+        event.listen(engine, "before_cursor_execute", register_statement)
+        try:
+            response = self.client.get(route)
+        finally:
+            event.remove(engine, "before_cursor_execute", register_statement)
+        # end try
+        assert response.status_code == 200
+
+        return len(statements)
+
+    def test_number_of_statements_rendering_events(self):
+
+        source_uuid_few_events = self.insert_source_with_events("source_few_events.xml", 2)
+        source_uuid_many_events = self.insert_source_with_events("source_many_events.xml", 50)
+
+        statements_few_events = self.count_statements_rendering("/eboa_nav/query-events-by-source-uuid/" + str(source_uuid_few_events))
+        statements_many_events = self.count_statements_rendering("/eboa_nav/query-events-by-source-uuid/" + str(source_uuid_many_events))
+
+        # The relationships used by the page are loaded in bulk, so
+        # the number of statements does not depend on the number of rows
+        assert statements_many_events == statements_few_events
+
+        assert statements_many_events <= 10
+
+    def test_query_events_geometries(self):
+
+        data = {"operations": [{
+            "mode": "insert",
+            "dim_signature": {"name": "dim_signature",
+                              "exec": "exec",
+                              "version": "1.0"},
+            "source": {"name": "source.xml",
+                       "reception_time": "2018-07-05T02:07:03",
+                       "generation_time": "2018-07-05T02:07:03",
+                       "validity_start": "2018-06-05T02:07:03",
+                       "validity_stop": "2018-06-05T08:07:36"},
+            "events": [{
+                "explicit_reference": "EXPLICIT_REFERENCE",
+                "gauge": {"name": "GAUGE_NAME",
+                          "system": "GAUGE_SYSTEM",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T04:07:03",
+                "stop": "2018-06-05T06:07:36",
+                "values": [{"name": "footprint",
+                            "type": "geometry",
+                            "value": "10.0 20.0 12.0 20.0 12.0 22.0 10.0 22.0 10.0 20.0"}]
+            }]
+        }]}
+
+        exit_status = self.engine_eboa.treat_data(data)
+        assert len([item for item in exit_status if item["status"] != eboa_engine.exit_codes["OK"]["status"]]) == 0
+
+        event = self.query_eboa.get_events()[0]
+
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"uuids": [str(event.event_uuid)]})
+        assert response.status_code == 200
+        assert response.mimetype == "application/geo+json"
+
+        feature_collection = response.json
+        assert feature_collection["type"] == "FeatureCollection"
+        assert len(feature_collection["features"]) == 1
+
+        feature = feature_collection["features"][0]
+        assert feature["id"] == str(event.event_uuid) + "_0"
+        assert feature["geometry"]["type"] == "Polygon"
+        assert feature["geometry"]["coordinates"][0][0] == [10.0, 20.0]
+        assert feature["properties"]["name"] == "footprint"
+        assert feature["properties"]["gauge"] == {"name": "GAUGE_NAME", "system": "GAUGE_SYSTEM"}
+        assert feature["properties"]["explicit_reference"] == "EXPLICIT_REFERENCE"
+        assert feature["properties"]["source"] == "source.xml"
+
+        # Simplified geometries keep the same features
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"uuids": [str(event.event_uuid)], "zoom": 2})
+        assert response.status_code == 200
+        assert len(response.json["features"]) == 1
+
+        # Only the geometries intersecting the view of the map are returned
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"uuids": [str(event.event_uuid)], "bbox": [0, 0, 11, 21], "zoom": 5})
+        assert response.status_code == 200
+        assert len(response.json["features"]) == 1
+
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"uuids": [str(event.event_uuid)], "bbox": [-50, -50, -40, -40], "zoom": 5})
+        assert response.status_code == 200
+        assert len(response.json["features"]) == 0
+
+        # Views of the map showing several worlds
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"uuids": [str(event.event_uuid)], "bbox": [360, 0, 371, 21], "zoom": 5})
+        assert response.status_code == 200
+        assert len(response.json["features"]) == 1
+
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"uuids": [str(event.event_uuid)], "bbox": [0, 0, 11], "zoom": 5})
+        assert response.status_code == 400
+
+        # The next requests of the map refer to the selection kept by the server
+        selection = feature_collection["selection"]
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"selection": selection, "bbox": [0, 0, 11, 21], "zoom": 5})
+        assert response.status_code == 200
+        assert len(response.json["features"]) == 1
+        assert response.json["selection"] == selection
+
+        # Expired selections
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"selection": "not_existing_selection", "zoom": 5})
+        assert response.status_code == 410
+
+    def test_query_events_geometries_without_explicit_ref(self):
+
+        data = {"operations": [{
+            "mode": "insert",
+            "dim_signature": {"name": "dim_signature",
+                              "exec": "exec",
+                              "version": "1.0"},
+            "source": {"name": "source.xml",
+                       "reception_time": "2018-07-05T02:07:03",
+                       "generation_time": "2018-07-05T02:07:03",
+                       "validity_start": "2018-06-05T02:07:03",
+                       "validity_stop": "2018-06-05T08:07:36"},
+            "events": [{
+                "gauge": {"name": "GAUGE_NAME",
+                          "system": "GAUGE_SYSTEM",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T04:07:03",
+                "stop": "2018-06-05T06:07:36",
+                "values": [{"name": "footprint",
+                            "type": "geometry",
+                            "value": "10.0 20.0 12.0 20.0 12.0 22.0 10.0 22.0 10.0 20.0"}]
+            }]
+        }]}
+
+        exit_status = self.engine_eboa.treat_data(data)
+        assert len([item for item in exit_status if item["status"] != eboa_engine.exit_codes["OK"]["status"]]) == 0
+
+        event = self.query_eboa.get_events()[0]
+
+        response = self.client.post("/eboa_nav/query-events-geometries", json = {"uuids": [str(event.event_uuid)]})
+        assert response.status_code == 200
+
+        feature = response.json["features"][0]
+        assert feature["properties"]["explicit_reference"] == ""
+        assert feature["properties"]["explicit_ref_uuid"] == ""
+
+    def test_get_bbox_envelopes(self):
+
+        assert functions.get_bbox_envelopes([0, 0, 10, 10]) == [[0, 0, 10, 10]]
+
+        assert functions.get_bbox_envelopes([-200, -100, 200, 100]) == None
+
+        assert functions.get_bbox_envelopes([170, 0, 190, 10]) == [[170, 0, 180, 10], [-180, 0, -170, 10]]
+
+        assert functions.get_bbox_envelopes([-370, 0, -350, 10]) == [[-10, 0, 10, 10]]
+
+    def test_query_geometries_wrong_entity(self):
+
+        response = self.client.post("/eboa_nav/query-sources-geometries", json = {"uuids": []})
+        assert response.status_code == 400
+
+    def test_archive_metadata_cache(self):
+
+        queried_sources = []
+        def query_metadata_source(source_name):
+            queried_sources.append(source_name)
+            if source_name == "source.xml":
+                return {"filename": "source.xml", "path": "/archive", "remote_archive": True}
+            # end if
+            return {"remote_archive": True}
+        # end def
+
+        original_query_metadata_source = eboa_nav._query_metadata_source
+        eboa_nav._query_metadata_source = query_metadata_source
+        eboa_nav.invalidate_metadata_sources(["source.xml", "missing_source.xml"])
+        try:
+            eboa_nav.prefetch_metadata_sources(["source.xml", "missing_source.xml"])
+
+            assert eboa_nav._get_metadata_source("source.xml")["path"] == "/archive"
+            assert "path" not in eboa_nav._get_metadata_source("missing_source.xml")
+            assert sorted(queried_sources) == ["missing_source.xml", "source.xml"]
+
+            # Negative results expire sooner than the found sources
+            assert eboa_nav.archive_metadata_cache["missing_source.xml"][0] < eboa_nav.archive_metadata_cache["source.xml"][0]
+
+            eboa_nav.invalidate_metadata_sources(["source.xml"])
+            eboa_nav._get_metadata_source("source.xml")
+            assert len(queried_sources) == 3
+
+            # The prefetches do not exceed the limit of lookups in progress
+            eboa_nav.invalidate_metadata_sources(["source.xml"])
+            original_prefetch_limit = eboa_nav.archive_metadata_prefetch_limit
+            eboa_nav.archive_metadata_prefetch_limit = 0
+            try:
+                eboa_nav.prefetch_metadata_sources(["source.xml"])
+            finally:
+                eboa_nav.archive_metadata_prefetch_limit = original_prefetch_limit
+            # end try
+            assert "source.xml" not in eboa_nav.archive_metadata_lookups
+        finally:
+            eboa_nav._query_metadata_source = original_query_metadata_source
+            eboa_nav.invalidate_metadata_sources(["source.xml", "missing_source.xml"])
+        # end try
+
+    def test_reingestion_job_status(self):
+
+        job_status = {
+            "job_id": "JOB_ID",
+            "status": "running",
+            "submission_time": datetime.datetime.now().isoformat(),
+            "sources": {"source.xml": {"status": "pending"}},
+            "executor": eboa_nav._lock_reingestion_jobs_executor()
+        }
+        os.makedirs(eboa_nav.reingestion_jobs_path, exist_ok = True)
+        eboa_nav._write_reingestion_job_status(job_status)
+
+        eboa_nav._update_reingestion_job_status(job_status, source_name = "source.xml", status = "failed", error = "ERROR")
+
+        response = self.client.get("/eboa_nav/reingestion-jobs/JOB_ID")
+        assert response.status_code == 200
+        assert response.json["status"] == "running"
+        assert response.json["sources"]["source.xml"] == {"status": "failed", "error": "ERROR"}
+
+        # Jobs of processes no longer existing are failed
+        job_status["executor"] = uuid.uuid4().hex
+        eboa_nav._write_reingestion_job_status(job_status)
+
+        response = self.client.get("/eboa_nav/reingestion-jobs/JOB_ID")
+        assert response.status_code == 200
+        assert response.json["status"] == "failed"
+
+        # Expired jobs are removed
+        job_status["submission_time"] = "2018-06-05T04:07:03"
+        eboa_nav._write_reingestion_job_status(job_status)
+        eboa_nav.remove_expired_reingestion_jobs()
+
+        response = self.client.get("/eboa_nav/reingestion-jobs/JOB_ID")
+        assert response.status_code == 404
+
+    def test_reingestion_job_failing_setup(self):
+
+        job_status = {
+            "job_id": "JOB_ID_SETUP",
+            "status": "running",
+            "submission_time": datetime.datetime.now().isoformat(),
+            "sources": {"source.xml": {"status": "pending"}},
+            "executor": eboa_nav._lock_reingestion_jobs_executor()
+        }
+        os.makedirs(eboa_nav.reingestion_jobs_path, exist_ok = True)
+        eboa_nav._write_reingestion_job_status(job_status)
+
+        # The temporal folder cannot be created
+        def temporary_directory(*args, **kwargs):
+            raise OSError("No space left on device")
+        # end def
+
+        original_temporary_directory = eboa_nav.tempfile.TemporaryDirectory
+        eboa_nav.tempfile.TemporaryDirectory = temporary_directory
+        try:
+            eboa_nav.run_reingestion_job(job_status)
+        finally:
+            eboa_nav.tempfile.TemporaryDirectory = original_temporary_directory
+        # end try
+
+        response = self.client.get("/eboa_nav/reingestion-jobs/JOB_ID_SETUP")
+        assert response.status_code == 200
+        assert response.json["status"] == "failed"
+
+    def test_reingestion_job_failing_retrieval(self):
+
+        self.insert_source_with_events("source.xml", 1)
+        self.insert_source_with_events("missing_source.xml", 1)
+
+        job_status = {
+            "job_id": "JOB_ID_RETRIEVAL",
+            "status": "running",
+            "submission_time": datetime.datetime.now().isoformat(),
+            "sources": {"source.xml": {"status": "pending"}, "missing_source.xml": {"status": "pending"}},
+            "executor": eboa_nav._lock_reingestion_jobs_executor()
+        }
+        os.makedirs(eboa_nav.reingestion_jobs_path, exist_ok = True)
+        eboa_nav._write_reingestion_job_status(job_status)
+
+        # Only source.xml is available in the archive
+        commands = []
+        def execute_command(command):
+            commands.append(command)
+            return b"", b""
+        # end def
+
+        original_execute_command = eboa_nav._execute_command
+        original_get_metadata_source = eboa_nav._get_metadata_source
+        original_temporary_directory = eboa_nav.tempfile.TemporaryDirectory
+        eboa_nav._execute_command = execute_command
+        eboa_nav._get_metadata_source = lambda source_name: {"filename": source_name, "path": "/archive", "remote_archive": False} if source_name == "source.xml" else {}
+        eboa_nav.tempfile.TemporaryDirectory = lambda *args, **kwargs: original_temporary_directory(prefix = ".")
+        try:
+            eboa_nav.run_reingestion_job(job_status)
+        finally:
+            eboa_nav._execute_command = original_execute_command
+            eboa_nav._get_metadata_source = original_get_metadata_source
+            eboa_nav.tempfile.TemporaryDirectory = original_temporary_directory
+        # end try
+
+        response = self.client.get("/eboa_nav/reingestion-jobs/JOB_ID_RETRIEVAL")
+        assert response.status_code == 200
+        assert response.json["status"] == "failed"
+        assert response.json["sources"]["source.xml"]["status"] == "retrieved"
+
+        # No source is removed from ORC nor from BOA
+        assert len([command for command in commands if command.startswith("orcQueueInput")]) == 0
+        assert len(self.query_eboa.get_sources()) == 2
+
+    def test_query_graph_data(self):
+
+        source_uuid = self.insert_source_with_events("source.xml", 2)
+
+        response = self.client.post("/eboa_nav/query-sources-graph-data", json = {"uuids": [str(source_uuid)]})
+        assert response.status_code == 200
+        assert len(response.json) == 1
+        assert response.json[0]["id"] == str(source_uuid)
+        assert response.json[0]["number_of_events"] == "2"
+        assert response.json[0]["validity_start"] == "2018-06-05T02:07:03"
+
+        events = self.query_eboa.get_events()
+        response = self.client.post("/eboa_nav/query-events-graph-data", json = {"uuids": [str(event.event_uuid) for event in events]})
+        assert response.status_code == 200
+        assert sorted([event["gauge"]["name"] for event in response.json]) == ["source.xml_GAUGE_NAME_0", "source.xml_GAUGE_NAME_1"]
+        assert response.json[0]["source"] == "source.xml"
+        assert response.json[0]["start"] == "2018-06-05T04:07:03"
+
+        explicit_refs = self.query_eboa.get_explicit_refs()
+        response = self.client.post("/eboa_nav/query-explicit-refs-graph-data", json = {"uuids": [str(explicit_ref.explicit_ref_uuid) for explicit_ref in explicit_refs]})
+        assert response.status_code == 200
+        assert sorted([explicit_ref["explicit_reference"] for explicit_ref in response.json]) == ["source.xml_EXPLICIT_REFERENCE_0", "source.xml_EXPLICIT_REFERENCE_1"]
+        assert response.json[0]["group"] == "N/A"
+
+        response = self.client.post("/eboa_nav/query-gauges-graph-data", json = {"uuids": []})
+        assert response.status_code == 400
+
+        response = self.client.post("/eboa_nav/query-events-graph-data", json = {})
+        assert response.status_code == 400
+
+    def test_query_datatables(self):
+
+        self.insert_source_with_events("source.xml", 3)
+
+        filters = {"gauge_name": [""], "gauge_system": [""], "dim_signature": [""], "order_by": [""], "limit": ["100"], "offset": [""]}
+        parameters = {"draw": 2, "start": 1, "length": 1, "order": [{"column": 0, "dir": "desc"}], "search": {"value": ""}, "columns": [{"search": {"value": ""}}] * 4, "records_total": 3, "filters": filters}
+
+        # Second page ordered by name in descending order
+        response = self.client.post("/eboa_nav/datatables/gauges", json = parameters)
+        assert response.status_code == 200
+        assert response.json["draw"] == 2
+        assert response.json["recordsTotal"] == 3
+        assert response.json["recordsFiltered"] == 3
+        assert response.json["rows"].count("<tr>") == 1
+        assert "source.xml_GAUGE_NAME_1" in response.json["rows"]
+
+        # Search on the column of the name
+        parameters["start"] = 0
+        parameters["length"] = 10
+        parameters["columns"] = [{"search": {"value": "NAME_2"}}] + [{"search": {"value": ""}}] * 3
+        response = self.client.post("/eboa_nav/datatables/gauges", json = parameters)
+        assert response.status_code == 200
+        assert response.json["recordsFiltered"] == 1
+        assert "source.xml_GAUGE_NAME_2" in response.json["rows"]
+
+        # The search on the column is added to the pattern of the query form over the same column
+        parameters["filters"] = dict(filters, gauge_name = ["%GAUGE%"], gauge_name_operator = ["like"])
+        response = self.client.post("/eboa_nav/datatables/gauges", json = parameters)
+        assert response.status_code == 200
+        assert response.json["recordsFiltered"] == 1
+        assert "source.xml_GAUGE_NAME_2" in response.json["rows"]
+
+        # The wildcards of the searched text are matched literally
+        parameters["filters"] = filters
+        parameters["columns"] = [{"search": {"value": "NAME%2"}}] + [{"search": {"value": ""}}] * 3
+        response = self.client.post("/eboa_nav/datatables/gauges", json = parameters)
+        assert response.status_code == 200
+        assert response.json["recordsFiltered"] == 0
+
+        parameters["columns"] = [{"search": {"value": "_NAME_"}}] + [{"search": {"value": ""}}] * 3
+        response = self.client.post("/eboa_nav/datatables/gauges", json = parameters)
+        assert response.status_code == 200
+        assert response.json["recordsFiltered"] == 3
+
+        # The page does not exceed the window requested in the query form
+        parameters["columns"] = [{"search": {"value": ""}}] * 4
+        parameters["filters"] = dict(filters, limit = ["2"])
+        response = self.client.post("/eboa_nav/datatables/gauges", json = parameters)
+        assert response.json["rows"].count("<tr>") == 2
+
+        # The global search applies to every searchable column
+        parameters["filters"] = filters
+        parameters["search"] = {"value": "SYSTEM"}
+        response = self.client.post("/eboa_nav/datatables/gauges", json = parameters)
+        assert response.status_code == 200
+        assert response.json["recordsFiltered"] == 3
+        assert response.json["rows"].count("<tr>") == 3
+
+        # Tables rendered without rows do not know the number of rows
+        parameters["search"] = {"value": ""}
+        parameters["length"] = 2
+        del parameters["records_total"]
+        response = self.client.post("/eboa_nav/datatables/gauges", json = parameters)
+        assert response.status_code == 200
+        assert response.json["recordsTotal"] == 3
+        assert response.json["recordsFiltered"] == 3
+        assert response.json["rows"].count("<tr>") == 2
+
+        response = self.client.post("/eboa_nav/datatables/dim-signatures", json = parameters)
+        assert response.status_code == 400
+
+        # Parameters without the filters of the query form or not valid
+        response = self.client.post("/eboa_nav/datatables/gauges", json = {"draw": 1})
+        assert response.status_code == 400
+
+        response = self.client.post("/eboa_nav/datatables/gauges", json = dict(parameters, start = "NOT_A_NUMBER"))
+        assert response.status_code == 400
+
+    def test_count_query_elements(self):
+
+        self.insert_source_with_events("source.xml", 3)
+
+        filters = {"key": [""], "event_value_name": [""], "source": [""], "er": [""], "gauge_name": [""], "gauge_system": [""], "start": [""], "stop": [""], "ingestion_time": [""], "event_duration": [""], "order_by": [""], "limit": ["1"], "offset": [""]}
+
+        # The count ignores the limit of the page
+        response = self.client.post("/eboa_nav/count-query-elements/events", json = filters)
+        assert response.status_code == 200
+        assert response.json == {"count": 3, "estimated": False}
+
+        # Large queries return the estimation of the planner
+        exact_rows = functions.query_count_exact_rows
+        functions.query_count_exact_rows = -1
+        try:
+            response = self.client.post("/eboa_nav/count-query-elements/events", json = filters)
+            assert response.status_code == 200
+            assert response.json["estimated"] == True
+        finally:
+            functions.query_count_exact_rows = exact_rows
+        # end try
+
+        response = self.client.post("/eboa_nav/count-query-elements/gauges", json = filters)
+        assert response.status_code == 400
+
+    def test_query_cost_guard_of_pages(self):
+
+        self.insert_source_with_events("source.xml", 3)
+
+        filters = {"query_events": [""], "key": [""], "event_value_name": [""], "source": [""], "er": [""], "gauge_name": [""], "gauge_system": [""], "start": [""], "stop": [""], "ingestion_time": [""], "event_duration": [""], "order_by": [""], "limit": ["1"], "offset": [""]}
+        parameters = {"draw": 1, "start": 0, "length": 1, "order": [], "search": {"value": ""}, "columns": [{"search": {"value": ""}}] * 4, "filters": filters}
+
+        # Every query needs a confirmation
+        confirmation_rows = functions.query_cost_confirmation_rows
+        functions.query_cost_confirmation_rows = -1
+        try:
+            response = self.client.post("/eboa_nav/query-events-pages", json = filters)
+            assert response.status_code == 200
+            assert b"query-cost-estimation-table" in response.data
+
+            response = self.client.post("/eboa_nav/datatables/events", json = parameters)
+            assert response.status_code == 400
+            assert response.json["estimation"]["action"] == "confirm"
+
+            # The confirmation received from the query form is kept by the pages
+            filters["confirm_query_cost"] = ["true"]
+            response = self.client.post("/eboa_nav/query-events-pages", json = filters)
+            assert response.status_code == 200
+            assert b"query-cost-estimation-table" not in response.data
+
+            response = self.client.post("/eboa_nav/datatables/events", json = parameters)
+            assert response.status_code == 200
+        finally:
+            functions.query_cost_confirmation_rows = confirmation_rows
+        # end try
+
+    def insert_linking_events(self, source_name, link_ref, number_of_linking_events, dim_signature = "dim_signature", linked_event_uuid = None):
+
+        events = [{
+            "gauge": {"name": "GAUGE_NAME_LINKING",
+                      "system": "GAUGE_SYSTEM",
+                      "insertion_type": "SIMPLE_UPDATE"},
+            "start": "2018-06-05T04:07:03",
+            "stop": "2018-06-05T06:07:36",
+            "links": [{
+                "link": "EVENT_1" if linked_event_uuid is None else linked_event_uuid,
+                "link_mode": "by_ref" if linked_event_uuid is None else "by_uuid",
+                "name": "LINK_NAME"
+            }]
+        } for i in range(number_of_linking_events)]
+        if link_ref:
+            events.append({
+                "link_ref": "EVENT_1",
+                "gauge": {"name": "GAUGE_NAME_LINKED",
+                          "system": "GAUGE_SYSTEM",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T04:07:03",
+                "stop": "2018-06-05T06:07:36"
+            })
+        # end if
+
+        data = {"operations": [{
+            "mode": "insert",
+            "dim_signature": {"name": dim_signature,
+                              "exec": "exec",
+                              "version": "1.0"},
+            "source": {"name": source_name,
+                       "reception_time": "2018-07-05T02:07:03",
+                       "generation_time": "2018-07-05T02:07:03",
+                       "validity_start": "2018-06-05T02:07:03",
+                       "validity_stop": "2018-06-05T08:07:36"},
+            "events": events
+        }]}
+
+        exit_status = self.engine_eboa.treat_data(data)
+        assert len([item for item in exit_status if item["status"] != eboa_engine.exit_codes["OK"]["status"]]) == 0
+
+    def test_query_linked_gauges(self):
+
+        self.insert_linking_events("source_1.xml", True, 2)
+
+        gauge_linked = self.query_eboa.get_gauges(names = {"filter": "GAUGE_NAME_LINKED", "op": "=="})[0]
+        gauge_linking = self.query_eboa.get_gauges(names = {"filter": "GAUGE_NAME_LINKING", "op": "=="})[0]
+
+        with self.app.app_context():
+            links = eboa_nav.query_linked_gauges([gauge_linked])
+        # end with
+
+        # The gauge linking is registered although it was not requested
+        assert len(links) == 2
+
+        nodes = {link["gauge_uuid"]: link for link in links}
+        assert nodes[str(gauge_linked.gauge_uuid)]["gauges_linking"] == []
+        assert nodes[str(gauge_linking.gauge_uuid)]["gauges_linking"] == [{"gauge_uuid": str(gauge_linked.gauge_uuid),
+                                                                           "link_name": "LINK_NAME",
+                                                                           "number_of_links": 2}]
+
+        # The ingestion of new sources invalidates the cached links
+        self.insert_linking_events("source_2.xml", True, 1)
+
+        with self.app.app_context():
+            links = eboa_nav.query_linked_gauges([gauge_linked])
+        # end with
+
+        nodes = {link["gauge_uuid"]: link for link in links}
+        assert nodes[str(gauge_linking.gauge_uuid)]["gauges_linking"][0]["number_of_links"] == 3
+
+    def test_query_linked_gauges_of_other_dim_signature(self):
+
+        self.insert_linking_events("source_1.xml", True, 0)
+
+        gauge_linked = self.query_eboa.get_gauges(names = {"filter": "GAUGE_NAME_LINKED", "op": "=="})[0]
+        event_linked = self.query_eboa.get_events(gauge_uuids = {"filter": [gauge_linked.gauge_uuid], "op": "in"})[0]
+
+        with self.app.app_context():
+            links = eboa_nav.query_linked_gauges([gauge_linked])
+        # end with
+
+        assert len(links) == 1
+
+        # The links created by the ingestion of other DIM signature
+        # invalidate the cached links of the linked DIM signature
+        self.insert_linking_events("source_2.xml", False, 2, dim_signature = "dim_signature_2", linked_event_uuid = str(event_linked.event_uuid))
+
+        gauge_linking = self.query_eboa.get_gauges(names = {"filter": "GAUGE_NAME_LINKING", "op": "=="})[0]
+
+        with self.app.app_context():
+            links = eboa_nav.query_linked_gauges([gauge_linked])
+        # end with
+
+        assert len(links) == 2
+
+        nodes = {link["gauge_uuid"]: link for link in links}
+        assert nodes[str(gauge_linking.gauge_uuid)]["gauges_linking"] == [{"gauge_uuid": str(gauge_linked.gauge_uuid),
+                                                                           "link_name": "LINK_NAME",
+                                                                           "number_of_links": 2}]
+
+    def test_compile_triggering_index(self):
+
+        with open(os.path.dirname(os.path.abspath(__file__)) + "/inputs/triggering.xml", "rb") as triggering_file:
+            index = functions.compile_triggering_index(triggering_file.read())
+        # end with
+
+        rule = functions.get_triggering_rule(index, "FILE_TO_PROCESS_2.xml")
+        assert rule["source_type"] == "FILE_TO_PROCESS_2"
+        assert rule["skip"] == False
+
+        assert functions.get_triggering_rule(index, "FILE_TO_SKIP_1.xml")["skip"] == True
+
+        assert functions.get_triggering_rule(index, "NOT_CONFIGURED.xml") == None
+
+        dependents = index["dependents"]["FILE_TO_PROCESS_1"]
+        assert len(dependents) == 1
+        assert dependents[0].match("FILE_TO_PROCESS_2.xml")
+
+        assert "FILE_TO_PROCESS_2" not in index["dependents"]
+
     def test_prepare_reingestion_of_sources_and_dependencies_no_data(self):
 
         sources = []
@@ -14,6 +14,7 @@ import datetime
 import re
 import dateutil.parser as parser
 import vboa.tests.functions as functions
+import vboa.functions as vboa_functions
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
@@ -241,7 +242,9 @@ class TestEventsTab(unittest.TestCase):
 
         event = self.session.query(Event).all()[0]
 
-        assert self.driver.execute_script('return events;') == [{
+        assert self.driver.execute_script('return events_for_timeline;') == [str(event.event_uuid)]
+
+        assert vboa_functions.get_graph_data(self.session, "events", [str(event.event_uuid)]) == [{
             "id": str(event.event_uuid),
             "gauge":{
                 "name": "GAUGE_NAME",
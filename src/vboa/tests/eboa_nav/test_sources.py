@@ -14,6 +14,7 @@ import datetime
 import re
 import dateutil.parser as parser
 import vboa.tests.functions as functions
+import vboa.functions as vboa_functions
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
@@ -299,7 +300,9 @@ class TestSourcesTab(unittest.TestCase):
 
         source = self.session.query(Source).all()[0]
 
-        assert self.driver.execute_script('return sources;') == [{
+        assert self.driver.execute_script('return sources_for_graphs;') == [str(source.source_uuid)]
+
+        assert vboa_functions.get_graph_data(self.session, "sources", [str(source.source_uuid)]) == [{
                 "id": str(source.source_uuid),
                 "name": "source.xml",
                 "dim_signature": "dim_signature",
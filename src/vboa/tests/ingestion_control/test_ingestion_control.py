@@ -14,6 +14,7 @@ import datetime
 import re
 import dateutil.parser as parser
 import vboa.tests.functions as functions
+import vboa.functions as vboa_functions
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
@@ -256,7 +257,8 @@ class TestIngestionControl(unittest.TestCase):
             }
         ]
 
-        assert sources == self.driver.execute_script('return sources;')
+        assert self.driver.execute_script('return sources_for_graphs;') == [sources[0]["id"]]
+        assert sources == vboa_functions.get_graph_data(self.session, "sources", [sources[0]["id"]])
         
         # Check validity timeline
         validity_timeline = self.driver.find_element_by_id("ingestion-control-validity-timeline")
@@ -398,7 +400,8 @@ class TestIngestionControl(unittest.TestCase):
             }
         ]
 
-        assert sources == self.driver.execute_script('return sources;')
+        assert self.driver.execute_script('return sources_for_graphs;') == [sources[0]["id"]]
+        assert sources == vboa_functions.get_graph_data(self.session, "sources", [sources[0]["id"]])
         
         # Check validity timeline
         validity_timeline = self.driver.find_element_by_id("ingestion-control-validity-timeline")
@@ -549,7 +552,8 @@ class TestIngestionControl(unittest.TestCase):
             }
         ]
 
-        assert sources == self.driver.execute_script('return sources;')
+        assert self.driver.execute_script('return sources_for_graphs;') == [sources[0]["id"]]
+        assert sources == vboa_functions.get_graph_data(self.session, "sources", [sources[0]["id"]])
         
         # Check validity timeline
         validity_timeline = self.driver.find_element_by_id("ingestion-control-validity-timeline")
@@ -721,7 +725,8 @@ class TestIngestionControl(unittest.TestCase):
             }
         ]
 
-        assert sources == self.driver.execute_script('return sources;')
+        assert self.driver.execute_script('return sources_for_graphs;') == [sources[0]["id"]]
+        assert sources == vboa_functions.get_graph_data(self.session, "sources", [sources[0]["id"]])
         
         # Check validity timeline
         validity_timeline = self.driver.find_element_by_id("ingestion-control-validity-timeline")
@@ -0,0 +1,114 @@
+"""
+Automated tests for the updates of the sliding ingestion control view
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import unittest
+import os
+import datetime
+import uuid
+
+# Configure environment to avoid authentication and authorization
+os.environ["VBOA_TEST"] = "TRUE"
+
+# Load (and reload if it was loaded before with VBOA_TEST set to TRUE) ingestion_control module
+from vboa.views.ingestion_control import ingestion_control
+import importlib
+importlib.reload(ingestion_control)
+
+# Import app
+from vboa import create_app
+
+# Import engine of the DDBB
+import eboa.engine.engine as eboa_engine
+from eboa.engine.engine import Engine
+from eboa.engine.query import Query
+from eboa.datamodel.base import Session
+
+class TestSlidingIngestionControl(unittest.TestCase):
+
+    def setUp(self):
+        # Create the engine to manage the data
+        self.engine_eboa = Engine()
+        self.query_eboa = Query()
+
+        # Create session to connect to the database
+        self.session = Session()
+
+        # Clear all tables before executing the test
+        self.query_eboa.clear_db()
+
+        # Create app
+        self.app = create_app()
+
+        # Create client
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        # Close connections to the DDBB
+        self.engine_eboa.close_session()
+        self.query_eboa.close_session()
+        self.session.close()
+
+    def test_sliding_ingestion_control_delta(self):
+
+        data = {"operations": [{
+            "mode": "insert",
+            "dim_signature": {"name": "DIM_SIGNATURE",
+                              "exec": "exec",
+                              "version": "1.0"},
+            "source": {"name": "source.xml",
+                       "reception_time": (datetime.datetime.now() - datetime.timedelta(hours=1)).isoformat(),
+                       "generation_time": "2018-07-05T02:07:03",
+                       "validity_start": "2018-06-05T02:07:03",
+                       "validity_stop": "2018-06-05T08:07:36"}
+        }]}
+
+        exit_status = self.engine_eboa.treat_data(data)
+        assert len([item for item in exit_status if item["status"] != eboa_engine.exit_codes["OK"]["status"]]) == 0
+
+        source_uuid = str(self.query_eboa.get_sources()[0].source_uuid)
+        parameters = {"window_delay": "0", "window_size": "1", "watermark": (datetime.datetime.now() + datetime.timedelta(days=1)).isoformat()}
+
+        # The shown sources without changes are not sent again
+        response = self.client.post("/ingestion_control/sliding_ingestion_control_delta", json = dict(parameters, uuids = [source_uuid]))
+        assert response.status_code == 200
+        assert response.json["changed"] == []
+        assert response.json["removed"] == []
+        assert source_uuid not in response.json["content"]
+
+        # The counters of the summary are obtained from the rollup of the sources
+        assert 'id="summary-ingestion-control-expected" data-sliding-summary>1<' in response.json["content"]
+
+        # The sources not shown are sent with their rows and graph items
+        response = self.client.post("/ingestion_control/sliding_ingestion_control_delta", json = dict(parameters, uuids = []))
+        assert response.status_code == 200
+        assert response.json["changed"] == [source_uuid]
+        assert response.json["uuids"] == [source_uuid]
+        assert source_uuid in response.json["content"]
+        assert [item["id"] for item in response.json["graphs"]["sources"]] == [source_uuid]
+
+        # The shown sources out of the window are removed
+        removed_uuid = str(uuid.uuid1())
+        response = self.client.post("/ingestion_control/sliding_ingestion_control_delta", json = dict(parameters, uuids = [source_uuid, removed_uuid]))
+        assert response.status_code == 200
+        assert response.json["changed"] == []
+        assert response.json["removed"] == [removed_uuid]
+
+        # The sources not shown by the template are not sent
+        response = self.client.post("/ingestion_control/sliding_ingestion_control_delta", json = dict(parameters, template = "errors", uuids = []))
+        assert response.status_code == 200
+        assert response.json["changed"] == []
+        assert source_uuid not in response.json["content"]
+
+        # The shown sources no longer matching the template are removed
+        response = self.client.post("/ingestion_control/sliding_ingestion_control_delta", json = dict(parameters, template = "alerts_and_errors", uuids = [source_uuid]))
+        assert response.status_code == 200
+        assert response.json["removed"] == [source_uuid]
+
+        # The watermark is required
+        response = self.client.post("/ingestion_control/sliding_ingestion_control_delta", json = {"window_delay": "0", "window_size": "1", "uuids": []})
+        assert response.status_code == 400
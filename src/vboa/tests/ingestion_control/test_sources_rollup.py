@@ -0,0 +1,107 @@
+"""
+Automated tests for the rollup of the sources shown by the ingestion control
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import unittest
+import datetime
+
+# Import the VBOA functions module
+import vboa.functions as functions
+
+# Import engine of the DDBB
+import eboa.engine.engine as eboa_engine
+from eboa.engine.engine import Engine
+from eboa.engine.query import Query
+
+class TestSourcesRollup(unittest.TestCase):
+
+    def setUp(self):
+        # Create the engine to manage the data
+        self.engine_eboa = Engine()
+        self.query_eboa = Query()
+
+        # Clear all tables before executing the test
+        self.query_eboa.clear_db()
+
+    def tearDown(self):
+        # Close connections to the DDBB
+        self.engine_eboa.close_session()
+        self.query_eboa.close_session()
+
+    def insert_source(self, name, reception_time):
+        data = {"operations": [{
+            "mode": "insert",
+            "dim_signature": {"name": "DIM_SIGNATURE",
+                              "exec": "exec",
+                              "version": "1.0"},
+            "source": {"name": name,
+                       "reception_time": reception_time.isoformat(),
+                       "generation_time": "2018-07-05T02:07:03",
+                       "validity_start": "2018-06-05T02:07:03",
+                       "validity_stop": "2018-06-05T08:07:36"}
+        }]}
+
+        exit_status = self.engine_eboa.treat_data(data)
+        assert len([item for item in exit_status if item["status"] != eboa_engine.exit_codes["OK"]["status"]]) == 0
+
+    def test_sources_rollup(self):
+
+        now = datetime.datetime.now()
+        start = (now - datetime.timedelta(days=1)).isoformat()
+        stop = now.isoformat()
+        rollup = functions.SourcesRollup()
+
+        self.insert_source("source_1.xml", now - datetime.timedelta(hours=6))
+
+        summary = rollup.get_summary(self.query_eboa.session, start, stop)
+        assert summary["sources"] == 1
+        assert summary["ingested"] == 1
+        assert summary["errors"] == 0
+        assert [(group["dim_signature"], group["sources"], group["error_rate"]) for group in summary["groups"]] == [("DIM_SIGNATURE", 1, 0.0)]
+
+        # The buckets of the new ingestions are aggregated again
+        self.insert_source("source_2.xml", now - datetime.timedelta(hours=6))
+        self.insert_source("source_3.xml", now - datetime.timedelta(days=2))
+
+        summary = rollup.get_summary(self.query_eboa.session, start, stop)
+        assert summary["sources"] == 2
+        assert summary["groups"][0]["sources"] == 2
+
+        # Periods not covering a whole bucket
+        summary = rollup.get_summary(self.query_eboa.session, (now - datetime.timedelta(hours=6, seconds=1)).isoformat(), (now - datetime.timedelta(hours=6)).isoformat())
+        assert summary["sources"] == 2
+
+        # The buckets of the sources removed are aggregated again once invalidated
+        self.query_eboa.get_sources(names = {"filter": "source_2.xml", "op": "=="}, delete = True)
+        rollup.invalidate([now - datetime.timedelta(hours=6)])
+
+        summary = rollup.get_summary(self.query_eboa.session, start, stop)
+        assert summary["sources"] == 1
+
+    def test_sources_rollup_invalidate(self):
+
+        now = datetime.datetime.now()
+        rollup = functions.SourcesRollup()
+        reception_time = now - datetime.timedelta(hours=6)
+        bucket = functions._get_sources_rollup_bucket(reception_time)
+
+        self.insert_source("source_1.xml", reception_time)
+        rollup.get_summary(self.query_eboa.session, (now - datetime.timedelta(days=1)).isoformat(), now.isoformat())
+        assert bucket in rollup.buckets
+
+        # Only the buckets of the received reception times are invalidated
+        rollup.invalidate([reception_time])
+        assert bucket not in rollup.buckets
+        assert bucket - 1 in rollup.buckets
+
+        rollup.invalidate()
+        assert rollup.buckets == {}
+
+    def test_sources_rollup_bucket_runs(self):
+
+        assert functions._get_sources_rollup_bucket_runs([]) == []
+        assert functions._get_sources_rollup_bucket_runs([7, 3, 4, 5, 9, 10]) == [(3, 5), (7, 7), (9, 10)]
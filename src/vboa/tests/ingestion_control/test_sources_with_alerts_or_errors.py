@@ -0,0 +1,117 @@
+"""
+Automated tests for the query of the sources with alerts or errors of the ingestion control
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import unittest
+import os
+import uuid
+
+# Configure environment to avoid authentication and authorization
+os.environ["VBOA_TEST"] = "TRUE"
+
+# Load (and reload if it was loaded before with VBOA_TEST set to TRUE) ingestion_control module
+from vboa.views.ingestion_control import ingestion_control
+import importlib
+importlib.reload(ingestion_control)
+
+# Import engine of the DDBB
+import eboa.engine.engine as eboa_engine
+from eboa.engine.engine import Engine
+from eboa.engine.query import Query
+from eboa.datamodel.base import Session
+
+# Import datamodel
+from eboa.datamodel.sources import Source
+
+class TestSourcesWithAlertsOrErrors(unittest.TestCase):
+
+    start_filter = {"date": "2018-07-06T00:00:00", "operator": "<="}
+    stop_filter = {"date": "2018-07-05T00:00:00", "operator": ">="}
+
+    def setUp(self):
+        # Create the engine to manage the data
+        self.engine_eboa = Engine()
+        self.query_eboa = Query()
+
+        # Create session to connect to the database
+        self.session = Session()
+
+        # Clear all tables before executing the test
+        self.query_eboa.clear_db()
+
+    def tearDown(self):
+        # Close connections to the DDBB
+        self.engine_eboa.close_session()
+        self.query_eboa.close_session()
+        self.session.close()
+
+    def insert_source(self, source_name, reception_time, with_alert = False, with_error = False):
+
+        data = {"operations": [{
+            "mode": "insert",
+            "dim_signature": {"name": "DIM_SIGNATURE",
+                              "exec": "exec",
+                              "version": "1.0"},
+            "source": {"name": source_name,
+                       "reception_time": reception_time,
+                       "generation_time": "2018-07-05T02:07:03",
+                       "validity_start": "2018-06-05T02:07:03",
+                       "validity_stop": "2018-06-05T08:07:36"}
+        }]}
+        if with_alert:
+            data["operations"][0]["alerts"] = [{
+                "message": "Alert message",
+                "generator": "test",
+                "notification_time": "2018-07-05T08:07:36",
+                "alert_cnf": {"name": "alert_name",
+                              "severity": "critical",
+                              "description": "Alert description",
+                              "group": "alert_group"},
+                "entity": {"reference_mode": "by_ref",
+                           "reference": source_name,
+                           "type": "source"}
+            }]
+        # end if
+
+        exit_status = self.engine_eboa.treat_data(data)
+        assert len([item for item in exit_status if item["status"] != eboa_engine.exit_codes["OK"]["status"]]) == 0
+
+        source_uuid = self.query_eboa.get_sources(names = {"filter": source_name, "op": "=="})[0].source_uuid
+        if with_error:
+            self.session.query(Source).filter(Source.source_uuid == source_uuid).update({"ingestion_error": True}, synchronize_session = False)
+            self.session.commit()
+        # end if
+
+        return str(source_uuid)
+
+    def query_source_uuids(self, **kwargs):
+
+        sources = ingestion_control.query_sources_with_alerts_or_errors(self.start_filter, self.stop_filter, **kwargs)
+
+        return [str(source.source_uuid) for source in sources]
+
+    def test_query_sources_with_alerts_or_errors(self):
+
+        with_alert_uuid = self.insert_source("source_with_alert.xml", "2018-07-05T04:00:00", with_alert = True)
+        with_error_uuid = self.insert_source("source_with_error.xml", "2018-07-05T03:00:00", with_error = True)
+        with_alert_and_error_uuid = self.insert_source("source_with_alert_and_error.xml", "2018-07-05T02:00:00", with_alert = True, with_error = True)
+        self.insert_source("source.xml", "2018-07-05T01:00:00")
+
+        # The sources without alerts and errors are not obtained, the
+        # rest are obtained once ordered by reception time descending
+        assert self.query_source_uuids() == [with_alert_uuid, with_error_uuid, with_alert_and_error_uuid]
+
+        # The pages keep the ordering of the DDBB
+        assert self.query_source_uuids(offset = 0, limit = 2) == [with_alert_uuid, with_error_uuid]
+        assert self.query_source_uuids(offset = 2, limit = 2) == [with_alert_and_error_uuid]
+
+        # Restricted to the received sources
+        assert self.query_source_uuids(source_uuids = [with_alert_and_error_uuid, str(uuid.uuid1())]) == [with_alert_and_error_uuid]
+
+        # Restricted to the period
+        self.stop_filter = {"date": "2018-07-05T02:30:00", "operator": ">="}
+        assert self.query_source_uuids() == [with_alert_uuid, with_error_uuid]
@@ -0,0 +1,488 @@
+"""
+Automated tests for the query API
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import unittest
+import os
+import json
+import time
+import gzip
+import datetime
+import threading
+
+# Configure environment to avoid authentication and authorization
+os.environ["VBOA_TEST"] = "TRUE"
+
+# Import app
+from vboa import create_app
+
+# Import the query API
+from vboa.query import query as query_api
+
+# Import the functions of vboa
+import vboa.functions as functions
+
+# Import engine of the DDBB
+import eboa.engine.engine as eboa_engine
+from eboa.engine.engine import Engine
+from eboa.engine.query import Query
+from eboa.datamodel.base import Session, engine, Base
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        # Create the engine to manage the data
+        self.engine_eboa = Engine()
+        self.query_eboa = Query()
+
+        # Create session to connect to the database
+        self.session = Session()
+
+        # Clear all tables before executing the test
+        self.query_eboa.clear_db()
+
+        # Create app
+        self.app = create_app()
+
+        # Create client
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        # Close connections to the DDBB
+        self.engine_eboa.close_session()
+        self.query_eboa.close_session()
+        self.session.close()
+
+    def insert_events(self):
+
+        data = {"operations": [{
+            "mode": "insert",
+            "dim_signature": {
+                  "name": "DIM_SIGNATURE",
+                  "exec": "exec",
+                  "version": "1.0"
+            },
+            "source":  {"name": "source.xml",
+                        "reception_time": "2018-07-05T02:07:03",
+                        "generation_time": "2018-07-05T02:07:03",
+                        "validity_start": "2018-06-05T02:07:03",
+                        "validity_stop": "2018-06-05T08:07:36"},
+            "events": [{
+                "explicit_reference": "EXPLICIT_REFERENCE_EVENT",
+                "gauge": {"name": "GAUGE_NAME",
+                          "system": "GAUGE_SYSTEM",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T04:07:03",
+                "stop": "2018-06-05T06:07:36"
+            },{
+                "explicit_reference": "EXPLICIT_REFERENCE_EVENT",
+                "gauge": {"name": "GAUGE_NAME",
+                          "system": "GAUGE_SYSTEM",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T04:07:03",
+                "stop": "2018-06-05T05:07:36"
+            },{
+                "explicit_reference": "EXPLICIT_REFERENCE_EVENT",
+                "gauge": {"name": "GAUGE_NAME",
+                          "system": "GAUGE_SYSTEM",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T04:07:03",
+                "stop": "2018-06-05T04:37:36"
+            },{
+                "explicit_reference": "EXPLICIT_REFERENCE_EVENT_2",
+                "gauge": {"name": "GAUGE_NAME_2",
+                          "system": "GAUGE_SYSTEM_2",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T05:07:12",
+                "stop": "2018-06-05T06:07:24"
+            },{
+                "explicit_reference": "EXPLICIT_REFERENCE_EVENT_2",
+                "gauge": {"name": "GAUGE_NAME_2",
+                          "system": "GAUGE_SYSTEM_2",
+                          "insertion_type": "SIMPLE_UPDATE"},
+                "start": "2018-06-05T06:07:12",
+                "stop": "2018-06-05T07:07:24"
+            }]
+        }]}
+
+        exit_status = self.engine_eboa.treat_data(data)
+        assert len([item for item in exit_status if item["status"] != eboa_engine.exit_codes["OK"]["status"]]) == 0
+
+    def test_query_no_json(self):
+
+        response = self.client.get("/query/")
+        assert response.status_code == 400
+
+    def test_query_events(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/", json = {"events": {}})
+        assert response.status_code == 200
+
+        assert len(response.json["data"]["events"]) == 5
+
+    def test_query_several_entities(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/", json = {"events": {"gauge_names": {"filter": "GAUGE_NAME", "op": "=="}},
+                                                      "sources": {},
+                                                      "explicit_refs": {},
+                                                      "source_alerts": {}})
+        assert response.status_code == 200
+
+        assert len(response.json["data"]["events"]) == 3
+
+        assert len(response.json["data"]["sources"]) == 1
+
+        assert len(response.json["data"]["explicit_refs"]) == 2
+
+        assert len(response.json["data"]["source_alerts"]) == 0
+
+    def test_query_several_entities_same_serialization(self):
+
+        self.insert_events()
+
+        explicit_refs = self.query_eboa.get_explicit_refs()
+        explicit_ref_keys = set(explicit_refs[0].jsonify().keys())
+
+        # Explicit references inserted by the events and requested
+        response = self.client.get("/query/", json = {"events": {"gauge_names": {"filter": "GAUGE_NAME", "op": "=="}},
+                                                      "explicit_refs": {}})
+        assert response.status_code == 200
+
+        assert len(response.json["data"]["events"]) == 3
+
+        exported_explicit_refs = response.json["data"]["explicit_refs"]
+        assert len(exported_explicit_refs) == 2
+        for explicit_ref_uuid in exported_explicit_refs:
+            assert set(exported_explicit_refs[explicit_ref_uuid].keys()) == explicit_ref_keys
+        # end for
+
+        # Explicit references inserted by the events and projected
+        response = self.client.get("/query/", json = {"events": {"gauge_names": {"filter": "GAUGE_NAME", "op": "=="}},
+                                                      "explicit_refs": {"explicit_refs": {"filter": "EXPLICIT_REFERENCE_EVENT_2", "op": "=="}},
+                                                      "projection": {"explicit_refs": ["explicit_ref"]}})
+        assert response.status_code == 200
+
+        exported_explicit_refs = response.json["data"]["explicit_refs"]
+        assert len(exported_explicit_refs) == 2
+        for explicit_ref_uuid in exported_explicit_refs:
+            assert set(exported_explicit_refs[explicit_ref_uuid].keys()) == set(["explicit_ref_uuid", "explicit_ref"])
+        # end for
+
+    def test_query_not_available_entity(self):
+
+        response = self.client.get("/query/", json = {"not_available_entity": {}})
+        assert response.status_code == 400
+
+    def test_query_not_object_parameters(self):
+
+        for body in ["[{\"events\": {}}]", "\"events\"", "1", "null"]:
+            response = self.client.get("/query/", data = body, content_type = "application/json")
+            assert response.status_code == 400
+            assert response.json["response"]["status"] == 400
+        # end for
+
+    def test_query_events_projection(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/", json = {"events": {"gauge_names": {"filter": "GAUGE_NAME_2", "op": "=="}},
+                                                      "projection": {"events": ["start", "stop", "gauge"]}})
+        assert response.status_code == 200
+
+        events = response.json["data"]["events"]
+        assert len(events) == 2
+
+        for event_uuid in events:
+            assert set(events[event_uuid].keys()) == set(["event_uuid", "start", "stop", "gauge"])
+            assert events[event_uuid]["gauge"]["name"] == "GAUGE_NAME_2"
+            assert events[event_uuid]["gauge"]["system"] == "GAUGE_SYSTEM_2"
+        # end for
+
+        # Only the requested entities are exported
+        assert list(response.json["data"].keys()) == ["events"]
+
+    def test_query_events_projection_wrong_field(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/", json = {"events": {},
+                                                      "projection": {"events": ["not_available_field"]}})
+        assert response.status_code == 400
+
+    def test_explain_query(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/explain", json = {"events": {}, "sources": {}})
+        assert response.status_code == 200
+
+        query_cost = response.json["data"]["query_cost"]
+        assert set(query_cost.keys()) == set(["events", "sources"])
+
+        for entity in query_cost:
+            assert query_cost[entity]["action"] == "run"
+        # end for
+
+    def test_query_cost_guard(self):
+
+        self.insert_events()
+
+        # Force the confirmation of every query
+        confirmation_rows = functions.query_cost_confirmation_rows
+        functions.query_cost_confirmation_rows = -1
+        try:
+            response = self.client.get("/query/", json = {"events": {}})
+            assert response.status_code == 400
+            assert response.json["data"]["query_cost"]["events"]["action"] == "confirm"
+
+            response = self.client.get("/query/", json = {"events": {}, "confirm_query_cost": True})
+            assert response.status_code == 200
+            assert len(response.json["data"]["events"]) == 5
+        finally:
+            functions.query_cost_confirmation_rows = confirmation_rows
+        # end try
+
+    def test_aggregate_events_by_gauge(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/aggregate", json = {"events": {},
+                                                               "group_by": ["gauge_name", "gauge_system"]})
+        assert response.status_code == 200
+
+        assert response.json["data"] == [
+            {"gauge_name": "GAUGE_NAME",
+             "gauge_system": "GAUGE_SYSTEM",
+             "count": 3,
+             "duration": 7200 + 33 + 3600 + 33 + 1800 + 33,
+             "min_duration": 1800 + 33,
+             "max_duration": 7200 + 33,
+             "start": "2018-06-05T04:07:03",
+             "stop": "2018-06-05T06:07:36"},
+            {"gauge_name": "GAUGE_NAME_2",
+             "gauge_system": "GAUGE_SYSTEM_2",
+             "count": 2,
+             "duration": 3600 + 12 + 3600 + 12,
+             "min_duration": 3600 + 12,
+             "max_duration": 3600 + 12,
+             "start": "2018-06-05T05:07:12",
+             "stop": "2018-06-05T07:07:24"}
+        ]
+
+    def test_aggregate_events_by_bucket(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/aggregate", json = {"events": {"start_filters": [{"date": "2018-06-05T05:00:00", "op": ">"}]},
+                                                               "group_by": ["bucket"],
+                                                               "bucket_size": 3600})
+        assert response.status_code == 200
+
+        assert [group["count"] for group in response.json["data"]] == [1, 1]
+
+    def test_aggregate_events_no_groups(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/aggregate", json = {"events": {"explicit_refs": {"filter": "EXPLICIT_REFERENCE_EVENT_2", "op": "=="}}})
+        assert response.status_code == 200
+
+        assert len(response.json["data"]) == 1
+
+        assert response.json["data"][0]["count"] == 2
+
+    def test_aggregate_events_wrong_dimension(self):
+
+        response = self.client.get("/query/aggregate", json = {"events": {},
+                                                               "group_by": ["not_available_dimension"]})
+        assert response.status_code == 400
+
+    def test_aggregate_events_not_supported_filters(self):
+
+        self.insert_events()
+
+        # Filters of Query.get_events not supported by the aggregation are rejected
+        response = self.client.get("/query/aggregate", json = {"events": {"value_filters": [{"name": {"op": "==", "filter": "VALUE"}, "type": "text", "value": {"op": "==", "filter": "TEXT"}}]}})
+        assert response.status_code == 400
+
+        response = self.client.get("/query/aggregate", json = {"events": {"explicit_ref_groups": {"filter": "GROUP", "op": "=="}}})
+        assert response.status_code == 400
+
+        response = self.client.get("/query/aggregate", json = {"events": {"gauge_names": {"filter": "GAUGE_.*", "op": "regex"}}})
+        assert response.status_code == 400
+
+        response = self.client.get("/query/aggregate", json = {"events": {"start_filters": [{"date": "2018-06-05T05:00:00", "op": "like"}]}})
+        assert response.status_code == 400
+
+    def test_query_job(self):
+
+        self.insert_events()
+
+        response = self.client.post("/query/jobs", json = {"events": {}, "sources": {}})
+        assert response.status_code == 202
+
+        job_id = response.json["data"]["job_id"]
+
+        # Wait for the job to finish
+        for i in range(100):
+            response = self.client.get("/query/jobs/" + job_id)
+            assert response.status_code == 200
+            if response.json["data"]["status"] in ["finished", "failed"]:
+                break
+            # end if
+            time.sleep(0.1)
+        # end for
+
+        assert response.json["data"]["status"] == "finished"
+
+        assert response.json["data"]["pages"] == 2
+
+        response = self.client.get("/query/jobs/" + job_id + "/pages/0")
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+
+        page = json.loads(gzip.decompress(response.data))
+        assert page["entity"] == "events"
+        assert len(page["data"]["events"]) == 5
+
+        response = self.client.get("/query/jobs/" + job_id + "/pages/1")
+        page = json.loads(gzip.decompress(response.data))
+        assert page["entity"] == "sources"
+        assert len(page["data"]["sources"]) == 1
+
+        response = self.client.get("/query/jobs/" + job_id + "/pages/2")
+        assert response.status_code == 404
+
+        response = self.client.delete("/query/jobs/" + job_id)
+        assert response.status_code == 200
+
+        response = self.client.get("/query/jobs/" + job_id)
+        assert response.status_code == 404
+
+    def test_query_job_orphaned(self):
+
+        # Job left running by a process which no longer exists
+        job_status = {
+            "job_id": "orphaned_job",
+            "status": "running",
+            "submission_time": datetime.datetime.now().isoformat(),
+            "pages": 0,
+            "executor": "not_existing_executor"
+        }
+        os.makedirs(os.path.join(query_api.query_jobs_path, "orphaned_job"), exist_ok = True)
+        query_api._write_query_job_status(job_status)
+
+        response = self.client.get("/query/jobs/orphaned_job")
+        assert response.status_code == 200
+        assert response.json["data"]["status"] == "failed"
+
+        response = self.client.delete("/query/jobs/orphaned_job")
+        assert response.status_code == 200
+
+    def test_query_job_submission_lock(self):
+
+        self.insert_events()
+
+        # The submission waits while another worker checks the concurrent jobs
+        lock_file = query_api._lock_query_jobs_submission()
+        responses = []
+        try:
+            submission = threading.Thread(target = lambda: responses.append(self.client.post("/query/jobs", json = {"sources": {}})))
+            submission.start()
+            submission.join(1)
+            assert submission.is_alive()
+            assert len(responses) == 0
+        finally:
+            lock_file.close()
+        # end try
+
+        submission.join()
+        assert responses[0].status_code == 202
+
+    def test_query_job_wrong_parameters(self):
+
+        response = self.client.post("/query/jobs", json = {"not_available_entity": {}})
+        assert response.status_code == 400
+
+    def test_cursor_encoding(self):
+
+        cursor = {"start": "2018-06-05T04:07:03", "event_uuid": "uuid"}
+
+        assert query_api.decode_cursor(query_api.encode_cursor(cursor)) == cursor
+
+        assert query_api.encode_cursor(None) == None
+
+        assert query_api.decode_cursor(None) == None
+
+        test_success = False
+        try:
+            query_api.decode_cursor("not_a_cursor")
+        except ValueError:
+            test_success = True
+        # end try
+
+        assert test_success
+
+    def test_query_events_stream(self):
+
+        self.insert_events()
+
+        # Batches of two events have to split the three events sharing the same start
+        event_uuids = []
+        cursor = None
+        number_of_requests = 0
+        while True:
+            response = self.client.get("/query/", json = {"events": {}, "stream": {"batch_size": 2, "cursor": cursor}})
+            assert response.status_code == 200
+            assert response.mimetype == "application/x-ndjson"
+            number_of_requests += 1
+
+            # Only read the first batch to simulate a dropped client
+            batch = json.loads(response.get_data(as_text = True).splitlines()[0])
+            event_uuids += list(batch["data"]["events"])
+            cursor = batch["cursor"]
+            if cursor is None:
+                break
+            # end if
+        # end while
+
+        assert number_of_requests == 3
+
+        assert len(event_uuids) == 5
+
+        assert len(set(event_uuids)) == 5
+
+    def test_query_events_stream_all_batches(self):
+
+        self.insert_events()
+
+        response = self.client.get("/query/", json = {"events": {}, "stream": {"batch_size": 2}})
+        assert response.status_code == 200
+
+        batches = [json.loads(line) for line in response.get_data(as_text = True).splitlines()]
+
+        assert len(batches) == 3
+
+        assert [batch["batch"] for batch in batches] == [0, 1, 2]
+
+        assert batches[-1]["cursor"] == None
+
+        assert sum([len(batch["data"]["events"]) for batch in batches]) == 5
+
+    def test_query_events_stream_wrong_cursor(self):
+
+        response = self.client.get("/query/", json = {"events": {}, "stream": {"cursor": "not_a_cursor"}})
+        assert response.status_code == 400
+
+    def test_query_events_stream_wrong_batch_size(self):
+
+        response = self.client.get("/query/", json = {"events": {}, "stream": {"batch_size": 0}})
+        assert response.status_code == 400
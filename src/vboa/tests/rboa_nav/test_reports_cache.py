@@ -0,0 +1,101 @@
+"""
+Automated tests for the cache of decompressed reports
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import os
+import gzip
+import tarfile
+import tempfile
+import unittest
+
+# Import the RBOA navigation view
+from vboa.views.rboa_nav import rboa_nav
+
+class TestReportsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.original_reports_cache_path = rboa_nav.reports_cache_path
+        self.original_reports_cache_size = rboa_nav.reports_cache_size
+        rboa_nav.reports_cache_path = os.path.join(self.folder.name, "cache")
+
+        self.content = b"<html>" + b"0123456789" * 1000 + b"</html>"
+        report_path = os.path.join(self.folder.name, "report.html")
+        with open(report_path, "wb") as report_file:
+            report_file.write(self.content)
+        # end with
+
+        self.tgz_path = os.path.join(self.folder.name, "report.tgz")
+        with tarfile.open(self.tgz_path, "w:gz") as tar:
+            tar.add(report_path, arcname = "report.html")
+        # end with
+
+    def tearDown(self):
+        rboa_nav.reports_cache_path = self.original_reports_cache_path
+        rboa_nav.reports_cache_size = self.original_reports_cache_size
+        self.folder.cleanup()
+
+    def test_insert_report_in_cache(self):
+
+        cached_report_path = os.path.join(rboa_nav.reports_cache_path, "REPORT_UUID_1.html")
+        rboa_nav._insert_report_in_cache(self.tgz_path, cached_report_path)
+
+        with open(cached_report_path, "rb") as cached_report_file:
+            assert cached_report_file.read() == self.content
+        # end with
+        with gzip.open(cached_report_path + ".gz", "rb") as cached_report_file:
+            assert cached_report_file.read() == self.content
+        # end with
+
+        assert sorted(os.listdir(rboa_nav.reports_cache_path)) == ["REPORT_UUID_1.html", "REPORT_UUID_1.html.gz"]
+
+    def test_evict_reports_from_cache(self):
+
+        for (report_uuid, used_time) in [("REPORT_UUID_1", 100), ("REPORT_UUID_2", 200)]:
+            cached_report_path = os.path.join(rboa_nav.reports_cache_path, report_uuid + ".html")
+            rboa_nav._insert_report_in_cache(self.tgz_path, cached_report_path)
+            os.utime(cached_report_path, (used_time, used_time))
+            os.utime(cached_report_path + ".gz", (used_time, used_time))
+        # end for
+
+        # Leave room only for the most recently used report
+        rboa_nav.reports_cache_size = len(self.content) + os.path.getsize(os.path.join(rboa_nav.reports_cache_path, "REPORT_UUID_2.html.gz"))
+        rboa_nav.evict_reports_from_cache()
+
+        assert sorted(os.listdir(rboa_nav.reports_cache_path)) == ["REPORT_UUID_2.html", "REPORT_UUID_2.html.gz"]
+
+    def test_evict_report_variants_together(self):
+
+        for (report_uuid, used_time) in [("REPORT_UUID_1", 100), ("REPORT_UUID_2", 200)]:
+            cached_report_path = os.path.join(rboa_nav.reports_cache_path, report_uuid + ".html")
+            rboa_nav._insert_report_in_cache(self.tgz_path, cached_report_path)
+            os.utime(cached_report_path, (used_time, used_time))
+            os.utime(cached_report_path + ".gz", (used_time, used_time))
+        # end for
+
+        # Only the gzipped variant of the first report was used recently
+        os.utime(os.path.join(rboa_nav.reports_cache_path, "REPORT_UUID_1.html.gz"), (300, 300))
+
+        rboa_nav.reports_cache_size = len(self.content) + os.path.getsize(os.path.join(rboa_nav.reports_cache_path, "REPORT_UUID_1.html.gz"))
+        rboa_nav.evict_reports_from_cache()
+
+        assert sorted(os.listdir(rboa_nav.reports_cache_path)) == ["REPORT_UUID_1.html", "REPORT_UUID_1.html.gz"]
+
+    def test_mark_cached_report_as_used(self):
+
+        cached_report_path = os.path.join(rboa_nav.reports_cache_path, "REPORT_UUID_1.html")
+        rboa_nav._insert_report_in_cache(self.tgz_path, cached_report_path)
+        for path in [cached_report_path, cached_report_path + ".gz"]:
+            os.utime(path, (100, 100))
+        # end for
+
+        # The use is recorded without changing the modification time (used by the entity tags)
+        rboa_nav.mark_cached_report_as_used(cached_report_path)
+        for path in [cached_report_path, cached_report_path + ".gz"]:
+            assert os.stat(path).st_mtime == 100
+            assert os.stat(path).st_atime > 100
+        # end for
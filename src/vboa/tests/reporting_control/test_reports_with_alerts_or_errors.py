@@ -0,0 +1,129 @@
+"""
+Automated tests for the query of the reports with alerts or errors of the reporting control
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import unittest
+import os
+import shutil
+import tempfile
+import uuid
+
+# Configure environment to avoid authentication and authorization
+os.environ["VBOA_TEST"] = "TRUE"
+
+# Load (and reload if it was loaded before with VBOA_TEST set to TRUE) reporting_control module
+from vboa.views.reporting_control import reporting_control
+import importlib
+importlib.reload(reporting_control)
+
+# Import engine of the DDBB
+import eboa.engine.engine as eboa_engine
+from eboa.engine.query import Query
+from eboa.datamodel.base import Session
+from rboa.engine.engine import Engine as EngineReport
+
+# Import datamodel
+from rboa.datamodel.reports import Report
+
+class TestReportsWithAlertsOrErrors(unittest.TestCase):
+
+    start_filter = {"date": "2018-07-06T00:00:00", "operator": "<="}
+    stop_filter = {"date": "2018-07-05T00:00:00", "operator": ">="}
+
+    def setUp(self):
+        # Create the engine to manage the data
+        self.engine_rboa = EngineReport()
+        self.query_eboa = Query()
+
+        # Create session to connect to the database
+        self.session = Session()
+
+        # Clear all tables before executing the test
+        self.query_eboa.clear_db()
+
+        # Folder with the files of the reports
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        # Close connections to the DDBB
+        self.engine_rboa.close_session()
+        self.query_eboa.close_session()
+        self.session.close()
+
+        self.folder.cleanup()
+
+    def insert_report(self, report_name, triggering_time, with_alert = False, with_error = False):
+
+        file_path = os.path.join(self.folder.name, report_name)
+        shutil.copyfile(os.path.dirname(os.path.abspath(__file__)) + "/../html_inputs/report.html", file_path)
+
+        data = {"operations": [{
+            "mode": "insert",
+            "report": {"name": report_name,
+                       "group": "report_group",
+                       "group_description": "Group of reports for testing",
+                       "path": file_path,
+                       "compress": "true",
+                       "generation_mode": "MANUAL",
+                       "validity_start": "2018-06-05T02:07:03",
+                       "validity_stop": "2018-06-05T08:07:36",
+                       "triggering_time": triggering_time,
+                       "generation_start": "2018-07-05T02:07:10",
+                       "generation_stop": "2018-07-05T02:15:10",
+                       "generator": "report_generator",
+                       "generator_version": "1.0"}
+        }]}
+        if with_alert:
+            data["operations"][0]["alerts"] = [{
+                "message": "Alert message",
+                "generator": "test",
+                "notification_time": "2018-07-05T08:07:36",
+                "alert_cnf": {"name": "alert_name",
+                              "severity": "critical",
+                              "description": "Alert description",
+                              "group": "alert_group"}
+            }]
+        # end if
+
+        self.engine_rboa.data = data
+        assert eboa_engine.exit_codes["OK"]["status"] == self.engine_rboa.treat_data()[0]["status"]
+
+        report_uuid = self.session.query(Report).filter(Report.name == report_name).one().report_uuid
+        if with_error:
+            self.session.query(Report).filter(Report.report_uuid == report_uuid).update({"generation_error": True}, synchronize_session = False)
+        # end if
+        self.session.commit()
+
+        return str(report_uuid)
+
+    def query_report_uuids(self, **kwargs):
+
+        reports = reporting_control.query_reports_with_alerts_or_errors(self.start_filter, self.stop_filter, **kwargs)
+
+        return [str(report.report_uuid) for report in reports]
+
+    def test_query_reports_with_alerts_or_errors(self):
+
+        with_alert_uuid = self.insert_report("report_with_alert.html", "2018-07-05T04:00:00", with_alert = True)
+        with_error_uuid = self.insert_report("report_with_error.html", "2018-07-05T03:00:00", with_error = True)
+        with_alert_and_error_uuid = self.insert_report("report_with_alert_and_error.html", "2018-07-05T02:00:00", with_alert = True, with_error = True)
+        self.insert_report("report.html", "2018-07-05T01:00:00")
+
+        # The reports without alerts and errors are not obtained, the
+        # rest are obtained once ordered by triggering time descending
+        assert self.query_report_uuids() == [with_alert_uuid, with_error_uuid, with_alert_and_error_uuid]
+
+        # The pages keep the ordering of the DDBB
+        assert self.query_report_uuids(offset = 0, limit = 2) == [with_alert_uuid, with_error_uuid]
+        assert self.query_report_uuids(offset = 2, limit = 2) == [with_alert_and_error_uuid]
+
+        # Restricted to the received reports
+        assert self.query_report_uuids(report_uuids = [with_alert_and_error_uuid, str(uuid.uuid1())]) == [with_alert_and_error_uuid]
+
+        # Restricted to the period
+        self.stop_filter = {"date": "2018-07-05T02:30:00", "operator": ">="}
+        assert self.query_report_uuids() == [with_alert_uuid, with_error_uuid]
@@ -0,0 +1,61 @@
+"""
+Automated tests for the index of the catalogs used by the selectors
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import time
+import unittest
+
+# Import the VBOA functions module
+import vboa.functions as functions
+
+class TestCatalogIndex(unittest.TestCase):
+
+    def wait_for_refresh(self, catalog_index):
+        while catalog_index.refreshing:
+            time.sleep(0.01)
+        # end while
+
+    def test_lookup(self):
+
+        catalog_index = functions.CatalogIndex(lambda session, watermark: (["GAUGE_B", "GAUGE_A", "OTHER_GAUGE", None, "GAUGE_A"], None))
+
+        # Values starting with the search go before the values containing it
+        assert catalog_index.lookup("GAUGE") == ["GAUGE_A", "GAUGE_B", "OTHER_GAUGE"]
+        assert catalog_index.lookup("GAUGE", limit = "1", offset = "1") == ["GAUGE_B"]
+        assert catalog_index.lookup("") == ["GAUGE_A", "GAUGE_B", "OTHER_GAUGE"]
+        assert catalog_index.lookup("MISSING") == []
+
+        assert catalog_index.lookup("GAUGE_A", exact = True) == ["GAUGE_A"]
+        assert catalog_index.lookup("GAUGE", exact = True) == []
+
+    def test_incremental_refresh(self):
+
+        watermarks = []
+        def load_values(session, watermark):
+            watermarks.append(watermark)
+            if watermark is None:
+                return ["GENERATOR_B"], 1
+            # end if
+            return ["GENERATOR_A"], 2
+        # end def
+
+        catalog_index = functions.CatalogIndex(load_values)
+        assert catalog_index.lookup("GENERATOR") == ["GENERATOR_B"]
+
+        # The refresh only obtains the values after the watermark and merges them
+        catalog_index.invalidate()
+        catalog_index.get_values()
+        self.wait_for_refresh(catalog_index)
+        assert catalog_index.lookup("GENERATOR") == ["GENERATOR_A", "GENERATOR_B"]
+        assert watermarks == [None, 1]
+
+        # The reset replaces all the values
+        catalog_index.invalidate(reset = True)
+        catalog_index.get_values()
+        self.wait_for_refresh(catalog_index)
+        assert catalog_index.lookup("GENERATOR") == ["GENERATOR_B"]
+        assert watermarks == [None, 1, None]
@@ -0,0 +1,108 @@
+"""
+Automated tests for the delivery of files
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import unittest
+import tarfile
+import tempfile
+import os
+
+# Import flask utilities
+from flask import Flask
+
+# Import the VBOA functions module
+import vboa.functions as functions
+
+class TestVboaFileDelivery(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.folder = tempfile.TemporaryDirectory()
+        self.content = b"<html>" + b"0123456789" * 1000 + b"</html>"
+
+        self.file_path = os.path.join(self.folder.name, "report.html")
+        with open(self.file_path, "wb") as report_file:
+            report_file.write(self.content)
+        # end with
+
+        self.tar_path = os.path.join(self.folder.name, "report.tar")
+        with tarfile.open(self.tar_path, "w") as tar:
+            tar.add(self.file_path, arcname = "report.html")
+        # end with
+
+        self.tgz_path = os.path.join(self.folder.name, "report.tgz")
+        with tarfile.open(self.tgz_path, "w:gz") as tar:
+            tar.add(self.file_path, arcname = "report.html")
+        # end with
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def deliver(self, deliver_function, file_path, headers = {}):
+        with self.app.test_request_context(headers = headers):
+            response = deliver_function(file_path)
+            response.direct_passthrough = False
+            data = response.get_data()
+            response.close()
+        # end with
+
+        return response, data
+
+    def test_deliver_file(self):
+
+        for deliver_function, file_path in [(functions.deliver_file, self.file_path),
+                                            (functions.deliver_tar_member, self.tar_path),
+                                            (functions.deliver_tar_member, self.tgz_path)]:
+            response, data = self.deliver(deliver_function, file_path)
+            assert response.status_code == 200
+            assert response.mimetype == "text/html"
+            assert response.headers["Accept-Ranges"] == "bytes"
+            assert data == self.content
+
+            etag = response.get_etag()[0]
+
+            response, data = self.deliver(deliver_function, file_path, {"Range": "bytes=6-15"})
+            assert response.status_code == 206
+            assert response.headers["Content-Range"] == "bytes 6-15/{}".format(len(self.content))
+            assert data == self.content[6:16]
+
+            response, data = self.deliver(deliver_function, file_path, {"Range": "bytes=-7"})
+            assert response.status_code == 206
+            assert data == b"</html>"
+
+            response, data = self.deliver(deliver_function, file_path, {"Range": "bytes={}-".format(len(self.content))})
+            assert response.status_code == 416
+
+            response, data = self.deliver(deliver_function, file_path, {"If-None-Match": '"{}"'.format(etag)})
+            assert response.status_code == 304
+            assert data == b""
+
+            # Outdated If-Range delivers the whole file
+            response, data = self.deliver(deliver_function, file_path, {"Range": "bytes=6-15", "If-Range": '"outdated"'})
+            assert response.status_code == 200
+            assert data == self.content
+        # end for
+
+    def test_deliver_file_front_proxy(self):
+
+        original_mode = functions.file_delivery_mode
+        original_locations = functions.file_delivery_internal_locations
+        try:
+            functions.file_delivery_mode = "x-accel-redirect"
+            functions.file_delivery_internal_locations = [[self.folder.name, "/protected"]]
+            response, data = self.deliver(functions.deliver_file, self.file_path)
+            assert response.headers["X-Accel-Redirect"] == "/protected/report.html"
+            assert data == b""
+
+            functions.file_delivery_mode = "x-sendfile"
+            response, data = self.deliver(functions.deliver_file, self.file_path)
+            assert response.headers["X-Sendfile"] == self.file_path
+            assert data == b""
+        finally:
+            functions.file_delivery_mode = original_mode
+            functions.file_delivery_internal_locations = original_locations
+        # end try
@@ -0,0 +1,143 @@
+"""
+Automated tests for the keyset pagination of the navigation
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import datetime
+import types
+import unittest
+
+# Import SQLAlchemy utilities
+from sqlalchemy.orm import Query as OrmQuery
+
+# Import datamodel
+from eboa.datamodel.events import Event
+
+# Import the VBOA functions module
+import vboa.functions as functions
+
+class TestKeysetPagination(unittest.TestCase):
+
+    keyset = (Event, ["start", "stop"], "event_uuid", "start")
+
+    def event(self, event_uuid, start):
+        if start is not None:
+            start = datetime.datetime(2018, 6, 5, start)
+        # end if
+        return types.SimpleNamespace(event_uuid = event_uuid, start = start)
+
+    def query_statement(self, kwargs):
+        return str(OrmQuery(Event).limit(kwargs.get("limit")))
+
+    def test_keyset_pagination(self):
+
+        # First page, honouring the offset of the query form
+        filters = {"order_by": [""], "limit": ["2"], "offset": ["4"]}
+        kwargs = {"offset": "4", "limit": "2"}
+        assert functions.set_keyset_pagination(filters, kwargs, self.keyset)
+        assert kwargs == {"offset": "4", "limit": "2", "order_by": {"field": "start", "descending": False}}
+
+        functions.set_next_pagination_cursor(filters, [self.event("UUID_1", 1), self.event("UUID_2", 2)], self.keyset)
+        cursor = functions.decode_pagination_cursor(filters["next_cursor"][0])
+        assert cursor == {"field": "start", "descending": False, "value": "2018-06-05T02:00:00", "uuid": "UUID_2"}
+
+        # Second page, seeking the last element shown instead of using the offset
+        filters = {"order_by": [""], "limit": ["2"], "offset": ["4"], "cursors": filters["next_cursor"]}
+        kwargs = {"offset": "4", "limit": "2"}
+        assert functions.set_keyset_pagination(filters, kwargs, self.keyset)
+        assert kwargs == {"limit": "2", "order_by": {"field": "start", "descending": False}}
+
+        # The cursor does not grow with the elements sharing the last value
+        functions.set_next_pagination_cursor(filters, [self.event("UUID_3", 2), self.event("UUID_4", 2)], self.keyset)
+        cursor = functions.decode_pagination_cursor(filters["next_cursor"][0])
+        assert cursor["uuid"] == "UUID_4"
+
+    def test_query_by_keyset(self):
+
+        # The UUID is used as tie-breaker of the ordering field
+        statement = functions.query_by_keyset(self.query_statement, {"limit": 2}, self.keyset)
+        assert "ORDER BY events.start ASC NULLS LAST, events.event_uuid ASC" in statement
+
+        # The page starts after the last element shown
+        cursor = {"field": "start", "descending": True, "value": "2018-06-05T02:00:00", "uuid": "UUID_2"}
+        statement = functions.query_by_keyset(self.query_statement, {"limit": 2}, self.keyset, "start", True, cursor)
+        assert "ORDER BY events.start DESC NULLS LAST, events.event_uuid DESC" in statement
+        assert "events.start < " in statement
+        assert "events.start IS NULL" in statement
+        assert "events.event_uuid < " in statement
+
+        # The ordering is only applied to the queries executed by the function
+        assert "ORDER BY" not in self.query_statement({"limit": 2})
+
+    def test_keyset_pagination_without_value(self):
+
+        # The elements without value are shown at the end
+        filters = {"order_by": ["stop"], "limit": ["2"], "offset": [""]}
+        functions.set_next_pagination_cursor(filters, [types.SimpleNamespace(event_uuid = "UUID_1", stop = None)], self.keyset)
+        cursor = functions.decode_pagination_cursor(filters["next_cursor"][0])
+        assert cursor == {"field": "stop", "descending": False, "value": None, "uuid": "UUID_1"}
+
+        statement = functions.query_by_keyset(self.query_statement, {"limit": 2}, self.keyset, "stop", False, cursor)
+        assert "events.stop IS NULL AND events.event_uuid > " in statement
+
+    def test_offset_pagination(self):
+
+        # Ordering fields not in the keyset keep the offset
+        filters = {"order_by": ["gauge_name"], "limit": ["2"], "offset": ["2"]}
+        kwargs = {"offset": "2", "limit": "2"}
+        assert not functions.set_keyset_pagination(filters, kwargs, self.keyset)
+        assert kwargs == {"offset": "2", "limit": "2"}
+
+        functions.set_next_pagination_cursor(filters, [self.event("UUID_1", 1)], self.keyset)
+        assert "next_cursor" not in filters
+
+        # Queries without limit are not paginated
+        filters = {"order_by": [""], "limit": [""], "offset": [""]}
+        assert not functions.set_keyset_pagination(filters, {}, self.keyset)
+
+    def test_invalid_cursor(self):
+
+        filters = {"order_by": [""], "limit": ["2"], "offset": [""], "cursors": ["NOT_A_CURSOR"]}
+        with self.assertRaises(functions.InvalidPaginationCursor):
+            functions.set_keyset_pagination(filters, {}, self.keyset)
+        # end with
+
+        # Cursors of another ordering field
+        cursor = functions.encode_pagination_cursor({"field": "stop", "descending": False, "value": None, "uuid": "UUID_1"})
+        filters = {"order_by": [""], "limit": ["2"], "offset": [""], "cursors": [cursor]}
+        with self.assertRaises(functions.InvalidPaginationCursor):
+            functions.set_keyset_pagination(filters, {}, self.keyset)
+        # end with
+
+    def test_probe_query_window(self):
+
+        # Query of five elements
+        queried = []
+        def query_elements(kwargs):
+            queried.append((kwargs["offset"], kwargs["limit"]))
+            return [self.event("UUID_" + str(offset), offset) for offset in range(kwargs["offset"], min(kwargs["offset"] + kwargs["limit"], 5))]
+
+        # Full page, the cursor of the following page is obtained from its last element
+        filters = {"order_by": [""], "limit": ["2"], "offset": [""]}
+        kwargs = {"limit": "2"}
+        functions.set_keyset_pagination(filters, kwargs, self.keyset)
+        assert functions.probe_query_window(query_elements, kwargs, filters, self.keyset) == 2
+        assert queried == [(1, 1)]
+        assert functions.decode_pagination_cursor(filters["next_cursor"][0])["uuid"] == "UUID_1"
+
+        # Page not full
+        queried.clear()
+        filters = {"order_by": [""], "limit": ["10"], "offset": [""]}
+        kwargs = {"limit": "10"}
+        functions.set_keyset_pagination(filters, kwargs, self.keyset)
+        assert functions.probe_query_window(query_elements, kwargs, filters, self.keyset) == 1
+        assert queried == [(9, 1), (0, 1)]
+        assert "next_cursor" not in filters
+
+        # Page without elements
+        queried.clear()
+        assert functions.probe_query_window(query_elements, {"offset": 5}, {"order_by": [""], "limit": [""], "offset": ["5"]}, self.keyset) == 0
+        assert queried == [(5, 1)]
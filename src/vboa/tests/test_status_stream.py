@@ -0,0 +1,110 @@
+"""
+Automated tests for the producer of the status stream
+
+Written by DEIMOS Space S.L. (dibb)
+
+module vboa
+"""
+# Import python utilities
+import unittest
+import queue
+import json
+import os
+import tempfile
+
+# Import the service management module
+import vboa.service_management as service_management
+
+class TestStatusStream(unittest.TestCase):
+
+    def setUp(self):
+        # Folder with the lock and the state shared by the producers
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "status_stream")
+
+        # Statuses of the processes checked by the producer of the host
+        self.statuses = {"orc": {"scheduler": {"status": "on"}}, "cron": {"crond": {"status": "on"}}, "scheduler": {"status": "off"}}
+        self.get_orc_status = service_management.get_orc_status
+        self.get_cron_status = service_management.get_cron_status
+        self.status_scheduler = service_management.boa_scheduler.status_scheduler
+        service_management.get_orc_status = lambda: self.statuses["orc"]
+        service_management.get_cron_status = lambda: self.statuses["cron"]
+        service_management.boa_scheduler.status_scheduler = lambda: self.statuses["scheduler"]
+
+    def tearDown(self):
+        service_management.get_orc_status = self.get_orc_status
+        service_management.get_cron_status = self.get_cron_status
+        service_management.boa_scheduler.status_scheduler = self.status_scheduler
+
+        self.folder.cleanup()
+
+    def test_publish_status_events(self):
+
+        producer = service_management.StatusProducer()
+        subscriber = queue.Queue(maxsize = 2)
+        producer.subscribers.add(subscriber)
+
+        producer.publish("cron", {"crond": {"status": "on"}})
+        event = subscriber.get_nowait()
+        assert event == "event: cron\ndata: " + json.dumps({"crond": {"status": "on"}}) + "\n\n"
+
+        # The oldest events are discarded for the clients not consuming them
+        producer.publish("alerts", {"number": 1})
+        producer.publish("alerts", {"number": 2})
+        producer.publish("alerts", {"number": 3})
+        assert [subscriber.get_nowait(), subscriber.get_nowait()] == ["event: alerts\ndata: {\"number\": 2}\n\n",
+                                                                      "event: alerts\ndata: {\"number\": 3}\n\n"]
+
+        # The unsubscribed clients do not receive events
+        producer.unsubscribe(subscriber)
+        producer.publish("alerts", {"number": 4})
+        assert subscriber.empty()
+
+    def test_subscribe_with_last_statuses(self):
+
+        producer = service_management.StatusProducer()
+        producer.statuses = {"scheduler": {"status": "off"}}
+        # Avoid starting the checks of the statuses
+        producer.thread = True
+
+        subscriber = producer.subscribe()
+        assert subscriber.get_nowait() == "event: scheduler\ndata: {\"status\": \"off\"}\n\n"
+        assert subscriber in producer.subscribers
+
+    def test_single_producer_by_host(self):
+
+        leader = service_management.StatusProducer(self.path)
+        follower = service_management.StatusProducer(self.path)
+        # Avoid starting the threads of the producers
+        leader.thread = follower.thread = True
+        subscriber = follower.subscribe()
+
+        # Only one producer checks the statuses
+        assert leader._acquire_leadership()
+        assert not follower._acquire_leadership()
+
+        leader._produce()
+        follower._tail_state()
+        assert follower.statuses == self.statuses
+        assert subscriber.get_nowait() == "event: orc\ndata: " + json.dumps(self.statuses["orc"]) + "\n\n"
+        assert subscriber.get_nowait() == "event: cron\ndata: " + json.dumps(self.statuses["cron"]) + "\n\n"
+        assert subscriber.get_nowait() == "event: scheduler\ndata: " + json.dumps(self.statuses["scheduler"]) + "\n\n"
+
+        # The workers tailing the state only receive the changes
+        self.statuses["scheduler"] = {"status": "on"}
+        leader._produce()
+        follower._tail_state()
+        assert subscriber.get_nowait() == "event: scheduler\ndata: {\"status\": \"on\"}\n\n"
+        assert subscriber.empty()
+
+        # Another worker becomes the producer when the leader leaves,
+        # resuming the state of the stream
+        leader._release_leadership()
+        assert follower._acquire_leadership()
+        self.statuses["cron"] = {"crond": {"status": "off"}}
+        follower._produce()
+        follower._tail_state()
+        assert subscriber.get_nowait() == "event: cron\ndata: " + json.dumps(self.statuses["cron"]) + "\n\n"
+        assert subscriber.empty()
+
+        follower._release_leadership()
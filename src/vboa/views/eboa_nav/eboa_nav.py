@@ -13,9 +13,20 @@ import shlex
 from subprocess import Popen, PIPE
 import tempfile
 import shutil
+import threading
+import os
+import uuid
+import datetime
+import time
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
+
+# Import SQLAlchemy utilities
+from sqlalchemy import func, or_
+from sqlalchemy.orm import aliased
 
 # Import flask utilities
-from flask import Blueprint, flash, g, current_app, redirect, render_template, request, url_for, send_from_directory
+from flask import Blueprint, flash, g, current_app, redirect, render_template, request, url_for, abort
 from flask_debugtoolbar import DebugToolbarExtension
 from flask import jsonify
 
@@ -25,9 +36,17 @@ import eboa.engine.engine as eboa_engine
 from eboa.engine.engine import Engine
 import eboa.engine.alerts as eboa_alerts
 
+# Import datamodel
+from eboa.datamodel.events import Event, EventLink
+from eboa.datamodel.gauges import Gauge
+from eboa.datamodel.sources import Source
+from eboa.datamodel.annotations import Annotation, AnnotationCnf
+from eboa.datamodel.explicit_refs import ExplicitRef, ExplicitRefGrp
+from eboa.datamodel.dim_signatures import DimSignature
+from eboa.datamodel.alerts import Alert, AlertGroup, EventAlert, AnnotationAlert, SourceAlert, ExplicitRefAlert
+
 # Import auxiliary functions
-from eboa.triggering.eboa_triggering import get_triggering_conf
-from vboa.functions import set_specific_alert_filters
+from vboa.functions import set_specific_alert_filters, estimate_query_cost, count_query_elements, load_relationships, get_geometries_feature_collection, create_selection, get_selection, get_triggering_index, get_triggering_rule, deliver_file, get_graph_data, get_datatables_settings, query_datatables_page, alerts_table_columns, alerts_search_conditions, CatalogIndex, get_catalog_loader, set_keyset_pagination, set_next_pagination_cursor, query_page_by_keyset, probe_query_window, event_alerts_keyset, annotation_alerts_keyset, source_alerts_keyset, er_alerts_keyset, sources_rollup
 
 # Import vboa security
 from vboa.security import auth_required, roles_accepted
@@ -36,6 +55,52 @@ bp = Blueprint("eboa_nav", __name__, url_prefix="/eboa_nav")
 query = Query()
 engine = Engine()
 
+# Relationships used by the templates rendering every entity, loaded in
+# bulk to avoid lazy loads per row
+loading_profiles = {
+    "events": ["gauge", "source", "explicitRef"],
+    "annotations": ["annotationCnf", "source", "explicitRef"],
+    "sources": ["dimSignature"],
+    "explicit_refs": ["group"],
+    "alerts": ["alertDefinition.group"]
+}
+
+# Maximum number of sources per statement obtaining linked sources
+linked_sources_chunk_size = 1000
+
+# Default configuration for the reingestion jobs
+reingestion_jobs_path = os.environ.get("VBOA_REINGESTION_JOBS_PATH", "/tmp/vboa_reingestion_jobs")
+reingestion_jobs_ttl = float(os.environ.get("VBOA_REINGESTION_JOBS_TTL", 24*3600))
+maximum_reingestion_workers = int(os.environ.get("VBOA_MAXIMUM_REINGESTION_WORKERS", 4))
+
+# Pool of workers retrieving the sources to reingest (shared by all the
+# reingestion jobs)
+reingestion_executor = ThreadPoolExecutor(max_workers = maximum_reingestion_workers)
+reingestion_jobs_lock = threading.Lock()
+
+# Identifier of the pool of this process. The process holds the lock of
+# the identifier while it lives, so that the jobs of the processes no
+# longer existing (e.g. restarted workers) are detected
+reingestion_jobs_executor_id = uuid.uuid4().hex
+reingestion_jobs_executor_lock = None
+
+# Default configuration for the cache of the metadata of the sources in
+# the archive (the prefetches do not submit lookups beyond the limit of
+# lookups in progress)
+archive_metadata_cache_ttl = float(os.environ.get("VBOA_ARCHIVE_METADATA_CACHE_TTL", 600))
+archive_metadata_cache_negative_ttl = float(os.environ.get("VBOA_ARCHIVE_METADATA_CACHE_NEGATIVE_TTL", 30))
+archive_metadata_cache_size = int(os.environ.get("VBOA_ARCHIVE_METADATA_CACHE_SIZE", 10000))
+archive_metadata_prefetch_limit = int(os.environ.get("VBOA_ARCHIVE_METADATA_PREFETCH_LIMIT", 100))
+maximum_archive_metadata_workers = int(os.environ.get("VBOA_MAXIMUM_ARCHIVE_METADATA_WORKERS", 4))
+
+# Cache of the metadata of the sources in the archive by source name
+# (source name -> (expiration time, metadata)) and lookups in progress
+# (source name -> future)
+archive_metadata_cache = {}
+archive_metadata_lookups = {}
+archive_metadata_cache_lock = threading.Lock()
+archive_metadata_executor = ThreadPoolExecutor(max_workers = maximum_archive_metadata_workers)
+
 @bp.route("/", methods=["GET"])
 @auth_required()
 @roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
@@ -45,6 +110,401 @@ def navigate():
     """
     return render_template("eboa_nav/query_events.html")
 
+# Indexes of the catalogs of low cardinality filling the selectors of
+# the query forms
+catalog_indexes = {
+    "gauge_names": CatalogIndex(get_catalog_loader(Gauge.name)),
+    "gauge_systems": CatalogIndex(get_catalog_loader(Gauge.system)),
+    "annotation_cnf_names": CatalogIndex(get_catalog_loader(AnnotationCnf.name)),
+    "annotation_cnf_systems": CatalogIndex(get_catalog_loader(AnnotationCnf.system)),
+    "er_groups": CatalogIndex(get_catalog_loader(ExplicitRefGrp.name)),
+    "dim_signatures": CatalogIndex(get_catalog_loader(DimSignature.dim_signature)),
+    "source_processors": CatalogIndex(get_catalog_loader(Source.processor, Source.ingestion_time)),
+    "alert_names": CatalogIndex(get_catalog_loader(Alert.name)),
+    "alert_groups": CatalogIndex(get_catalog_loader(AlertGroup.name)),
+    "event_alert_generators": CatalogIndex(get_catalog_loader(EventAlert.generator, EventAlert.ingestion_time)),
+    "annotation_alert_generators": CatalogIndex(get_catalog_loader(AnnotationAlert.generator, AnnotationAlert.ingestion_time)),
+    "source_alert_generators": CatalogIndex(get_catalog_loader(SourceAlert.generator, SourceAlert.ingestion_time)),
+    "explicit_ref_alert_generators": CatalogIndex(get_catalog_loader(ExplicitRefAlert.generator, ExplicitRefAlert.ingestion_time))
+}
+
+# Entities whose queries are guarded by the estimation of their cost
+query_cost_entities = {
+    "events": ("get_events", lambda filters: set_filters_for_query_events_or_event_alerts(filters), "eboa_nav.query_events_and_render"),
+    "annotations": ("get_annotations", lambda filters: set_filters_for_query_annotations_or_annotation_alerts(filters), "eboa_nav.query_annotations_and_render"),
+    "sources": ("get_sources", lambda filters: set_filters_for_query_sources_or_source_alerts(filters), "eboa_nav.query_sources_and_render"),
+}
+
+# Keysets for paginating the navigation (entity, fields which can be
+# used as key, attribute of the UUID used as tie-breaker and default
+# ordering field)
+events_keyset = (Event, ["start", "stop", "ingestion_time"], "event_uuid", "start")
+annotations_keyset = (Annotation, ["ingestion_time"], "annotation_uuid", "ingestion_time")
+sources_keyset = (Source, ["validity_start", "validity_stop", "reception_time", "generation_time"], "source_uuid", "reception_time")
+ers_keyset = (ExplicitRef, ["explicit_ref", "ingestion_time"], "explicit_ref_uuid", "ingestion_time")
+gauges_keyset = (Gauge, ["name", "system"], "gauge_uuid", "name")
+
+# Columns of the tables of the navigation (field to order by and kwarg
+# to search by, None if the column does not allow it)
+events_table_columns = [
+    (None, None),
+    (None, "gauge_names"),
+    (None, "gauge_systems"),
+    ("start", None),
+    ("stop", None),
+    (None, None),
+    ("ingestion_time", None),
+    (None, "sources"),
+    (None, "explicit_refs"),
+    (None, None),
+    (None, None),
+    (None, None)
+]
+annotations_table_columns = [
+    (None, None),
+    (None, "annotation_cnf_names"),
+    (None, "annotation_cnf_systems"),
+    ("ingestion_time", None),
+    (None, "sources"),
+    (None, "explicit_refs"),
+    (None, None),
+    (None, None)
+]
+sources_table_columns = [
+    (None, None),
+    (None, None),
+    ("name", "names"),
+    (None, None),
+    (None, None),
+    ("validity_start", None),
+    ("validity_stop", None),
+    (None, None),
+    ("generation_time", None),
+    (None, None),
+    ("reception_time", None),
+    ("ingestion_time", None),
+    ("ingestion_duration", None),
+    ("processing_duration", None),
+    ("reported_validity_start", None),
+    ("reported_validity_stop", None),
+    (None, None),
+    ("reported_generation_time", None),
+    (None, None),
+    (None, None),
+    (None, "dim_signatures"),
+    ("processor", "processors"),
+    ("processor_version", None),
+    (None, None),
+    (None, None)
+]
+ers_table_columns = [
+    ("explicit_ref", "explicit_refs"),
+    (None, "groups"),
+    (None, None),
+    (None, None),
+    ("ingestion_time", None),
+    (None, None),
+    (None, None),
+    (None, None)
+]
+gauges_table_columns = [
+    ("name", "names"),
+    ("system", "systems"),
+    (None, "dim_signatures"),
+    (None, None)
+]
+
+# Conditions of the global search over the searchable columns of the
+# tables of the navigation (kwarg -> function receiving the entity and
+# the searched pattern)
+events_search_conditions = {
+    "gauge_names": lambda entity, pattern: entity.gauge.has(Gauge.name.like(pattern)),
+    "gauge_systems": lambda entity, pattern: entity.gauge.has(Gauge.system.like(pattern)),
+    "sources": lambda entity, pattern: entity.source.has(Source.name.like(pattern)),
+    "explicit_refs": lambda entity, pattern: entity.explicitRef.has(ExplicitRef.explicit_ref.like(pattern))
+}
+annotations_search_conditions = {
+    "annotation_cnf_names": lambda entity, pattern: entity.annotationCnf.has(AnnotationCnf.name.like(pattern)),
+    "annotation_cnf_systems": lambda entity, pattern: entity.annotationCnf.has(AnnotationCnf.system.like(pattern)),
+    "sources": lambda entity, pattern: entity.source.has(Source.name.like(pattern)),
+    "explicit_refs": lambda entity, pattern: entity.explicitRef.has(ExplicitRef.explicit_ref.like(pattern))
+}
+sources_search_conditions = {
+    "names": lambda entity, pattern: entity.name.like(pattern),
+    "dim_signatures": lambda entity, pattern: entity.dimSignature.has(DimSignature.dim_signature.like(pattern)),
+    "processors": lambda entity, pattern: entity.processor.like(pattern)
+}
+ers_search_conditions = {
+    "explicit_refs": lambda entity, pattern: entity.explicit_ref.like(pattern),
+    "groups": lambda entity, pattern: entity.group.has(ExplicitRefGrp.name.like(pattern))
+}
+gauges_search_conditions = {
+    "names": lambda entity, pattern: entity.name.like(pattern),
+    "systems": lambda entity, pattern: entity.system.like(pattern),
+    "dim_signatures": lambda entity, pattern: entity.dim_signature.has(DimSignature.dim_signature.like(pattern))
+}
+
+# Tables processed in the server by DataTables (entity -> (function
+# obtaining the kwargs of the query from the filters of the query form,
+# function querying the elements of a page, template rendering the rows,
+# name of the elements in the template, columns, keyset, conditions of
+# the global search))
+datatables_entities = {
+    "events": (lambda filters: set_filters_for_query_events(filters),
+               lambda kwargs: query_table_elements("get_events", kwargs, "events"),
+               "eboa_nav/events_table_rows.html", "events", events_table_columns, events_keyset, events_search_conditions),
+    "annotations": (lambda filters: set_filters_for_query_annotations(filters),
+                    lambda kwargs: query_table_elements("get_annotations", kwargs, "annotations"),
+                    "eboa_nav/annotations_table_rows.html", "annotations", annotations_table_columns, annotations_keyset, annotations_search_conditions),
+    "sources": (lambda filters: set_filters_for_query_ingested_sources(filters),
+                lambda kwargs: query_table_elements("get_sources", kwargs, "sources"),
+                "eboa_nav/sources_table_rows.html", "sources", sources_table_columns, sources_keyset, sources_search_conditions),
+    "explicit-refs": (lambda filters: set_filters_for_query_ers(filters),
+                      lambda kwargs: query_table_elements("get_explicit_refs", kwargs, "explicit_refs"),
+                      "eboa_nav/explicit_references_table_rows.html", "ers", ers_table_columns, ers_keyset, ers_search_conditions),
+    "gauges": (lambda filters: set_filters_for_query_gauges(filters),
+               lambda kwargs: query_table_elements("get_gauges", kwargs),
+               "eboa_nav/gauges_table_rows.html", "gauges", gauges_table_columns, gauges_keyset, gauges_search_conditions),
+    "event-alerts": (lambda filters: set_filters_for_query_event_alerts(filters),
+                     lambda kwargs: query_table_elements("get_event_alerts", kwargs, "alerts"),
+                     "general_view_alerts/general_view_alerts_events_table_content.html", "alerts", alerts_table_columns, event_alerts_keyset, alerts_search_conditions),
+    "annotation-alerts": (lambda filters: set_filters_for_query_annotation_alerts(filters),
+                          lambda kwargs: query_table_elements("get_annotation_alerts", kwargs, "alerts"),
+                          "general_view_alerts/general_view_alerts_annotations_table_content.html", "alerts", alerts_table_columns, annotation_alerts_keyset, alerts_search_conditions),
+    "source-alerts": (lambda filters: set_filters_for_query_source_alerts(filters),
+                      lambda kwargs: query_table_elements("get_source_alerts", kwargs, "alerts"),
+                      "general_view_alerts/general_view_alerts_sources_table_content.html", "alerts", alerts_table_columns, source_alerts_keyset, alerts_search_conditions),
+    "explicit-ref-alerts": (lambda filters: set_filters_for_query_er_alerts(filters),
+                            lambda kwargs: query_table_elements("get_explicit_ref_alerts", kwargs, "alerts"),
+                            "general_view_alerts/general_view_alerts_explicit_refs_table_content.html", "alerts", alerts_table_columns, er_alerts_keyset, alerts_search_conditions)
+}
+
+# Pages rendered without rows, which are requested by DataTables
+# (entity -> (function obtaining the kwargs of the query from the
+# filters of the query form, method of the Query, keyset))
+query_windows = {
+    "events": (lambda filters: set_filters_for_query_events(filters), "get_events", events_keyset),
+    "annotations": (lambda filters: set_filters_for_query_annotations(filters), "get_annotations", annotations_keyset),
+    "sources": (lambda filters: set_filters_for_query_sources(filters), "get_sources", sources_keyset),
+    "explicit-refs": (lambda filters: set_filters_for_query_ers(filters), "get_explicit_refs", ers_keyset)
+}
+
+def check_query_cost(entity, filters):
+    """
+    Check the estimated cost of the query of the entity before executing it.
+
+    :param entity: entity to query (events, annotations or sources)
+    :type entity: str
+    :param filters: filters received from the query form
+    :type filters: dict
+
+    :return: page asking for the confirmation of the query (or informing about its rejection) or None if the query can be executed
+    :rtype: str
+    """
+    estimation = get_unaccepted_query_cost(entity, filters)
+    if estimation is None:
+        return None
+    # end if
+    route = query_cost_entities[entity][2]
+
+    # Do not propagate the flag of confirmation as it is added by the form
+    filters_to_repost = {name: values for name, values in filters.items() if name != "confirm_query_cost"}
+
+    return render_template("eboa_nav/query_cost_confirmation.html", entity=entity, estimation=estimation, filters=filters_to_repost, route=url_for(route), back_route=url_for(route))
+
+def get_unaccepted_query_cost(entity, filters):
+    """
+    Estimate the cost of the query of the entity and check if it can be executed.
+
+    :param entity: entity to query (events, annotations or sources)
+    :type entity: str
+    :param filters: filters received from the query form
+    :type filters: dict
+
+    :return: estimation of the query if it is rejected or needs a confirmation not received yet, None otherwise
+    :rtype: dict
+    """
+    query_method_name, set_filters, route = query_cost_entities[entity]
+
+    estimation = estimate_query_cost(query_method_name, **set_filters(filters))
+    current_app.logger.debug("Estimated cost of the query of {}: {}".format(entity, estimation))
+
+    if estimation["action"] == "run" or (estimation["action"] == "confirm" and "confirm_query_cost" in filters):
+        return None
+    # end if
+
+    return estimation
+
+@bp.route("/estimate-query-cost/<string:entity>", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def estimate_query_cost_of_entity(entity):
+    """
+    Preview of the estimated cost of the query of events, annotations or sources without executing it.
+    """
+    current_app.logger.debug("Estimate query cost of {}".format(entity))
+
+    if entity not in query_cost_entities:
+        return jsonify({"status": "KO", "message": "The entity {} is not available. Available entities are: {}".format(entity, list(query_cost_entities.keys()))}), 400
+    # end if
+
+    filters = request.json
+    if filters is None:
+        filters = request.form.to_dict(flat=False).copy()
+    # end if
+
+    query_method_name, set_filters, route = query_cost_entities[entity]
+
+    estimation = estimate_query_cost(query_method_name, **set_filters(filters))
+
+    return jsonify(estimation)
+
+@bp.route("/count-query-elements/<string:entity>", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def count_query_elements_of_entity(entity):
+    """
+    Number of events, annotations or sources matching the filters of the query (estimated by the planner when it is large).
+    """
+    current_app.logger.debug("Count query elements of {}".format(entity))
+
+    if entity not in query_cost_entities:
+        return jsonify({"status": "KO", "message": "The entity {} is not available. Available entities are: {}".format(entity, list(query_cost_entities.keys()))}), 400
+    # end if
+
+    filters = request.json
+    if filters is None:
+        filters = request.form.to_dict(flat=False).copy()
+    # end if
+
+    query_method_name, set_filters, route = query_cost_entities[entity]
+
+    count = count_query_elements(query_method_name, **set_filters(filters))
+
+    return jsonify(count)
+
+@bp.route("/datatables/<string:entity>", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def query_datatables(entity):
+    """
+    Query the page of a table processed in the server by DataTables.
+
+    The request carries the parameters of DataTables (draw, start,
+    length, order, columns and search), the number of rows of the table
+    (if known) and the filters of the query form which originated the
+    table.
+
+    :param entity: entity of the table
+    :type entity: str
+
+    :return: JSON with the draw, the number of rows and the rendered rows of the page
+    :rtype: str
+    """
+    current_app.logger.debug("Query page of the table of {}".format(entity))
+
+    if entity not in datatables_entities:
+        return jsonify({"status": "KO", "message": "The entity {} has no table processed in the server. Available entities are: {}".format(entity, list(datatables_entities.keys()))}), 400
+    # end if
+
+    parameters = request.get_json(silent = True)
+    if type(parameters) != dict or type(parameters.get("filters")) != dict:
+        return jsonify({"status": "KO", "message": "The method needs to receive the JSON data with the parameters of DataTables and the filters of the query form"}), 400
+    # end if
+
+    set_filters, query_elements, template, elements_name, columns, keyset, search_conditions = datatables_entities[entity]
+
+    if entity in query_cost_entities:
+        estimation = get_unaccepted_query_cost(entity, parameters["filters"])
+        if estimation is not None:
+            return jsonify({"status": "KO", "message": "The estimated cost of the query needs to be confirmed in the query form (action: {})".format(estimation["action"]), "estimation": estimation}), 400
+        # end if
+    # end if
+
+    try:
+        elements, response = query_datatables_page(parameters, set_filters(parameters["filters"]), columns, query_elements, keyset, search_conditions)
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+        return jsonify({"status": "KO", "message": "The parameters of the table are not valid: {}".format(e)}), 400
+    # end try
+    response["rows"] = render_template(template, **{elements_name: elements})
+
+    return jsonify(response)
+
+def get_table_settings(entity, filters, records_total):
+    """
+    Obtain the settings of the table of the entity processed in the server by DataTables.
+
+    :param entity: entity of the table
+    :type entity: str
+    :param filters: filters received from the query form
+    :type filters: dict
+    :param records_total: number of rows of the table (None if the rows are not rendered with the page)
+    :type records_total: int
+
+    :return: settings of the table for the templates
+    :rtype: dict
+    """
+    return get_datatables_settings(url_for("eboa_nav.query_datatables", entity=entity), filters, records_total, datatables_entities[entity][4])
+
+def probe_page(entity, filters):
+    """
+    Probe the page of the entity requested in the query form, which is
+    rendered without rows as they are requested by DataTables.
+
+    :param entity: entity of the page
+    :type entity: str
+    :param filters: filters received from the query form (updated with the cursor of the following page)
+    :type filters: dict
+
+    :return: number of elements of the page known by the probes
+    :rtype: int
+    """
+    set_filters, query_method_name, keyset = query_windows[entity]
+
+    return probe_query_window(lambda kwargs: getattr(query, query_method_name)(**kwargs), set_filters(filters), filters, keyset)
+
+def query_page_uuids(entity, filters):
+    """
+    Query the UUIDs of the elements of the page of the entity requested
+    in the query form (used by the graphs and the maps of the pages
+    rendered without rows).
+
+    :param entity: entity of the page
+    :type entity: str
+    :param filters: filters received from the query form
+    :type filters: dict
+
+    :return: list of UUIDs
+    :rtype: list
+    """
+    set_filters, query_method_name, keyset = query_windows[entity]
+
+    elements = query_page_by_keyset(lambda kwargs: getattr(query, query_method_name)(**kwargs), set_filters(filters), filters, keyset)
+
+    return [str(getattr(element, keyset[2])) for element in elements]
+
+def query_table_elements(query_method_name, kwargs, loading_profile = None):
+    """
+    Query the elements of a page of a table processed in the server by DataTables.
+
+    :param query_method_name: name of the method of the Query (e.g. get_events)
+    :type query_method_name: str
+    :param kwargs: filters of the method
+    :type kwargs: dict
+    :param loading_profile: name of the loading profile of the relationships used by the rows
+    :type loading_profile: str
+
+    :return: list of elements
+    :rtype: list
+    """
+    elements = getattr(query, query_method_name)(**kwargs)
+
+    if loading_profile is not None:
+        load_relationships(query.session, elements, loading_profiles[loading_profile])
+    # end if
+
+    return elements
+
 @bp.route("/query-events", methods=["GET", "POST"])
 @auth_required()
 @roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
@@ -58,17 +518,17 @@ def query_events_and_render():
         filters["offset"] = [""]
 
         if "query_events" in filters:
-            events = query_events(filters)
+            cost_confirmation = check_query_cost("events", filters)
+            if cost_confirmation:
+                return cost_confirmation
+            # end if
+            number_of_events = probe_page("events", filters)
             show = define_what_to_show_events(filters)
-            events_geometries = []
-            if show["map"]:
-                events_geometries = [{"event": event, "geometries": engine.geometries_to_wkt(event.eventGeometries)} for event in events if len(event.eventGeometries) > 0]
-            # end if        
 
-            return render_template("eboa_nav/events_nav.html", events=events, events_geometries=events_geometries, show=show, filters=filters)
+            return render_template("eboa_nav/events_nav.html", events=None, number_of_elements=number_of_events, show=show, filters=filters, datatables=get_table_settings("events", filters, None))
         else:
             event_alerts = query_event_alerts(filters)
-            return render_template("eboa_nav/event_alerts_nav.html", alerts=event_alerts, filters=filters)
+            return render_template("eboa_nav/event_alerts_nav.html", alerts=event_alerts, filters=filters, datatables=get_table_settings("event-alerts", filters, len(event_alerts)))
         # end if
     
     # end if
@@ -83,14 +543,14 @@ def query_events_pages():
     """
     current_app.logger.debug("Query events using pages and render")
     filters = request.json
-    events = query_events(filters)
+    cost_confirmation = check_query_cost("events", filters)
+    if cost_confirmation:
+        return cost_confirmation
+    # end if
+    number_of_events = probe_page("events", filters)
     show = define_what_to_show_events(filters)
-    events_geometries = []
-    if show["map"]:
-        events_geometries = [{"event": event, "geometries": engine.geometries_to_wkt(event.eventGeometries)} for event in events if len(event.eventGeometries) > 0]
-    # end if        
 
-    return render_template("eboa_nav/events_nav.html", events=events, events_geometries=events_geometries, show=show, filters=filters)
+    return render_template("eboa_nav/events_nav.html", events=None, number_of_elements=number_of_events, show=show, filters=filters, datatables=get_table_settings("events", filters, None))
 
 def define_what_to_show_events(filters):
     """
@@ -125,10 +585,9 @@ def query_events_by_er(er):
 
     events = query.get_events(explicit_refs={"filter": [er], "op": "in"})
 
-    events_geometries = []
-    events_geometries = [{"event": event, "geometries": engine.geometries_to_wkt(event.eventGeometries)} for event in events if len(event.eventGeometries) > 0]
+    load_relationships(query.session, events, loading_profiles["events"])
 
-    return render_template("eboa_nav/events_nav.html", events=events, events_geometries=events_geometries, show=show, filters=filters)
+    return render_template("eboa_nav/events_nav.html", events=events, show=show, filters=filters)
 
 @bp.route("/query-events-by-source-uuid/<string:source_uuid>")
 @auth_required()
@@ -147,10 +606,9 @@ def query_events_by_source_uuid(source_uuid):
 
     events = query.get_events(source_uuids={"filter": [source_uuid], "op": "in"})
 
-    events_geometries = []
-    events_geometries = [{"event": event, "geometries": engine.geometries_to_wkt(event.eventGeometries)} for event in events if len(event.eventGeometries) > 0]
+    load_relationships(query.session, events, loading_profiles["events"])
 
-    return render_template("eboa_nav/events_nav.html", events=events, events_geometries=events_geometries, show=show, filters=filters)
+    return render_template("eboa_nav/events_nav.html", events=events, show=show, filters=filters)
 
 def query_events(filters):
     """
@@ -158,27 +616,55 @@ def query_events(filters):
     """
     current_app.logger.debug("Query events")
 
-    kwargs = set_filters_for_query_events_or_event_alerts(filters)
+    kwargs = set_filters_for_query_events(filters)
+
+    events = query_page_by_keyset(lambda kwargs: query.get_events(**kwargs), kwargs, filters, events_keyset)
 
-    events = query.get_events(**kwargs)
+    load_relationships(query.session, events, loading_profiles["events"])
+
+    set_next_pagination_cursor(filters, events, events_keyset)
 
     return events
 
+def set_filters_for_query_events(filters):
+    """
+    Set filter for query events paginating by keyset.
+    """
+    kwargs = set_filters_for_query_events_or_event_alerts(filters)
+
+    set_keyset_pagination(filters, kwargs, events_keyset)
+
+    return kwargs
+
 def query_event_alerts(filters):
     """
     Query event alerts.
     """
     current_app.logger.debug("Query event alerts")
 
+    kwargs = set_filters_for_query_event_alerts(filters)
+
+    event_alerts = query_page_by_keyset(lambda kwargs: query.get_event_alerts(**kwargs), kwargs, filters, event_alerts_keyset)
+
+    load_relationships(query.session, event_alerts, loading_profiles["alerts"])
+
+    set_next_pagination_cursor(filters, event_alerts, event_alerts_keyset)
+
+    return event_alerts
+
+def set_filters_for_query_event_alerts(filters):
+    """
+    Set filter for query event alerts paginating by keyset.
+    """
     event_kwargs = set_filters_for_query_events_or_event_alerts(filters)
 
     alert_kwargs = set_specific_alert_filters(filters)
 
     kwargs = {**event_kwargs, **alert_kwargs}
 
-    event_alerts = query.get_event_alerts(**kwargs)
+    set_keyset_pagination(filters, kwargs, event_alerts_keyset)
 
-    return event_alerts
+    return kwargs
 
 def set_filters_for_query_events_or_event_alerts(filters):
     """
@@ -371,8 +857,7 @@ def query_event_links_and_render(event_uuid):
     current_app.logger.debug("Query event links and render")
     links = query_event_links(event_uuid)
     events = links["prime_events"] + [link["event"] for link in links["events_linking"]] + [link["event"] for link in links["linked_events"]]
-    events_geometries = [{"event": event, "geometries": engine.geometries_to_wkt(event.eventGeometries)} for event in events if len(event.eventGeometries) > 0]
-    return render_template("eboa_nav/linked_events_nav.html", links=links, events=events, events_geometries=events_geometries)
+    return render_template("eboa_nav/linked_events_nav.html", links=links, events=events, links_for_network=get_links_for_network(links, "event"))
 
 def query_event_links(event_uuid):
     """
@@ -395,6 +880,140 @@ def query_jsonify_event_values(event_uuid):
     jsonified_values = [value.jsonify() for value in values]
     return jsonify(jsonified_values)
 
+@bp.route("/query-<string:entity>-geometries", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def query_geometries(entity):
+    """
+    Query the geometries of the events or annotations with the received UUIDs as a GeoJSON FeatureCollection.
+
+    The UUIDs are received or obtained from the page requested by the
+    filters of the query form. They are kept in the server as a
+    selection, whose identifier is returned in the FeatureCollection
+    (member "selection"), so that the next requests of the map only
+    send the identifier. The expired selections are reported with the
+    status 410 for the client to send the UUIDs (or the filters) again.
+
+    Expected JSON: {"uuids": [<UUIDs>] or "filters": <filters of the query form> or "selection": <identifier of the selection>,
+                    "zoom": <zoom level of the map (optional)>,
+                    "bbox": [<min longitude>, <min latitude>, <max longitude>, <max latitude>] (optional)}
+    """
+    current_app.logger.debug("Query geometries of {}".format(entity))
+
+    parameters = request.get_json()
+    if parameters is None or (not "uuids" in parameters and not "filters" in parameters and not "selection" in parameters):
+        return jsonify({"status": "KO", "message": "The method needs to receive the JSON data with the UUIDs of the {}".format(entity)}), 400
+    # end if
+
+    try:
+        if "selection" in parameters:
+            selection = parameters["selection"]
+            uuids = get_selection(selection)
+            if uuids is None:
+                return jsonify({"status": "KO", "message": "The selection {} does not exist or it has expired".format(selection)}), 410
+            # end if
+        else:
+            uuids = get_requested_uuids(entity, parameters)
+            selection = None
+        # end if
+        feature_collection = get_geometries_feature_collection(query.session, entity, uuids, parameters.get("zoom"), parameters.get("bbox"))
+        if selection is None:
+            selection = create_selection(uuids)
+        # end if
+    except (ValueError, TypeError) as e:
+        return jsonify({"status": "KO", "message": str(e)}), 400
+    # end try
+
+    feature_collection["selection"] = selection
+
+    response = jsonify(feature_collection)
+    response.mimetype = "application/geo+json"
+
+    return response
+
+@bp.route("/query-<string:entity>-graph-data", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def query_graph_data(entity):
+    """
+    Query the data shown in the graphs of the events, sources or explicit references with the received UUIDs.
+
+    The UUIDs are received or obtained from the page requested by the
+    filters of the query form.
+
+    Expected JSON: {"uuids": [<UUIDs>]} or {"filters": <filters of the query form>}
+    """
+    current_app.logger.debug("Query data for the graphs of {}".format(entity))
+
+    parameters = request.get_json()
+    if parameters is None or (not "uuids" in parameters and not "filters" in parameters):
+        return jsonify({"status": "KO", "message": "The method needs to receive the JSON data with the UUIDs of the {}".format(entity)}), 400
+    # end if
+
+    try:
+        graph_data = get_graph_data(query.session, entity.replace("-", "_"), get_requested_uuids(entity, parameters))
+    except (ValueError, TypeError) as e:
+        return jsonify({"status": "KO", "message": str(e)}), 400
+    # end try
+
+    return jsonify(graph_data)
+
+def get_requested_uuids(entity, parameters):
+    """
+    Get the UUIDs received or the UUIDs of the page requested by the
+    received filters of the query form.
+
+    :param entity: entity of the elements
+    :type entity: str
+    :param parameters: JSON data with the UUIDs (uuids) or the filters of the query form (filters)
+    :type parameters: dict
+
+    :return: list of UUIDs
+    :rtype: list
+    """
+    if "uuids" in parameters:
+        return parameters["uuids"]
+    # end if
+
+    filters = parameters["filters"]
+    if entity not in query_windows or type(filters) != dict:
+        raise ValueError("The {} cannot be obtained from the filters of the query form".format(entity))
+    # end if
+
+    try:
+        return query_page_uuids(entity, filters)
+    except (KeyError, IndexError) as e:
+        raise ValueError("The filters of the query form are not valid: {}".format(e))
+    # end try
+
+def get_links_for_network(links, entity):
+    """
+    Get the relation of every item of the links with the prime item for
+    the networks (the data of the items is requested to
+    /query-<entity>-graph-data).
+
+    :param links: links as returned by query_event_links or query_er_links
+    :type links: dict
+    :param entity: key of the linked items in the links (event or explicit_ref)
+    :type entity: str
+
+    :return: list with the UUID, the label and the link name of each item
+    :rtype: list
+    """
+    uuid_attribute = entity + "_uuid"
+    links_for_network = []
+    for key in links:
+        for link in links[key]:
+            if key.startswith("prime_"):
+                links_for_network.append({"id": str(getattr(link, uuid_attribute)), "label": key, "link_name": ""})
+            else:
+                links_for_network.append({"id": str(getattr(link[entity], uuid_attribute)), "label": key, "link_name": link["link_name"]})
+            # end if
+        # end for
+    # end for
+
+    return links_for_network
+
 @bp.route("/query-annotations", methods=["GET", "POST"])
 @auth_required()
 @roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
@@ -408,17 +1027,17 @@ def query_annotations_and_render():
         filters["offset"] = [""]
 
         if "query_annotations" in filters:
-            annotations = query_annotations(filters)
-            show = define_what_to_show_annotations(filters)
-            annotations_geometries = []
-            if show["map"]:
-                annotations_geometries = [{"annotation": annotation, "geometries": engine.geometries_to_wkt(annotation.annotationGeometries)} for annotation in annotations if len(annotation.annotationGeometries) > 0]
+            cost_confirmation = check_query_cost("annotations", filters)
+            if cost_confirmation:
+                return cost_confirmation
             # end if
+            number_of_annotations = probe_page("annotations", filters)
+            show = define_what_to_show_annotations(filters)
 
-            return render_template("eboa_nav/annotations_nav.html", annotations=annotations, annotations_geometries=annotations_geometries, show=show, filters=filters)
+            return render_template("eboa_nav/annotations_nav.html", annotations=None, number_of_elements=number_of_annotations, show=show, filters=filters, datatables=get_table_settings("annotations", filters, None))
         else:
             annotation_alerts = query_annotation_alerts(filters)
-            return render_template("eboa_nav/annotation_alerts_nav.html", alerts=annotation_alerts, filters=filters)
+            return render_template("eboa_nav/annotation_alerts_nav.html", alerts=annotation_alerts, filters=filters, datatables=get_table_settings("annotation-alerts", filters, len(annotation_alerts)))
         # end if
 
     # end if
@@ -433,15 +1052,15 @@ def query_annotations_pages():
     """
     current_app.logger.debug("Query annotations using pages and render")
     filters = request.json
-    annotations = query_annotations(filters)
+    cost_confirmation = check_query_cost("annotations", filters)
+    if cost_confirmation:
+        return cost_confirmation
+    # end if
+    number_of_annotations = probe_page("annotations", filters)
     
     show = define_what_to_show_annotations(filters)
-    annotations_geometries = []
-    if show["map"]:
-        annotations_geometries = [{"annotation": annotation, "geometries": engine.geometries_to_wkt(annotation.annotationGeometries)} for annotation in annotations if len(annotation.annotationGeometries) > 0]
-    # end if
 
-    return render_template("eboa_nav/annotations_nav.html", annotations=annotations, annotations_geometries=annotations_geometries, show=show, filters=filters)
+    return render_template("eboa_nav/annotations_nav.html", annotations=None, number_of_elements=number_of_annotations, show=show, filters=filters, datatables=get_table_settings("annotations", filters, None))
 
 def define_what_to_show_annotations(filters):
     """
@@ -471,9 +1090,9 @@ def query_annotations_by_er(er):
     
     annotations = query.get_annotations(explicit_refs={"filter": [er], "op": "in"})
 
-    annotations_geometries = [{"annotation": annotation, "geometries": engine.geometries_to_wkt(annotation.annotationGeometries)} for annotation in annotations if len(annotation.annotationGeometries) > 0]
+    load_relationships(query.session, annotations, loading_profiles["annotations"])
 
-    return render_template("eboa_nav/annotations_nav.html", annotations=annotations, annotations_geometries=annotations_geometries, show=show, filters=filters)
+    return render_template("eboa_nav/annotations_nav.html", annotations=annotations, show=show, filters=filters)
 
 @bp.route("/query-annotation/<uuid:annotation_uuid>")
 @auth_required()
@@ -492,11 +1111,7 @@ def query_annotation(annotation_uuid):
 
     annotation = query.get_annotations(annotation_uuids={"filter": [annotation_uuid], "op": "in"})
 
-    annotation_geometries = []
-    if len(annotation[0].annotationGeometries) > 0: 
-        annotation_geometries = [{"annotation": annotation, "geometries": engine.geometries_to_wkt(annotation.annotationGeometries)}]
-
-    return render_template("eboa_nav/annotations_nav.html", annotations=annotation, annotations_geometries=annotation_geometries, show=show, filters=filters)
+    return render_template("eboa_nav/annotations_nav.html", annotations=annotation, show=show, filters=filters)
 
 @bp.route("/query-annotations-by-source-uuid/<string:source_uuid>")
 @auth_required()
@@ -514,10 +1129,9 @@ def query_annotations_by_source_uuid(source_uuid):
 
     annotations = query.get_annotations(source_uuids={"filter": [source_uuid], "op": "in"})
 
-    annotations_geometries = []
-    annotations_geometries = [{"annotation": annotation, "geometries": engine.geometries_to_wkt(annotation.annotationGeometries)} for annotation in annotations if len(annotation.annotationGeometries) > 0]
+    load_relationships(query.session, annotations, loading_profiles["annotations"])
 
-    return render_template("eboa_nav/annotations_nav.html", annotations=annotations, annotations_geometries=annotations_geometries, show=show, filters=filters)
+    return render_template("eboa_nav/annotations_nav.html", annotations=annotations, show=show, filters=filters)
 
 def query_annotations(filters):
     """
@@ -525,27 +1139,55 @@ def query_annotations(filters):
     """
     current_app.logger.debug("Query annotations")
 
-    kwargs = set_filters_for_query_annotations_or_annotation_alerts(filters)
+    kwargs = set_filters_for_query_annotations(filters)
+
+    annotations = query_page_by_keyset(lambda kwargs: query.get_annotations(**kwargs), kwargs, filters, annotations_keyset)
+
+    load_relationships(query.session, annotations, loading_profiles["annotations"])
 
-    annotations = query.get_annotations(**kwargs)
+    set_next_pagination_cursor(filters, annotations, annotations_keyset)
 
     return annotations
 
+def set_filters_for_query_annotations(filters):
+    """
+    Set filter for query annotations paginating by keyset.
+    """
+    kwargs = set_filters_for_query_annotations_or_annotation_alerts(filters)
+
+    set_keyset_pagination(filters, kwargs, annotations_keyset)
+
+    return kwargs
+
 def query_annotation_alerts(filters):
     """
     Query annotation alerts.
     """
     current_app.logger.debug("Query annotation alerts")
 
+    kwargs = set_filters_for_query_annotation_alerts(filters)
+
+    annotation_alerts = query_page_by_keyset(lambda kwargs: query.get_annotation_alerts(**kwargs), kwargs, filters, annotation_alerts_keyset)
+
+    load_relationships(query.session, annotation_alerts, loading_profiles["alerts"])
+
+    set_next_pagination_cursor(filters, annotation_alerts, annotation_alerts_keyset)
+
+    return annotation_alerts
+
+def set_filters_for_query_annotation_alerts(filters):
+    """
+    Set filter for query annotation alerts paginating by keyset.
+    """
     annotation_kwargs = set_filters_for_query_annotations_or_annotation_alerts(filters)
 
     alert_kwargs = set_specific_alert_filters(filters)
 
     kwargs = {**annotation_kwargs, **alert_kwargs}
 
-    annotation_alerts = query.get_annotation_alerts(**kwargs)
+    set_keyset_pagination(filters, kwargs, annotation_alerts_keyset)
 
-    return annotation_alerts
+    return kwargs
 
 def set_filters_for_query_annotations_or_annotation_alerts(filters):
     """
@@ -710,12 +1352,18 @@ def query_sources_and_render():
         filters["offset"] = [""]
 
         if "query_sources" in filters:
-            sources = query_sources(filters)
+            cost_confirmation = check_query_cost("sources", filters)
+            if cost_confirmation:
+                return cost_confirmation
+            # end if
+            number_of_sources = probe_page("sources", filters)
+            not_ingested_sources = query_not_ingested_sources(filters)
             show = define_what_to_show_sources(filters)
-            return render_template("eboa_nav/sources_nav.html", sources=sources, show=show, filters=filters)
+
+            return render_template("eboa_nav/sources_nav.html", sources=None, not_ingested_sources=not_ingested_sources, number_of_elements=number_of_sources, show=show, filters=filters, datatables=get_table_settings("sources", filters, None))
         else:
             source_alerts = query_source_alerts(filters)
-            return render_template("eboa_nav/source_alerts_nav.html", alerts=source_alerts, filters=filters)
+            return render_template("eboa_nav/source_alerts_nav.html", alerts=source_alerts, filters=filters, datatables=get_table_settings("source-alerts", filters, len(source_alerts)))
         # end if
     # end if
 
@@ -731,9 +1379,14 @@ def query_sources_pages():
     current_app.logger.debug("Query sources using pages and render")
     filters = request.json
 
-    sources = query_sources(filters)
+    cost_confirmation = check_query_cost("sources", filters)
+    if cost_confirmation:
+        return cost_confirmation
+    # end if
+    number_of_sources = probe_page("sources", filters)
+    not_ingested_sources = query_not_ingested_sources(filters)
     show = define_what_to_show_sources(filters)
-    return render_template("eboa_nav/sources_nav.html", sources=sources, show=show, filters=filters)
+    return render_template("eboa_nav/sources_nav.html", sources=None, not_ingested_sources=not_ingested_sources, number_of_elements=number_of_sources, show=show, filters=filters, datatables=get_table_settings("sources", filters, None))
 
 def define_what_to_show_sources(filters):
     """
@@ -770,27 +1423,80 @@ def query_sources(filters):
     """
     current_app.logger.debug("Query sources")
     
-    kwargs = set_filters_for_query_sources_or_source_alerts(filters)
+    kwargs = set_filters_for_query_sources(filters)
 
-    sources = query.get_sources(**kwargs)
+    sources = query_page_by_keyset(lambda kwargs: query.get_sources(**kwargs), kwargs, filters, sources_keyset)
+
+    load_relationships(query.session, sources, loading_profiles["sources"])
+
+    set_next_pagination_cursor(filters, sources, sources_keyset)
+
+    return sources
+
+def query_not_ingested_sources(filters):
+    """
+    Query the sources not ingested of the page requested in the query form.
+    """
+    current_app.logger.debug("Query not ingested sources")
+
+    kwargs = set_filters_for_query_sources(filters)
+
+    sources = query_page_by_keyset(lambda kwargs: query.get_sources(**kwargs), kwargs, filters, sources_keyset, or_(Source.ingested == False, Source.ingested.is_(None)))
+
+    load_relationships(query.session, sources, loading_profiles["sources"])
 
     return sources
 
+def set_filters_for_query_sources(filters):
+    """
+    Set filter for query sources paginating by keyset.
+    """
+    kwargs = set_filters_for_query_sources_or_source_alerts(filters)
+
+    set_keyset_pagination(filters, kwargs, sources_keyset)
+
+    return kwargs
+
 def query_source_alerts(filters):
     """
     Query source alerts.
     """
     current_app.logger.debug("Query source alerts")
 
+    kwargs = set_filters_for_query_source_alerts(filters)
+
+    source_alerts = query_page_by_keyset(lambda kwargs: query.get_source_alerts(**kwargs), kwargs, filters, source_alerts_keyset)
+
+    load_relationships(query.session, source_alerts, loading_profiles["alerts"])
+
+    set_next_pagination_cursor(filters, source_alerts, source_alerts_keyset)
+
+    return source_alerts
+
+def set_filters_for_query_source_alerts(filters):
+    """
+    Set filter for query source alerts paginating by keyset.
+    """
     source_kwargs = set_filters_for_query_sources_or_source_alerts(filters)
 
     alert_kwargs = set_specific_alert_filters(filters)
 
     kwargs = {**source_kwargs, **alert_kwargs}
 
-    source_alerts = query.get_source_alerts(**kwargs)
+    set_keyset_pagination(filters, kwargs, source_alerts_keyset)
 
-    return source_alerts
+    return kwargs
+
+def set_filters_for_query_ingested_sources(filters):
+    """
+    Set filter for query the sources shown in the table of ingested sources.
+    """
+    kwargs = set_filters_for_query_sources(filters)
+
+    # The sources without ingestion duration are shown in the table of not ingested sources
+    kwargs["ingestion_duration_filters"] = kwargs.get("ingestion_duration_filters", []) + [{"float": 0, "op": ">"}]
+
+    return kwargs
 
 def set_filters_for_query_sources_or_source_alerts(filters):
     """
@@ -1030,6 +1736,8 @@ def query_sources_by_name(name):
     """
     current_app.logger.debug("Query sources by name")
     sources = query.get_sources(names={"filter": name, "op": "=="})
+
+    load_relationships(query.session, sources, loading_profiles["sources"])
     show = {}
     show["validity_timeline"]=True
     show["generation_to_ingestion_timeline"]=True
@@ -1052,6 +1760,8 @@ def query_sources_by_dim(dim_signature_uuid):
     """
     current_app.logger.debug("Query sources by DIM signature")
     sources = query.get_sources(dim_signature_uuids={"filter": [dim_signature_uuid], "op": "in"})
+
+    load_relationships(query.session, sources, loading_profiles["sources"])
     show = {}
     show["validity_timeline"]=True
     show["generation_to_ingestion_timeline"]=True
@@ -1106,16 +1816,9 @@ def query_jsonify_sources_by_processor():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["order_by"] = {"field": "reception_time", "descending": True}
-    kwargs["processors"] = {"filter": "%" + search + "%", "op": "like"}
+    processors = catalog_indexes["source_processors"].lookup(search, limit, offset)
 
-    sources = query.get_sources(**kwargs)
-    jsonified_sources = [source.jsonify() for source in sources]
-    return jsonify(jsonified_sources)
+    return jsonify([{"processor": processor} for processor in processors])
 
 @bp.route("/query-jsonify-source-statuses/<uuid:source_uuid>")
 @auth_required()
@@ -1136,151 +1839,471 @@ def get_source_status():
     """
     Get the source statuses defined in the EBOA component.
     """
-    current_app.logger.debug("Get source statuses")
-    return jsonify(eboa_engine.exit_codes)
+    current_app.logger.debug("Get source statuses")
+    return jsonify(eboa_engine.exit_codes)
+
+def prepare_reingestion_of_sources_and_dependencies(sources, source_uuids_matching_triggering_rule, source_uuids_not_matching_triggering_rule):
+    """
+    Classify the sources depending on whether they match a triggering rule (not skipped) and add the sources depending on them.
+
+    The dependencies are followed in a breadth-first pass using the
+    compiled triggering configuration: the sources of every level are
+    classified in memory and the sources linked to them are obtained
+    with one statement per level (and chunk of sources).
+
+    :param sources: list of sources to reingest
+    :type sources: list
+    :param source_uuids_matching_triggering_rule: list where to add the UUIDs of the sources to reingest
+    :type source_uuids_matching_triggering_rule: list
+    :param source_uuids_not_matching_triggering_rule: list where to add the UUIDs of the sources which will not be reingested
+    :type source_uuids_not_matching_triggering_rule: list
+    """
+
+    if len(sources) == 0:
+        return
+    # end if
+
+    # Get triggering configuration
+    triggering_index = get_triggering_index()
+
+    visited_source_uuids = set()
+    sources_to_classify = [(source.source_uuid, source.name) for source in sources]
+    while len(sources_to_classify) > 0:
+        dependent_source_masks = {}
+        for source_uuid, source_name in sources_to_classify:
+            if source_uuid in visited_source_uuids:
+                continue
+            # end if
+            visited_source_uuids.add(source_uuid)
+
+            rule = get_triggering_rule(triggering_index, source_name)
+            if rule is not None and not rule["skip"]:
+                source_uuids_matching_triggering_rule.append(source_uuid)
+                source_masks_depending_on_this = triggering_index["dependents"].get(rule["source_type"], [])
+                if len(source_masks_depending_on_this) > 0:
+                    dependent_source_masks[source_uuid] = source_masks_depending_on_this
+                # end if
+            else:
+                source_uuids_not_matching_triggering_rule.append(source_uuid)
+            # end if
+        # end for
+
+        # Obtain the sources of the events linked by the events of
+        # the sources with dependencies
+        sources_to_classify = []
+        for source_uuid, linked_source_uuid, linked_source_name in get_linked_sources(list(dependent_source_masks.keys())):
+            if linked_source_uuid not in visited_source_uuids and len([source_mask for source_mask in dependent_source_masks[source_uuid] if source_mask.match(linked_source_name)]) > 0:
+                sources_to_classify.append((linked_source_uuid, linked_source_name))
+            # end if
+        # end for
+    # end while
+
+    return
+
+def get_linked_sources(source_uuids):
+    """
+    Get the sources of the events linked by the events of the received sources.
+
+    :param source_uuids: list of UUIDs of the sources
+    :type source_uuids: list
+
+    :return: list of tuples (UUID of the source, UUID of the linked source, name of the linked source)
+    :rtype: list
+    """
+    linked_sources = []
+    event = aliased(Event)
+    linked_event = aliased(Event)
+    for i in range(0, len(source_uuids), linked_sources_chunk_size):
+        linked_sources += query.session.query(event.source_uuid, Source.source_uuid, Source.name) \
+                                       .join(EventLink, EventLink.event_uuid == event.event_uuid) \
+                                       .join(linked_event, EventLink.event_uuid_link == linked_event.event_uuid) \
+                                       .join(Source, linked_event.source_uuid == Source.source_uuid) \
+                                       .filter(event.source_uuid.in_(source_uuids[i:i + linked_sources_chunk_size])) \
+                                       .distinct() \
+                                       .all()
+    # end for
+
+    return linked_sources
+
+@bp.route("/prepare-reingestion-of-sources", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator")
+def prepare_reingestion_of_sources():
+    """
+    Prepare reingestion of selected sources.
+    """
+    current_app.logger.debug("Prepare reingestion of selected sources")
+    filters = request.json
+    sources_from_uuids = query.get_sources(source_uuids = {"filter": filters["sources"], "op": "in"})
+
+    sources = query.get_sources(names = {"filter": [source.name for source in sources_from_uuids], "op": "in"})
+
+    source_uuids_matching_triggering_rule = []
+    source_uuids_not_matching_triggering_rule = []
+    prepare_reingestion_of_sources_and_dependencies(sources, source_uuids_matching_triggering_rule, source_uuids_not_matching_triggering_rule)
+
+    sources_matching_triggering_rule = query.get_sources(source_uuids = {"filter": source_uuids_matching_triggering_rule, "op": "in"})
+
+    sources_not_matching_triggering_rule = query.get_sources(source_uuids = {"filter": source_uuids_not_matching_triggering_rule, "op": "in"})
+
+    # Warm the archive metadata needed by the reingestion while the user confirms it
+    prefetch_metadata_sources([source.name for source in sources_matching_triggering_rule])
+
+    return render_template("eboa_nav/reingestion_of_sources.html", sources_matching_triggering_rule=sources_matching_triggering_rule, sources_not_matching_triggering_rule=sources_not_matching_triggering_rule)
+
+@bp.route("/reingest-sources", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator")
+def reingest_sources():
+    """
+    Re-ingest selected sources.
+
+    The reingestion is performed by a job in the background. The
+    response contains the identifier of the job to follow its progress
+    using /eboa_nav/reingestion-jobs/<job_id>.
+    """
+    current_app.logger.debug("Re-ingest selected sources")
+    filters = request.json
+
+    sources_to_reingest = sorted(set(filters["sources"]))
+
+    remove_expired_reingestion_jobs()
+
+    job_status = {
+        "job_id": str(uuid.uuid4()),
+        "status": "running",
+        "submission_time": datetime.datetime.now().isoformat(),
+        "sources": {source_name: {"status": "pending"} for source_name in sources_to_reingest},
+        "executor": _lock_reingestion_jobs_executor()
+    }
+    _write_reingestion_job_status(job_status)
+
+    threading.Thread(target = run_reingestion_job, args = (job_status,), daemon = True).start()
+
+    return {"status": "OK",
+            "job_id": job_status["job_id"]}
+
+@bp.route("/reingestion-jobs/<string:job_id>", methods=["GET"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator")
+def get_reingestion_job(job_id):
+    """
+    Get the status of a reingestion job with the progress of every source.
+    """
+    current_app.logger.debug("Get status of the reingestion job " + job_id)
+
+    remove_expired_reingestion_jobs()
+
+    job_status = _read_reingestion_job_status(job_id)
+    if job_status is None:
+        return {"status": "NOK",
+                "error": f"The reingestion job {job_id} does not exist"}, 404
+    # end if
+
+    return job_status
+
+def run_reingestion_job(job_status):
+    """
+    Run a reingestion job.
+
+    The metadata lookup and the retrieval from the archive of every
+    source are pipelined in the pool of workers. Only once all the
+    sources are retrieved, they are removed from ORC (also in the pool
+    of workers) and, if all of them are removed, deleted from BOA and
+    moved to /inputs as one batch. If the retrieval of any source
+    fails, no changes are performed to ORC nor to the DDBB. If the
+    removal from ORC of any source fails, no changes are performed to
+    the DDBB and the sources already removed from ORC are kept in BOA
+    and in the archive, so they can be reingested by a new job.
+
+    :param job_status: status of the job
+    :type job_status: dict
+    """
+
+    temporal_folder = None
+    try:
+        # Create temporal folder inside /inputs folder to copy sources there for ORC to re-ingest
+        temporal_folder = tempfile.TemporaryDirectory(prefix = ".", dir="/inputs/")
+
+        futures = [reingestion_executor.submit(retrieve_source_for_reingestion, job_status, source_name, temporal_folder.name) for source_name in job_status["sources"]]
+        errors = [error for error in [future.result() for future in futures] if error is not None]
+
+        if len(errors) == 0:
+            futures = [reingestion_executor.submit(remove_source_from_orc, job_status, source_name) for source_name in job_status["sources"]]
+            errors = [error for error in [future.result() for future in futures] if error is not None]
+        # end if
+
+        if len(errors) > 0:
+            _update_reingestion_job_status(job_status, status = "failed", error = " ".join(errors))
+        else:
+            source_names = list(job_status["sources"].keys())
+
+            # Delete sources from BOA
+            query_reingestion = Query()
+            try:
+                reception_times = [source.reception_time for source in query_reingestion.get_sources(names = {"filter": source_names, "op": "in"})]
+                query_reingestion.get_sources(names = {"filter": source_names, "op": "in"}, delete=True)
+            finally:
+                query_reingestion.close_session()
+            # end try
+
+            # Move sources to /inputs
+            for source_name in source_names:
+                shutil.move(temporal_folder.name + "/" + source_name, "/inputs")
+            # end for
+
+            # The sources are going to be archived again
+            invalidate_metadata_sources(source_names)
+            invalidate_catalog_indexes(reset = True)
+            sources_rollup.invalidate(reception_times)
+
+            for source_name in source_names:
+                _update_reingestion_job_status(job_status, source_name = source_name, status = "moved to inputs")
+            # end for
+            _update_reingestion_job_status(job_status, status = "finished")
+        # end if
+    except Exception as e:
+        _update_reingestion_job_status(job_status, status = "failed", error = str(e))
+    finally:
+        # Delete temporal folder
+        if temporal_folder is not None:
+            temporal_folder.cleanup()
+        # end if
+    # end try
+
+    return
+
+def retrieve_source_for_reingestion(job_status, source_name, folder):
+    """
+    Get the metadata of a source and retrieve it from the archive into the folder.
+
+    :param job_status: status of the job
+    :type job_status: dict
+    :param source_name: name of the source
+    :type source_name: str
+    :param folder: folder where to retrieve the source
+    :type folder: str
+
+    :return: error obtained (None if there were no errors)
+    :rtype: str
+    """
+
+    # Get source metadata from minArc
+    _update_reingestion_job_status(job_status, source_name = source_name, status = "obtaining metadata")
+    source_metadata = _get_metadata_source(source_name)
+
+    if "filename" not in source_metadata or "path" not in source_metadata:
+        error = f"Source with name {source_name} is not available in the archive"
+        _update_reingestion_job_status(job_status, source_name = source_name, status = "failed", error = error)
+        return error
+    # end if
+
+    # Retrieve file from the archive
+    _update_reingestion_job_status(job_status, source_name = source_name, status = "retrieving")
+    if source_metadata["remote_archive"]:
+        command = "minArcRetrieve --Location " + folder + " --Unpack --file " + source_name
+    else:
+        command = "minArcRetrieve --noserver --Location " + folder + " --Unpack --file " + source_name
+    # end if
+    output, error = _execute_command(command)
+
+    if error:
+        error = f"Source with name {source_name} could not be retrieved from minArc. minArc gave the following output: {output} and the following error: {error}"
+        _update_reingestion_job_status(job_status, source_name = source_name, status = "failed", error = error)
+        return error
+    # end if
+
+    _update_reingestion_job_status(job_status, source_name = source_name, status = "retrieved")
+
+    return None
+
+def remove_source_from_orc(job_status, source_name):
+    """
+    Remove a source from ORC so that it is ingested again.
+
+    :param job_status: status of the job
+    :type job_status: dict
+    :param source_name: name of the source
+    :type source_name: str
+
+    :return: error obtained (None if there were no errors)
+    :rtype: str
+    """
+
+    _update_reingestion_job_status(job_status, source_name = source_name, status = "removing from ORC")
+    output, error = _execute_command("orcQueueInput -d " + source_name)
+
+    if error:
+        error = f"Source with name {source_name} could not be removed inside ORC. ORC gave the following output: {output} and the following error: {error}"
+        _update_reingestion_job_status(job_status, source_name = source_name, status = "failed", error = error)
+        return error
+    # end if
+
+    _update_reingestion_job_status(job_status, source_name = source_name, status = "removed from ORC")
+
+    return None
+
+def remove_expired_reingestion_jobs():
+    """
+    Remove the statuses of the reingestion jobs submitted before the TTL.
 
-def prepare_reingestion_of_sources_and_dependencies(sources, source_uuids_matching_triggering_rule, source_uuids_not_matching_triggering_rule):
+    Jobs running in a process which no longer exists (e.g. because the
+    worker was restarted) are marked as failed.
+    """
 
-    sources_to_follow_reingestion = []
-    
-    if len(sources) > 0:
-        # Get triggering configuration
-        triggering_xpath = get_triggering_conf()
-        for source in sources:
-            matching_rules = triggering_xpath("/triggering_rules/rule[match(source_mask, $file_name)]", file_name = source.name)
-            if len(matching_rules) > 0:
-                rule = matching_rules[0]
-                skip = rule.get("skip")
-                if skip != "true":
-                    source_uuids_matching_triggering_rule.append(source.source_uuid)
-                    source_type = triggering_xpath("/triggering_rules/rule[match(source_mask, $file_name)]/source_type", file_name = source.name)[0].text
-                    source_masks_depending_on_this = triggering_xpath("/triggering_rules/rule[dependencies/source_type = $source_type]/source_mask", source_type = source_type)
-                    if len(source_masks_depending_on_this) > 0:
-                        source_masks_sql = [source_mask.text.replace('.*', '%').replace('.', '_').replace('*', '%') for source_mask in source_masks_depending_on_this]
-                        # Obtain events linking to the events of the source
-                        event_uuid_links = [link.event_uuid_link for event in source.events for link in event.eventLinks]
-
-                        for source_mask_sql in source_masks_sql:
-                            events = query.get_events(event_uuids = {"filter": event_uuid_links, "op": "in"}, sources = {"filter": source_mask_sql, "op": "like"})
-                            sources_linked = [event.source for event in events]
-                            sources_to_follow_reingestion = sources_to_follow_reingestion + [source for source in sources_linked if source.source_uuid not in source_uuids_matching_triggering_rule]
-                        # end for
-                    # end if
-                else:
-                    source_uuids_not_matching_triggering_rule.append(source.source_uuid)
-                # end if
-            else:
-                source_uuids_not_matching_triggering_rule.append(source.source_uuid)
-            # end if
-        # end for
+    if not os.path.isdir(reingestion_jobs_path):
+        return
     # end if
 
-    if len(sources_to_follow_reingestion) > 0:
-        prepare_reingestion_of_sources_and_dependencies(list(set(sources_to_follow_reingestion)), source_uuids_matching_triggering_rule, source_uuids_not_matching_triggering_rule)
-    # end if
+    now = datetime.datetime.now()
+    for status_file_name in os.listdir(reingestion_jobs_path):
+        job_status = _read_reingestion_job_status(status_file_name.replace(".json", ""))
+        if job_status is not None and job_status["status"] == "running" and not _is_reingestion_jobs_executor_alive(job_status.get("executor")):
+            job_status["status"] = "failed"
+            job_status["error"] = "The process executing the reingestion job no longer exists"
+            job_status["finish_time"] = now.isoformat()
+            _write_reingestion_job_status(job_status)
+        # end if
+        if job_status is not None and (now - datetime.datetime.fromisoformat(job_status["submission_time"])).total_seconds() > reingestion_jobs_ttl:
+            try:
+                os.remove(os.path.join(reingestion_jobs_path, status_file_name))
+            except FileNotFoundError:
+                pass
+            # end try
+        # end if
+    # end for
 
     return
 
-@bp.route("/prepare-reingestion-of-sources", methods=["POST"])
-@auth_required()
-@roles_accepted("administrator", "service_administrator", "operator")
-def prepare_reingestion_of_sources():
+def _get_reingestion_jobs_executor_lock_path(executor_id):
     """
-    Prepare reingestion of selected sources.
+    Obtain the path to the lock file of the process running reingestion jobs.
     """
-    current_app.logger.debug("Prepare reingestion of selected sources")
-    filters = request.json
-    sources_from_uuids = query.get_sources(source_uuids = {"filter": filters["sources"], "op": "in"})
-
-    sources = query.get_sources(names = {"filter": [source.name for source in sources_from_uuids], "op": "in"})
+    return os.path.join(reingestion_jobs_path, ".executors", f"{executor_id}.lock")
 
-    source_uuids_matching_triggering_rule = []
-    source_uuids_not_matching_triggering_rule = []
-    prepare_reingestion_of_sources_and_dependencies(sources, source_uuids_matching_triggering_rule, source_uuids_not_matching_triggering_rule)
+def _lock_reingestion_jobs_executor():
+    """
+    Take the lock of the reingestion jobs of this process (kept until
+    the process ends).
 
-    sources_matching_triggering_rule = query.get_sources(source_uuids = {"filter": source_uuids_matching_triggering_rule, "op": "in"})
+    :return: identifier of the pool
+    :rtype: str
+    """
+    global reingestion_jobs_executor_lock
 
-    sources_not_matching_triggering_rule = query.get_sources(source_uuids = {"filter": source_uuids_not_matching_triggering_rule, "op": "in"})
+    if reingestion_jobs_executor_lock is None:
+        lock_path = _get_reingestion_jobs_executor_lock_path(reingestion_jobs_executor_id)
+        os.makedirs(os.path.dirname(lock_path), exist_ok = True)
+        lock_file = open(lock_path, "w")
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        reingestion_jobs_executor_lock = lock_file
+    # end if
 
-    return render_template("eboa_nav/reingestion_of_sources.html", sources_matching_triggering_rule=sources_matching_triggering_rule, sources_not_matching_triggering_rule=sources_not_matching_triggering_rule)
+    return reingestion_jobs_executor_id
 
-@bp.route("/reingest-sources", methods=["POST"])
-@auth_required()
-@roles_accepted("administrator", "service_administrator", "operator")
-def reingest_sources():
+def _is_reingestion_jobs_executor_alive(executor_id):
     """
-    Re-ingest selected sources.
+    Check whether the reingestion jobs of the pool are held by a living process.
+
+    :param executor_id: identifier of the pool
+    :type executor_id: str
+
+    :return: True if the pool exists, False otherwise
+    :rtype: bool
     """
-    current_app.logger.debug("Re-ingest selected sources")
-    filters = request.json
+    if executor_id == reingestion_jobs_executor_id:
+        return True
+    # end if
+    if not isinstance(executor_id, str) or os.path.basename(executor_id) != executor_id or executor_id in ["", ".", ".."]:
+        return False
+    # end if
 
-    sources_to_reingest = set(filters["sources"])
-    
-    # Create temporal folder inside /inputs folder to copy sources there for ORC to re-ingest
-    temporal_folder = tempfile.TemporaryDirectory(prefix = ".", dir="/inputs/")
-    
-    # Get metadata of sources
-    sources_metadata = {}
-    for source_name in sources_to_reingest:
-        # Get source metadata from minArc
-        sources_metadata[source_name] = _get_metadata_source(source_name)
+    lock_path = _get_reingestion_jobs_executor_lock_path(executor_id)
+    try:
+        with open(lock_path) as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            # end try
+        # end with
+    except FileNotFoundError:
+        return False
+    # end try
 
-        if "filename" not in sources_metadata[source_name] or "path" not in sources_metadata[source_name]:
-            return {"status": "NOK",
-                    "error": f"Source with name {source_name} is not available in the archive"}
-        # end if
-    # end for
+    # Nobody holds the lock anymore
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+    # end try
 
-    # Copy sources to temporal folder and delete from ORC
-    for source_name in sources_to_reingest:
+    return False
 
-        # Retrieve file from the archive
-        if sources_metadata[source_name]["remote_archive"]:
-            command = "minArcRetrieve --Location " + temporal_folder.name + " --Unpack --file " + source_name
-            command_split = shlex.split(command)
-            program = Popen(command_split, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-            output, error = program.communicate()        
-            return_code = program.returncode
-        else:
-            command = "minArcRetrieve --noserver --Location " + temporal_folder.name + " --Unpack --file " + source_name
-            command_split = shlex.split(command)
-            program = Popen(command_split, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-            output, error = program.communicate()        
-            return_code = program.returncode
-        # end if
+def _execute_command(command):
+    """
+    Execute a command and return its output and error.
+    """
+    command_split = shlex.split(command)
+    program = Popen(command_split, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+    output, error = program.communicate()
+
+    return output, error
 
-        if error:
-            return {"status": "NOK",
-                    "error": f"Source with name {source_name} could not be retrieved from minArc. minArc gave the following output: {output} and the following error: {error}"}
+def _update_reingestion_job_status(job_status, source_name = None, status = None, error = None):
+    """
+    Update the status of a reingestion job (or of one of its sources) and write it.
+    """
+    with reingestion_jobs_lock:
+        item_status = job_status
+        if source_name is not None:
+            item_status = job_status["sources"][source_name]
+        # end if
+        item_status["status"] = status
+        if error is not None:
+            item_status["error"] = error
+        # end if
+        if source_name is None and status in ["finished", "failed"]:
+            job_status["finish_time"] = datetime.datetime.now().isoformat()
         # end if
+        _write_reingestion_job_status(job_status)
+    # end with
 
-        # Delete source from ORC
-        command = "orcQueueInput -d " + source_name
-        command_split = shlex.split(command)
-        program = Popen(command_split, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-        output, error = program.communicate()        
-        return_code = program.returncode
+    return
 
-        if error:
-            return {"status": "NOK",
-                    "error": f"Source with name {source_name} could not be removed inside ORC. ORC gave the following output: {output} and the following error: {error}"}
-        # end if
+def _write_reingestion_job_status(job_status):
+    """
+    Write the status of a reingestion job (atomically, so readers from other workers never see partial files).
+    """
+    status_path = os.path.join(reingestion_jobs_path, job_status["job_id"] + ".json")
+    with open(status_path + ".tmp", "w") as status_file:
+        json.dump(job_status, status_file)
+    # end with
+    os.replace(status_path + ".tmp", status_path)
 
-    # end for
+    return
 
-    # Delete sources from BOA
-    query.get_sources(names = {"filter": list(sources_to_reingest), "op": "in"}, delete=True)
+def _read_reingestion_job_status(job_id):
+    """
+    Read the status of a reingestion job.
 
-    # Move sources to /inputs
-    for source_name in sources_to_reingest:
-        # Copy source to temporal folder
-        shutil.move(temporal_folder.name + "/" + source_name, "/inputs")
-    # end for
+    :return: status of the job (None if the job does not exist)
+    :rtype: dict
+    """
+    # Avoid accessing paths outside the folder of the jobs
+    if os.path.basename(job_id) != job_id or job_id in ["", ".", ".."]:
+        return None
+    # end if
 
-    # Delete temporal folder
-    temporal_folder.cleanup()
+    try:
+        with open(os.path.join(reingestion_jobs_path, job_id + ".json")) as status_file:
+            job_status = json.load(status_file)
+        # end with
+    except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+        job_status = None
+    # end try
 
-    return {"status": "OK"}
+    return job_status
 
 @bp.route("/prepare-deletion-of-sources", methods=["POST"])
 @auth_required()
@@ -1300,6 +2323,137 @@ def prepare_deletion_of_sources():
 def _get_metadata_source(source_name):
     """
     Get metadata of the specified source.
+
+    The metadata is obtained from the cache of the archive metadata. On a
+    miss, the archive is queried (or the lookup in progress for the
+    source is awaited).
+
+    :param source_name: string with the source name to get the associated metadata
+    :type source_name: str
+
+    :return: Dictionary with metadata
+    :rtype: dict
+    """
+
+    with archive_metadata_cache_lock:
+        cached_metadata = _get_cached_metadata_source(source_name)
+        if cached_metadata is not None:
+            return dict(cached_metadata)
+        # end if
+        lookup = _submit_metadata_source_lookup(source_name)
+    # end with
+
+    return dict(lookup.result())
+
+def prefetch_metadata_sources(source_names):
+    """
+    Request the metadata of the specified sources to the archive in
+    background, so that the following calls to _get_metadata_source
+    find them in the cache.
+
+    Sources already cached or being looked up are not requested again.
+    The prefetch stops once there are archive_metadata_prefetch_limit
+    lookups in progress (the remaining sources are looked up on demand).
+
+    :param source_names: names of the sources
+    :type source_names: list
+    """
+
+    with archive_metadata_cache_lock:
+        for source_name in set(source_names):
+            if len(archive_metadata_lookups) >= archive_metadata_prefetch_limit:
+                break
+            # end if
+            if _get_cached_metadata_source(source_name) is None:
+                _submit_metadata_source_lookup(source_name)
+            # end if
+        # end for
+    # end with
+
+    return
+
+def invalidate_metadata_sources(source_names):
+    """
+    Remove the metadata of the specified sources from the cache.
+
+    :param source_names: names of the sources
+    :type source_names: list
+    """
+
+    with archive_metadata_cache_lock:
+        for source_name in source_names:
+            archive_metadata_cache.pop(source_name, None)
+        # end for
+    # end with
+
+    return
+
+def _get_cached_metadata_source(source_name):
+    """
+    Get the metadata of the source from the cache if it has not expired.
+    The caller has to hold archive_metadata_cache_lock.
+    """
+    if source_name in archive_metadata_cache:
+        expiration_time, metadata = archive_metadata_cache[source_name]
+        if expiration_time > time.monotonic():
+            return metadata
+        # end if
+        del archive_metadata_cache[source_name]
+    # end if
+
+    return None
+
+def _submit_metadata_source_lookup(source_name):
+    """
+    Submit the lookup of the metadata of the source to the archive
+    unless there is one in progress. The caller has to hold
+    archive_metadata_cache_lock.
+
+    :return: future with the metadata
+    :rtype: concurrent.futures.Future
+    """
+    if source_name not in archive_metadata_lookups:
+        archive_metadata_lookups[source_name] = archive_metadata_executor.submit(_lookup_metadata_source, source_name)
+    # end if
+
+    return archive_metadata_lookups[source_name]
+
+def _lookup_metadata_source(source_name):
+    """
+    Query the archive for the metadata of the source and insert it in the cache.
+
+    Sources not available in the archive are cached with a shorter
+    TTL, so that newly archived sources are found soon.
+    """
+    try:
+        metadata = _query_metadata_source(source_name)
+    finally:
+        with archive_metadata_cache_lock:
+            archive_metadata_lookups.pop(source_name, None)
+        # end with
+    # end try
+
+    if "filename" in metadata and "path" in metadata:
+        ttl = archive_metadata_cache_ttl
+    else:
+        ttl = archive_metadata_cache_negative_ttl
+    # end if
+
+    with archive_metadata_cache_lock:
+        # Evict the entries closer to expire when the cache is full
+        if len(archive_metadata_cache) >= archive_metadata_cache_size:
+            for name_to_evict in sorted(archive_metadata_cache, key = lambda name: archive_metadata_cache[name][0])[:max(1, archive_metadata_cache_size // 10)]:
+                del archive_metadata_cache[name_to_evict]
+            # end for
+        # end if
+        archive_metadata_cache[source_name] = (time.monotonic() + ttl, metadata)
+    # end with
+
+    return metadata
+
+def _query_metadata_source(source_name):
+    """
+    Query the archive for the metadata of the specified source.
     :param source_name: string with the source name to get the associated metadata
     :type source_name: str
 
@@ -1345,16 +2499,24 @@ def download_source(source_name):
     current_app.logger.debug("Download of selected source")
 
     output_json = _get_metadata_source(source_name)
-    filename = ""
-    filepath = ""
 
-    if "filename" in output_json and "path" in output_json:
-        # Get filename and filepath from minArcStatus output
-        filename = output_json["filename"]
-        filepath = output_json["path"]
+    # The source could have been moved inside the archive since it was cached
+    if "filename" in output_json and "path" in output_json and not os.path.isfile(os.path.join(output_json["path"], output_json["filename"])):
+        invalidate_metadata_sources([source_name])
+        output_json = _get_metadata_source(source_name)
+    # end if
+
+    if "filename" not in output_json or "path" not in output_json:
+        abort(404)
+    # end if
+
+    # Get file path from minArcStatus output
+    file_path = os.path.join(output_json["path"], output_json["filename"])
+    if not os.path.isfile(file_path):
+        abort(404)
     # end if
-    
-    return send_from_directory(filepath, filename, as_attachment=True)
+
+    return deliver_file(file_path, as_attachment=True)
 
 @bp.route("/delete-sources", methods=["POST"])
 @auth_required()
@@ -1365,10 +2527,28 @@ def delete_sources():
     """
     current_app.logger.debug("Delete selected sources")
     filters = request.json
+    reception_times = [source.reception_time for source in query.get_sources(names = {"filter": filters["sources"], "op": "in"})]
     query.get_sources(names = {"filter": filters["sources"], "op": "in"}, delete=True)
 
+    invalidate_catalog_indexes(reset = True)
+    sources_rollup.invalidate(reception_times)
+
     return {"status": "OK"}
 
+def invalidate_catalog_indexes(reset = False):
+    """
+    Mark the indexes of the catalogs to be refreshed on their next lookup.
+
+    Only the indexes of the current process are invalidated, the rest of
+    processes refresh their indexes periodically (see CatalogIndex).
+
+    :param reset: flag to replace all the values of the catalogs loaded incrementally (e.g. after deletions)
+    :type reset: bool
+    """
+    for catalog_index in catalog_indexes.values():
+        catalog_index.invalidate(reset = reset)
+    # end for
+
 @bp.route("/query-gauges", methods=["GET", "POST"])
 @auth_required()
 @roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
@@ -1389,7 +2569,7 @@ def query_gauges_and_render():
             links = query_linked_gauges(gauges)
         # end if
         
-        return render_template("eboa_nav/gauges_nav.html", gauges=gauges, links=links, show=show, filters=filters)
+        return render_template("eboa_nav/gauges_nav.html", gauges=gauges, links=links, show=show, filters=filters, datatables=get_table_settings("gauges", filters, len(gauges)))
     # end if
 
     return render_template("eboa_nav/query_gauges.html")
@@ -1413,7 +2593,7 @@ def query_gauges_pages():
         links = query_linked_gauges(gauges)
     # end if
 
-    return render_template("eboa_nav/gauges_nav.html", gauges=gauges, links=links, show=show, filters=filters)
+    return render_template("eboa_nav/gauges_nav.html", gauges=gauges, links=links, show=show, filters=filters, datatables=get_table_settings("gauges", filters, len(gauges)))
 
 def define_what_to_show_gauges(filters):
 
@@ -1446,6 +2626,13 @@ def query_gauges_by_dim(dim_signature_uuid):
 
     return render_template("eboa_nav/gauges_nav.html", gauges=gauges, links=links, show=show, filters=filters)
 
+# Cache of the links between gauges per DIM signature (indexed by the
+# DIM signature at the other end of the links) with the state of the
+# sources of every DIM signature when the links were obtained
+gauge_links_cache = {}
+gauge_links_sources_state = {}
+gauge_links_cache_lock = threading.Lock()
+
 def register_gauge_node (links, gauge, registered_gauges):
     """
     Register gauge node for the linked gauges.
@@ -1464,59 +2651,143 @@ def register_gauge_node (links, gauge, registered_gauges):
     # end if
     return registered_gauges[gauge.gauge_uuid]
 
+def get_sources_state():
+    """
+    Get the state of the sources of every DIM signature (number of sources and last ingestion time) to detect new ingestions and removals.
+    """
+    sources_state = {}
+    for dim_signature_uuid, number_of_sources, last_ingestion_time in query.session.query(Source.dim_signature_uuid, func.count(Source.source_uuid), func.max(Source.ingestion_time)) \
+                                                                                   .group_by(Source.dim_signature_uuid):
+        sources_state[dim_signature_uuid] = (number_of_sources, last_ingestion_time)
+    # end for
+
+    return sources_state
+
+def get_gauge_links(dim_signature_uuids):
+    """
+    Get the links between gauges of the received DIM signatures.
+
+    The links are obtained aggregating all the event links (joined to
+    the gauges of the linking and linked events) in one statement for
+    the DIM signatures which are not cached and for the links of the
+    cached DIM signatures with the DIM signatures whose sources
+    changed. A new ingestion can create links owned by the events of
+    other DIM signatures (back references), so the cached links are
+    invalidated when the sources of the DIM signature at any end of the
+    links change.
+
+    :param dim_signature_uuids: list of UUIDs of DIM signatures
+    :type dim_signature_uuids: list
+
+    :return: list of links as tuples (gauge UUID of the event owning the link, gauge UUID of the linked event, link name, number of event links)
+    :rtype: list
+    """
+    sources_state = get_sources_state()
+
+    with gauge_links_cache_lock:
+        changed_dim_signature_uuids = set([dim_signature_uuid for dim_signature_uuid in set(sources_state) | set(gauge_links_sources_state)
+                                           if sources_state.get(dim_signature_uuid) != gauge_links_sources_state.get(dim_signature_uuid)])
+        dim_signature_uuids_to_obtain = set([dim_signature_uuid for dim_signature_uuid in dim_signature_uuids if dim_signature_uuid not in gauge_links_cache])
+        cached_dim_signature_uuids = set(gauge_links_cache) - dim_signature_uuids_to_obtain
+    # end with
+
+    if len(changed_dim_signature_uuids) > 0 and len(cached_dim_signature_uuids) == 0:
+        changed_dim_signature_uuids = set()
+    # end if
+
+    if len(dim_signature_uuids_to_obtain) > 0 or len(changed_dim_signature_uuids) > 0:
+        current_app.logger.debug("Obtain links between gauges of the DIM signatures {} and of the DIM signatures {} with {}".format(list(dim_signature_uuids_to_obtain), list(cached_dim_signature_uuids), list(changed_dim_signature_uuids)))
+
+        event = aliased(Event)
+        linked_event = aliased(Event)
+        gauge = aliased(Gauge)
+        linked_gauge = aliased(Gauge)
+        rows = query.session.query(gauge.gauge_uuid, gauge.dim_signature_uuid, linked_gauge.gauge_uuid, linked_gauge.dim_signature_uuid, EventLink.name, func.count()) \
+                            .join(event, EventLink.event_uuid == event.event_uuid) \
+                            .join(gauge, event.gauge_uuid == gauge.gauge_uuid) \
+                            .join(linked_event, EventLink.event_uuid_link == linked_event.event_uuid) \
+                            .join(linked_gauge, linked_event.gauge_uuid == linked_gauge.gauge_uuid) \
+                            .filter((gauge.dim_signature_uuid.in_(dim_signature_uuids_to_obtain)) |
+                                    (linked_gauge.dim_signature_uuid.in_(dim_signature_uuids_to_obtain)) |
+                                    ((gauge.dim_signature_uuid.in_(cached_dim_signature_uuids)) & (linked_gauge.dim_signature_uuid.in_(changed_dim_signature_uuids))) |
+                                    ((gauge.dim_signature_uuid.in_(changed_dim_signature_uuids)) & (linked_gauge.dim_signature_uuid.in_(cached_dim_signature_uuids)))) \
+                            .group_by(gauge.gauge_uuid, gauge.dim_signature_uuid, linked_gauge.gauge_uuid, linked_gauge.dim_signature_uuid, EventLink.name) \
+                            .all()
+
+        # Links of every DIM signature to update per DIM signature at the other end
+        gauge_links = {dim_signature_uuid: {} for dim_signature_uuid in dim_signature_uuids_to_obtain}
+        for gauge_uuid, dim_signature_uuid, linked_gauge_uuid, linked_dim_signature_uuid, link_name, number_of_links in rows:
+            for link_dim_signature_uuid, other_dim_signature_uuid in set([(dim_signature_uuid, linked_dim_signature_uuid), (linked_dim_signature_uuid, dim_signature_uuid)]):
+                if link_dim_signature_uuid in dim_signature_uuids_to_obtain or (link_dim_signature_uuid in cached_dim_signature_uuids and other_dim_signature_uuid in changed_dim_signature_uuids):
+                    gauge_links.setdefault(link_dim_signature_uuid, {}).setdefault(other_dim_signature_uuid, []).append((gauge_uuid, linked_gauge_uuid, link_name, number_of_links))
+                # end if
+            # end for
+        # end for
+
+        with gauge_links_cache_lock:
+            for dim_signature_uuid in dim_signature_uuids_to_obtain:
+                gauge_links_cache[dim_signature_uuid] = {}
+            # end for
+            for dim_signature_uuid in cached_dim_signature_uuids:
+                if dim_signature_uuid in gauge_links_cache:
+                    for changed_dim_signature_uuid in changed_dim_signature_uuids:
+                        gauge_links_cache[dim_signature_uuid].pop(changed_dim_signature_uuid, None)
+                    # end for
+                # end if
+            # end for
+            for dim_signature_uuid in gauge_links:
+                if dim_signature_uuid in gauge_links_cache:
+                    gauge_links_cache[dim_signature_uuid].update(gauge_links[dim_signature_uuid])
+                # end if
+            # end for
+        # end with
+    # end if
+
+    links = set()
+    with gauge_links_cache_lock:
+        gauge_links_sources_state.clear()
+        gauge_links_sources_state.update(sources_state)
+        for dim_signature_uuid in dim_signature_uuids:
+            for other_dim_signature_links in gauge_links_cache[dim_signature_uuid].values():
+                links.update(other_dim_signature_links)
+            # end for
+        # end for
+    # end with
+
+    return sorted(links, key = lambda link: (str(link[0]), str(link[1]), link[2]))
+
 def query_linked_gauges(gauges):
     """
     Query linked gauges.
+
+    Every link between the events of two gauges (with its name and the
+    number of event links) is associated to the gauge owning the link
+    (gauges_linking), so it is shown once in the network.
     """
     current_app.logger.debug("Query linked gauges")
     links = []
-    linked_gauges = {}
     registered_gauges = {}
+    load_relationships(query.session, gauges, ["dim_signature"])
     for gauge in gauges:
-        gauge_node = register_gauge_node(links, gauge, registered_gauges)
-        # Get the associated events
-        events = query.get_events(gauge_uuids = {"filter": [gauge.gauge_uuid], "op": "in"},
-                                  limit = 1)
-        if len(events) > 0:
-            # Get the events that link to the related events
-            linking_event_uuids = [event_link.event_uuid_link for event_link in events[0].eventLinks]
-            linking_events = query.get_events(event_uuids = {"filter": linking_event_uuids, "op": "in"})
-
-            # Get the events that linked by the related events
-            linked_event_links = query.get_event_links(event_uuid_links = {"filter": [events[0].event_uuid], "op": "in"})
-            linked_event_uuids = [event_link.event_uuid for event_link in linked_event_links]
-            linked_events = query.get_events(event_uuids = {"filter": linked_event_uuids, "op": "in"})
-
-            # Get the gauges associated to the events linking to the related events
-            gauges_linking = set([(str(event.gauge.gauge_uuid), [event_link.name for event_link in events[0].eventLinks if event_link.event_uuid_link == event.event_uuid][0]) for event in linking_events])
-
-            # Get the gauges associated to the events linked by the related events
-            gauges_linked = set([(str(event.gauge.gauge_uuid), [event_link.name for event_link in linked_event_links if event_link.event_uuid == event.event_uuid][0]) for event in linked_events])
-
-            linking_linked_events = set (linked_events + linking_events)
-            unique_linking_linked_gauges = set([event.gauge for event in linking_linked_events])
-            for linking_linked_gauge in unique_linking_linked_gauges:
-                register_gauge_node(links, linking_linked_gauge, registered_gauges)
-            # end for
-            
-            # Associate gauges
-            for gauge_linking in gauges_linking:
-                gauge_linking_uuid = gauge_linking[0]
-                link_name = gauge_linking[1]
-                if (gauge_linking_uuid, str(gauge.gauge_uuid)) not in linked_gauges:
-                    linked_gauges[(gauge_linking_uuid, str(gauge.gauge_uuid))] = True
-                    gauge_node["gauges_linking"].append({"gauge_uuid": gauge_linking_uuid, "link_name": link_name})
-                # end if
-            # end for
-            for gauge_linked in gauges_linked:
-                gauge_linked_uuid = gauge_linked[0]
-                link_name = gauge_linked[1]
-                if (str(gauge.gauge_uuid), gauge_linked_uuid) not in linked_gauges:
-                    linked_gauges[(str(gauge.gauge_uuid), gauge_linked_uuid)] = True
-                    gauge_node["gauges_linked"].append({"gauge_uuid": gauge_linked_uuid, "link_name": link_name})
-                # end if
-            # end for
-        # end if
+        register_gauge_node(links, gauge, registered_gauges)
+    # end for
+
+    gauge_uuids = set([gauge.gauge_uuid for gauge in gauges])
+    gauge_links = [gauge_link for gauge_link in get_gauge_links(list(set([gauge.dim_signature_uuid for gauge in gauges])))
+                   if gauge_link[0] in gauge_uuids or gauge_link[1] in gauge_uuids]
+
+    # Register the gauges linking or linked which were not requested
+    gauge_uuids_to_register = set([gauge_link[0] for gauge_link in gauge_links] + [gauge_link[1] for gauge_link in gauge_links]) - gauge_uuids
+    if len(gauge_uuids_to_register) > 0:
+        gauges_to_register = query.get_gauges(gauge_uuids = {"filter": list(gauge_uuids_to_register), "op": "in"})
+        load_relationships(query.session, gauges_to_register, ["dim_signature"])
+        for gauge in gauges_to_register:
+            register_gauge_node(links, gauge, registered_gauges)
+        # end for
+    # end if
+
+    for gauge_uuid, linked_gauge_uuid, link_name, number_of_links in gauge_links:
+        registered_gauges[gauge_uuid]["gauges_linking"].append({"gauge_uuid": str(linked_gauge_uuid), "link_name": link_name, "number_of_links": number_of_links})
     # end for
 
     return links
@@ -1526,6 +2797,17 @@ def query_gauges(filters):
     Query gauges.
     """
     current_app.logger.debug("Query gauges")
+
+    kwargs = set_filters_for_query_gauges(filters)
+
+    gauges = query_page_by_keyset(lambda kwargs: query.get_gauges(**kwargs), kwargs, filters, gauges_keyset)
+
+    return gauges
+
+def set_filters_for_query_gauges(filters):
+    """
+    Set filter for query gauges.
+    """
     kwargs = {}
     if filters["gauge_name"][0] != "":
         op="notlike"
@@ -1602,9 +2884,7 @@ def query_gauges(filters):
         kwargs["offset"] = filters["offset"][0]
     # end if
 
-    gauges = query.get_gauges(**kwargs)
-
-    return gauges
+    return kwargs
 
 @bp.route("/query-jsonify-gauges-by-name")
 @auth_required()
@@ -1619,15 +2899,9 @@ def query_jsonify_gauges_by_name():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["names"] = {"filter": "%" + search + "%", "op": "like"}
+    gauge_names = catalog_indexes["gauge_names"].lookup(search, limit, offset)
 
-    gauges = query.get_gauges(**kwargs)
-    jsonified_gauges = [gauge.jsonify() for gauge in gauges]
-    return jsonify(jsonified_gauges)
+    return jsonify([{"name": gauge_name} for gauge_name in gauge_names])
 
 @bp.route("/query-jsonify-gauges-by-system")
 @auth_required()
@@ -1642,15 +2916,9 @@ def query_jsonify_gauges_by_system():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["systems"] = {"filter": "%" + search + "%", "op": "like"}
+    gauge_systems = catalog_indexes["gauge_systems"].lookup(search, limit, offset)
 
-    gauges = query.get_gauges(**kwargs)
-    jsonified_gauges = [gauge.jsonify() for gauge in gauges]
-    return jsonify(jsonified_gauges)
+    return jsonify([{"system": gauge_system} for gauge_system in gauge_systems])
 
 @bp.route("/query-annotation-cnfs", methods=["GET", "POST"])
 @auth_required()
@@ -1797,15 +3065,9 @@ def query_jsonify_annotation_cnfs_by_name():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["names"] = {"filter": "%" + search + "%", "op": "like"}
-    
-    annotation_cnfs = query.get_annotation_cnfs(**kwargs)
-    jsonified_annotation_cnfs = [annotation_cnf.jsonify() for annotation_cnf in annotation_cnfs]
-    return jsonify(jsonified_annotation_cnfs)
+    annotation_cnf_names = catalog_indexes["annotation_cnf_names"].lookup(search, limit, offset)
+
+    return jsonify([{"name": annotation_cnf_name} for annotation_cnf_name in annotation_cnf_names])
 
 @bp.route("/query-jsonify-annotation-cnfs-by-system")
 @auth_required()
@@ -1820,15 +3082,9 @@ def query_jsonify_annotation_cnfs_by_system():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["systems"] = {"filter": "%" + search + "%", "op": "like"}
-    
-    annotation_cnfs = query.get_annotation_cnfs(**kwargs)
-    jsonified_annotation_cnfs = [annotation_cnf.jsonify() for annotation_cnf in annotation_cnfs]
-    return jsonify(jsonified_annotation_cnfs)
+    annotation_cnf_systems = catalog_indexes["annotation_cnf_systems"].lookup(search, limit, offset)
+
+    return jsonify([{"system": annotation_cnf_system} for annotation_cnf_system in annotation_cnf_systems])
 
 @bp.route("/query-jsonify-keys")
 @auth_required()
@@ -1866,11 +3122,11 @@ def query_ers_and_render():
         filters["offset"] = [""]
         
         if "query_explicit_refs" in filters:
-            ers = query_ers(filters)
-            return render_template("eboa_nav/explicit_references_nav.html", ers=ers, filters=filters)
+            number_of_ers = probe_page("explicit-refs", filters)
+            return render_template("eboa_nav/explicit_references_nav.html", ers=None, number_of_elements=number_of_ers, filters=filters, datatables=get_table_settings("explicit-refs", filters, None))
         else:
             er_alerts = query_er_alerts(filters)
-            return render_template("eboa_nav/explicit_reference_alerts_nav.html", alerts=er_alerts, filters=filters)
+            return render_template("eboa_nav/explicit_reference_alerts_nav.html", alerts=er_alerts, filters=filters, datatables=get_table_settings("explicit-ref-alerts", filters, len(er_alerts)))
         # end if
     # end if
     
@@ -1885,9 +3141,9 @@ def query_ers_pages():
     """
     current_app.logger.debug("Query explicit references using pages and render")
     filters = request.json
-    ers = query_ers(filters)
+    number_of_ers = probe_page("explicit-refs", filters)
 
-    return render_template("eboa_nav/explicit_references_nav.html", ers=ers, filters=filters)
+    return render_template("eboa_nav/explicit_references_nav.html", ers=None, number_of_elements=number_of_ers, filters=filters, datatables=get_table_settings("explicit-refs", filters, None))
 
 def query_ers(filters):
     """
@@ -1895,27 +3151,55 @@ def query_ers(filters):
     """
     current_app.logger.debug("Query explicit references")
 
-    kwargs = set_filters_for_query_ers_or_er_alerts(filters)
+    kwargs = set_filters_for_query_ers(filters)
 
-    ers = query.get_explicit_refs(**kwargs)
+    ers = query_page_by_keyset(lambda kwargs: query.get_explicit_refs(**kwargs), kwargs, filters, ers_keyset)
+
+    load_relationships(query.session, ers, loading_profiles["explicit_refs"])
+
+    set_next_pagination_cursor(filters, ers, ers_keyset)
 
     return ers
 
+def set_filters_for_query_ers(filters):
+    """
+    Set filter for query explicit references paginating by keyset.
+    """
+    kwargs = set_filters_for_query_ers_or_er_alerts(filters)
+
+    set_keyset_pagination(filters, kwargs, ers_keyset)
+
+    return kwargs
+
 def query_er_alerts(filters):
     """
     Query explicit reference alerts.
     """
     current_app.logger.debug("Query explicit reference alerts")
 
+    kwargs = set_filters_for_query_er_alerts(filters)
+
+    er_alerts = query_page_by_keyset(lambda kwargs: query.get_explicit_ref_alerts(**kwargs), kwargs, filters, er_alerts_keyset)
+
+    load_relationships(query.session, er_alerts, loading_profiles["alerts"])
+
+    set_next_pagination_cursor(filters, er_alerts, er_alerts_keyset)
+
+    return er_alerts
+
+def set_filters_for_query_er_alerts(filters):
+    """
+    Set filter for query explicit reference alerts paginating by keyset.
+    """
     er_kwargs = set_filters_for_query_ers_or_er_alerts(filters)
 
     alert_kwargs = set_specific_alert_filters(filters)
 
     kwargs = {**er_kwargs, **alert_kwargs}
 
-    er_alerts = query.get_explicit_ref_alerts(**kwargs)
+    set_keyset_pagination(filters, kwargs, er_alerts_keyset)
 
-    return er_alerts
+    return kwargs
 
 def set_filters_for_query_ers_or_er_alerts(filters):
     """
@@ -2227,7 +3511,7 @@ def query_er_links_and_render(explicit_ref_uuid):
     current_app.logger.debug("Query explicit reference links and render")
     links = query_er_links(explicit_ref_uuid)
     ers = links["prime_explicit_refs"] + [link["explicit_ref"] for link in links["explicit_refs_linking"]] + [link["explicit_ref"] for link in links["linked_explicit_refs"]]
-    return render_template("eboa_nav/linked_explicit_references_nav.html", links=links, ers=ers)
+    return render_template("eboa_nav/linked_explicit_references_nav.html", links=links, ers=ers, links_for_network=get_links_for_network(links, "explicit_ref"))
 
 def query_er_links(explicit_ref_uuid):
     """
@@ -2274,15 +3558,9 @@ def query_jsonify_er_groups():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["names"] = {"filter": "%" + search + "%", "op": "like"}
+    er_groups = catalog_indexes["er_groups"].lookup(search, limit, offset)
 
-    er_groups = query.get_explicit_refs_groups(**kwargs)
-    jsonified_er_groups = [er_group.jsonify() for er_group in er_groups]
-    return jsonify(jsonified_er_groups)
+    return jsonify([{"name": er_group} for er_group in er_groups])
 
 @bp.route("/query-dim-signatures", methods=["GET", "POST"])
 @auth_required()
@@ -2376,15 +3654,9 @@ def query_jsonify_dim_signatures():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["dim_signatures"] = {"filter": "%" + search + "%", "op": "like"}
+    dim_signatures = catalog_indexes["dim_signatures"].lookup(search, limit, offset)
 
-    dim_signatures = query.get_dim_signatures(**kwargs)
-    jsonified_dim_signatures = [dim_signature.jsonify() for dim_signature in dim_signatures]
-    return jsonify(jsonified_dim_signatures)
+    return jsonify([{"dim_signature": dim_signature} for dim_signature in dim_signatures])
 
 @bp.route("/treat-data", methods = ["POST"])
 @auth_required()
@@ -2400,6 +3672,9 @@ def treat_data():
 
     data = request.get_json()
     returned_values = engine.treat_data(data)
+
+    # The ingested data can add values to the catalogs
+    invalidate_catalog_indexes()
     exit_information = {
         "returned_values": returned_values
     }
@@ -2418,17 +3693,21 @@ def query_alerts_pages():
     if "query_event_alerts" in filters:
         alerts = query_event_alerts(filters)
         template = "eboa_nav/event_alerts_nav.html"
+        entity = "event-alerts"
     elif "query_annotation_alerts" in filters:
         alerts = query_annotation_alerts(filters)
         template = "eboa_nav/annotation_alerts_nav.html"
+        entity = "annotation-alerts"
     elif "query_source_alerts" in filters:
         alerts = query_source_alerts(filters)
         template = "eboa_nav/source_alerts_nav.html"
+        entity = "source-alerts"
     elif "query_explicit_ref_alerts" in filters:
         alerts = query_er_alerts(filters)
         template = "eboa_nav/explicit_reference_alerts_nav.html"
+        entity = "explicit-ref-alerts"
     # end if
-    return render_template(template, alerts=alerts, filters=filters)
+    return render_template(template, alerts=alerts, filters=filters, datatables=get_table_settings(entity, filters, len(alerts)))
 
 @bp.route("/query-<string:entity>-alert/<uuid:alert_uuid>")
 @auth_required()
@@ -2527,15 +3806,9 @@ def query_jsonify_alerts_by_name():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["names"] = {"filter": search, "op": "=="}
+    alert_names = catalog_indexes["alert_names"].lookup(search, limit, offset, exact = True)
 
-    alerts = query.get_alerts(**kwargs)
-    jsonified_alerts = [alert.jsonify() for alert in alerts]
-    return jsonify(jsonified_alerts)
+    return jsonify([{"name": alert_name} for alert_name in alert_names])
 
 @bp.route("/query-jsonify-alerts-by-group")
 @auth_required()
@@ -2550,15 +3823,9 @@ def query_jsonify_alerts_by_group():
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["groups"] = {"filter": search, "op": "=="}
+    alert_groups = catalog_indexes["alert_groups"].lookup(search, limit, offset, exact = True)
 
-    alerts = query.get_alerts(**kwargs)
-    jsonified_alerts = [alert.jsonify() for alert in alerts]
-    return jsonify(jsonified_alerts)
+    return jsonify([{"group": alert_group} for alert_group in alert_groups])
 
 @bp.route("/query-jsonify-<string:entity>-alerts-by-generator")
 @auth_required()
@@ -2573,22 +3840,6 @@ def query_jsonify_entity_alerts_by_generator(entity):
     offset = request.args.get("offset")
     search = request.args.get("search")
 
-    # Set the filters for the query
-    kwargs = {}
-    kwargs["limit"] = limit
-    kwargs["offset"] = offset
-    kwargs["generators"] = {"filter": search, "op": "=="}
+    generators = catalog_indexes[entity.replace("-", "_") + "_alert_generators"].lookup(search, limit, offset, exact = True)
 
-    if entity == "event":
-        event_alerts = query.get_event_alerts(**kwargs)
-        jsonified_alerts = [event_alert.jsonify() for event_alert in event_alerts]
-    elif entity == "annotation":
-        annotation_alerts = query.get_annotation_alerts(**kwargs)
-        jsonified_alerts = [annotation_alert.jsonify() for annotation_alert in annotation_alerts]
-    elif entity == "source":
-        source_alerts = query.get_source_alerts(**kwargs)
-        jsonified_alerts = [source_alert.jsonify() for source_alert in source_alerts]
-    elif entity == "explicit-ref":
-        er_alerts = query.get_explicit_ref_alerts(**kwargs)
-        jsonified_alerts = [er_alert.jsonify() for er_alert in er_alerts]
-    return jsonify(jsonified_alerts)
+    return jsonify([{"generator": generator} for generator in generators])
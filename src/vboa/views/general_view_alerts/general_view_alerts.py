@@ -11,6 +11,8 @@ import json
 import datetime
 from dateutil import parser
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 
 # Import flask utilities
 from flask import Blueprint, flash, g, current_app, redirect, render_template, request, url_for
@@ -22,8 +24,24 @@ from eboa.engine.query import Query
 import eboa.engine.engine as eboa_engine
 from eboa.engine.engine import Engine
 
+# Import eboa alerts
+from eboa.engine.alerts import alert_severity_codes
+
+# Import datamodel
+from eboa.datamodel.sources import Source
+from eboa.datamodel.dim_signatures import DimSignature
+from eboa.datamodel.alerts import SourceAlert, EventAlert, AnnotationAlert, ExplicitRefAlert
+from rboa.datamodel.alerts import ReportAlert
+
+# Import SQLAlchemy utilities
+from sqlalchemy import or_, text
+
 # Import SQLAlchemy exceptions
 from sqlalchemy.orm.exc import DetachedInstanceError
+from sqlalchemy.exc import OperationalError
+
+# Import vboa functions
+from vboa.functions import get_sliding_window_filters, get_sliding_window_watermark, get_sliding_window_delta, sliding_window_full_refresh_cycles
 
 # Import vboa security
 from vboa.security import auth_required, roles_accepted
@@ -37,6 +55,9 @@ window_delay=0
 window_size=0.25
 repeat_cycle=5
 
+# Default configuration for the queries of the alerts
+alerts_query_timeout = float(os.environ.get("VBOA_GENERAL_VIEW_ALERTS_QUERY_TIMEOUT", 30))
+
 def get_start_stop_filters(filters):
 
     start_filter = None
@@ -214,8 +235,148 @@ def show_sliding_general_view_alerts():
 
     return query_and_render(start_filter, stop_filter, sliding_window)
 
+@bp.route("/sliding-general-view-alerts-delta", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def query_sliding_general_view_alerts_delta():
+    """
+    Changes of the sliding general view of alerts since its last update.
+
+    Expected JSON: {"window_delay": <days>, "window_size": <days>, "watermark": <watermark>, "uuids": [<UUIDs of the shown alerts>]}
+    """
+    current_app.logger.debug("Sliding general view of alerts view changes")
+
+    parameters = request.get_json()
+    if parameters is None or len([name for name in ["window_delay", "window_size", "watermark", "uuids"] if not name in parameters]) > 0:
+        return jsonify({"status": "KO", "message": "The method needs to receive the JSON data with the sliding window, the watermark and the UUIDs of the shown alerts"}), 400
+    # end if
+
+    start_filter, stop_filter = get_sliding_window_filters(parameters["window_delay"], parameters["window_size"])
+    since, watermark = get_sliding_window_watermark(parameters["watermark"])
+
+    # Alerts notified inside the window, changed when ingested or solved
+    windows = []
+    for (alert_model, alert_uuid_column) in [(SourceAlert, SourceAlert.source_alert_uuid),
+                                             (EventAlert, EventAlert.event_alert_uuid),
+                                             (AnnotationAlert, AnnotationAlert.annotation_alert_uuid),
+                                             (ReportAlert, ReportAlert.report_alert_uuid),
+                                             (ExplicitRefAlert, ExplicitRefAlert.explicit_ref_alert_uuid)]:
+        window_query = query.session.query(alert_uuid_column) \
+                                    .filter(alert_model.notification_time <= start_filter["date"],
+                                            alert_model.notification_time >= stop_filter["date"])
+        if alert_model == SourceAlert:
+            # Avoid showing the sources related to the ingestion of health data
+            window_query = window_query.join(Source, SourceAlert.source_uuid == Source.source_uuid) \
+                                       .join(DimSignature, Source.dim_signature_uuid == DimSignature.dim_signature_uuid) \
+                                       .filter(DimSignature.dim_signature != "BOA_HEALTH")
+        # end if
+        windows.append((window_query, alert_uuid_column, or_(alert_model.ingestion_time > since, alert_model.solved_time > since)))
+    # end for
+    changed_uuids, removed_uuids = get_sliding_window_delta(windows, parameters["uuids"])
+
+    alerts_graph_data = []
+    content = ""
+    graphs = {}
+    if len(changed_uuids) > 0:
+        alerts = query_alerts(start_filter, stop_filter, alert_uuids = changed_uuids)
+        if len(alerts["unavailable"]) > 0:
+            # The rows of the alerts not obtained would be removed from the view
+            return jsonify({"status": "KO", "message": "The alerts associated to {} could not be obtained in time".format(alerts["unavailable"])}), 503
+        # end if
+        alerts_graph_data = get_alerts_graph_data(alerts)
+        content = render_alerts(alerts, start_filter, stop_filter, alerts_graph_data = alerts_graph_data)
+        graphs["alerts"] = alerts_graph_data
+    # end if
+
+    return jsonify({
+        "watermark": watermark,
+        "reporting_start": stop_filter["date"],
+        "reporting_stop": start_filter["date"],
+        "uuids": [item["id"] for item in alerts_graph_data],
+        "changed": changed_uuids,
+        "removed": removed_uuids,
+        "content": content,
+        "graphs": graphs,
+        "full_refresh_cycles": sliding_window_full_refresh_cycles
+    })
+
+# Entities of the alerts shown by the view:
+# name -> (UUID of the alert, UUID of the entity, label, timeline group, link to the alert, link to the entity)
+alert_entities = {
+    "source_alerts": ("source_alert_uuid", "source_uuid", "Source", "SOURCES",
+                      lambda alert: url_for("eboa_nav.query_entity_alert_and_render", entity="source", alert_uuid=alert.source_alert_uuid),
+                      lambda alert: url_for("eboa_nav.query_source", source_uuid=alert.source_uuid)),
+    "event_alerts": ("event_alert_uuid", "event_uuid", "Event", "EVENTS",
+                     lambda alert: url_for("eboa_nav.query_entity_alert_and_render", entity="event", alert_uuid=alert.event_alert_uuid),
+                     lambda alert: url_for("eboa_nav.query_event_links_and_render", event_uuid=alert.event_uuid)),
+    "annotation_alerts": ("annotation_alert_uuid", "annotation_uuid", "Annotation", "ANNOTATIONS",
+                          lambda alert: url_for("eboa_nav.query_entity_alert_and_render", entity="annotation", alert_uuid=alert.annotation_alert_uuid),
+                          lambda alert: url_for("eboa_nav.query_annotation", annotation_uuid=alert.annotation_uuid)),
+    "report_alerts": ("report_alert_uuid", "report_uuid", "Report", "REPORTS",
+                      lambda alert: url_for("rboa_nav.query_report_alert_and_render", alert_uuid=alert.report_alert_uuid),
+                      lambda alert: url_for("rboa_nav.query_report", report_uuid=alert.report_uuid)),
+    "er_alerts": ("explicit_ref_alert_uuid", "explicit_ref_uuid", "Explicit reference", "EXPLICIT_REFERENCES",
+                  lambda alert: url_for("eboa_nav.query_entity_alert_and_render", entity="er", alert_uuid=alert.explicit_ref_alert_uuid),
+                  lambda alert: url_for("eboa_nav.query_er", explicit_ref_uuid=alert.explicit_ref_uuid)),
+}
+
+def get_alerts_graph_data(alerts):
+    """
+    Obtain the data shown in the timeline of the general view of alerts.
+    """
+    graph_data = []
+    for name in alert_entities:
+        alert_uuid_name, entity_uuid_name, entity, group, alert_link, entity_link = alert_entities[name]
+        for alert in alerts[name]:
+            alert_uuid = str(getattr(alert, alert_uuid_name))
+            severity_label = [severity_label for severity_label in alert_severity_codes if alert_severity_codes[severity_label] == alert.alertDefinition.severity][0]
+            solved_time = alert.solved_time
+            if solved_time != None:
+                solved_time = solved_time.isoformat()
+            # end if
+            graph_data.append({
+                "id": alert_uuid,
+                "name": alert.alertDefinition.name,
+                "severity": severity_label,
+                "description": alert.alertDefinition.description,
+                "message": alert.message,
+                "validated": "<span class='bold-orange'>" + str(alert.validated) + "</span>",
+                "ingestion_time": alert.ingestion_time.isoformat(),
+                "generator": alert.generator,
+                "notified": "<span class='bold-orange'>" + str(alert.notified) + "</span>",
+                "solved": "<span class='bold-orange'>" + str(alert.solved) + "</span>",
+                "solved_time": str(solved_time),
+                "notification_time": alert.notification_time.isoformat(),
+                "justification": str(alert.justification),
+                "alert_uuid": "<a href='" + alert_link(alert) + "'>" + alert_uuid + "</a>",
+                "entity_uuid": "<a href='" + entity_link(alert) + "'>" + str(getattr(alert, entity_uuid_name)) + "</a>",
+                "group_alert": alert.alertDefinition.group.name,
+                "entity": entity,
+                "group": group + ";" + alert.alertDefinition.group.name,
+                "timeline": alert.alertDefinition.name,
+                "start": alert.notification_time.isoformat(),
+                "stop": alert.notification_time.isoformat()
+            })
+        # end for
+    # end for
+
+    return graph_data
+
 def query_and_render(start_filter = None, stop_filter = None, sliding_window = None, filters = None):
 
+    if sliding_window:
+        # The changes after this moment are applied by the updates of the view
+        sliding_window["watermark"] = datetime.datetime.now().isoformat()
+    # end if
+
+    alerts = query_alerts(start_filter, stop_filter, filters = filters)
+
+    return render_alerts(alerts, start_filter, stop_filter, sliding_window, filters = filters)
+
+def query_alerts(start_filter, stop_filter, filters = None, alert_uuids = None):
+    """
+    Query the alerts shown by the general view of alerts, restricted to the received UUIDs if any.
+    """
     kwargs = {}
 
     # Start filter
@@ -224,9 +385,6 @@ def query_and_render(start_filter = None, stop_filter = None, sliding_window = N
     # Stop filter
     kwargs["notification_time_filters"].append({"date": stop_filter["date"], "op": stop_filter["operator"]})
 
-    # Avoid showing the sources related to the ingestion of health data
-    kwargs["dim_signatures"] = {"filter": ["BOA_HEALTH"], "op": "notin"}
-
     # Set offset and limit for the query
     if filters and "offset" in filters and filters["offset"][0] != "":
         kwargs["offset"] = filters["offset"][0]
@@ -238,27 +396,94 @@ def query_and_render(start_filter = None, stop_filter = None, sliding_window = N
     # Set order by ingestion_time descending
     kwargs["order_by"] = {"field": "notification_time", "descending": False}
 
-    # Obtain source alerts and then the sources
-    source_alerts = query.get_source_alerts(**kwargs)
-    
-    # Remove filter by DIM signature
-    del kwargs["dim_signatures"]
+    # Obtain the alerts of each entity concurrently, restricted to the
+    # received ones if any. The workers belong to the request, so the
+    # queries of a request do not wait for the ones of other requests,
+    # and they are bounded by the deadline in the DDBB, releasing their
+    # connections when it expires
+    deadline = time.monotonic() + alerts_query_timeout
+    futures = {}
+    entities = [("source_alerts", "get_source_alerts", "source_alert_uuids"),
+                ("report_alerts", "get_report_alerts", "report_alert_uuids"),
+                ("event_alerts", "get_event_alerts", "event_alert_uuids"),
+                ("annotation_alerts", "get_annotation_alerts", "annotation_alert_uuids"),
+                ("er_alerts", "get_explicit_ref_alerts", "explicit_ref_alert_uuids")]
+    alerts_query_executor = ThreadPoolExecutor(max_workers = len(entities))
+    for (name, query_method, alert_uuids_name) in entities:
+        entity_kwargs = kwargs.copy()
+        if alert_uuids != None:
+            entity_kwargs[alert_uuids_name] = {"filter": alert_uuids, "op": "in"}
+        # end if
+        if name == "source_alerts":
+            # Avoid showing the sources related to the ingestion of health data
+            entity_kwargs["dim_signatures"] = {"filter": ["BOA_HEALTH"], "op": "notin"}
+        # end if
+        futures[name] = alerts_query_executor.submit(_query_entity_alerts, query_method, entity_kwargs, deadline)
+    # end for
+    alerts_query_executor.shutdown(wait = False)
+
+    # The panels of the alerts not obtained in time are shown as not available
+    alerts = {"unavailable": []}
+    for name in futures:
+        try:
+            alerts[name] = futures[name].result(timeout = max(0, deadline - time.monotonic()))
+        except (TimeoutError, OperationalError):
+            current_app.logger.warning("The query of {} of the general view of alerts exceeded the timeout of {} seconds".format(name, alerts_query_timeout))
+            alerts[name] = []
+            alerts["unavailable"].append(name)
+        # end try
+    # end for
+
+    return alerts
+
+def _query_entity_alerts(query_method, kwargs, deadline):
+    """
+    Query the alerts of an entity with its own session to the DDBB.
 
-    # Obtain report alerts and then the reports
-    report_alerts = query.get_report_alerts(**kwargs)
+    The statements of the session are cancelled by the DDBB once the
+    deadline is reached. The definitions of the alerts and their
+    groups, shown by the view, are loaded before closing the session.
 
-    # Obtain event alerts and then the events
-    event_alerts = query.get_event_alerts(**kwargs)
+    :param query_method: name of the method of the query obtaining the alerts
+    :type query_method: str
+    :param kwargs: filters of the query
+    :type kwargs: dict
+    :param deadline: moment (as given by time.monotonic) after which the query is cancelled
+    :type deadline: float
 
-    # Obtain annotation alerts and then the annotations
-    annotation_alerts = query.get_annotation_alerts(**kwargs)
+    :return: alerts of the entity
+    :rtype: list
+    """
+    remaining_time = deadline - time.monotonic()
+    if remaining_time <= 0:
+        raise TimeoutError()
+    # end if
+
+    query_entity = Query()
+    try:
+        # The timeout applies to the transaction in which the alerts are queried
+        query_entity.session.execute(text("SET LOCAL statement_timeout = {}".format(max(int(remaining_time * 1000), 1))))
+        alerts = getattr(query_entity, query_method)(**kwargs)
+        for alert in alerts:
+            alert.alertDefinition.group
+        # end for
+    finally:
+        query_entity.close_session()
+    # end try
+
+    return alerts
+
+def render_alerts(alerts, start_filter, stop_filter, sliding_window = None, filters = None, alerts_graph_data = None):
+    """
+    Render the general view of alerts with the received alerts.
+    """
+    if alerts_graph_data == None:
+        alerts_graph_data = get_alerts_graph_data(alerts)
+    # end if
 
-    # Obtain explicit ref alerts and then the explicit refs
-    er_alerts = query.get_explicit_ref_alerts(**kwargs)
-    
     reporting_start = stop_filter["date"]
     reporting_stop = start_filter["date"]
 
     template = "general_view_alerts/general_view_alerts.html"
 
-    return render_template(template, source_alerts=source_alerts, event_alerts=event_alerts, annotation_alerts=annotation_alerts, report_alerts=report_alerts, er_alerts=er_alerts, reporting_start=reporting_start, reporting_stop=reporting_stop, sliding_window=sliding_window, filters=filters)
+    return render_template(template, source_alerts=alerts["source_alerts"], event_alerts=alerts["event_alerts"], annotation_alerts=alerts["annotation_alerts"], report_alerts=alerts["report_alerts"], er_alerts=alerts["er_alerts"], alerts_graph_data=alerts_graph_data, reporting_start=reporting_start, reporting_stop=reporting_stop, unavailable_alerts=alerts["unavailable"], sliding_window=sliding_window, filters=filters)
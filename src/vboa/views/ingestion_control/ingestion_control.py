@@ -25,9 +25,20 @@ import eboa.engine.engine as eboa_engine
 from eboa.engine.engine import Engine
 import eboa.triggering.eboa_triggering as eboa_triggering
 
+# Import datamodel
+from eboa.datamodel.sources import Source
+from eboa.datamodel.dim_signatures import DimSignature
+from eboa.datamodel.alerts import SourceAlert
+
+# Import SQLAlchemy utilities
+from sqlalchemy import and_, or_, exists
+
 # Import SQLAlchemy exceptions
 from sqlalchemy.orm.exc import DetachedInstanceError
 
+# Import vboa functions
+from vboa.functions import sources_rollup, get_graph_data, get_sliding_window_filters, get_sliding_window_watermark, get_sliding_window_delta, sliding_window_full_refresh_cycles
+
 # Import vboa security
 from vboa.security import auth_required, roles_accepted
 
@@ -231,8 +242,87 @@ def show_sliding_ingestion_control():
 
     return query_sources_and_render(start_filter, stop_filter, sliding_window, template_name = template_name)
 
+@bp.route("/sliding_ingestion_control_delta", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def query_sliding_ingestion_control_delta():
+    """
+    Changes of the sliding ingestion control view since its last update.
+
+    Expected JSON: {"window_delay": <days>, "window_size": <days>, "template": <template>, "watermark": <watermark>, "uuids": [<UUIDs of the shown sources>]}
+    """
+    current_app.logger.debug("Sliding ingestion control view changes")
+
+    parameters = request.get_json()
+    if parameters is None or len([name for name in ["window_delay", "window_size", "watermark", "uuids"] if not name in parameters]) > 0:
+        return jsonify({"status": "KO", "message": "The method needs to receive the JSON data with the sliding window, the watermark and the UUIDs of the shown sources"}), 400
+    # end if
+    template_name = parameters.get("template")
+
+    start_filter, stop_filter = get_sliding_window_filters(parameters["window_delay"], parameters["window_size"])
+    since, watermark = get_sliding_window_watermark(parameters["watermark"])
+
+    # Sources received inside the window, changed when ingested, in progress or with new or solved alerts
+    window_query = query.session.query(Source.source_uuid) \
+                                .join(DimSignature, Source.dim_signature_uuid == DimSignature.dim_signature_uuid) \
+                                .filter(Source.reception_time <= start_filter["date"],
+                                        Source.reception_time >= stop_filter["date"],
+                                        DimSignature.dim_signature != "BOA_HEALTH")
+    template_condition = get_template_condition(template_name)
+    if template_condition is not None:
+        window_query = window_query.filter(template_condition)
+    # end if
+    changed_alerts_query = query.session.query(SourceAlert.source_uuid) \
+                                        .filter(or_(SourceAlert.ingestion_time > since, SourceAlert.solved_time > since))
+    changed_condition = or_(Source.ingestion_time > since,
+                            and_(Source.ingested == False, Source.ingestion_error == False),
+                            Source.source_uuid.in_(changed_alerts_query))
+    changed_uuids, removed_uuids = get_sliding_window_delta([(window_query, Source.source_uuid, changed_condition)], parameters["uuids"])
+
+    sources = []
+    graphs = {}
+    if len(changed_uuids) > 0:
+        sources = query_sources(start_filter, stop_filter, template_name = template_name, source_uuids = changed_uuids)
+        if template_name == None:
+            graphs["sources"] = get_graph_data(query.session, "sources", [str(source.source_uuid) for source in sources])
+        # end if
+    # end if
+
+    # The counters of the summary are obtained from the rollup of the
+    # sources as in the whole view (not from the rows of the tables)
+    sources_summary = sources_rollup.get_summary(query.session, stop_filter["date"], start_filter["date"])
+    content = render_sources(sources, start_filter, stop_filter, template_name = template_name, sources_summary = sources_summary)
+
+    return jsonify({
+        "watermark": watermark,
+        "reporting_start": stop_filter["date"],
+        "reporting_stop": start_filter["date"],
+        "uuids": [str(source.source_uuid) for source in sources],
+        "changed": changed_uuids,
+        "removed": removed_uuids,
+        "content": content,
+        "graphs": graphs,
+        "full_refresh_cycles": sliding_window_full_refresh_cycles
+    })
+
 def query_sources_and_render(start_filter = None, stop_filter = None, sliding_window = None, template_name = None, filters = None):
 
+    if sliding_window:
+        # The changes after this moment are applied by the updates of the view
+        sliding_window["watermark"] = datetime.datetime.now().isoformat()
+    # end if
+
+    sources = query_sources(start_filter, stop_filter, template_name = template_name, filters = filters)
+
+    # Obtain the counters of the summary from the rollup of the sources
+    sources_summary = sources_rollup.get_summary(query.session, stop_filter["date"], start_filter["date"])
+
+    return render_sources(sources, start_filter, stop_filter, sliding_window, template_name = template_name, filters = filters, sources_summary = sources_summary)
+
+def query_sources(start_filter, stop_filter, template_name = None, filters = None, source_uuids = None):
+    """
+    Query the sources shown by the ingestion control view, restricted to the received UUIDs if any.
+    """
     kwargs = {}
 
     # Start filter
@@ -244,6 +334,11 @@ def query_sources_and_render(start_filter = None, stop_filter = None, sliding_wi
     # Avoid showing the sources related to the ingestion of health data
     kwargs["dim_signatures"] = {"filter": ["BOA_HEALTH"], "op": "notin"}
 
+    # Restrict the sources to the received ones
+    if source_uuids != None:
+        kwargs["source_uuids"] = {"filter": source_uuids, "op": "in"}
+    # end if
+
     # Set offset and limit for the query
     if filters and "offset" in filters and filters["offset"][0] != "":
         kwargs["offset"] = filters["offset"][0]
@@ -260,21 +355,9 @@ def query_sources_and_render(start_filter = None, stop_filter = None, sliding_wi
         source_alerts = query.get_source_alerts(**kwargs)
         sources = query.get_sources(source_uuids = {"filter": [source_alert.source_uuid for source_alert in source_alerts], "op": "in"})
     elif template_name == "alerts_and_errors":
-        # Set order by ingestion_time descending
-        kwargs["order_by"] = {"field": "ingestion_time", "descending": True}
-
-        # Obtain source alerts and then the sources
-        source_alerts = query.get_source_alerts(**kwargs)
-        sources_from_source_alerts = query.get_sources(source_uuids = {"filter": [source_alert.source_uuid for source_alert in source_alerts], "op": "in"})
-
-        # Set order by ingestion_time descending
-        kwargs["order_by"] = {"field": "reception_time", "descending": True}
-
-        # Obtain sources with errors
-        kwargs["ingestion_error"] = {"filter": "true", "op": "=="}
-        sources_from_source_errors = query.get_sources(**kwargs)
-
-        sources = list(set(sources_from_source_alerts + sources_from_source_errors))
+        # Obtain the sources with alerts or errors in one statement
+        # ordered and paginated in the DDBB
+        sources = query_sources_with_alerts_or_errors(start_filter, stop_filter, source_uuids = source_uuids, offset = kwargs.get("offset"), limit = kwargs.get("limit"))
     else:
         if template_name == "errors":
             kwargs["ingestion_error"] = {"filter": "true", "op": "=="}
@@ -287,7 +370,59 @@ def query_sources_and_render(start_filter = None, stop_filter = None, sliding_wi
 
     # Order sources by reception time descending
     sources.sort(key=lambda x: x.reception_time, reverse = True)
-    
+
+    return sources
+
+def get_template_condition(template_name):
+    """
+    Get the condition of the sources shown by the template of the
+    ingestion control view (None if the template shows all the sources).
+    """
+    with_alerts = exists().where(SourceAlert.source_uuid == Source.source_uuid)
+    with_errors = Source.ingestion_error == True
+    if template_name == "alerts":
+        return with_alerts
+    elif template_name == "errors":
+        return with_errors
+    elif template_name == "alerts_and_errors":
+        return or_(with_errors, with_alerts)
+    # end if
+
+    return None
+
+def query_sources_with_alerts_or_errors(start_filter, stop_filter, source_uuids = None, offset = None, limit = None):
+    """
+    Query the sources received inside the period with alerts or with
+    ingestion errors, ordered by reception time descending.
+    """
+    sources_query = query.session.query(Source) \
+                                 .join(DimSignature, Source.dim_signature_uuid == DimSignature.dim_signature_uuid) \
+                                 .filter(Source.reception_time <= start_filter["date"],
+                                         Source.reception_time >= stop_filter["date"],
+                                         DimSignature.dim_signature != "BOA_HEALTH",
+                                         get_template_condition("alerts_and_errors"))
+
+    # Restrict the sources to the received ones
+    if source_uuids != None:
+        sources_query = sources_query.filter(Source.source_uuid.in_(source_uuids))
+    # end if
+
+    sources_query = sources_query.order_by(Source.reception_time.desc(), Source.source_uuid)
+
+    if offset != None:
+        sources_query = sources_query.offset(offset)
+    # end if
+    if limit != None:
+        sources_query = sources_query.limit(limit)
+    # end if
+
+    return sources_query.all()
+
+def render_sources(sources, start_filter, stop_filter, sliding_window = None, template_name = None, filters = None, sources_summary = None):
+    """
+    Render the ingestion control view with the received sources.
+    The summary is obtained from the received sources if not provided.
+    """
     reporting_start = stop_filter["date"]
     reporting_stop = start_filter["date"]
 
@@ -296,7 +431,7 @@ def query_sources_and_render(start_filter = None, stop_filter = None, sliding_wi
         template = "ingestion_control/ingestion_control_" + template_name + ".html"
     # end if
 
-    return render_template(template, sources=sources, reporting_start=reporting_start, reporting_stop=reporting_stop, sliding_window=sliding_window, filters=filters)
+    return render_template(template, sources=sources, sources_summary=sources_summary, reporting_start=reporting_start, reporting_stop=reporting_stop, sliding_window=sliding_window, filters=filters)
 
 @bp.route("/manual-ingestion", methods=["GET"])
 @auth_required()
@@ -8,12 +8,16 @@ module vboa
 # Import python utilities
 import sys
 import json
-import tarfile
 import json
 import shlex
 from subprocess import Popen, PIPE
 from multiprocessing import Pool
 import os
+import gzip
+import tarfile
+import tempfile
+import threading
+import time
 
 # Import flask utilities
 from flask import Blueprint, flash, g, current_app, redirect, render_template, request, url_for
@@ -26,20 +30,81 @@ import rboa.engine.engine as rboa_engine
 import eboa.engine.alerts as eboa_alerts
 from eboa.engine.engine import Engine
 
+# Import datamodel
+from rboa.datamodel.reports import Report, ReportGroup
+from rboa.datamodel.alerts import ReportAlert
+
 # Import auxiliary functions
 from rboa.engine.functions import get_rboa_archive_path
 from rboa.triggering.rboa_triggering import get_reporting_conf
-from vboa.functions import set_specific_alert_filters
+from vboa.functions import set_specific_alert_filters, deliver_file, deliver_tar_member, get_datatables_settings, query_datatables_page, alerts_table_columns, alerts_search_conditions, set_keyset_pagination, set_next_pagination_cursor, query_page_by_keyset
 
 # Import vboa security
 from vboa.security import auth_required, roles_accepted
 
 archive_path = get_rboa_archive_path()
 
+# Default configuration for the cache of the decompressed reports
+reports_cache_path = os.environ.get("VBOA_REPORTS_CACHE_PATH", "/tmp/vboa_reports_cache")
+reports_cache_size = int(os.environ.get("VBOA_REPORTS_CACHE_SIZE", 1024*1024*1024))
+
+# Reports being inserted in the cache
+reports_cache_insertions = set()
+reports_cache_lock = threading.Lock()
+
 bp = Blueprint("rboa_nav", __name__, url_prefix="/rboa_nav")
 query = Query()
 engine = Engine()
 
+# Keysets for paginating the reports and their alerts (entity, fields
+# which can be used as key, attribute of the UUID used as tie-breaker and
+# default ordering field)
+reports_keyset = (Report, ["validity_start", "validity_stop", "triggering_time"], "report_uuid", "triggering_time")
+report_alerts_keyset = (ReportAlert, ["notification_time"], "report_alert_uuid", "notification_time")
+
+# Columns of the table of reports (field to order by and kwarg to search
+# by, None if the column does not allow it)
+reports_table_columns = [
+    (None, None),
+    ("name", "names"),
+    (None, None),
+    ("validity_start", None),
+    ("validity_stop", None),
+    (None, None),
+    ("generation_start", None),
+    ("generation_stop", None),
+    ("generation_duration", None),
+    (None, "report_groups"),
+    ("generator", "generators"),
+    ("generator_version", None),
+    (None, None),
+    (None, None),
+    (None, None)
+]
+
+# Conditions of the global search over the searchable columns of the
+# table of reports (kwarg -> function receiving the entity and the
+# searched pattern)
+reports_search_conditions = {
+    "names": lambda entity, pattern: entity.name.like(pattern),
+    "report_groups": lambda entity, pattern: entity.reportGroup.has(ReportGroup.name.like(pattern)),
+    "generators": lambda entity, pattern: entity.generator.like(pattern)
+}
+
+# Tables processed in the server by DataTables (entity -> (function
+# obtaining the kwargs of the query from the filters of the query form,
+# function querying the elements of a page, template rendering the rows,
+# name of the elements in the template, columns, keyset, conditions of
+# the global search))
+datatables_entities = {
+    "reports": (lambda filters: set_filters_for_query_generated_reports(filters),
+                lambda kwargs: query.get_reports(**kwargs),
+                "rboa_nav/reports_table_rows.html", "reports", reports_table_columns, reports_keyset, reports_search_conditions),
+    "report-alerts": (lambda filters: set_filters_for_query_report_alerts(filters),
+                      lambda kwargs: query.get_report_alerts(**kwargs),
+                      "general_view_alerts/general_view_alerts_reports_table_content.html", "alerts", alerts_table_columns, report_alerts_keyset, alerts_search_conditions)
+}
+
 ##############
 # NAVIGATION #
 ##############
@@ -74,10 +139,10 @@ def query_reports_and_render():
         if "query_reports" in filters:
             reports = query_reports(filters)
             show = define_what_to_show_reports(filters)
-            return render_template("rboa_nav/reports_nav.html", reports=reports, show=show, filters=filters)
+            return render_template("rboa_nav/reports_nav.html", reports=reports, show=show, filters=filters, datatables=get_table_settings("reports", filters, len([report for report in reports if report.generation_error != True])))
         else:
             report_alerts = query_report_alerts(filters)
-            return render_template("rboa_nav/report_alerts_nav.html", alerts=report_alerts, filters=filters)
+            return render_template("rboa_nav/report_alerts_nav.html", alerts=report_alerts, filters=filters, datatables=get_table_settings("report-alerts", filters, len(report_alerts)))
         # end if
     
     # end if
@@ -95,7 +160,58 @@ def query_reports_pages():
 
     reports = query_reports(filters)
     show = define_what_to_show_reports(filters)
-    return render_template("rboa_nav/reports_nav.html", reports=reports, show=show, filters=filters)
+    return render_template("rboa_nav/reports_nav.html", reports=reports, show=show, filters=filters, datatables=get_table_settings("reports", filters, len([report for report in reports if report.generation_error != True])))
+
+@bp.route("/datatables/<string:entity>", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def query_datatables(entity):
+    """
+    Query the page of a table processed in the server by DataTables.
+
+    :param entity: entity of the table
+    :type entity: str
+
+    :return: JSON with the draw, the number of rows and the rendered rows of the page
+    :rtype: str
+    """
+    current_app.logger.debug("Query page of the table of {}".format(entity))
+
+    if entity not in datatables_entities:
+        return jsonify({"status": "KO", "message": "The entity {} has no table processed in the server. Available entities are: {}".format(entity, list(datatables_entities.keys()))}), 400
+    # end if
+
+    parameters = request.get_json(silent = True)
+    if type(parameters) != dict or type(parameters.get("filters")) != dict:
+        return jsonify({"status": "KO", "message": "The method needs to receive the JSON data with the parameters of DataTables and the filters of the query form"}), 400
+    # end if
+
+    set_filters, query_elements, template, elements_name, columns, keyset, search_conditions = datatables_entities[entity]
+
+    try:
+        elements, response = query_datatables_page(parameters, set_filters(parameters["filters"]), columns, query_elements, keyset, search_conditions)
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+        return jsonify({"status": "KO", "message": "The parameters of the table are not valid: {}".format(e)}), 400
+    # end try
+    response["rows"] = render_template(template, **{elements_name: elements})
+
+    return jsonify(response)
+
+def get_table_settings(entity, filters, records_total):
+    """
+    Obtain the settings of the table of the entity processed in the server by DataTables.
+
+    :param entity: entity of the table
+    :type entity: str
+    :param filters: filters received from the query form
+    :type filters: dict
+    :param records_total: number of rows of the table
+    :type records_total: int
+
+    :return: settings of the table for the templates
+    :rtype: dict
+    """
+    return get_datatables_settings(url_for("rboa_nav.query_datatables", entity=entity), filters, records_total, datatables_entities[entity][4])
 
 def define_what_to_show_reports(filters):
     """
@@ -120,27 +236,62 @@ def query_reports(filters):
     """
     current_app.logger.debug("Query reports")
     
-    kwargs = set_filters_for_query_reports_or_report_alerts(filters)
+    kwargs = set_filters_for_query_reports(filters)
     
-    reports = query.get_reports(**kwargs)
+    reports = query_page_by_keyset(lambda kwargs: query.get_reports(**kwargs), kwargs, filters, reports_keyset)
+
+    set_next_pagination_cursor(filters, reports, reports_keyset)
 
     return reports
 
+def set_filters_for_query_reports(filters):
+    """
+    Set filter for query reports paginating by keyset.
+    """
+    kwargs = set_filters_for_query_reports_or_report_alerts(filters)
+
+    set_keyset_pagination(filters, kwargs, reports_keyset)
+
+    return kwargs
+
 def query_report_alerts(filters):
     """
     Query report alerts.
     """
     current_app.logger.debug("Query report alerts")
     
+    kwargs = set_filters_for_query_report_alerts(filters)
+    
+    reports = query_page_by_keyset(lambda kwargs: query.get_report_alerts(**kwargs), kwargs, filters, report_alerts_keyset)
+
+    set_next_pagination_cursor(filters, reports, report_alerts_keyset)
+
+    return reports
+
+def set_filters_for_query_report_alerts(filters):
+    """
+    Set filter for query report alerts paginating by keyset.
+    """
     report_kwargs = set_filters_for_query_reports_or_report_alerts(filters)
 
     alert_kwargs = set_specific_alert_filters(filters)
 
     kwargs = {**report_kwargs, **alert_kwargs}
-    
-    reports = query.get_report_alerts(**kwargs)
 
-    return reports
+    set_keyset_pagination(filters, kwargs, report_alerts_keyset)
+
+    return kwargs
+
+def set_filters_for_query_generated_reports(filters):
+    """
+    Set filter for query the reports shown in the table of generated reports.
+    """
+    kwargs = set_filters_for_query_reports(filters)
+
+    # The reports with generation error are shown in the table of not generated reports
+    kwargs["generation_error"] = {"filter": "true", "op": "!="}
+
+    return kwargs
 
 def set_filters_for_query_reports_or_report_alerts(filters):
     """
@@ -305,9 +456,7 @@ def query_report(report_uuid):
         return render_template("panel/error.html"), 403
     # end if
 
-    html = retrieve_report_content(report)
-    
-    return html
+    return retrieve_report_content(report)
 
 @bp.route("/query-report-by-name/<string:report_name>", methods=["GET"])
 @auth_required()
@@ -326,9 +475,7 @@ def query_report_by_name(report_name):
     current_app.logger.debug("Query report by name")
     report = query.get_reports(**kwargs)[0]
 
-    html = retrieve_report_content(report)
-    
-    return html
+    return retrieve_report_content(report)
 
 @bp.route("/query-report-alert/<uuid:alert_uuid>")
 @auth_required()
@@ -387,27 +534,182 @@ def retrieve_report_content(report):
             return render_template("panel/error.html")
         # end if
 
+        # Deliver the report without loading it in memory
         if report.compressed:
-            # Get the report inside
-            tar = tarfile.open(file_path, "r")
-            f = tar.extractfile(tar.getnames()[0])
-        else:
-            f = open(file_path, "r")
+            cached_report_path = get_cached_report_path(report, file_path)
+            # The entity tag depends only on the version of the report
+            # in the archive, so it is the same before and after
+            # caching it
+            etag = os.path.splitext(os.path.basename(cached_report_path))[0]
+            if not os.path.isfile(cached_report_path):
+                # Stream the report from the archive while it is inserted in the cache
+                insert_report_in_cache(file_path, cached_report_path)
+
+                return deliver_tar_member(file_path, mimetype = "text/html", etag = etag)
+            # end if
+
+            # Use the pre-compressed body if the client accepts it
+            if "gzip" in request.accept_encodings and os.path.isfile(cached_report_path + ".gz"):
+                response = deliver_file(cached_report_path + ".gz", mimetype = "text/html", etag = etag + "-gzip")
+                response.content_encoding = "gzip"
+            else:
+                response = deliver_file(cached_report_path, mimetype = "text/html", etag = etag)
+            # end if
+            response.vary.add("Accept-Encoding")
+
+            mark_cached_report_as_used(cached_report_path)
+
+            return response
         # end if
 
-        html = f.read()
+        return deliver_file(file_path, mimetype = "text/html")
+    # end if
 
-        # Close file
-        f.close()
+    return render_template("panel/error.html")
 
-        if report.compressed:
-            # Close tar if the report was compressed
-            tar.close()
+def get_cached_report_path(report, file_path):
+    """
+    Get the path to the decompressed report in the cache.
+    The path is related to the version of the report in the archive.
+
+    :param report: report
+    :type report: Report
+    :param file_path: path to the report in the archive
+    :type file_path: str
+
+    :return: path to the decompressed report in the cache
+    :rtype: str
+    """
+
+    return os.path.join(reports_cache_path, "{}_{:x}.html".format(report.report_uuid, os.stat(file_path).st_mtime_ns))
+
+def mark_cached_report_as_used(cached_report_path):
+    """
+    Mark the report of the cache (both variants) as recently used.
+
+    The use is recorded in the access time of the files, keeping their
+    modification time.
+
+    :param cached_report_path: path to the decompressed report in the cache
+    :type cached_report_path: str
+    """
+    now = time.time_ns()
+    for path in [cached_report_path, cached_report_path + ".gz"]:
+        try:
+            os.utime(path, ns = (now, os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            pass
+        # end try
+    # end for
+
+    return
+
+def insert_report_in_cache(file_path, cached_report_path):
+    """
+    Insert the report in the cache in background (both decompressed and gzipped).
+
+    :param file_path: path to the report in the archive
+    :type file_path: str
+    :param cached_report_path: path to the decompressed report in the cache
+    :type cached_report_path: str
+    """
+
+    with reports_cache_lock:
+        if cached_report_path in reports_cache_insertions:
+            return
         # end if
-    
-        return html
+        reports_cache_insertions.add(cached_report_path)
+    # end with
 
-    return render_template("panel/error.html")
+    threading.Thread(target = _insert_report_in_cache, args = (file_path, cached_report_path), daemon = True).start()
+
+    return
+
+def _insert_report_in_cache(file_path, cached_report_path):
+    """
+    Decompress the report into the cache and evict the least recently
+    used reports exceeding the size of the cache.
+    """
+    try:
+        os.makedirs(reports_cache_path, exist_ok = True)
+        tmp_paths = []
+        try:
+            (report_fd, tmp_report_path) = tempfile.mkstemp(dir = reports_cache_path, prefix = ".")
+            tmp_paths.append(tmp_report_path)
+            with os.fdopen(report_fd, "wb") as report_file:
+                (gzipped_report_fd, tmp_gzipped_report_path) = tempfile.mkstemp(dir = reports_cache_path, prefix = ".")
+                tmp_paths.append(tmp_gzipped_report_path)
+                with os.fdopen(gzipped_report_fd, "wb") as gzipped_file, gzip.open(gzipped_file, "wb") as gzipped_report_file, tarfile.open(file_path, "r:*") as tar:
+                    member_file = tar.extractfile(tar.next())
+                    for block in iter(lambda: member_file.read(1024*1024), b""):
+                        report_file.write(block)
+                        gzipped_report_file.write(block)
+                    # end for
+                # end with
+            # end with
+
+            # The decompressed report is the last one to be visible as it signals the cache hit
+            os.replace(tmp_gzipped_report_path, cached_report_path + ".gz")
+            os.replace(tmp_report_path, cached_report_path)
+        finally:
+            for tmp_path in tmp_paths:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                # end if
+            # end for
+        # end try
+
+        evict_reports_from_cache()
+    except Exception:
+        # The report will be streamed from the archive
+        pass
+    finally:
+        with reports_cache_lock:
+            reports_cache_insertions.discard(cached_report_path)
+        # end with
+    # end try
+
+    return
+
+def evict_reports_from_cache():
+    """
+    Remove the least recently used reports (by the access time of their
+    files) while the cache exceeds VBOA_REPORTS_CACHE_SIZE.
+
+    The decompressed and the gzipped variants of a report are evicted together.
+    """
+
+    with reports_cache_lock:
+        # Cached reports (decompressed report path -> [last use, size])
+        cached_reports = {}
+        for entry in os.scandir(reports_cache_path):
+            if entry.is_file() and not entry.name.startswith("."):
+                entry_stat = entry.stat()
+                cached_report_path = entry.path[:-len(".gz")] if entry.path.endswith(".gz") else entry.path
+                cached_report = cached_reports.setdefault(cached_report_path, [0, 0])
+                cached_report[0] = max(cached_report[0], entry_stat.st_atime)
+                cached_report[1] += entry_stat.st_size
+            # end if
+        # end for
+
+        cache_size = sum([size for (_, size) in cached_reports.values()])
+        for (_, size, cached_report_path) in sorted([(last_use, size, path) for (path, (last_use, size)) in cached_reports.items()]):
+            if cache_size <= reports_cache_size:
+                break
+            # end if
+            # The decompressed report is removed first as it signals the cache hit
+            for path in [cached_report_path, cached_report_path + ".gz"]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                # end try
+            # end for
+            cache_size -= size
+        # end for
+    # end with
+
+    return
 
 @bp.route("/query-jsonify-reports")
 @auth_required()
@@ -682,7 +984,7 @@ def query_alerts_pages():
     alerts = query_report_alerts(filters)
     template = "rboa_nav/report_alerts_nav.html"
     
-    return render_template(template, alerts=alerts, filters=filters)
+    return render_template(template, alerts=alerts, filters=filters, datatables=get_table_settings("report-alerts", filters, len(alerts)))
 
 @bp.route("/get-alert-severity")
 @auth_required()
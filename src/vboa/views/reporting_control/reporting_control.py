@@ -22,9 +22,19 @@ from eboa.engine.query import Query
 import eboa.engine.engine as eboa_engine
 from eboa.engine.engine import Engine
 
+# Import datamodel
+from rboa.datamodel.reports import Report
+from rboa.datamodel.alerts import ReportAlert
+
+# Import SQLAlchemy utilities
+from sqlalchemy import and_, or_, exists
+
 # Import SQLAlchemy exceptions
 from sqlalchemy.orm.exc import DetachedInstanceError
 
+# Import vboa functions
+from vboa.functions import get_sliding_window_filters, get_sliding_window_watermark, get_sliding_window_delta, sliding_window_full_refresh_cycles
+
 # Import vboa security
 from vboa.security import auth_required, roles_accepted
 
@@ -225,8 +235,99 @@ def show_sliding_reporting_control():
 
     return query_reports_and_render(start_filter, stop_filter, sliding_window, template_name = template_name)
 
+@bp.route("/sliding_reporting_control_delta", methods=["POST"])
+@auth_required()
+@roles_accepted("administrator", "service_administrator", "operator", "analyst", "operator_observer")
+def query_sliding_reporting_control_delta():
+    """
+    Changes of the sliding reporting control view since its last update.
+
+    Expected JSON: {"window_delay": <days>, "window_size": <days>, "template": <template>, "watermark": <watermark>, "uuids": [<UUIDs of the shown reports>]}
+    """
+    current_app.logger.debug("Sliding reporting control view changes")
+
+    parameters = request.get_json()
+    if parameters is None or len([name for name in ["window_delay", "window_size", "watermark", "uuids"] if not name in parameters]) > 0:
+        return jsonify({"status": "KO", "message": "The method needs to receive the JSON data with the sliding window, the watermark and the UUIDs of the shown reports"}), 400
+    # end if
+    template_name = parameters.get("template")
+
+    start_filter, stop_filter = get_sliding_window_filters(parameters["window_delay"], parameters["window_size"])
+    since, watermark = get_sliding_window_watermark(parameters["watermark"])
+
+    # Reports triggered inside the window, changed when generated, in progress or with new or solved alerts
+    window_query = query.session.query(Report.report_uuid) \
+                                .filter(Report.triggering_time <= start_filter["date"],
+                                        Report.triggering_time >= stop_filter["date"])
+    changed_alerts_query = query.session.query(ReportAlert.report_uuid) \
+                                        .filter(or_(ReportAlert.ingestion_time > since, ReportAlert.solved_time > since))
+    changed_condition = or_(Report.triggering_time > since,
+                            Report.generation_stop > since,
+                            and_(Report.generated == False, Report.generation_error == False),
+                            Report.report_uuid.in_(changed_alerts_query))
+    changed_uuids, removed_uuids = get_sliding_window_delta([(window_query, Report.report_uuid, changed_condition)], parameters["uuids"])
+
+    reports = []
+    content = ""
+    graphs = {}
+    if len(changed_uuids) > 0:
+        reports = query_reports(start_filter, stop_filter, template_name = template_name, report_uuids = changed_uuids)
+        content = render_reports(reports, start_filter, stop_filter, template_name = template_name)
+        if template_name == None:
+            graphs["reports"] = get_reports_graph_data(reports)
+        # end if
+    # end if
+
+    return jsonify({
+        "watermark": watermark,
+        "reporting_start": stop_filter["date"],
+        "reporting_stop": start_filter["date"],
+        "uuids": [str(report.report_uuid) for report in reports],
+        "changed": changed_uuids,
+        "removed": removed_uuids,
+        "content": content,
+        "graphs": graphs,
+        "full_refresh_cycles": sliding_window_full_refresh_cycles
+    })
+
+def get_reports_graph_data(reports):
+    """
+    Obtain the data shown in the graphs of the reporting control view.
+    The dates not available are replaced by the triggering time.
+    """
+    return [{
+        "id": str(report.report_uuid),
+        "name": report.name,
+        "report_group": report.reportGroup.name,
+        "generation_mode": report.generation_mode,
+        "validity_start": str(report.validity_start or report.triggering_time),
+        "validity_stop": str(report.validity_stop or report.triggering_time),
+        "triggering_time": str(report.triggering_time),
+        "generation_start": str(report.generation_start or report.triggering_time),
+        "generation_stop": str(report.generation_stop or report.triggering_time),
+        "metadata_ingestion_duration": str(report.metadata_ingestion_duration or "0:00:00"),
+        "generated": str(report.generated),
+        "compressed": str(report.compressed),
+        "generator": str(report.generator),
+        "version": str(report.generator_version),
+        "generation_error": str(report.generation_error)
+    } for report in reports]
+
 def query_reports_and_render(start_filter = None, stop_filter = None, sliding_window = None, template_name = None, filters = None):
 
+    if sliding_window:
+        # The changes after this moment are applied by the updates of the view
+        sliding_window["watermark"] = datetime.datetime.now().isoformat()
+    # end if
+
+    reports = query_reports(start_filter, stop_filter, template_name = template_name, filters = filters)
+
+    return render_reports(reports, start_filter, stop_filter, sliding_window, template_name = template_name, filters = filters)
+
+def query_reports(start_filter, stop_filter, template_name = None, filters = None, report_uuids = None):
+    """
+    Query the reports shown by the reporting control view, restricted to the received UUIDs if any.
+    """
     kwargs = {}
 
     # Start filter
@@ -235,6 +336,11 @@ def query_reports_and_render(start_filter = None, stop_filter = None, sliding_wi
     # Stop filter
     kwargs["triggering_time_filters"].append({"date": stop_filter["date"], "op": stop_filter["operator"]})
 
+    # Restrict the reports to the received ones
+    if report_uuids != None:
+        kwargs["report_uuids"] = {"filter": report_uuids, "op": "in"}
+    # end if
+
     # Set offset and limit for the query
     if filters and "offset" in filters and filters["offset"][0] != "":
         kwargs["offset"] = filters["offset"][0]
@@ -251,21 +357,9 @@ def query_reports_and_render(start_filter = None, stop_filter = None, sliding_wi
         report_alerts = query.get_report_alerts(**kwargs)
         reports = query.get_reports(report_uuids = {"filter": [report_alert.report_uuid for report_alert in report_alerts], "op": "in"})
     elif template_name == "alerts_and_errors":
-        # Set order by ingestion_time descending
-        kwargs["order_by"] = {"field": "ingestion_time", "descending": True}
-
-        # Obtain report alerts and then the reports
-        report_alerts = query.get_report_alerts(**kwargs)
-        reports_from_report_alerts = query.get_reports(report_uuids = {"filter": [report_alert.report_uuid for report_alert in report_alerts], "op": "in"})
-
-        # Set order by ingestion_time descending
-        kwargs["order_by"] = {"field": "triggering_time", "descending": True}
-
-        # Obtain sources with errors
-        kwargs["generation_error"] = {"filter": "true", "op": "=="}
-        reports_from_report_errors = query.get_reports(**kwargs)
-
-        reports = list(set(reports_from_report_alerts + reports_from_report_errors))
+        # Obtain the reports with alerts or errors in one statement
+        # ordered and paginated in the DDBB
+        reports = query_reports_with_alerts_or_errors(start_filter, stop_filter, report_uuids = report_uuids, offset = kwargs.get("offset"), limit = kwargs.get("limit"))
     else:
         if template_name == "errors":
             kwargs["generation_error"] = {"filter": "true", "op": "=="}
@@ -278,13 +372,49 @@ def query_reports_and_render(start_filter = None, stop_filter = None, sliding_wi
 
     # Order reports by triggering time descending
     reports.sort(key=lambda x: x.triggering_time, reverse = True)
-    
+
+    return reports
+
+def query_reports_with_alerts_or_errors(start_filter, stop_filter, report_uuids = None, offset = None, limit = None):
+    """
+    Query the reports triggered inside the period with alerts or with
+    generation errors, ordered by triggering time descending.
+    """
+    reports_query = query.session.query(Report) \
+                                 .filter(Report.triggering_time <= start_filter["date"],
+                                         Report.triggering_time >= stop_filter["date"],
+                                         or_(Report.generation_error == True,
+                                             exists().where(ReportAlert.report_uuid == Report.report_uuid)))
+
+    # Restrict the reports to the received ones
+    if report_uuids != None:
+        reports_query = reports_query.filter(Report.report_uuid.in_(report_uuids))
+    # end if
+
+    reports_query = reports_query.order_by(Report.triggering_time.desc(), Report.report_uuid)
+
+    if offset != None:
+        reports_query = reports_query.offset(offset)
+    # end if
+    if limit != None:
+        reports_query = reports_query.limit(limit)
+    # end if
+
+    return reports_query.all()
+
+def render_reports(reports, start_filter, stop_filter, sliding_window = None, template_name = None, filters = None):
+    """
+    Render the reporting control view with the received reports.
+    """
     reporting_start = stop_filter["date"]
     reporting_stop = start_filter["date"]
 
     template = "reporting_control/reporting_control.html"
+    reports_graph_data = []
     if template_name != None:
         template = "reporting_control/reporting_control_" + template_name + ".html"
+    else:
+        reports_graph_data = get_reports_graph_data(reports)
     # end if
     
-    return render_template(template, reports=reports, reporting_start=reporting_start, reporting_stop=reporting_stop, sliding_window=sliding_window, filters=filters)
+    return render_template(template, reports=reports, reports_graph_data=reports_graph_data, reporting_start=reporting_start, reporting_stop=reporting_stop, sliding_window=sliding_window, filters=filters)